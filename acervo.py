@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Acervo Compartilhado
+Volpe Advogados Associados - Unimed Cuiabá
+
+O Streamlit executa o aplicativo uma vez por sessão e a cada interação.
+Em vez de cada sessão conferir as pastas e remontar catálogo e mapa de
+correspondência, um único AcervoCompartilhado por par de pastas mantém a
+fotografia atual do acervo: uma tupla imutável e numerada com o catálogo
+dos pareceres (e as consultas sobre ele), os agregados do painel, a matriz
+TF-IDF dos pareceres semelhantes, a lista de HTMLs (e as consultas da
+página deles) e o mapa JSON -> HTML.
+
+Uma thread em segundo plano confere as pastas a cada INTERVALO_ATUALIZACAO
+segundos (com os detectores de alterações) e, quando algo mudou, atualiza
+os índices da busca no conteúdo e dos quase idênticos e os termos dos
+pareceres semelhantes, monta uma nova fotografia e a publica no lugar da anterior. As sessões só leem a
+fotografia publicada, protegida por uma trava de leitores e escritor, e
+nunca esperam pela leitura das pastas; quem ainda usa uma fotografia antiga
+continua com ela intacta até terminar.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from busca_textual import BuscaTextual, documentos_do_acervo
+from catalogo import Catalogo
+from consulta_pareceres import ConsultaArquivosHtml, ConsultaPareceres
+from correspondencia import MapaCorrespondencia
+from duplicatas import IndiceDuplicatas, documentos_json
+from indice_pareceres import IndiceArquivosHtml, IndicePareceres, caminho_indice_padrao
+from metricas import contar, etapa, medir_execucao
+from semelhantes import MatrizTfIdf
+
+
+# Intervalo (segundos) entre as conferências das pastas em segundo plano
+INTERVALO_ATUALIZACAO = 5
+
+# Quantidade de pareceres guardados em "maiores exposições"
+MAIORES_EXPOSICOES = 10
+
+
+def _sem_semelhanca():
+    """Matriz TF-IDF vazia (acervo sem pareceres ou sem calcular_semelhanca)"""
+    return MatrizTfIdf(tuple, lambda arquivos: {})
+
+
+class TravaLeituraEscrita:
+    """Trava com várias leituras simultâneas e escrita exclusiva
+
+    Um escritor esperando tem preferência: novas leituras aguardam até ele
+    terminar, de modo que a publicação não fica adiada indefinidamente.
+    """
+
+    def __init__(self):
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escrevendo = False
+        self._escritores_esperando = 0
+
+    @contextmanager
+    def leitura(self):
+        with self._condicao:
+            while self._escrevendo or self._escritores_esperando:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                if not self._leitores:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self):
+        with self._condicao:
+            self._escritores_esperando += 1
+            while self._escrevendo or self._leitores:
+                self._condicao.wait()
+            self._escritores_esperando -= 1
+            self._escrevendo = True
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._escrevendo = False
+                self._condicao.notify_all()
+
+
+class Fotografia(NamedTuple):
+    """Estado do acervo numa versão (imutável: não altere o conteúdo)"""
+    versao: int
+    versao_json: str
+    versao_html: str
+    catalogo: Catalogo
+    consulta: ConsultaPareceres
+    agregados: dict
+    maiores_exposicoes: tuple
+    semelhanca: MatrizTfIdf
+    arquivos_html: tuple
+    consulta_html: ConsultaArquivosHtml
+    estatisticas_html: tuple
+    mapa: MapaCorrespondencia
+    busca: BuscaTextual
+    duplicatas: IndiceDuplicatas
+    erros_json: tuple
+    erros_html: tuple
+    erros_busca: tuple
+    erros_duplicatas: tuple
+    publicada_em: datetime
+
+
+class AcervoCompartilhado:
+    """Fotografia do acervo de um par de pastas, atualizada em segundo plano
+
+    Recebe os detectores de alterações das duas pastas (um por pasta no
+    processo, pois são eles que gravam os índices). Com indexar_conteudo,
+    os índices da busca no conteúdo e dos quase idênticos e os termos dos
+    pareceres semelhantes são sincronizados antes de cada publicação e
+    entram na fotografia (as páginas só os consultam). A primeira fotografia
+    sai sem eles (None; a matriz de semelhança só com os termos já contados),
+    para não fazer a primeira sessão esperar pela leitura do texto do acervo
+    inteiro; a conferência seguinte os sincroniza e publica outra fotografia.
+
+    Sem calcular_semelhanca (processos que não mostram os pareceres
+    semelhantes, como a API), a matriz TF-IDF não é montada: a fotografia
+    leva uma matriz vazia e os termos não são contados.
+    """
+
+    def __init__(self, detector_json, detector_html, intervalo=INTERVALO_ATUALIZACAO, indexar_conteudo=True,
+                 calcular_semelhanca=True):
+        self.detector_json = detector_json
+        self.detector_html = detector_html
+        self.intervalo = intervalo
+        self.calcular_semelhanca = calcular_semelhanca
+        self.ultimo_erro = None
+
+        pasta_json = detector_json.pasta
+        if indexar_conteudo:
+            self.busca = BuscaTextual(caminho_indice_padrao(pasta_json, prefixo="busca"))
+            self.duplicatas = IndiceDuplicatas(caminho_indice_padrao(pasta_json, prefixo="duplicatas"))
+        else:
+            self.busca = self.duplicatas = None
+
+        self._fotografia = None
+        self._trava = TravaLeituraEscrita()
+        self._trava_atualizacao = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def fotografia(self):
+        """Retorna a fotografia publicada mais recente (None antes da primeira)"""
+        with self._trava.leitura():
+            return self._fotografia
+
+    def atualizar(self):
+        """Confere as pastas e publica uma nova fotografia se algo mudou
+
+        Retorna a fotografia em vigor depois da conferência. As atualizações
+        que publicam uma fotografia vão para o log de métricas.
+        """
+        with self._trava_atualizacao, medir_execucao("atualização do acervo") as medicao:
+            anterior = self.fotografia()
+            pasta_json, pasta_html = self.detector_json.pasta, self.detector_html.pasta
+
+            indice = IndicePareceres(pasta_json)
+            if Path(pasta_json).exists():
+                resumo_json = self.detector_json.atualizar(indice)
+            else:
+                resumo_json = {'versao': None, 'erros': []}
+
+            indice_html = IndiceArquivosHtml(pasta_html)
+            if Path(pasta_html).exists():
+                resumo_html = self.detector_html.atualizar(indice_html)
+                arquivos_html = tuple(self.detector_html.entradas())
+            else:
+                resumo_html = {'versao': None, 'erros': []}
+                arquivos_html = ()
+
+            mudou_json = anterior is None or resumo_json['versao'] != anterior.versao_json
+            mudou_html = anterior is None or resumo_html['versao'] != anterior.versao_html
+            indexar = self.busca is not None and anterior is not None
+            conteudo_pendente = indexar and anterior.busca is None
+            if not (mudou_json or mudou_html or conteudo_pendente):
+                if medicao is not None:
+                    medicao.registrar = False
+                return anterior
+
+            if mudou_json:
+                if resumo_json['versao'] is None:
+                    catalogo, agregados, maiores = Catalogo(()), {}, ()
+                    consulta = ConsultaPareceres(catalogo)
+                    semelhanca = _sem_semelhanca()
+                else:
+                    with etapa("catálogo"):
+                        catalogo = Catalogo.do_indice(indice)
+                        consulta = ConsultaPareceres(catalogo)
+                    with etapa("agregados"):
+                        agregados = indice.agregados()
+                        maiores = tuple(indice.maiores_exposicoes(MAIORES_EXPOSICOES))
+                    # Com os índices do conteúdo, a matriz é montada depois
+                    # da contagem dos termos dos pareceres novos (abaixo)
+                    if not self.calcular_semelhanca:
+                        semelhanca = _sem_semelhanca()
+                    elif not indexar:
+                        with etapa("semelhança"):
+                            semelhanca = MatrizTfIdf.do_indice(indice)
+            else:
+                contar('acertos_cache')
+                catalogo, agregados, maiores = anterior.catalogo, anterior.agregados, anterior.maiores_exposicoes
+                consulta = anterior.consulta
+                semelhanca = anterior.semelhanca
+
+            if mudou_html:
+                consulta_html = ConsultaArquivosHtml(indice_html.listar() if arquivos_html else ())
+                estatisticas_html = consulta_html.estatisticas()
+            else:
+                consulta_html = anterior.consulta_html
+                estatisticas_html = anterior.estatisticas_html
+
+            with etapa("correspondência"):
+                mapa = MapaCorrespondencia(catalogo, consulta_html.numeros_processo())
+
+            busca = duplicatas = None
+            erros_busca = anterior.erros_busca if anterior else ()
+            erros_duplicatas = anterior.erros_duplicatas if anterior else ()
+            if indexar:
+                versoes = indice.versoes() if resumo_json['versao'] is not None else {}
+
+                # Termos dos pareceres semelhantes: a ingestão não os conta
+                # (os erros de leitura já aparecem nos da pasta de JSONs)
+                if self.calcular_semelhanca and (mudou_json or conteudo_pendente) and resumo_json['versao'] is not None:
+                    with etapa("termos"):
+                        calculados = indice.sincronizar_termos()['calculados']
+                    if mudou_json or calculados:
+                        with etapa("semelhança"):
+                            semelhanca = MatrizTfIdf.do_indice(indice)
+
+                # HTMLs sem JSON também são pesquisáveis: depende das duas pastas
+                with etapa("índice da busca"):
+                    resumo_busca = self.busca.sincronizar(
+                        documentos_do_acervo(versoes, arquivos_html, set(mapa.mapa.values()))
+                    )
+                    erros_busca = tuple(resumo_busca['erros'])
+
+                if mudou_json or conteudo_pendente:
+                    with etapa("índice de duplicatas"):
+                        erros_duplicatas = tuple(self.duplicatas.sincronizar(documentos_json(versoes))['erros'])
+                busca, duplicatas = self.busca, self.duplicatas
+
+            fotografia = Fotografia(
+                versao=anterior.versao + 1 if anterior else 1,
+                versao_json=resumo_json['versao'],
+                versao_html=resumo_html['versao'],
+                catalogo=catalogo,
+                consulta=consulta,
+                agregados=agregados,
+                maiores_exposicoes=maiores,
+                semelhanca=semelhanca,
+                arquivos_html=arquivos_html,
+                consulta_html=consulta_html,
+                estatisticas_html=estatisticas_html,
+                mapa=mapa,
+                busca=busca,
+                duplicatas=duplicatas,
+                erros_json=tuple(resumo_json['erros']),
+                erros_html=tuple(resumo_html['erros']),
+                erros_busca=erros_busca,
+                erros_duplicatas=erros_duplicatas,
+                publicada_em=datetime.now(),
+            )
+
+            # Só a troca da referência é exclusiva; a montagem foi feita fora
+            with self._trava.escrita():
+                self._fotografia = fotografia
+            return fotografia
+
+    def iniciar(self):
+        """Publica a primeira fotografia e inicia a thread de atualização
+
+        Se os índices do conteúdo ficaram pendentes, a thread os sincroniza
+        logo, sem esperar o intervalo.
+        """
+        if self._fotografia is None:
+            self.atualizar()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name="acervo-compartilhado", daemon=True)
+            self._thread.start()
+            if self.busca is not None and self._fotografia.busca is None:
+                self._acordar.set()
+        return self
+
+    def _executar(self):
+        """Laço da thread: confere as pastas a cada intervalo ou quando acordada"""
+        while not self._parar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            if self._parar.is_set():
+                break
+
+            try:
+                self.atualizar()
+                self.ultimo_erro = None
+            except Exception as e:
+                # Mantém a fotografia anterior; tenta de novo no próximo ciclo
+                self.ultimo_erro = str(e)
+
+    def solicitar_atualizacao(self, completa=False):
+        """Pede à thread uma conferência imediata (completa: percorre tudo)"""
+        if completa:
+            self.detector_json.forcar_releitura()
+            self.detector_html.forcar_releitura()
+        self._acordar.set()
+
+    def parar(self, espera=None):
+        """Encerra a thread de atualização"""
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(espera)
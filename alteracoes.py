@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção de Alterações nas Pastas de Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+O Streamlit reexecuta o aplicativo a cada interação. Em vez de percorrer
+as pastas inteiras toda vez, o detector guarda em memória a última
+fotografia de cada pasta (caminho -> mtime_ns, tamanho) e o mtime de cada
+diretório. Enquanto os diretórios não mudam, nada é percorrido; quando
+mudam (ou a cada INTERVALO_VARREDURA segundos, para pegar arquivos
+reescritos no lugar), a pasta é listada e só a diferença é aplicada ao
+índice.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from indice_pareceres import impressao_digital, varrer_arquivos
+from metricas import contar, etapa
+
+
+# Intervalo máximo (segundos) sem listar a pasta quando os diretórios não mudam
+INTERVALO_VARREDURA = 30
+
+
+class Delta(NamedTuple):
+    """Diferença entre duas fotografias de uma pasta"""
+    novos: list
+    alterados: list
+    removidos: list
+
+    @property
+    def total(self):
+        return len(self.novos) + len(self.alterados) + len(self.removidos)
+
+
+def calcular_delta(anterior, atual):
+    """Compara duas fotografias {caminho: (mtime_ns, tamanho)}
+
+    Retorna um Delta com novos e alterados como (caminho, mtime_ns, tamanho)
+    e removidos como caminhos, todos em ordem de caminho.
+    """
+    novos, alterados = [], []
+    for caminho in sorted(atual):
+        versao = atual[caminho]
+        if caminho not in anterior:
+            novos.append((caminho, *versao))
+        elif anterior[caminho] != versao:
+            alterados.append((caminho, *versao))
+
+    removidos = sorted(caminho for caminho in anterior if caminho not in atual)
+    return Delta(novos, alterados, removidos)
+
+
+class DetectorAlteracoes:
+    """Mantém um índice sincronizado com a pasta aplicando só o que mudou
+
+    Uma instância por pasta pode ser compartilhada entre sessões: as
+    atualizações são serializadas por uma trava.
+    """
+
+    def __init__(self, pasta, extensao, intervalo_varredura=INTERVALO_VARREDURA):
+        self.pasta = pasta
+        self.extensao = extensao
+        self.intervalo_varredura = intervalo_varredura
+
+        self.arquivos = None
+        self._entradas = None
+        self.diretorios = {}
+        self.versao = None
+        self.erros = []
+        self.atualizado_em = None
+        self.ultimas_alteracoes = 0
+
+        self._ultima_varredura = 0.0
+        self._trava = threading.Lock()
+
+    def forcar_releitura(self):
+        """Descarta a fotografia: a próxima atualização percorre tudo"""
+        with self._trava:
+            self.arquivos = None
+
+    def entradas(self):
+        """Retorna a última fotografia como [(caminho, mtime_ns, tamanho)]"""
+        if self._entradas is None:
+            self._entradas = [(caminho, *versao) for caminho, versao in sorted((self.arquivos or {}).items())]
+        return self._entradas
+
+    def _diretorios_inalterados(self):
+        """Confere, só com um stat por diretório, se algum deles mudou"""
+        for diretorio, mtime_ns in self.diretorios.items():
+            try:
+                if os.stat(diretorio).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def atualizar(self, indice):
+        """Sincroniza `indice` (IndicePareceres ou IndiceArquivosHtml) com a pasta
+
+        Na primeira chamada (ou após forcar_releitura) a pasta inteira é
+        conferida com indice.sincronizar; depois, apenas o delta é aplicado
+        com indice.aplicar_delta. Retorna o resumo no formato de
+        IndicePareceres.sincronizar.
+        """
+        with self._trava:
+            agora = time.monotonic()
+            recente = agora - self._ultima_varredura < self.intervalo_varredura
+
+            if self.arquivos is not None and recente and self._diretorios_inalterados():
+                contar('acertos_cache')
+                return self._resumo_sem_alteracoes()
+
+            contar('falhas_cache')
+            diretorios = {}
+            with etapa(f"varredura {self.extensao}"):
+                arquivos = {
+                    caminho: (mtime_ns, tamanho)
+                    for caminho, mtime_ns, tamanho in varrer_arquivos(self.pasta, self.extensao, diretorios)
+                }
+
+            if self.arquivos is None:
+                with etapa(f"índice {self.extensao}"):
+                    resumo = indice.sincronizar([(caminho, *versao) for caminho, versao in arquivos.items()])
+                alteracoes = resumo['novos'] + resumo['alterados'] + resumo['removidos']
+            else:
+                delta = calcular_delta(self.arquivos, arquivos)
+                if not delta.total:
+                    self.diretorios = diretorios
+                    self._ultima_varredura = agora
+                    self._registrar(0)
+                    return self._resumo_sem_alteracoes()
+
+                with etapa(f"índice {self.extensao}"):
+                    resumo = indice.aplicar_delta(delta)
+                resumo['inalterados'] = len(arquivos) - len(delta.novos) - len(delta.alterados)
+                resumo['versao'] = impressao_digital((caminho, *versao) for caminho, versao in arquivos.items())
+                alteracoes = delta.total
+
+            # Só avança a fotografia depois que o índice foi gravado
+            self.arquivos = arquivos
+            self._entradas = None
+            self.diretorios = diretorios
+            self.versao = resumo['versao']
+            self.erros = resumo['erros']
+            self._ultima_varredura = agora
+            self._registrar(alteracoes)
+            return resumo
+
+    def _registrar(self, alteracoes):
+        """Anota o momento e a quantidade de alterações da última atualização"""
+        self.atualizado_em = datetime.now()
+        self.ultimas_alteracoes = alteracoes
+
+    def _resumo_sem_alteracoes(self):
+        """Resumo de uma atualização que não encontrou nada novo"""
+        return {
+            'novos': 0, 'alterados': 0, 'removidos': 0, 'inalterados': len(self.arquivos),
+            'erros': list(self.erros), 'versao': self.versao,
+        }
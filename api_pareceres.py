@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API HTTP dos Pareceres (somente leitura)
+Volpe Advogados Associados - Unimed Cuiabá
+
+Servidor HTTP/JSON leve (só a biblioteca padrão, com asyncio) para outros
+sistemas consultarem os pareceres sem passar pelo Streamlit. Serve o mesmo
+acervo do aplicativo: um AcervoCompartilhado atualizado em segundo plano,
+cuja fotografia (catálogo e mapa JSON -> HTML) é consultada em memória.
+
+Rotas (GET ou HEAD):
+
+    /                         versão do acervo e quantidades
+    /pareceres                lista paginada: pagina, por_pagina, ordem e
+                              os filtros cnj (trecho do número),
+                              classificacao (exata) e natureza (trecho)
+    /pareceres/<id>           metadados de um parecer (<id>: nome do JSON
+                              sem a extensão)
+    /pareceres/<id>.json      o JSON do parecer
+    /pareceres/<id>.html      o HTML do parecer
+
+Todas as respostas têm ETag, uma por codificação ("<sha>" e "<sha>-gzip"):
+com If-None-Match igual, a resposta é 304 sem corpo (e sem comprimir nada).
+Com Accept-Encoding: gzip, os JSONs são comprimidos na hora e os
+HTMLs entregues pelas variantes pré-comprimidas de entrega_arquivos. As
+respostas da lista e dos metadados são montadas (e comprimidas) uma vez por
+versão do acervo. As conexões são mantidas abertas (HTTP/1.1) entre as
+requisições.
+
+Uso:
+    python -m api_pareceres [--host 127.0.0.1] [--porta 8502] [--pareceres pareceres] [--html pareceres_html]
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import suppress
+from email.utils import formatdate
+from functools import lru_cache, partial
+from http import HTTPStatus
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+from acervo import AcervoCompartilhado
+from alteracoes import DetectorAlteracoes
+from entrega_arquivos import (
+    DIRETORIO_DOWNLOADS, escolher_codificacao, etag_codificacao, etag_confere, ler_variante, preparar_artefato
+)
+from pacote import ler_arquivo
+
+
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8502
+
+# Paginação da lista
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAXIMO = 500
+
+# Ordenações da lista (as mesmas de ORDENACOES_PARECERES no índice)
+ORDENACOES = ('recentes', 'antigos', 'maior_valor', 'menor_valor')
+
+# Respostas menores que isto não são comprimidas
+TAMANHO_MINIMO_GZIP = 1024
+
+# Segundos que uma conexão ociosa fica aberta à espera da próxima requisição
+TEMPO_OCIOSO = 30
+
+# Limites do pedido (linha e cabeçalhos)
+TAMANHO_MAXIMO_LINHA = 8192
+MAXIMO_CABECALHOS = 100
+
+# Listas filtradas guardadas por visão do acervo (uma por combinação de filtros)
+LISTAS_EM_CACHE = 128
+
+# Respostas JSON já codificadas guardadas por visão (uma por rota e consulta)
+RESPOSTAS_EM_CACHE = 1024
+
+CAMPOS_OCULTOS = ('arquivo',)
+
+
+class Pedido(NamedTuple):
+    """Requisição HTTP já interpretada"""
+    metodo: str
+    caminho: str
+    consulta: dict
+    cabecalhos: dict
+    manter_conexao: bool
+
+
+class Corpo(NamedTuple):
+    """Conteúdo pronto para entrega: ETag e bytes de cada codificação"""
+    etag: str
+    variantes: dict
+
+
+class ErroApi(Exception):
+    """Erro com status HTTP, respondido como {"erro": mensagem}"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class Visao:
+    """Fotografia do acervo preparada para a API
+
+    Guarda as posições do catálogo nas ordenações da lista e o id (nome do
+    JSON sem extensão) de cada parecer. Montada uma vez por versão do acervo.
+    """
+
+    def __init__(self, fotografia):
+        self.fotografia = fotografia
+        self.catalogo = catalogo = fotografia.catalogo
+
+        posicoes = range(len(catalogo))
+        timestamps = catalogo.textos['timestamp']
+        por_data = sorted(posicoes, key=lambda p: (_texto(timestamps[p]), catalogo.arquivo(p)))
+        por_valor = sorted(posicoes, key=lambda p: (catalogo.centavos[p], catalogo.arquivo(p)))
+        self.ordens = {
+            'recentes': por_data[::-1],
+            'antigos': por_data,
+            'maior_valor': por_valor[::-1],
+            'menor_valor': por_valor,
+        }
+
+        self.ids = {}
+        for posicao in posicoes:
+            self.ids.setdefault(Path(catalogo.nomes[posicao]).stem, posicao)
+
+        # Listas filtradas e respostas guardadas junto da visão: somem com ela
+        self.filtrar = lru_cache(maxsize=LISTAS_EM_CACHE)(self._filtrar)
+        self.respostas = OrderedDict()
+
+    def resposta(self, chave, montar):
+        """Corpo JSON da rota `chave`, montado por `montar()` só na primeira vez"""
+        corpo = self.respostas.get(chave)
+        if corpo is None:
+            corpo = preparar_corpo(json.dumps(montar(), ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            self.respostas[chave] = corpo
+            if len(self.respostas) > RESPOSTAS_EM_CACHE:
+                self.respostas.popitem(last=False)
+        else:
+            self.respostas.move_to_end(chave)
+        return corpo
+
+    def parecer(self, posicao):
+        """Metadados de um parecer como são entregues (sem o caminho no servidor)"""
+        parecer = self.catalogo.registro(posicao)
+        identificador = Path(parecer['nome']).stem
+        html = self.fotografia.mapa.buscar(parecer['arquivo'])
+
+        entregue = {campo: valor for campo, valor in parecer.items() if campo not in CAMPOS_OCULTOS}
+        entregue['id'] = identificador
+        entregue['links'] = {
+            'json': f"/pareceres/{quote(identificador)}.json",
+            'html': f"/pareceres/{quote(identificador)}.html" if html else None,
+        }
+        return entregue
+
+    def _filtrar(self, ordem, cnj, classificacao, natureza):
+        """Posições dos pareceres que atendem aos filtros, na ordem pedida
+
+        Mesmos critérios do aplicativo: `cnj` é um trecho do número do
+        processo e `classificacao` a classificação exata; `natureza` é um
+        trecho da natureza (sem diferenciar maiúsculas).
+        """
+        catalogo = self.catalogo
+        posicoes = self.ordens[ordem]
+
+        if classificacao is not None:
+            posicoes = catalogo.posicoes('classificacao', lambda valor: valor == classificacao, posicoes)
+
+        if natureza:
+            trecho = natureza.casefold()
+            posicoes = catalogo.posicoes(
+                'natureza', lambda valor: isinstance(valor, str) and trecho in valor.casefold(), posicoes
+            )
+
+        if cnj:
+            numeros = catalogo.textos['numero_processo']
+            trecho = cnj.upper()
+            posicoes = [p for p in posicoes if trecho in _texto(numeros[p]).upper()]
+
+        return tuple(posicoes)
+
+
+def etag_conteudo(dados):
+    """ETag (SHA-256) de um conteúdo, sem codificação"""
+    return f'"{hashlib.sha256(dados).hexdigest()}"'
+
+
+def comprimir_gzip(dados):
+    """Conteúdo em gzip (sempre os mesmos bytes para os mesmos dados)"""
+    return gzip.compress(dados, compresslevel=6, mtime=0)
+
+
+def preparar_corpo(dados):
+    """ETag e variantes de um conteúdo guardado; gzip só se valer a pena"""
+    variantes = {'identity': dados}
+    if len(dados) >= TAMANHO_MINIMO_GZIP:
+        comprimido = comprimir_gzip(dados)
+        if len(comprimido) < len(dados):
+            variantes['gzip'] = comprimido
+    return Corpo(etag_conteudo(dados), variantes)
+
+
+def _texto(valor):
+    """Valor de uma coluna de texto do catálogo como str (ausente: vazio)"""
+    return valor if isinstance(valor, str) else ''
+
+
+def _inteiro(consulta, nome, padrao, minimo=1, maximo=None):
+    """Parâmetro inteiro da consulta, validado (ErroApi 400 se inválido)"""
+    valores = consulta.get(nome)
+    if not valores:
+        return padrao
+    try:
+        valor = int(valores[0])
+    except ValueError:
+        raise ErroApi(HTTPStatus.BAD_REQUEST, f"'{nome}' deve ser um número inteiro")
+    if valor < minimo or (maximo is not None and valor > maximo):
+        limite = f"entre {minimo} e {maximo}" if maximo is not None else f"a partir de {minimo}"
+        raise ErroApi(HTTPStatus.BAD_REQUEST, f"'{nome}' deve estar {limite}")
+    return valor
+
+
+def _texto_consulta(consulta, nome):
+    """Parâmetro de texto da consulta (None se ausente ou vazio)"""
+    valores = consulta.get(nome)
+    return valores[0].strip() or None if valores else None
+
+
+def montar_resposta(status, corpo=b'', cabecalhos=None, apenas_cabecalhos=False, manter_conexao=True):
+    """Bytes de uma resposta HTTP/1.1 (Content-Length sempre informado)"""
+    status = HTTPStatus(status)
+    linhas = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Date: {formatdate(usegmt=True)}",
+        "Server: api-pareceres",
+        f"Content-Length: {len(corpo)}",
+        f"Connection: {'keep-alive' if manter_conexao else 'close'}",
+    ]
+    linhas += [f"{nome}: {valor}" for nome, valor in (cabecalhos or {}).items()]
+    cabecalho = ("\r\n".join(linhas) + "\r\n\r\n").encode('latin-1')
+    return cabecalho if apenas_cabecalhos else cabecalho + corpo
+
+
+class ServidorApi:
+    """Atende as requisições da API com a fotografia atual de um acervo"""
+
+    def __init__(self, acervo, diretorio_downloads=DIRETORIO_DOWNLOADS):
+        self.acervo = acervo
+        self.diretorio_downloads = diretorio_downloads
+        self._visao = None
+        self._trava_visao = threading.Lock()
+
+    async def visao(self):
+        """Visão da fotografia publicada (remontada numa thread quando o acervo muda)"""
+        fotografia = self.acervo.fotografia()
+        if fotografia is None:
+            raise ErroApi(HTTPStatus.SERVICE_UNAVAILABLE, "acervo ainda não carregado")
+
+        visao = self._visao
+        if visao is not None and visao.fotografia.versao == fotografia.versao:
+            return visao
+        return await asyncio.to_thread(self._montar_visao, fotografia)
+
+    def _montar_visao(self, fotografia):
+        """Monta a visão uma única vez por versão, mesmo com pedidos simultâneos"""
+        with self._trava_visao:
+            if self._visao is None or self._visao.fotografia.versao != fotografia.versao:
+                self._visao = Visao(fotografia)
+            return self._visao
+
+    async def atender(self, leitor, escritor):
+        """Atende as requisições de uma conexão até ela ser fechada"""
+        try:
+            while True:
+                try:
+                    linha = await asyncio.wait_for(leitor.readline(), TEMPO_OCIOSO)
+                except (asyncio.TimeoutError, ConnectionError, ValueError):
+                    break
+                if not linha:
+                    break
+
+                try:
+                    pedido = await self._ler_pedido(linha, leitor)
+                except ErroApi as e:
+                    escritor.write(self._resposta_erro(e, manter_conexao=False))
+                    await escritor.drain()
+                    break
+
+                escritor.write(await self.responder(pedido))
+                await escritor.drain()
+                if not pedido.manter_conexao:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+            with suppress(ConnectionError):
+                await escritor.wait_closed()
+
+    async def _ler_pedido(self, linha, leitor):
+        """Interpreta a linha de requisição e os cabeçalhos"""
+        try:
+            metodo, alvo, versao = linha.decode('latin-1').strip().split(' ')
+        except ValueError:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "linha de requisição inválida")
+        if len(linha) > TAMANHO_MAXIMO_LINHA or not versao.startswith('HTTP/1.'):
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "linha de requisição inválida")
+
+        cabecalhos = {}
+        while True:
+            try:
+                linha = await asyncio.wait_for(leitor.readline(), TEMPO_OCIOSO)
+            except (asyncio.TimeoutError, ValueError):
+                raise ErroApi(HTTPStatus.BAD_REQUEST, "cabeçalhos incompletos")
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            if len(cabecalhos) >= MAXIMO_CABECALHOS or len(linha) > TAMANHO_MAXIMO_LINHA:
+                raise ErroApi(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "cabeçalhos demais")
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        # A API não aceita corpo; um corpo enviado mesmo assim é descartado
+        with suppress(ValueError):
+            tamanho = int(cabecalhos.get('content-length', 0))
+            if tamanho > TAMANHO_MAXIMO_LINHA:
+                raise ErroApi(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "requisições não têm corpo")
+            if tamanho > 0:
+                await leitor.readexactly(tamanho)
+
+        conexao = cabecalhos.get('connection', '').lower()
+        manter = conexao != 'close' if versao == 'HTTP/1.1' else conexao == 'keep-alive'
+
+        partes = urlsplit(alvo)
+        return Pedido(metodo.upper(), unquote(partes.path), parse_qs(partes.query), cabecalhos, manter)
+
+    async def responder(self, pedido):
+        """Bytes da resposta a um pedido (erros viram {"erro": ...})"""
+        try:
+            if pedido.metodo not in ('GET', 'HEAD'):
+                return self._resposta_erro(
+                    ErroApi(HTTPStatus.METHOD_NOT_ALLOWED, "a API é somente leitura"),
+                    pedido.manter_conexao, {'Allow': 'GET, HEAD'}
+                )
+
+            caminho = pedido.caminho.rstrip('/') or '/'
+            prefixo, _, identificador = caminho.rpartition('/')
+            if caminho not in ('/', '/pareceres') and (prefixo != '/pareceres' or not identificador):
+                raise ErroApi(HTTPStatus.NOT_FOUND, "rota inexistente")
+
+            visao = await self.visao()
+            if identificador.endswith('.html'):
+                return await self._resposta_html(pedido, visao, identificador[:-5])
+            if identificador.endswith('.json'):
+                return await self._resposta_documento(pedido, visao, identificador[:-5])
+
+            if caminho == '/':
+                montar = partial(self.status, visao)
+            elif caminho == '/pareceres':
+                montar = partial(self.listar, visao, pedido.consulta)
+            else:
+                montar = partial(self._metadados, visao, identificador)
+            chave = (caminho, tuple(sorted((nome, tuple(valores)) for nome, valores in pedido.consulta.items())))
+            return self._resposta_corpo(pedido, visao.resposta(chave, montar), "application/json; charset=utf-8")
+
+        except ErroApi as e:
+            return self._resposta_erro(e, pedido.manter_conexao, apenas_cabecalhos=pedido.metodo == 'HEAD')
+        except Exception as e:
+            erro = ErroApi(HTTPStatus.INTERNAL_SERVER_ERROR, f"erro interno: {e}")
+            return self._resposta_erro(erro, pedido.manter_conexao, apenas_cabecalhos=pedido.metodo == 'HEAD')
+
+    @staticmethod
+    def status(visao):
+        """Versão do acervo publicada e quantidades"""
+        fotografia = visao.fotografia
+        return {
+            'versao': fotografia.versao,
+            'publicada_em': fotografia.publicada_em.isoformat(timespec='seconds'),
+            'pareceres': len(visao.catalogo),
+            'htmls': len(fotografia.arquivos_html),
+            'com_html': len(fotografia.mapa),
+        }
+
+    @staticmethod
+    def listar(visao, consulta):
+        """Página da lista de pareceres com os filtros da consulta"""
+        ordem = _texto_consulta(consulta, 'ordem') or ORDENACOES[0]
+        if ordem not in ORDENACOES:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, f"'ordem' deve ser uma de: {', '.join(ORDENACOES)}")
+        pagina = _inteiro(consulta, 'pagina', 1)
+        por_pagina = _inteiro(consulta, 'por_pagina', POR_PAGINA_PADRAO, maximo=POR_PAGINA_MAXIMO)
+        filtros = {nome: _texto_consulta(consulta, nome) for nome in ('cnj', 'classificacao', 'natureza')}
+
+        posicoes = visao.filtrar(ordem, **filtros)
+        total = len(posicoes)
+        paginas = max(1, -(-total // por_pagina))
+        inicio = (pagina - 1) * por_pagina
+
+        parametros = {nome: valor for nome, valor in filtros.items() if valor is not None}
+        parametros.update(ordem=ordem, por_pagina=por_pagina)
+        return {
+            'versao': visao.fotografia.versao,
+            'total': total,
+            'pagina': pagina,
+            'por_pagina': por_pagina,
+            'paginas': paginas,
+            'proxima': f"/pareceres?{urlencode({**parametros, 'pagina': pagina + 1})}" if pagina < paginas else None,
+            'pareceres': [visao.parecer(posicao) for posicao in posicoes[inicio:inicio + por_pagina]],
+        }
+
+    @classmethod
+    def _metadados(cls, visao, identificador):
+        """Metadados do parecer com o id"""
+        return visao.parecer(cls._posicao(visao, identificador))
+
+    @staticmethod
+    def _posicao(visao, identificador):
+        """Posição no catálogo do parecer com o id (ErroApi 404 se não existir)"""
+        posicao = visao.ids.get(identificador)
+        if posicao is None:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"parecer inexistente: {identificador}")
+        return posicao
+
+    @staticmethod
+    def _nao_modificado(pedido, etag, codificacao):
+        """Cabeçalhos da entrega na codificação e, se a ETag confere, a resposta 304"""
+        etag = etag_codificacao(etag, codificacao)
+        cabecalhos = {'ETag': etag, 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'}
+        if etag_confere(pedido.cabecalhos.get('if-none-match'), etag):
+            return cabecalhos, montar_resposta(HTTPStatus.NOT_MODIFIED, cabecalhos=cabecalhos,
+                                               manter_conexao=pedido.manter_conexao)
+        if codificacao != 'identity':
+            cabecalhos['Content-Encoding'] = codificacao
+        return cabecalhos, None
+
+    def _resposta_corpo(self, pedido, corpo, tipo):
+        """Resposta de um conteúdo em memória, na codificação aceita pelo cliente"""
+        codificacao = escolher_codificacao(pedido.cabecalhos.get('accept-encoding'), corpo.variantes)
+        cabecalhos, resposta = self._nao_modificado(pedido, corpo.etag, codificacao)
+        if resposta is not None:
+            return resposta
+
+        cabecalhos['Content-Type'] = tipo
+        return montar_resposta(HTTPStatus.OK, corpo.variantes[codificacao], cabecalhos,
+                               pedido.metodo == 'HEAD', pedido.manter_conexao)
+
+    async def _resposta_documento(self, pedido, visao, identificador):
+        """O JSON do parecer, como está no acervo
+
+        A ETag é conferida antes de comprimir: o gzip só é feito quando é a
+        codificação escolhida e a resposta não é 304.
+        """
+        arquivo = visao.catalogo.arquivo(self._posicao(visao, identificador))
+        try:
+            dados = await asyncio.to_thread(ler_arquivo, arquivo)
+        except OSError:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"JSON indisponível: {identificador}")
+
+        disponiveis = ('identity', 'gzip') if len(dados) >= TAMANHO_MINIMO_GZIP else ('identity',)
+        codificacao = escolher_codificacao(pedido.cabecalhos.get('accept-encoding'), disponiveis)
+        cabecalhos, resposta = self._nao_modificado(pedido, etag_conteudo(dados), codificacao)
+        if resposta is not None:
+            return resposta
+
+        if codificacao == 'gzip':
+            dados = await asyncio.to_thread(comprimir_gzip, dados)
+        cabecalhos['Content-Type'] = "application/json; charset=utf-8"
+        return montar_resposta(HTTPStatus.OK, dados, cabecalhos, pedido.metodo == 'HEAD', pedido.manter_conexao)
+
+    async def _resposta_html(self, pedido, visao, identificador):
+        """O HTML do parecer, pela variante pré-comprimida aceita pelo cliente"""
+        arquivo = visao.catalogo.arquivo(self._posicao(visao, identificador))
+        html = visao.fotografia.mapa.buscar(arquivo)
+        if html is None:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"parecer sem HTML: {identificador}")
+
+        try:
+            artefato = await asyncio.to_thread(preparar_artefato, html, self.diretorio_downloads)
+        except OSError:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"HTML indisponível: {identificador}")
+
+        codificacao = escolher_codificacao(pedido.cabecalhos.get('accept-encoding'), artefato.variantes)
+        cabecalhos, resposta = self._nao_modificado(pedido, artefato.etag, codificacao)
+        if resposta is not None:
+            return resposta
+
+        try:
+            corpo = await asyncio.to_thread(ler_variante, artefato, codificacao)
+        except OSError:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"HTML indisponível: {identificador}")
+        cabecalhos['Content-Type'] = "text/html; charset=utf-8"
+        return montar_resposta(HTTPStatus.OK, corpo, cabecalhos, pedido.metodo == 'HEAD', pedido.manter_conexao)
+
+    @staticmethod
+    def _resposta_erro(erro, manter_conexao=True, cabecalhos=None, apenas_cabecalhos=False):
+        """Resposta {"erro": mensagem} com o status do erro"""
+        corpo = json.dumps({'erro': str(erro)}, ensure_ascii=False).encode('utf-8')
+        cabecalhos = {'Content-Type': "application/json; charset=utf-8", **(cabecalhos or {})}
+        return montar_resposta(erro.status, corpo, cabecalhos, apenas_cabecalhos, manter_conexao)
+
+
+async def servir(servidor, host=HOST_PADRAO, porta=PORTA_PADRAO, pronto=None):
+    """Atende conexões até ser cancelado
+
+    `pronto`, se informado, é chamado com a porta efetiva (útil com porta 0).
+    """
+    servidor_tcp = await asyncio.start_server(servidor.atender, host, porta, limit=TAMANHO_MAXIMO_LINHA * 2)
+    async with servidor_tcp:
+        if pronto is not None:
+            pronto(servidor_tcp.sockets[0].getsockname()[1])
+        await servidor_tcp.serve_forever()
+
+
+def main():
+    """Inicia a API sobre as pastas (ou pacotes) de pareceres e HTMLs"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=HOST_PADRAO, help='Endereço de escuta (0.0.0.0: toda a rede)')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help='Porta de escuta')
+    parser.add_argument('--pareceres', default='pareceres', help='Pasta (ou pacote) dos pareceres JSON')
+    parser.add_argument('--html', default='pareceres_html', help='Pasta (ou pacote) dos HTMLs')
+    args = parser.parse_args()
+
+    print("📦 Carregando o acervo...")
+    acervo = AcervoCompartilhado(
+        DetectorAlteracoes(args.pareceres, '.json'),
+        DetectorAlteracoes(args.html, '.html'),
+        indexar_conteudo=False,
+        calcular_semelhanca=False,
+    ).iniciar()
+    fotografia = acervo.fotografia()
+    print(f"✓ {len(fotografia.catalogo)} pareceres, {len(fotografia.mapa)} com HTML")
+    print(f"🚀 API em http://{args.host}:{args.porta}/pareceres (Ctrl+C para encerrar)")
+
+    try:
+        asyncio.run(servir(ServidorApi(acervo), args.host, args.porta))
+    except KeyboardInterrupt:
+        print("\n✓ API encerrada")
+    finally:
+        acervo.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
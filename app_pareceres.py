@@ -13,10 +13,59 @@ import json
 import os
 from pathlib import Path
 from datetime import datetime
-import base64
-import re
+from decimal import Decimal
+from itertools import islice
+from contextlib import nullcontext
+import math
 import hmac
 
+from indice_pareceres import ORDENACOES_HTML, ORDENACOES_PARECERES
+from alteracoes import DetectorAlteracoes
+from acervo import AcervoCompartilhado
+from cache_conteudo import CACHE_CONTEUDO
+from compactacao_html import ler_html
+from entrega_arquivos import hash_conteudo
+from exportacao import FORMATOS, arquivo_exportado, nome_exportacao
+from lote_zip import LIMITE_TAMANHO_LOTE, LoteGrandeDemais, arquivo_zip, nome_lote
+from pacote import PacoteInvalido, abrir_pacote, arquivo_existe, eh_pacote
+from secoes_html import dividir_secoes
+from extracao import Risco, normalizar_numero_processo, normalizar_risco
+from metricas import ARQUIVO_LOG, etapa, medir_execucao, painel_habilitado, perfilar, resumir_historico
+
+
+# Máximo de erros de leitura listados na barra lateral
+MAXIMO_ERROS_EXIBIDOS = 50
+
+# Opções de paginação das listas
+OPCOES_TAMANHO_PAGINA = [10, 25, 50, 100]
+TAMANHO_PAGINA_PADRAO = 25
+
+# Classe do badge de cada risco
+CLASSES_BADGE = {
+    Risco.PROVAVEL: 'badge-provavel',
+    Risco.POSSIVEL: 'badge-possivel',
+    Risco.REMOTA: 'badge-remota',
+    Risco.NAO_INFORMADO: 'badge-medio',
+}
+
+# Quantidade de naturezas e partes contrárias listadas na distribuição
+MAXIMO_DISTRIBUICAO = 10
+
+# Quantidade de pareceres listados em "Maiores exposições"
+MAIORES_EXPOSICOES = 5
+
+# Altura do quadro de uma seção no visualizador (ajustada ao conteúdo)
+ALTURA_SECAO = "content"
+
+# Opção do sumário que exibe o documento inteiro
+DOCUMENTO_COMPLETO = "📄 Documento completo"
+
+# Pareceres quase idênticos listados em cada card
+MAXIMO_QUASE_IDENTICOS = 5
+
+# Pareceres semelhantes (TF-IDF) listados em cada card
+MAXIMO_SEMELHANTES = 5
+
 
 # Configuração da página
 st.set_page_config(
@@ -234,6 +283,11 @@ st.markdown("""
         letter-spacing: 1px;
     }
     
+    .metric-detail {
+        font-size: 0.85em;
+        opacity: 0.8;
+    }
+    
     .html-card {
         background: white;
         padding: 1.2rem;
@@ -252,98 +306,71 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def buscar_pareceres_json(pasta="pareceres"):
-    """Busca todos os arquivos JSON de pareceres na pasta especificada"""
-    pareceres = []
-    pasta_path = Path(pasta)
-    
-    if not pasta_path.exists():
-        return pareceres
-    
-    for arquivo in pasta_path.glob("**/*.json"):
-        try:
-            with open(arquivo, 'r', encoding='utf-8') as f:
-                dados = json.load(f)
-                
-                # Extrai informações básicas
-                info = {
-                    'arquivo': str(arquivo),
-                    'nome': arquivo.name,
-                    'timestamp': dados.get('timestamp', ''),
-                    'hash': dados.get('hash', ''),
-                }
-                
-                # Verifica se é um parecer completo ou análise estruturada
-                if 'resultado' in dados:
-                    resultado = dados['resultado']
-                    
-                    # Se resultado é string (markdown)
-                    if isinstance(resultado, str):
-                        info['tipo'] = 'parecer_markdown'
-                        info['numero_processo'] = extrair_numero_processo(resultado)
-                        info['classificacao'] = extrair_classificacao(resultado)
-                        info['valor'] = extrair_valor(resultado)
-                        info['parte_contraria'] = extrair_parte_contraria(resultado)
-                        info['natureza'] = extrair_natureza(resultado)
-                    
-                    # Se resultado é dict (análise estruturada)
-                    elif isinstance(resultado, dict):
-                        info['tipo'] = 'analise_estruturada'
-                        info['numero_processo'] = resultado.get('numero_cnj', 'N/A')
-                        info['classificacao'] = resultado.get('probabilidade_perda', 'Não informado')
-                        info['valor'] = resultado.get('valor_contingencia', 'N/A')
-                        info['parte_contraria'] = resultado.get('parte_contraria', 'N/A')
-                        info['natureza'] = resultado.get('natureza', 'N/A')
-                        info['fase'] = resultado.get('fase', 'N/A')
-                
-                pareceres.append(info)
-                
-        except Exception as e:
-            st.sidebar.warning(f"Erro ao ler {arquivo.name}: {str(e)}")
-            continue
+def exibir_erros_leitura(erros, descricao):
+    """Resume na barra lateral os arquivos que não puderam ser lidos"""
+    if not erros:
+        return
     
-    return pareceres
+    st.sidebar.warning(f"⚠️ {len(erros)} {descricao} com erro de leitura")
+    with st.sidebar.expander("Ver erros"):
+        for nome, erro in erros[:MAXIMO_ERROS_EXIBIDOS]:
+            st.caption(f"**{nome}**: {erro}")
+        if len(erros) > MAXIMO_ERROS_EXIBIDOS:
+            st.caption(f"... e mais {len(erros) - MAXIMO_ERROS_EXIBIDOS}")
 
 
-def buscar_arquivos_html(pasta_html="pareceres_html"):
-    """Busca todos os arquivos HTML na pasta especificada"""
-    arquivos_html = []
-    pasta_html_path = Path(pasta_html)
-    
-    if not pasta_html_path.exists():
-        return arquivos_html
-    
-    for arquivo in pasta_html_path.glob("**/*.html"):
-        try:
-            # Obtém informações do arquivo
-            stat = arquivo.stat()
-            
-            info = {
-                'caminho': str(arquivo),
-                'nome': arquivo.name,
-                'tamanho': stat.st_size,
-                'tamanho_formatado': formatar_tamanho(stat.st_size),
-                'data_modificacao': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                'timestamp_modificacao': stat.st_mtime
-            }
-            
-            # Tenta extrair informações do conteúdo HTML
-            try:
-                with open(arquivo, 'r', encoding='utf-8') as f:
-                    conteudo = f.read()
-                    info['numero_processo'] = extrair_numero_processo_html(conteudo)
-                    info['titulo'] = extrair_titulo_html(conteudo)
-            except:
-                info['numero_processo'] = 'N/A'
-                info['titulo'] = arquivo.stem
-            
-            arquivos_html.append(info)
-            
-        except Exception as e:
-            st.sidebar.warning(f"Erro ao processar {arquivo.name}: {str(e)}")
-            continue
-    
-    return arquivos_html
+@st.cache_resource(show_spinner=False)
+def obter_detector(pasta, extensao):
+    """Retorna o detector de alterações da pasta (compartilhado entre sessões)"""
+    return DetectorAlteracoes(pasta, extensao)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4, on_release=lambda acervo: acervo.parar())
+def obter_acervo(pasta_pareceres, pasta_html):
+    """Retorna o acervo compartilhado das pastas, atualizado em segundo plano
+
+    Só a primeira sessão espera pela leitura das pastas; as demais usam a
+    fotografia já publicada.
+    """
+    return AcervoCompartilhado(
+        obter_detector(pasta_pareceres, '.json'),
+        obter_detector(pasta_html, '.html'),
+    ).iniciar()
+
+
+def exibir_status_atualizacao(espaco, acervo):
+    """Mostra quando cada pasta foi atualizada e quantas alterações havia"""
+    linhas = []
+    for rotulo, detector in [
+        ("JSON", acervo.detector_json),
+        ("HTML", acervo.detector_html),
+    ]:
+        if detector.atualizado_em:
+            linhas.append(
+                f"🕒 {rotulo}: atualizado às {detector.atualizado_em.strftime('%H:%M:%S')} · "
+                f"{detector.ultimas_alteracoes} alteração(ões)"
+            )
+    
+    fotografia = acervo.fotografia()
+    if fotografia:
+        linhas.append(f"📦 Acervo: versão {fotografia.versao}, publicada às {fotografia.publicada_em.strftime('%H:%M:%S')}")
+    if acervo.ultimo_erro:
+        linhas.append(f"⚠️ Falha na última atualização: {acervo.ultimo_erro}")
+    
+    if linhas:
+        espaco.caption("  \n".join(linhas))
+
+
+def completar_info_html(info):
+    """Acrescenta ao registro de um HTML os campos formatados exibidos nos cards"""
+    info['tamanho_formatado'] = formatar_tamanho(info['tamanho'])
+    info['data_modificacao'] = datetime.fromtimestamp(info['timestamp_modificacao']).strftime('%Y-%m-%d %H:%M:%S')
+    return info
+
+
+def formatar_valor(valor):
+    """Formata um valor Decimal em reais (R$ 1.234,56)"""
+    return "R$ " + f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
 
 
 def formatar_tamanho(tamanho_bytes):
@@ -355,350 +382,603 @@ def formatar_tamanho(tamanho_bytes):
     return f"{tamanho_bytes:.1f} TB"
 
 
-def extrair_numero_processo_html(html_content):
-    """Extrai o número do processo do conteúdo HTML"""
-    # Procura por padrões CNJ
-    match = re.search(r'\d{7}-\d{2}\.\d{4}\.\d{1}\.\d{2}\.\d{4}', html_content)
-    if match:
-        return match.group(0)
-    
-    # Procura por "Número do Processo" ou "Processo:"
-    match = re.search(r'(?:Número do Processo|Processo)[:\s]*([0-9\-\.]+)', html_content, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    
-    return 'N/A'
+def pesquisar_conteudo(consulta, busca):
+    """Busca no conteúdo dos pareceres e retorna {arquivo: posição no ranking}
 
+    O índice da busca é sincronizado pelo acervo, em segundo plano (None
+    enquanto a primeira indexação não termina).
+    """
+    if busca is None:
+        st.info("⏳ O índice da busca no conteúdo está sendo preparado; tente novamente em instantes")
+        return {}
+    
+    with etapa("busca textual"):
+        return {doc_id: posicao for posicao, (doc_id, _) in enumerate(busca.buscar(consulta))}
 
-def extrair_titulo_html(html_content):
-    """Extrai o título do HTML"""
-    match = re.search(r'<title>(.+?)</title>', html_content, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    
-    match = re.search(r'<h1[^>]*>(.+?)</h1>', html_content, re.IGNORECASE)
-    if match:
-        return re.sub(r'<[^>]+>', '', match.group(1)).strip()
-    
-    return 'Documento sem título'
 
+def buscar_html_correspondente(caminho_json, mapa_correspondencia):
+    """Busca o arquivo HTML correspondente ao JSON"""
+    return mapa_correspondencia.buscar(caminho_json)
 
-def extrair_numero_processo(texto):
-    """Extrai o número do processo do parecer markdown"""
-    match = re.search(r'\*\*Número do Processo \(CNJ\):\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
-    return "N/A"
 
+def get_badge_html(classificacao, risco=None):
+    """Retorna o HTML do badge de classificação
 
-def extrair_classificacao(texto):
-    """Extrai a classificação de risco do parecer markdown"""
-    match = re.search(r'\*\*Classificação:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
-    
-    # Tenta buscar por RISCO ALTO/MÉDIO/BAIXO
-    if 'RISCO ALTO' in texto:
-        return 'RISCO ALTO'
-    elif 'RISCO MÉDIO' in texto or 'RISCO MÉDIO-BAIXO' in texto:
-        return 'RISCO MÉDIO'
-    elif 'PROVÁVEL' in texto:
-        return 'PROVÁVEL'
-    elif 'POSSÍVEL' in texto:
-        return 'POSSÍVEL'
-    elif 'REMOTA' in texto:
-        return 'REMOTA'
-    
-    return "Não informado"
+    `risco` é o valor de Risco já normalizado na indexação; sem ele, a
+    classificação é normalizada aqui.
+    """
+    risco = Risco(risco) if risco else normalizar_risco(classificacao)
+    return f'<span class="{CLASSES_BADGE[risco]}">{classificacao}</span>'
 
 
-def extrair_valor(texto):
-    """Extrai o valor da causa do parecer markdown"""
-    match = re.search(r'\*\*Valor da Causa:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
-    
-    match = re.search(r'R\$\s*[\d\.,]+', texto)
-    if match:
-        return match.group(0)
-    
-    return "N/A"
+def exibir_versoes(parecer, consulta):
+    """Lista as versões (reanálises) do processo do parecer, da mais recente à mais antiga"""
+    versoes = consulta.historico(parecer.get('numero_processo'))
+    linhas = []
+    for versao in versoes:
+        valor = formatar_valor(versao['valor_numerico']) if versao['valor_numerico'] is not None else "N/A"
+        atual = " ← esta versão" if versao['arquivo'] == parecer['arquivo'] else ""
+        linhas.append(
+            f"- {versao.get('timestamp', 'N/A')[:19].replace('T', ' ')} — "
+            f"{versao.get('classificacao', 'N/A')} — {valor}{atual}"
+        )
+    st.markdown(f"**🕘 Versões deste processo ({len(versoes)})**\n\n" + "\n".join(linhas))
 
 
-def extrair_parte_contraria(texto):
-    """Extrai a parte contrária do parecer markdown"""
-    match = re.search(r'\*\*Parte Contrária:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
+def exibir_quase_identicos(parecer, duplicatas, consulta):
+    """Lista os pareceres de outros processos com texto quase idêntico ao do parecer"""
+    processo = normalizar_numero_processo(parecer.get('numero_processo'))
+    semelhancas = dict(duplicatas.semelhantes(parecer['arquivo']))
+    if not semelhancas:
+        return
     
-    match = re.search(r'\*\*Autor:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
+    outros = [
+        outro for outro in consulta.consultar(arquivos=semelhancas)
+        if processo is None or normalizar_numero_processo(outro.get('numero_processo')) != processo
+    ]
+    if not outros:
+        return
     
-    return "N/A"
+    outros.sort(key=lambda outro: -semelhancas[outro['arquivo']])
+    linhas = [
+        f"- {outro.get('numero_processo', 'N/A')} — {outro.get('classificacao', 'N/A')} "
+        f"({semelhancas[outro['arquivo']]:.0%})"
+        for outro in outros[:MAXIMO_QUASE_IDENTICOS]
+    ]
+    st.markdown(f"**🧬 Quase idênticos ({len(outros)})**\n\n" + "\n".join(linhas))
 
 
-def extrair_natureza(texto):
-    """Extrai a natureza da ação do parecer markdown"""
-    match = re.search(r'\*\*Natureza:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
-    
-    match = re.search(r'\*\*Tipo de Ação:\*\* (.+)', texto)
-    if match:
-        return match.group(1).strip()
-    
-    return "N/A"
+def semelhantes_da_pagina(pareceres, matriz, consulta):
+    """Pareceres semelhantes de cada parecer da página, com os metadados
 
+    Retorna {arquivo: [(parecer semelhante, semelhança)]}; os metadados de
+    todos os semelhantes da página vêm de uma única consulta ao catálogo.
+    """
+    semelhancas = {
+        parecer['arquivo']: matriz.semelhantes(parecer['arquivo'], MAXIMO_SEMELHANTES)
+        for parecer in pareceres
+    }
+    arquivos = {outro for lista in semelhancas.values() for outro, _ in lista}
+    metadados = {outro['arquivo']: outro for outro in consulta.consultar(arquivos=arquivos)} if arquivos else {}
 
-def buscar_html_correspondente(caminho_json, pasta_html="pareceres_html"):
-    """Busca o arquivo HTML correspondente ao JSON"""
-    pasta_html_path = Path(pasta_html)
-    
-    if not pasta_html_path.exists():
-        return None
-    
-    # Extrai o nome base do arquivo JSON
-    nome_base = Path(caminho_json).stem
+    return {
+        arquivo: [(metadados[outro], semelhanca) for outro, semelhanca in lista if outro in metadados]
+        for arquivo, lista in semelhancas.items()
+    }
+
+
+def exibir_semelhantes(semelhantes):
+    """Lista os pareceres de outros processos com texto mais semelhante e como foram classificados"""
+    if not semelhantes:
+        return
     
-    # Tenta diferentes padrões de nomes
-    padroes = [
-        f"{nome_base}.html",
-        f"parecer_{nome_base}.html",
-        f"relatorio_{nome_base}.html",
+    linhas = [
+        f"- {outro.get('numero_processo', 'N/A')} — {outro.get('classificacao', 'N/A')} — "
+        f"{outro.get('timestamp', 'N/A')[:10]} ({semelhanca:.0%})"
+        for outro, semelhanca in semelhantes
     ]
-    
-    # Busca por número de processo no nome
-    for arquivo_html in pasta_html_path.glob("*.html"):
-        for padrao in padroes:
-            if padrao in arquivo_html.name or nome_base in arquivo_html.name:
-                return str(arquivo_html)
-    
-    return None
+    st.markdown("**🔗 Pareceres semelhantes**\n\n" + "\n".join(linhas))
 
 
-def get_badge_html(classificacao):
-    """Retorna o HTML do badge de classificação"""
-    classificacao_upper = str(classificacao).upper()
-    
-    if 'PROVÁVEL' in classificacao_upper or 'ALTO' in classificacao_upper:
-        classe = 'badge-provavel'
-    elif 'POSSÍVEL' in classificacao_upper or 'MÉDIO' in classificacao_upper:
-        classe = 'badge-possivel'
-    elif 'REMOTA' in classificacao_upper or 'BAIXO' in classificacao_upper:
-        classe = 'badge-remota'
+def exibir_quadro_html(conteudo, altura):
+    """Exibe um HTML num iframe (`altura` em pixels ou "content")
+
+    Usa st.iframe; nas versões do Streamlit que ainda não o têm, o
+    components.v1.html (que não ajusta a altura ao conteúdo).
+    """
+    if hasattr(st, 'iframe'):
+        st.iframe(conteudo, height=altura)
     else:
-        classe = 'badge-medio'
-    
-    return f'<span class="{classe}">{classificacao}</span>'
+        st.components.v1.html(conteudo, height=altura if isinstance(altura, int) else 800, scrolling=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def carregar_secoes(digest, _caminho_html):
+    """Divide um HTML em seções (uma vez por conteúdo, identificado pelo hash)
+
+    Os bytes vêm do cache de conteúdo (já lidos para calcular o hash) e são
+    decodificados uma única vez aqui.
+    """
+    return dividir_secoes(ler_html(_caminho_html).decode('utf-8'))
+
 
+@st.fragment
+def visualizar_parecer(caminho_html, chave):
+    """Exibe o parecer seção a seção, com sumário
 
-def exibir_html(caminho_html):
-    """Exibe o conteúdo de um arquivo HTML no Streamlit"""
+    Só a seção escolhida é enviada ao navegador; trocar de seção reexecuta
+    apenas este fragmento. Documentos sem seções são exibidos inteiros.
+    """
     try:
-        with open(caminho_html, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Exibe o HTML usando components
-        st.components.v1.html(html_content, height=800, scrolling=True)
-        
+        with etapa("leitura do HTML"):
+            documento = carregar_secoes(hash_conteudo(caminho_html), caminho_html)
     except Exception as e:
         st.error(f"Erro ao carregar o HTML: {str(e)}")
+        return
+    
+    if len(documento.secoes) < 2:
+        with etapa("componente HTML"):
+            exibir_quadro_html(documento.completo(), 800)
+        return
+    
+    opcoes = list(range(len(documento.secoes))) + [DOCUMENTO_COMPLETO]
+    col_sumario, col_secao = st.columns([1, 3])
+    
+    with col_sumario:
+        escolha = st.radio(
+            "📑 Sumário",
+            opcoes,
+            index=documento.inicial,
+            format_func=lambda opcao: opcao if opcao == DOCUMENTO_COMPLETO else documento.secoes[opcao].titulo,
+            key=f"secao_{chave}"
+        )
+    
+    with col_secao:
+        if escolha == DOCUMENTO_COMPLETO:
+            exibir_quadro_html(documento.completo(), 800)
+        else:
+            exibir_quadro_html(documento.pagina(escolha), ALTURA_SECAO)
 
 
-def exibir_pdf_download(caminho_html):
+def exibir_pdf_download(caminho_html, chave):
     """Cria botão de download do HTML"""
-    try:
-        with open(caminho_html, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+    if not arquivo_existe(caminho_html):
+        st.error(f"Erro ao criar download: arquivo não encontrado ({Path(caminho_html).name})")
+        return
+    
+    # O conteúdo só é lido quando o botão é clicado; a página leva apenas o botão
+    st.download_button(
+        "📥 Baixar Parecer HTML",
+        data=lambda: ler_html(caminho_html),
+        file_name=Path(caminho_html).name,
+        mime="text/html",
+        key=f"download_{chave}",
+        on_click="ignore",
+        type="primary"
+    )
+
+
+def gerar_exportacao(percorrer, formato):
+    """Conteúdo da exportação: percorre os pareceres de novo no momento do clique"""
+    with arquivo_exportado(percorrer(), formato) as arquivo:
+        return arquivo.read()
+
+
+def exibir_exportacao(percorrer, chave):
+    """Exportação da lista filtrada (CSV, JSONL ou XLSX)
+
+    `percorrer` é uma função sem argumentos que gera os pareceres filtrados;
+    o arquivo só é montado quando o botão é clicado.
+    """
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        formato = st.selectbox(
+            "📤 Exportar lista filtrada",
+            list(FORMATOS),
+            format_func=str.upper,
+            key=f"formato_exportacao_{chave}",
+            help="Número CNJ, parte contrária, natureza, valor, classificação, risco e data da análise"
+        )
+    
+    with col2:
+        st.markdown("<div style='height: 1.75rem'></div>", unsafe_allow_html=True)
+        st.download_button(
+            f"📥 Baixar {formato.upper()}",
+            data=lambda: gerar_exportacao(percorrer, formato),
+            file_name=nome_exportacao(formato),
+            mime=FORMATOS[formato][0],
+            key=f"exportar_{chave}",
+            on_click="ignore"
+        )
+
+
+def exibir_lote_zip(percorrer, total, mapa_correspondencia, assinatura, chave):
+    """Download em lote: ZIP com os HTMLs (e opcionalmente os JSONs) da lista filtrada
+
+    O ZIP é montado ao clicar em "Preparar", com barra de progresso, e fica
+    num arquivo temporário da sessão até os filtros mudarem.
+    `assinatura` identifica os filtros que geraram a lista. O Streamlit
+    copia o download inteiro na memória, por isso o ZIP é limitado a
+    LIMITE_TAMANHO_LOTE (lotes maiores: python -m lote_zip).
+    """
+    estado = f"lote_zip_{chave}"
+    lote = st.session_state.get(estado)
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    
+    with col1:
+        incluir_json = st.checkbox("Incluir os JSONs", key=f"lote_json_{chave}")
+    
+    assinatura = (assinatura, incluir_json)
+    if lote is not None and lote['assinatura'] != assinatura:
+        lote['arquivo'].close()
+        del st.session_state[estado]
+        lote = None
+    
+    with col2:
+        preparar = st.button(f"📦 Preparar ZIP ({total})", key=f"preparar_lote_{chave}",
+                             help="HTMLs de todos os pareceres da lista filtrada")
+    
+    if preparar:
+        barra = st.progress(0.0, text="Montando o ZIP...")
+        passo = max(1, total // 100)
         
-        b64 = base64.b64encode(html_content.encode()).decode()
-        nome_arquivo = Path(caminho_html).name
+        def progresso(feitos):
+            if feitos % passo == 0 or feitos == total:
+                barra.progress(min(1.0, feitos / total), text=f"Montando o ZIP: {feitos} de {total}")
         
-        href = f'<a href="data:text/html;base64,{b64}" download="{nome_arquivo}" style="text-decoration: none;"><button style="background: linear-gradient(135deg, #1e4d6b 0%, #2a6587 100%); color: white; border: none; padding: 0.5rem 1rem; border-radius: 8px; font-weight: 600; cursor: pointer;">📥 Baixar Parecer HTML</button></a>'
+        if lote is not None:
+            lote['arquivo'].close()
+            del st.session_state[estado]
+            lote = None
         
-        st.markdown(href, unsafe_allow_html=True)
+        try:
+            with etapa("lote zip"):
+                arquivo, resumo = arquivo_zip(percorrer(), mapa_correspondencia, incluir_json, progresso)
+        except LoteGrandeDemais:
+            st.error(f"❌ O ZIP passaria de {LIMITE_TAMANHO_LOTE // 2**20} MB. Filtre a lista ou monte o lote "
+                     f"pela linha de comando: python -m lote_zip --saida lote.zip")
+        else:
+            lote = {'assinatura': assinatura, 'arquivo': arquivo, 'resumo': resumo, 'nome': nome_lote()}
+            st.session_state[estado] = lote
+        barra.empty()
+    
+    if lote is not None:
+        resumo = lote['resumo']
         
-    except Exception as e:
-        st.error(f"Erro ao criar download: {str(e)}")
+        # Só lido ao clicar; a cópia na memória é limitada pelo tamanho do lote
+        def conteudo_lote():
+            lote['arquivo'].seek(0)
+            return lote['arquivo'].read()
+        
+        with col3:
+            st.download_button(
+                "📥 Baixar ZIP",
+                data=conteudo_lote,
+                file_name=lote['nome'],
+                mime="application/zip",
+                key=f"baixar_lote_{chave}",
+                on_click="ignore",
+                type="primary"
+            )
+            aviso = f" — {resumo['sem_html']} sem HTML" if resumo['sem_html'] else ""
+            st.caption(f"{resumo['htmls']} HTML(s) e {resumo['jsons']} JSON(s){aviso}")
+
+
+def controles_paginacao(total, chave):
+    """Exibe os controles de paginação e retorna (deslocamento, limite) da página atual"""
+    col1, col2, col3 = st.columns([1, 1, 2])
+    
+    with col1:
+        tamanho_pagina = st.selectbox(
+            "Itens por página",
+            OPCOES_TAMANHO_PAGINA,
+            index=OPCOES_TAMANHO_PAGINA.index(TAMANHO_PAGINA_PADRAO),
+            key=f"tamanho_pagina_{chave}"
+        )
+    
+    total_paginas = max(1, math.ceil(total / tamanho_pagina))
+    
+    with col2:
+        pagina = st.number_input(
+            f"Ir para a página (de {total_paginas})",
+            min_value=1,
+            step=1,
+            key=f"pagina_{chave}"
+        )
+    
+    # Se os filtros reduziram o total, permanece na última página existente
+    pagina = min(int(pagina), total_paginas)
+    deslocamento = (pagina - 1) * tamanho_pagina
+    
+    with col3:
+        st.caption(f"Página {pagina} de {total_paginas} — exibindo {deslocamento + 1} a {min(deslocamento + tamanho_pagina, total)} de {total}")
+    
+    return deslocamento, tamanho_pagina
 
 
-def pagina_pareceres_json(pasta_pareceres, pasta_html):
+def pagina_pareceres_json(fotografia, pasta_pareceres):
     """Página de visualização dos pareceres baseados em JSON"""
     
-    # Busca os pareceres
-    with st.spinner("🔍 Carregando pareceres..."):
-        pareceres = buscar_pareceres_json(pasta_pareceres)
+    # Agregados, lista e contagens vêm todos da mesma fotografia do acervo:
+    # a página não abre o índice e nunca mistura duas versões
+    consulta = fotografia.consulta
+    por_risco = fotografia.agregados.get('risco', {})
+    contagens = fotografia.agregados.get('classificacao', {})
+    total_pareceres = sum(quantidade for quantidade, _ in por_risco.values())
     
-    if not pareceres:
+    if not total_pareceres:
         st.warning(f"⚠️ Nenhum parecer encontrado na pasta '{pasta_pareceres}'")
         st.info("💡 **Como usar:**\n\n1. Coloque os arquivos JSON dos pareceres na pasta configurada\n2. Coloque os arquivos HTML correspondentes na pasta de HTMLs\n3. Os pareceres serão listados automaticamente")
         return
     
     # Métricas
-    st.subheader("📊 Resumo Geral")
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Total de Pareceres</div>
-            <div class="metric-value">{len(pareceres)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        alto_risco = sum(1 for p in pareceres if 'PROVÁVEL' in str(p.get('classificacao', '')).upper() or 'ALTO' in str(p.get('classificacao', '')).upper())
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Alto Risco</div>
-            <div class="metric-value">{alto_risco}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        medio_risco = sum(1 for p in pareceres if 'POSSÍVEL' in str(p.get('classificacao', '')).upper() or 'MÉDIO' in str(p.get('classificacao', '')).upper())
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Médio Risco</div>
-            <div class="metric-value">{medio_risco}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        baixo_risco = sum(1 for p in pareceres if 'REMOTA' in str(p.get('classificacao', '')).upper() or 'BAIXO' in str(p.get('classificacao', '')).upper())
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Baixo Risco</div>
-            <div class="metric-value">{baixo_risco}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    with etapa("painel"):
+        st.subheader("📊 Resumo Geral")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            contingencia_total = sum(valor for _, valor in por_risco.values())
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">Total de Pareceres</div>
+                <div class="metric-value">{total_pareceres}</div>
+                <div class="metric-detail">{formatar_valor(contingencia_total)}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        cartoes = [
+            (col2, "Alto Risco", Risco.PROVAVEL),
+            (col3, "Médio Risco", Risco.POSSIVEL),
+            (col4, "Baixo Risco", Risco.REMOTA),
+        ]
+        for coluna, rotulo, risco in cartoes:
+            quantidade, contingencia = por_risco.get(risco.value, (0, 0))
+            with coluna:
+                st.markdown(f"""
+                <div class="metric-card">
+                    <div class="metric-label">{rotulo}</div>
+                    <div class="metric-value">{quantidade}</div>
+                    <div class="metric-detail">{formatar_valor(contingencia)}</div>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        with st.expander("📈 Distribuição por natureza e parte contrária"):
+            col1, col2 = st.columns(2)
+            for coluna, dimensao, rotulo in [(col1, 'natureza', "Natureza"), (col2, 'parte_contraria', "Parte Contrária")]:
+                with coluna:
+                    st.table([
+                        {rotulo: chave, "Pareceres": quantidade, "Valor": formatar_valor(valor)}
+                        for chave, (quantidade, valor) in islice(fotografia.agregados[dimensao].items(), MAXIMO_DISTRIBUICAO)
+                    ])
+            
+            st.markdown("**💰 Maiores exposições**")
+            st.table([
+                {
+                    "Processo": parecer.get('numero_processo', 'N/A'),
+                    "Parte Contrária": parecer.get('parte_contraria', 'N/A'),
+                    "Classificação": parecer.get('classificacao', 'N/A'),
+                    "Valor": formatar_valor(parecer['valor_numerico']),
+                }
+                for parecer in fotografia.maiores_exposicoes[:MAIORES_EXPOSICOES]
+                if parecer['valor_numerico'] is not None
+            ])
     
     st.markdown("---")
     
     # Filtros
-    st.subheader("🔍 Filtros")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        filtro_processo = st.text_input("🔎 Buscar por número do processo", "")
-    
-    with col2:
-        todas_classificacoes = list(set([p.get('classificacao', 'N/A') for p in pareceres]))
-        filtro_classificacao = st.selectbox(
-            "📊 Filtrar por classificação",
-            ["Todas"] + todas_classificacoes
+    with etapa("filtros"):
+        st.subheader("🔍 Filtros")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            filtro_processo = st.text_input("🔎 Buscar por número do processo", "")
+            filtro_conteudo = st.text_input(
+                "📚 Buscar no conteúdo",
+                "",
+                help='Busca por tese, parte ou fundamentos. Use aspas para frases ("negativa de cobertura") '
+                     'e parte: ou natureza: para restringir o campo (parte:ans, natureza:"execução fiscal")'
+            )
+        
+        with col2:
+            todas_classificacoes = list(contagens)
+            filtro_classificacao = st.selectbox(
+                "📊 Filtrar por classificação",
+                ["Todas"] + todas_classificacoes
+            )
+            ordem = st.selectbox(
+                "↕️ Ordenar por",
+                list(ORDENACOES_PARECERES),
+                help="Na busca no conteúdo, os resultados seguem a relevância"
+            )
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            apenas_recentes = st.checkbox(
+                "🕘 Só a versão mais recente de cada processo",
+                help="Reanálises do mesmo número CNJ aparecem uma vez, pela data da análise mais recente"
+            )
+        
+        with col2:
+            mostrar_quase_identicos = st.checkbox(
+                "🧬 Indicar pareceres quase idênticos",
+                help="Mostra em cada parecer os de outros processos com texto quase igual"
+            )
+        
+        with st.expander("💰 Filtrar por valor e data da análise"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                valor_minimo = st.number_input("Valor mínimo (R$)", min_value=0.0, value=None, step=1000.0, format="%.2f")
+            with col2:
+                valor_maximo = st.number_input("Valor máximo (R$)", min_value=0.0, value=None, step=1000.0, format="%.2f")
+            with col3:
+                datas = st.date_input("Período da análise", value=[], format="DD/MM/YYYY")
+        
+        faixa_valor = (
+            Decimal(str(valor_minimo)) if valor_minimo is not None else None,
+            Decimal(str(valor_maximo)) if valor_maximo is not None else None,
         )
+        periodo = (datas[0], datas[-1]) if datas else None
+        filtros = {'faixa_valor': faixa_valor, 'periodo': periodo, 'apenas_recentes': apenas_recentes}
     
-    # Aplica filtros
-    pareceres_filtrados = pareceres
-    
-    if filtro_processo:
-        pareceres_filtrados = [p for p in pareceres_filtrados if filtro_processo.upper() in str(p.get('numero_processo', '')).upper()]
+    # Mapa JSON -> HTML, recalculado apenas quando alguma das pastas muda
+    mapa_correspondencia = fotografia.mapa
     
-    if filtro_classificacao != "Todas":
-        pareceres_filtrados = [p for p in pareceres_filtrados if p.get('classificacao') == filtro_classificacao]
+    # Aplica filtros (a contagem vem do catálogo, sem montar a lista)
+    with etapa("consulta"):
+        classificacao = None if filtro_classificacao == "Todas" else filtro_classificacao
+        ranking = None
+        
+        if filtro_conteudo:
+            ranking = pesquisar_conteudo(filtro_conteudo, fotografia.busca)
+            
+            # Ordena por relevância na busca textual
+            resultados = consulta.consultar(filtro_processo, classificacao, arquivos=ranking, **filtros)
+            resultados.sort(key=lambda x: ranking[x['arquivo']])
+            total_filtrado = len(resultados)
+        else:
+            total_filtrado = consulta.contar(filtro_processo, classificacao, **filtros)
     
     st.markdown("---")
     
     # Lista de pareceres
-    st.subheader(f"📋 Lista de Pareceres ({len(pareceres_filtrados)})")
+    st.subheader(f"📋 Lista de Pareceres ({total_filtrado})")
     
-    if not pareceres_filtrados:
+    if not total_filtrado:
         st.warning("Nenhum parecer encontrado com os filtros aplicados.")
         return
     
-    # Ordena por data (mais recentes primeiro)
-    pareceres_filtrados.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+    if ranking is not None:
+        percorrer = lambda: iter(resultados)
+    else:
+        percorrer = lambda: consulta.percorrer_consulta(filtro_processo, classificacao, ordem=ordem, **filtros)
     
-    for idx, parecer in enumerate(pareceres_filtrados):
-        with st.expander(f"📄 {parecer.get('numero_processo', 'N/A')} - {parecer.get('natureza', 'N/A')[:50]}..."):
-            
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.markdown(f"""
-                <div class="card">
-                    <h3>Informações do Processo</h3>
-                    <p><strong>Número CNJ:</strong> {parecer.get('numero_processo', 'N/A')}</p>
-                    <p><strong>Parte Contrária:</strong> {parecer.get('parte_contraria', 'N/A')}</p>
-                    <p><strong>Natureza:</strong> {parecer.get('natureza', 'N/A')}</p>
-                    <p><strong>Valor:</strong> {parecer.get('valor', 'N/A')}</p>
-                    <p><strong>Classificação:</strong> {get_badge_html(parecer.get('classificacao', 'N/A'))}</p>
-                    <p><strong>Data da Análise:</strong> {parecer.get('timestamp', 'N/A')[:19]}</p>
-                </div>
-                """, unsafe_allow_html=True)
+    exibir_exportacao(percorrer, "json")
+    exibir_lote_zip(
+        percorrer, total_filtrado, mapa_correspondencia,
+        (filtro_conteudo, filtro_processo, classificacao, ordem, repr(filtros), fotografia.versao), "json"
+    )
+    
+    deslocamento, limite = controles_paginacao(total_filtrado, "json")
+    
+    # Carrega apenas a página visível, na ordem escolhida
+    with etapa("consulta"):
+        if ranking is not None:
+            pareceres_pagina = resultados[deslocamento:deslocamento + limite]
+        else:
+            pareceres_pagina = consulta.consultar(
+                filtro_processo, classificacao, ordem=ordem, limite=limite, deslocamento=deslocamento, **filtros
+            )
+    
+    # Assinaturas mantidas pelo acervo, em segundo plano
+    duplicatas = fotografia.duplicatas if mostrar_quase_identicos else None
+    if mostrar_quase_identicos and duplicatas is None:
+        st.info("⏳ A comparação de quase idênticos está sendo preparada; tente novamente em instantes")
+    
+    # Matriz TF-IDF montada em segundo plano, com a fotografia do acervo; na
+    # primeira fotografia, só com os pareceres que já tinham os termos contados
+    if fotografia.busca is None and len(fotografia.semelhanca) < len(fotografia.catalogo):
+        st.caption("⏳ Os pareceres semelhantes estão sendo preparados; aparecem em instantes")
+    with etapa("semelhantes"):
+        semelhantes = semelhantes_da_pagina(pareceres_pagina, fotografia.semelhanca, consulta)
+    
+    with etapa("cards"):
+        for parecer in pareceres_pagina:
+            chave = parecer['arquivo']
+            versoes = parecer.get('quantidade_versoes', 1)
+            rotulo_versoes = f" 🕘 {versoes} versões" if versoes > 1 else ""
             
-            with col2:
-                st.markdown("### 📊 Ações")
+            with st.expander(f"📄 {parecer.get('numero_processo', 'N/A')} - {parecer.get('natureza', 'N/A')[:50]}...{rotulo_versoes}"):
                 
-                # Busca HTML correspondente
-                html_path = buscar_html_correspondente(parecer['arquivo'], pasta_html)
+                col1, col2 = st.columns([2, 1])
                 
-                if html_path:
-                    if st.button(f"👁️ Visualizar Parecer", key=f"view_json_{idx}"):
-                        st.session_state[f'mostrar_html_json_{idx}'] = True
+                with col1:
+                    st.markdown(f"""
+                    <div class="card">
+                        <h3>Informações do Processo</h3>
+                        <p><strong>Número CNJ:</strong> {parecer.get('numero_processo', 'N/A')}</p>
+                        <p><strong>Parte Contrária:</strong> {parecer.get('parte_contraria', 'N/A')}</p>
+                        <p><strong>Natureza:</strong> {parecer.get('natureza', 'N/A')}</p>
+                        <p><strong>Valor:</strong> {parecer.get('valor', 'N/A')}</p>
+                        <p><strong>Classificação:</strong> {get_badge_html(parecer.get('classificacao', 'N/A'), parecer.get('risco'))}</p>
+                        <p><strong>Data da Análise:</strong> {parecer.get('timestamp', 'N/A')[:19]}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
                     
-                    exibir_pdf_download(html_path)
-                else:
-                    st.warning("HTML não encontrado")
+                    if versoes > 1:
+                        exibir_versoes(parecer, consulta)
+                    if duplicatas is not None:
+                        exibir_quase_identicos(parecer, duplicatas, consulta)
+                    exibir_semelhantes(semelhantes.get(chave))
                 
-                st.info(f"**Arquivo:** {parecer['nome']}")
-            
-            # Exibe HTML se solicitado
-            if st.session_state.get(f'mostrar_html_json_{idx}', False):
-                st.markdown("---")
-                st.markdown("### 📄 Visualização do Parecer")
-                
-                if st.button(f"❌ Fechar Visualização", key=f"close_json_{idx}"):
-                    st.session_state[f'mostrar_html_json_{idx}'] = False
-                    st.rerun()
+                with col2:
+                    st.markdown("### 📊 Ações")
+                    
+                    # Busca HTML correspondente
+                    html_path = buscar_html_correspondente(parecer['arquivo'], mapa_correspondencia)
+                    
+                    if html_path:
+                        if st.button(f"👁️ Visualizar Parecer", key=f"view_json_{chave}"):
+                            st.session_state[f'mostrar_html_json_{chave}'] = True
+                        
+                        exibir_pdf_download(html_path, f"json_{chave}")
+                    else:
+                        st.warning("HTML não encontrado")
+                    
+                    st.info(f"**Arquivo:** {parecer['nome']}")
                 
-                html_path = buscar_html_correspondente(parecer['arquivo'], pasta_html)
-                if html_path:
-                    exibir_html(html_path)
+                # Exibe HTML se solicitado
+                if st.session_state.get(f'mostrar_html_json_{chave}', False):
+                    st.markdown("---")
+                    st.markdown("### 📄 Visualização do Parecer")
+                    
+                    if st.button(f"❌ Fechar Visualização", key=f"close_json_{chave}"):
+                        st.session_state[f'mostrar_html_json_{chave}'] = False
+                        st.rerun()
+                    
+                    if html_path:
+                        visualizar_parecer(html_path, f"json_{chave}")
 
 
-def pagina_arquivos_html(pasta_html):
+def pagina_arquivos_html(fotografia, pasta_html):
     """Página de visualização de todos os arquivos HTML"""
     
-    # Busca todos os arquivos HTML
-    with st.spinner("🔍 Carregando arquivos HTML..."):
-        arquivos_html = buscar_arquivos_html(pasta_html)
+    consulta_html = fotografia.consulta_html
+    total_arquivos, tamanho_total, mtime_mais_recente = fotografia.estatisticas_html
     
-    if not arquivos_html:
+    if not total_arquivos:
         st.warning(f"⚠️ Nenhum arquivo HTML encontrado na pasta '{pasta_html}'")
         st.info("💡 **Dica:** Coloque os arquivos HTML dos pareceres na pasta configurada para visualizá-los aqui.")
         return
     
     # Métricas
-    st.subheader("📊 Resumo dos Arquivos HTML")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Total de Arquivos</div>
-            <div class="metric-value">{len(arquivos_html)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        tamanho_total = sum(a['tamanho'] for a in arquivos_html)
-        st.markdown(f"""
-        <div class="metric-card">
-            <div class="metric-label">Tamanho Total</div>
-            <div class="metric-value">{formatar_tamanho(tamanho_total)}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        if arquivos_html:
-            mais_recente = max(arquivos_html, key=lambda x: x['timestamp_modificacao'])
-            data_recente = datetime.fromtimestamp(mais_recente['timestamp_modificacao']).strftime('%d/%m/%Y')
+    with etapa("painel"):
+        st.subheader("📊 Resumo dos Arquivos HTML")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">Total de Arquivos</div>
+                <div class="metric-value">{total_arquivos}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class="metric-card">
+                <div class="metric-label">Tamanho Total</div>
+                <div class="metric-value">{formatar_tamanho(tamanho_total)}</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            data_recente = datetime.fromtimestamp(mtime_mais_recente / 1e9).strftime('%d/%m/%Y')
             st.markdown(f"""
             <div class="metric-card">
                 <div class="metric-label">Última Modificação</div>
@@ -711,90 +991,180 @@ def pagina_arquivos_html(pasta_html):
     # Filtro de busca
     st.subheader("🔍 Buscar Arquivos")
     filtro_busca = st.text_input("🔎 Buscar por nome do arquivo ou número do processo", "")
+    filtro_conteudo = st.text_input(
+        "📚 Buscar no conteúdo",
+        "",
+        help='Busca por tese, parte ou fundamentos. Use aspas para frases ("negativa de cobertura") '
+             'e parte: ou natureza: para restringir o campo (parte:ans, natureza:"execução fiscal")'
+    )
     
     # Aplica filtro
-    arquivos_filtrados = arquivos_html
-    if filtro_busca:
-        arquivos_filtrados = [
-            a for a in arquivos_html 
-            if filtro_busca.upper() in a['nome'].upper() or 
-               filtro_busca.upper() in str(a.get('numero_processo', '')).upper() or
-               filtro_busca.upper() in str(a.get('titulo', '')).upper()
-        ]
+    with etapa("consulta"):
+        ranking = None
+        
+        if filtro_conteudo:
+            mapa_correspondencia = fotografia.mapa
+            ranking_documentos = pesquisar_conteudo(filtro_conteudo, fotografia.busca)
+            
+            # Resultados em JSON são levados para o HTML correspondente
+            ranking = {}
+            for doc_id, posicao in ranking_documentos.items():
+                caminho = mapa_correspondencia.buscar(doc_id) or doc_id
+                ranking[caminho] = min(posicao, ranking.get(caminho, posicao))
+        
+        total_filtrado = consulta_html.contar(filtro_busca, ranking)
     
     st.markdown("---")
     
     # Opções de ordenação
     col1, col2 = st.columns([3, 1])
     with col1:
-        st.subheader(f"📁 Arquivos HTML ({len(arquivos_filtrados)})")
+        st.subheader(f"📁 Arquivos HTML ({total_filtrado})")
     with col2:
+        ordens = list(ORDENACOES_HTML)
+        if ranking is not None:
+            ordens = ["Relevância"] + ordens
         ordem = st.selectbox(
             "Ordenar por:",
-            ["Mais recentes", "Mais antigos", "Nome (A-Z)", "Nome (Z-A)", "Maior tamanho", "Menor tamanho"]
+            ordens
         )
     
-    # Ordena os arquivos
-    if ordem == "Mais recentes":
-        arquivos_filtrados.sort(key=lambda x: x['timestamp_modificacao'], reverse=True)
-    elif ordem == "Mais antigos":
-        arquivos_filtrados.sort(key=lambda x: x['timestamp_modificacao'])
-    elif ordem == "Nome (A-Z)":
-        arquivos_filtrados.sort(key=lambda x: x['nome'])
-    elif ordem == "Nome (Z-A)":
-        arquivos_filtrados.sort(key=lambda x: x['nome'], reverse=True)
-    elif ordem == "Maior tamanho":
-        arquivos_filtrados.sort(key=lambda x: x['tamanho'], reverse=True)
-    elif ordem == "Menor tamanho":
-        arquivos_filtrados.sort(key=lambda x: x['tamanho'])
-    
-    if not arquivos_filtrados:
+    if not total_filtrado:
         st.warning("Nenhum arquivo encontrado com os filtros aplicados.")
         return
     
+    deslocamento, limite = controles_paginacao(total_filtrado, "html")
+    
+    # Monta apenas a página visível, na ordem já montada com a fotografia
+    with etapa("consulta"):
+        if ordem == "Relevância":
+            arquivos_pagina = consulta_html.consultar(filtro_busca, ranking)
+            arquivos_pagina.sort(key=lambda x: ranking[x['caminho']])
+            arquivos_pagina = arquivos_pagina[deslocamento:deslocamento + limite]
+        else:
+            arquivos_pagina = consulta_html.consultar(filtro_busca, ranking, ordem, limite, deslocamento)
+    
     # Lista os arquivos em cards
-    for idx, arquivo in enumerate(arquivos_filtrados):
-        with st.expander(f"📄 {arquivo['nome']} | {arquivo['tamanho_formatado']}"):
-            
-            col1, col2 = st.columns([2, 1])
+    with etapa("cards"):
+        for arquivo in map(completar_info_html, arquivos_pagina):
+            chave = arquivo['caminho']
             
-            with col1:
-                st.markdown(f"""
-                <div class="html-card">
-                    <h3>📋 {arquivo.get('titulo', 'Sem título')}</h3>
-                    <p><strong>📁 Arquivo:</strong> {arquivo['nome']}</p>
-                    <p><strong>📊 Tamanho:</strong> {arquivo['tamanho_formatado']}</p>
-                    <p><strong>📅 Última modificação:</strong> {arquivo['data_modificacao']}</p>
-                    <p><strong>🔢 Número do Processo:</strong> {arquivo.get('numero_processo', 'N/A')}</p>
-                    <p><strong>📂 Caminho:</strong> <code>{arquivo['caminho']}</code></p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("### 📊 Ações")
+            with st.expander(f"📄 {arquivo['nome']} | {arquivo['tamanho_formatado']}"):
                 
-                if st.button(f"👁️ Visualizar", key=f"view_html_{idx}"):
-                    st.session_state[f'mostrar_html_{idx}'] = True
+                col1, col2 = st.columns([2, 1])
                 
-                exibir_pdf_download(arquivo['caminho'])
-            
-            # Exibe HTML se solicitado
-            if st.session_state.get(f'mostrar_html_{idx}', False):
-                st.markdown("---")
-                st.markdown("### 📄 Visualização do Arquivo")
+                with col1:
+                    st.markdown(f"""
+                    <div class="html-card">
+                        <h3>📋 {arquivo.get('titulo', 'Sem título')}</h3>
+                        <p><strong>📁 Arquivo:</strong> {arquivo['nome']}</p>
+                        <p><strong>📊 Tamanho:</strong> {arquivo['tamanho_formatado']}</p>
+                        <p><strong>📅 Última modificação:</strong> {arquivo['data_modificacao']}</p>
+                        <p><strong>🔢 Número do Processo:</strong> {arquivo.get('numero_processo', 'N/A')}</p>
+                        <p><strong>📂 Caminho:</strong> <code>{arquivo['caminho']}</code></p>
+                    </div>
+                    """, unsafe_allow_html=True)
                 
-                if st.button(f"❌ Fechar Visualização", key=f"close_html_{idx}"):
-                    st.session_state[f'mostrar_html_{idx}'] = False
-                    st.rerun()
+                with col2:
+                    st.markdown("### 📊 Ações")
+                    
+                    if st.button(f"👁️ Visualizar", key=f"view_html_{chave}"):
+                        st.session_state[f'mostrar_html_{chave}'] = True
+                    
+                    exibir_pdf_download(arquivo['caminho'], f"html_{chave}")
                 
-                exibir_html(arquivo['caminho'])
+                # Exibe HTML se solicitado
+                if st.session_state.get(f'mostrar_html_{chave}', False):
+                    st.markdown("---")
+                    st.markdown("### 📄 Visualização do Arquivo")
+                    
+                    if st.button(f"❌ Fechar Visualização", key=f"close_html_{chave}"):
+                        st.session_state[f'mostrar_html_{chave}'] = False
+                        st.rerun()
+                    
+                    visualizar_parecer(arquivo['caminho'], f"html_{chave}")
+
+
+def exibir_painel_desempenho(medicao, perfil):
+    """Painel de desempenho na barra lateral (com PARECERES_ADMIN=1)"""
+    st.sidebar.markdown("---")
+    st.sidebar.header("🛠️ Desempenho")
+    
+    st.sidebar.caption(f"Esta execução: {medicao.total * 1000:.1f} ms")
+    st.sidebar.table([
+        {"Etapa": nome, "ms": f"{segundos * 1000:.1f}"} for nome, segundos in medicao.etapas.items()
+    ])
+    if medicao.contadores:
+        st.sidebar.table([{"Contador": nome, "Valor": valor} for nome, valor in medicao.contadores.items()])
+    
+    cache = CACHE_CONTEUDO.estatisticas()
+    with st.sidebar.expander(
+        f"Cache de conteúdo ({cache['bytes'] / 2**20:.1f} de {cache['limite_bytes'] / 2**20:.0f} MB)"
+    ):
+        st.table([
+            {"Estatística": "Arquivos em cache", "Valor": str(cache['entradas'])},
+            {"Estatística": "Acertos", "Valor": str(cache['acertos'])},
+            {"Estatística": "Falhas", "Valor": str(cache['falhas'])},
+            {"Estatística": "Taxa de acertos", "Valor": f"{cache['taxa_acertos']:.1%}"},
+            {"Estatística": "Descartes (LRU)", "Valor": str(cache['descartes'])},
+            {"Estatística": "Invalidações", "Valor": str(cache['invalidacoes'])},
+        ])
+    
+    for rotulo, execucao in [("Execuções recentes", "execução"), ("Atualizações do acervo", "atualização do acervo")]:
+        resumo = resumir_historico(execucao)
+        if resumo:
+            with st.sidebar.expander(f"{rotulo} (mediana / máximo, ms)"):
+                st.table([
+                    {"Etapa": nome, "Mediana": f"{mediana:.1f}", "Máximo": f"{maximo:.1f}"}
+                    for nome, (mediana, maximo) in resumo.items()
+                ])
+    
+    st.sidebar.caption(f"Log: `{ARQUIVO_LOG}`")
+    st.sidebar.button(
+        "🧪 Perfilar esta página (cProfile)",
+        on_click=lambda: st.session_state.update(perfilar_execucao=True),
+        help="Executa a página de novo sob o cProfile e grava o arquivo .pstats"
+    )
+    
+    if perfil is not None:
+        if perfil.erro:
+            st.session_state['ultimo_perfil'] = None
+            st.sidebar.warning(f"Perfil não capturado: {perfil.erro}")
+        else:
+            st.session_state['ultimo_perfil'] = (str(perfil.caminho), perfil.resumo)
+    
+    if st.session_state.get('ultimo_perfil'):
+        caminho, resumo = st.session_state['ultimo_perfil']
+        with st.sidebar.expander("Último perfil"):
+            st.code(resumo, language=None)
+            if Path(caminho).is_file():
+                st.download_button(
+                    "📥 Baixar .pstats",
+                    data=lambda: Path(caminho).read_bytes(),
+                    file_name=Path(caminho).name,
+                    on_click="ignore",
+                )
 
 
 def main():
-    """Função principal do aplicativo"""
+    """Função principal do aplicativo: executa a página medindo cada etapa"""
+    perfilar_execucao = st.session_state.pop('perfilar_execucao', False)
+    
+    with medir_execucao("execução") as medicao:
+        with perfilar() if perfilar_execucao else nullcontext() as perfil:
+            executar_aplicativo()
+    
+    if painel_habilitado():
+        exibir_painel_desempenho(medicao, perfil)
+
+
+def executar_aplicativo():
+    """Monta a página do aplicativo"""
     
     # Verifica autenticação antes de mostrar o conteúdo
-    if not check_password():
+    with etapa("autenticação"):
+        autenticado = check_password()
+    if not autenticado:
         st.stop()  # Para a execução se não estiver autenticado
     
     # Header
@@ -815,15 +1185,39 @@ def main():
     pasta_pareceres = st.sidebar.text_input(
         "Pasta dos Pareceres JSON",
         value="pareceres",
-        help="Pasta contendo os arquivos JSON dos pareceres"
+        help="Pasta contendo os arquivos JSON dos pareceres (ou um arquivo .pacote)"
     )
     
     pasta_html = st.sidebar.text_input(
         "Pasta dos HTMLs",
         value="pareceres_html",
-        help="Pasta contendo os arquivos HTML gerados"
+        help="Pasta contendo os arquivos HTML gerados (ou um arquivo .pacote)"
     )
     
+    for pasta in {pasta_pareceres, pasta_html}:
+        if eh_pacote(pasta):
+            try:
+                abrir_pacote(pasta)
+            except (OSError, PacoteInvalido) as e:
+                st.error(f"❌ Não foi possível abrir o pacote: {e}")
+                st.stop()
+    
+    # Acervo compartilhado por todas as sessões, atualizado em segundo plano
+    with st.spinner("🔍 Carregando pareceres..."), etapa("acervo"):
+        acervo = obter_acervo(pasta_pareceres, pasta_html)
+        fotografia = acervo.fotografia()
+    
+    # Estado da atualização (preenchido ao final da página)
+    status_atualizacao = st.sidebar.empty()
+    if st.sidebar.button("🔄 Forçar releitura completa", help="Percorre as pastas inteiras novamente, em vez de aplicar só as alterações detectadas"):
+        acervo.solicitar_atualizacao(completa=True)
+        st.sidebar.info("Releitura solicitada: a lista é atualizada em instantes")
+    
+    exibir_erros_leitura(fotografia.erros_json, "parecer(es) JSON")
+    exibir_erros_leitura(fotografia.erros_html, "arquivo(s) HTML")
+    exibir_erros_leitura(fotografia.erros_busca, "documento(s) fora da busca no conteúdo")
+    exibir_erros_leitura(fotografia.erros_duplicatas, "parecer(es) fora da comparação de quase idênticos")
+    
     st.sidebar.markdown("---")
     
     # Seleção de visualização
@@ -850,10 +1244,13 @@ def main():
     """)
     
     # Renderiza a página selecionada
-    if modo_visualizacao == "📊 Pareceres com JSON":
-        pagina_pareceres_json(pasta_pareceres, pasta_html)
-    else:
-        pagina_arquivos_html(pasta_html)
+    with etapa("página"):
+        if modo_visualizacao == "📊 Pareceres com JSON":
+            pagina_pareceres_json(fotografia, pasta_pareceres)
+        else:
+            pagina_arquivos_html(fotografia, pasta_html)
+    
+    exibir_status_atualizacao(status_atualizacao, acervo)
     
     # Footer
     st.markdown("---")
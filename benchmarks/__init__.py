@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks do Sistema de Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Execute cada benchmark a partir da raiz do projeto, por exemplo:
+
+    python -m benchmarks.bench_html_cabecalho
+"""
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: acervo compartilhado com sessões simultâneas
+Volpe Advogados Associados - Unimed Cuiabá
+
+Copia um acervo sintético para uma pasta temporária e simula várias sessões
+lendo a fotografia do acervo (como a cada execução do aplicativo) enquanto
+a pasta de JSONs é alterada e a thread de atualização publica novas versões.
+Mede a latência das leituras e compara com o custo, por sessão, de conferir
+as pastas e montar catálogo e mapa (o que cada sessão fazia antes).
+
+Confere também que:
+
+- as versões vistas por cada sessão nunca voltam atrás
+- cada fotografia é consistente (catálogo, lista da página e agregados com a
+  mesma quantidade)
+- a última fotografia é igual ao conteúdo do índice depois das alterações
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_acervo [--quantidade 1000] [--sessoes 8] [--segundos 5]
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from acervo import AcervoCompartilhado
+from alteracoes import DetectorAlteracoes
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from catalogo import Catalogo
+from correspondencia import MapaCorrespondencia
+from indice_pareceres import IndiceArquivosHtml, IndicePareceres, caminho_indice_padrao
+
+
+def sessao(acervo, parar, latencias, problemas):
+    """Lê a fotografia repetidamente, como as execuções de uma sessão"""
+    versao_anterior = 0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        fotografia = acervo.fotografia()
+        latencias.append(time.perf_counter() - inicio)
+
+        if fotografia.versao < versao_anterior:
+            problemas.append(f"versão voltou de {versao_anterior} para {fotografia.versao}")
+        versao_anterior = fotografia.versao
+
+        total = sum(quantidade for quantidade, _ in fotografia.agregados.get('risco', {}).values())
+        if total != len(fotografia.catalogo):
+            problemas.append(f"versão {fotografia.versao}: {len(fotografia.catalogo)} no catálogo, {total} agregados")
+        if fotografia.consulta.contar() != total:
+            problemas.append(f"versão {fotografia.versao}: {fotografia.consulta.contar()} na lista, {total} agregados")
+        time.sleep(0.001)
+
+
+def alterar_pasta(pasta_json, segundos, parar):
+    """Acrescenta, altera e remove JSONs enquanto as sessões leem"""
+    arquivos = sorted(Path(pasta_json).glob('*.json'))
+    fim = time.monotonic() + segundos
+    passo = 0
+    while time.monotonic() < fim:
+        origem = arquivos[passo % len(arquivos)]
+        dados = json.loads(origem.read_text(encoding='utf-8'))
+        dados['timestamp'] = f"2025-01-01T00:00:{passo % 60:02d}"
+        (Path(pasta_json) / f"copia_{passo}.json").write_text(json.dumps(dados, ensure_ascii=False), encoding='utf-8')
+        if passo % 3 == 2:
+            (Path(pasta_json) / f"copia_{passo - 2}.json").unlink()
+        passo += 1
+        time.sleep(0.05)
+    parar.set()
+    return passo
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=1000, help='Número de pareceres')
+    parser.add_argument('--sessoes', type=int, default=8, help='Sessões simultâneas')
+    parser.add_argument('--segundos', type=float, default=5, help='Duração das alterações')
+    args = parser.parse_args()
+
+    origem_json, origem_html = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_json = Path(temporario) / "pareceres"
+        pasta_html = Path(temporario) / "pareceres_html"
+        shutil.copytree(origem_json, pasta_json)
+        shutil.copytree(origem_html, pasta_html)
+
+        detector_json = DetectorAlteracoes(str(pasta_json), '.json', intervalo_varredura=0)
+        detector_html = DetectorAlteracoes(str(pasta_html), '.html', intervalo_varredura=0)
+
+        inicio = time.perf_counter()
+        acervo = AcervoCompartilhado(detector_json, detector_html, intervalo=0.2).iniciar()
+        primeira = time.perf_counter() - inicio
+
+        # Custo por sessão do caminho anterior: conferir as pastas e montar tudo
+        inicio = time.perf_counter()
+        indice = IndicePareceres(str(pasta_json))
+        detector_json.atualizar(indice)
+        catalogo = Catalogo.do_indice(indice)
+        MapaCorrespondencia(catalogo, IndiceArquivosHtml(str(pasta_html)).numeros_processo())
+        por_sessao = time.perf_counter() - inicio
+
+        parar = threading.Event()
+        latencias = [[] for _ in range(args.sessoes)]
+        problemas = []
+        sessoes = [
+            threading.Thread(target=sessao, args=(acervo, parar, latencias[i], problemas))
+            for i in range(args.sessoes)
+        ]
+        for thread in sessoes:
+            thread.start()
+        passos = alterar_pasta(pasta_json, args.segundos, parar)
+        for thread in sessoes:
+            thread.join()
+
+        # A última fotografia deve refletir a pasta depois das alterações
+        acervo.parar()
+        final = acervo.atualizar()
+        esperado = IndicePareceres(str(pasta_json)).listar()
+        if list(final.catalogo) != esperado:
+            problemas.append("última fotografia diferente do índice")
+
+        todas = sorted(latencia for lista in latencias for latencia in lista)
+        print(f"Pareceres: {args.quantidade} (+{passos} alterações), sessões: {args.sessoes}")
+        print(f"Primeira fotografia: {primeira * 1000:.1f} ms; versões publicadas: {final.versao}")
+        print(f"Conferir pastas + montar catálogo e mapa (antes, por sessão): {por_sessao * 1000:.1f} ms")
+        print(
+            f"Leitura da fotografia: {len(todas)} leituras, mediana {statistics.median(todas) * 1e6:.1f} µs, "
+            f"p99 {todas[int(len(todas) * 0.99)] * 1e6:.1f} µs, máximo {todas[-1] * 1000:.2f} ms"
+        )
+
+        # Os índices da pasta temporária não servem para mais nada
+        for caminho_indice in (
+            caminho_indice_padrao(pasta_json), caminho_indice_padrao(pasta_html, "indice_html"),
+            caminho_indice_padrao(pasta_json, "busca"), caminho_indice_padrao(pasta_json, "duplicatas"),
+        ):
+            for sufixo in ('', '-wal', '-shm'):
+                Path(f"{caminho_indice}{sufixo}").unlink(missing_ok=True)
+
+    if problemas:
+        print(f"❌ {len(problemas)} problema(s): {problemas[:5]}")
+        return 1
+
+    print("✓ Versões monotônicas, fotografias consistentes e a última igual ao índice")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
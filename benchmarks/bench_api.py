@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: carga na API HTTP dos pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Sobe a API (api_pareceres) sobre um acervo sintético numa thread, ou usa
+uma API já em execução (--url), e dispara clientes simultâneos com conexões
+mantidas abertas durante alguns segundos, numa mistura de pedidos: páginas
+da lista com e sem filtros, metadados, JSON e HTML de pareceres (com gzip) e
+revalidações com If-None-Match. Mede requisições por segundo e as latências
+por rota.
+
+Com a API própria, confere também que:
+
+- a lista, em cada ordenação e com os filtros de CNJ e classificação, traz
+  os mesmos pareceres, na mesma ordem, que IndicePareceres.consultar, e o
+  filtro de natureza os mesmos que um filtro direto sobre o índice
+- percorrer todas as páginas entrega cada parecer exatamente uma vez
+- o JSON e o HTML entregues são os arquivos do acervo, com e sem gzip
+- If-None-Match com a ETag recebida responde 304 sem corpo, e identity e
+  gzip têm ETags diferentes
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_api [--quantidade 1000] [--clientes 16] [--segundos 5]
+    python -m benchmarks.bench_api --url http://127.0.0.1:8502 [--clientes 16] [--segundos 5]
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import quote, urlencode, urlsplit
+
+from acervo import AcervoCompartilhado
+from alteracoes import DetectorAlteracoes
+from api_pareceres import ServidorApi, servir
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from indice_pareceres import IndicePareceres
+
+ORDENS_INDICE = {
+    'recentes': "Mais recentes",
+    'antigos': "Mais antigos",
+    'maior_valor': "Maior valor",
+    'menor_valor': "Menor valor",
+}
+
+
+class Cliente:
+    """Conexão HTTP/1.1 mantida aberta, um pedido de cada vez"""
+
+    def __init__(self, host, porta):
+        self.host, self.porta = host, porta
+        self.leitor = self.escritor = None
+
+    async def pedir(self, caminho, cabecalhos=None, metodo='GET'):
+        """Retorna (status, cabeçalhos, corpo); reconecta se o servidor fechou"""
+        for tentativa in range(2):
+            if self.escritor is None:
+                self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+            linhas = [f"{metodo} {caminho} HTTP/1.1", f"Host: {self.host}"]
+            linhas += [f"{nome}: {valor}" for nome, valor in (cabecalhos or {}).items()]
+            self.escritor.write(("\r\n".join(linhas) + "\r\n\r\n").encode('latin-1'))
+            try:
+                await self.escritor.drain()
+                return await self._ler_resposta(metodo)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.fechar()
+                if tentativa:
+                    raise
+
+    async def _ler_resposta(self, metodo):
+        status = int((await self.leitor.readuntil(b"\r\n")).split()[1])
+        cabecalhos = {}
+        while (linha := await self.leitor.readuntil(b"\r\n")) != b"\r\n":
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        tamanho = int(cabecalhos.get('content-length', 0))
+        corpo = b'' if metodo == 'HEAD' or status == 304 else await self.leitor.readexactly(tamanho)
+        if cabecalhos.get('connection') == 'close':
+            self.fechar()
+        return status, cabecalhos, corpo
+
+    def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+        self.leitor = self.escritor = None
+
+
+def decodificar(cabecalhos, corpo):
+    """Corpo sem a compressão indicada em Content-Encoding"""
+    return gzip.decompress(corpo) if cabecalhos.get('content-encoding') == 'gzip' else corpo
+
+
+async def obter_json(cliente, caminho):
+    status, cabecalhos, corpo = await cliente.pedir(caminho, {'Accept-Encoding': 'gzip'})
+    if status != 200:
+        raise RuntimeError(f"{caminho}: status {status}")
+    return json.loads(decodificar(cabecalhos, corpo))
+
+
+async def listar_tudo(cliente, parametros, por_pagina=97):
+    """Nomes de todos os pareceres da lista, seguindo o link da próxima página"""
+    caminho = f"/pareceres?{urlencode({**parametros, 'por_pagina': por_pagina})}"
+    nomes, total = [], None
+    while caminho:
+        pagina = await obter_json(cliente, caminho)
+        total = pagina['total']
+        nomes += [parecer['nome'] for parecer in pagina['pareceres']]
+        caminho = pagina['proxima']
+    return total, nomes
+
+
+async def conferir(cliente, pasta_json, problemas):
+    """Compara a API com o índice de pareceres e os arquivos do acervo"""
+    indice = IndicePareceres(pasta_json)
+    todos = indice.listar()
+
+    # Um trecho de CNJ, uma classificação e um trecho de natureza que ocorrem no acervo
+    sorteio = random.Random(3)
+    exemplo = sorteio.choice([p for p in todos if p.get('numero_processo')])
+    trecho_cnj = exemplo['numero_processo'][-9:-3]
+    classificacao = next(p['classificacao'] for p in todos if p.get('classificacao'))
+    naturezas = [p['natureza'] for p in todos if isinstance(p.get('natureza'), str)]
+    trecho_natureza = sorteio.choice(naturezas)[:8].lower() if naturezas else 'x'
+
+    casos = [({}, {})]
+    casos.append(({'cnj': trecho_cnj}, {'filtro_processo': trecho_cnj}))
+    casos.append(({'classificacao': classificacao}, {'classificacao': classificacao}))
+    casos.append(({'cnj': trecho_cnj[:2], 'classificacao': classificacao},
+                  {'filtro_processo': trecho_cnj[:2], 'classificacao': classificacao}))
+    for ordem, ordem_indice in ORDENS_INDICE.items():
+        for parametros, filtros in casos:
+            total, nomes = await listar_tudo(cliente, {**parametros, 'ordem': ordem})
+            esperado = [p['nome'] for p in indice.consultar(ordem=ordem_indice, **filtros)]
+            if nomes != esperado or total != len(esperado):
+                problemas.append(f"lista {ordem} {parametros}: {len(nomes)} da API, {len(esperado)} do índice")
+
+    total, nomes = await listar_tudo(cliente, {'natureza': trecho_natureza})
+    esperado = {p['nome'] for p in todos if trecho_natureza in (p.get('natureza') or '').casefold()}
+    if set(nomes) != esperado or len(nomes) != total:
+        problemas.append(f"natureza '{trecho_natureza}': {len(nomes)} da API, {len(esperado)} esperados")
+
+    total, nomes = await listar_tudo(cliente, {})
+    if total != len(todos) or len(nomes) != len(set(nomes)) or set(nomes) != {p['nome'] for p in todos}:
+        problemas.append(f"paginação: {len(nomes)} entregues ({len(set(nomes))} distintos) de {len(todos)}")
+
+    # Documentos: o JSON é o arquivo; o HTML é o do link, com e sem gzip
+    for parecer in sorteio.sample(todos, min(30, len(todos))):
+        identificador = Path(parecer['nome']).stem
+        metadados = await obter_json(cliente, f"/pareceres/{quote(identificador)}")
+        if metadados['nome'] != parecer['nome'] or metadados['hash'] != parecer['hash']:
+            problemas.append(f"metadados de {identificador}")
+
+        for formato, link in metadados['links'].items():
+            if link is None:
+                continue
+            identidade = await cliente.pedir(link)
+            comprimido = await cliente.pedir(link, {'Accept-Encoding': 'gzip'})
+            if identidade[0] != 200 or decodificar(comprimido[1], comprimido[2]) != identidade[2]:
+                problemas.append(f"{formato} de {identificador}: gzip diferente do original")
+            if formato == 'json' and identidade[2] != Path(parecer['arquivo']).read_bytes():
+                problemas.append(f"JSON de {identificador} diferente do arquivo")
+
+            etag = identidade[1].get('etag')
+            revalidado = await cliente.pedir(link, {'If-None-Match': etag})
+            if revalidado[0] != 304 or revalidado[2]:
+                problemas.append(f"{formato} de {identificador}: If-None-Match respondeu {revalidado[0]}")
+
+            # Cada codificação tem a sua ETag forte
+            if comprimido[1].get('content-encoding'):
+                etag_gzip = comprimido[1].get('etag')
+                if etag_gzip == etag:
+                    problemas.append(f"{formato} de {identificador}: mesma ETag em identity e gzip")
+                revalidado = await cliente.pedir(link, {'If-None-Match': etag_gzip, 'Accept-Encoding': 'gzip'})
+                outra = await cliente.pedir(link, {'If-None-Match': etag_gzip})
+                if revalidado[0] != 304 or outra[0] != 200:
+                    problemas.append(f"{formato} de {identificador}: ETag do gzip respondeu "
+                                     f"{revalidado[0]} (gzip) e {outra[0]} (identity)")
+
+    status, _, _ = await cliente.pedir("/pareceres/inexistente.json")
+    if status != 404:
+        problemas.append(f"parecer inexistente respondeu {status}")
+    status, _, _ = await cliente.pedir("/pareceres?por_pagina=0")
+    if status != 400:
+        problemas.append(f"por_pagina inválido respondeu {status}")
+    status, _, _ = await cliente.pedir("/pareceres", metodo='DELETE')
+    if status != 405:
+        problemas.append(f"DELETE respondeu {status}")
+
+
+async def preparar_rotas(cliente):
+    """Amostra de caminhos da API para a carga, por rota"""
+    pagina = await obter_json(cliente, "/pareceres?por_pagina=200")
+    classificacoes = sorted({p.get('classificacao') for p in pagina['pareceres'] if p.get('classificacao')})
+    cnjs = [p['numero_processo'][-9:-3] for p in pagina['pareceres'] if p.get('numero_processo')]
+    paginas = max(1, pagina['total'] // 50)
+
+    rotas = defaultdict(list)
+    for ordem in ORDENS_INDICE:
+        for numero in range(1, min(paginas, 10) + 1):
+            rotas['lista'].append(f"/pareceres?{urlencode({'ordem': ordem, 'pagina': numero})}")
+    for classificacao in classificacoes:
+        rotas['lista filtrada'].append(f"/pareceres?{urlencode({'classificacao': classificacao})}")
+    for cnj in cnjs[:50]:
+        rotas['lista filtrada'].append(f"/pareceres?{urlencode({'cnj': cnj})}")
+    for parecer in pagina['pareceres']:
+        rotas['metadados'].append(f"/pareceres/{quote(parecer['id'])}")
+        rotas['json'].append(parecer['links']['json'])
+        if parecer['links']['html']:
+            rotas['html'].append(parecer['links']['html'])
+    return rotas
+
+
+async def carga(host, porta, rotas, clientes, segundos, semente=42):
+    """Dispara os clientes pelo tempo pedido; retorna {rota: [latências]} e os erros"""
+    latencias = defaultdict(list)
+    erros = []
+    etags = {}
+    fim = time.perf_counter() + segundos
+
+    async def sessao(numero):
+        sorteio = random.Random(semente + numero)
+        cliente = Cliente(host, porta)
+        nomes = list(rotas)
+        try:
+            while time.perf_counter() < fim:
+                rota = sorteio.choice(nomes)
+                caminho = sorteio.choice(rotas[rota])
+                cabecalhos = {'Accept-Encoding': 'gzip'}
+                # Parte dos clientes revalida o que já recebeu (navegadores, caches)
+                if caminho in etags and sorteio.random() < 0.3:
+                    cabecalhos['If-None-Match'] = etags[caminho]
+                    rota = 'revalidação'
+
+                inicio = time.perf_counter()
+                status, resposta, _ = await cliente.pedir(caminho, cabecalhos)
+                latencias[rota].append(time.perf_counter() - inicio)
+                if status not in (200, 304):
+                    erros.append(f"{caminho}: {status}")
+                elif 'etag' in resposta:
+                    etags[caminho] = resposta['etag']
+        finally:
+            cliente.fechar()
+
+    await asyncio.gather(*(sessao(numero) for numero in range(clientes)))
+    return latencias, erros
+
+
+def iniciar_servidor(pasta_json, pasta_html, diretorio_downloads):
+    """Sobe a API numa thread, numa porta livre; retorna (acervo, porta)"""
+    acervo = AcervoCompartilhado(
+        DetectorAlteracoes(pasta_json, '.json'),
+        DetectorAlteracoes(pasta_html, '.html'),
+        indexar_conteudo=False,
+        calcular_semelhanca=False,
+    ).iniciar()
+    pronta = threading.Event()
+    porta = []
+
+    def executar():
+        asyncio.run(servir(ServidorApi(acervo, diretorio_downloads), '127.0.0.1', 0,
+                           pronto=lambda p: (porta.append(p), pronta.set())))
+
+    threading.Thread(target=executar, name="api-pareceres", daemon=True).start()
+    if not pronta.wait(60):
+        raise RuntimeError("a API não iniciou")
+    return acervo, porta[0]
+
+
+async def executar(host, porta, args, pasta_json=None):
+    problemas = []
+    cliente = Cliente(host, porta)
+    if pasta_json is not None:
+        inicio = time.perf_counter()
+        await conferir(cliente, pasta_json, problemas)
+        print(f"Conferências: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    rotas = await preparar_rotas(cliente)
+    cliente.fechar()
+
+    inicio = time.perf_counter()
+    latencias, erros = await carga(host, porta, rotas, args.clientes, args.segundos)
+    duracao = time.perf_counter() - inicio
+
+    total = sum(len(lista) for lista in latencias.values())
+    print(f"Clientes: {args.clientes}, duração: {duracao:.1f} s, requisições: {total}")
+    print(f"Vazão: {total / duracao:.0f} requisições/s")
+    for rota, lista in sorted(latencias.items()):
+        lista.sort()
+        print(
+            f"  {rota:<15} {len(lista):>7} req  mediana {statistics.median(lista) * 1000:6.2f} ms  "
+            f"p99 {lista[int(len(lista) * 0.99)] * 1000:6.2f} ms"
+        )
+    if erros:
+        problemas.append(f"{len(erros)} respostas de erro na carga: {erros[:3]}")
+    return problemas
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=1000, help='Número de pareceres do acervo sintético')
+    parser.add_argument('--clientes', type=int, default=16, help='Clientes simultâneos')
+    parser.add_argument('--segundos', type=float, default=5, help='Duração da carga')
+    parser.add_argument('--url', help='API já em execução (sem as conferências)')
+    args = parser.parse_args()
+
+    if args.url:
+        partes = urlsplit(args.url)
+        problemas = asyncio.run(executar(partes.hostname, partes.port or 80, args))
+    else:
+        pasta_json, pasta_html = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+        with tempfile.TemporaryDirectory() as downloads:
+            inicio = time.perf_counter()
+            acervo, porta = iniciar_servidor(str(pasta_json), str(pasta_html), Path(downloads))
+            print(f"Pareceres: {args.quantidade}; API pronta em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            try:
+                problemas = asyncio.run(executar('127.0.0.1', porta, args, str(pasta_json)))
+            finally:
+                acervo.parar()
+
+    if problemas:
+        print(f"❌ {len(problemas)} problema(s): {problemas[:5]}")
+        return 1
+
+    print("✓ Lista, filtros, paginação, documentos, gzip e ETags conferidos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: cache do conteúdo dos HTMLs
+Volpe Advogados Associados - Unimed Cuiabá
+
+Simula acessos aos HTMLs de uma pasta com popularidade desigual (poucos
+pareceres muito consultados, como no uso real) e mede, para um limite de
+memória, a taxa de acertos, os descartes e o tempo por leitura com e sem o
+cache (cache_conteudo.CacheConteudo).
+
+Confere também que:
+
+- todo conteúdo devolvido pelo cache é igual ao lido do disco
+- o cache nunca passa do limite de memória
+- um arquivo reescrito é lido de novo (a entrada antiga é invalidada)
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_cache_conteudo [pasta_html] [--quantidade 1000]
+                                               [--acessos 5000] [--limite-mb 64]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from cache_conteudo import LIMITE_PADRAO_MB, CacheConteudo
+from compactacao_html import ler_html
+from indice_pareceres import varrer_arquivos
+
+
+def ler_disco(caminho):
+    """Leitura sem cache (a função de carga do cache)"""
+    return ler_html(caminho, usar_cache=False)
+
+
+def sequencia_acessos(caminhos, quantidade, semente=42):
+    """Sorteia acessos concentrados nos primeiros arquivos (cauda longa)"""
+    sorteio = random.Random(semente)
+    return [caminhos[int(len(caminhos) * sorteio.random() ** 3)] for _ in range(quantidade)]
+
+
+def conferir_invalidacao(caminho):
+    """Reescreve uma cópia do arquivo e confere que o cache lê a nova versão"""
+    with tempfile.TemporaryDirectory() as temporario:
+        # Cópia reconstruída (a pasta temporária não tem os recursos)
+        copia = Path(temporario) / Path(caminho).name
+        copia.write_bytes(ler_disco(caminho))
+
+        cache = CacheConteudo(2**20)
+        original = cache.ler(copia, ler_disco)
+
+        copia.write_bytes(original + b"\n<!-- revisado -->")
+        stat = copia.stat()
+        os.utime(copia, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        relido = cache.ler(copia, ler_disco)
+        return relido == copia.read_bytes() and cache.invalidacoes == 1
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta_html', nargs='?', help='Pasta dos HTMLs (padrão: acervo sintético)')
+    parser.add_argument('--quantidade', type=int, default=1000, help='Tamanho do acervo sintético')
+    parser.add_argument('--acessos', type=int, default=5000, help='Quantidade de leituras simuladas')
+    parser.add_argument('--limite-mb', type=float, default=LIMITE_PADRAO_MB, help='Limite de memória do cache (MB)')
+    args = parser.parse_args()
+
+    pasta_html = args.pasta_html or gerar_corpus(DESTINO_PADRAO, args.quantidade)[1]
+    caminhos = sorted(caminho for caminho, _, _ in varrer_arquivos(pasta_html, '.html'))
+    if not caminhos:
+        print("Nenhum HTML encontrado")
+        return 1
+
+    acessos = sequencia_acessos(caminhos, args.acessos)
+    originais = {caminho: ler_disco(caminho) for caminho in set(acessos)}
+    limite = int(args.limite_mb * 2**20)
+
+    # Sem cache: cada acesso lê (e reconstrói) o arquivo
+    inicio = time.perf_counter()
+    for caminho in acessos:
+        ler_disco(caminho)
+    tempo_sem_cache = time.perf_counter() - inicio
+
+    cache = CacheConteudo(limite)
+    tempos, resultados, ocupacao = [], [], []
+    for caminho in acessos:
+        inicio = time.perf_counter()
+        resultados.append(cache.ler(caminho, ler_disco))
+        tempos.append(time.perf_counter() - inicio)
+        ocupacao.append(cache.estatisticas()['bytes'])
+    tempo_com_cache = sum(tempos)
+
+    problemas = [f"conteúdo divergente: {caminho}" for caminho, dados in zip(acessos, resultados)
+                 if dados != originais[caminho]]
+    if max(ocupacao) > limite:
+        problemas.append(f"limite excedido: {max(ocupacao)} bytes")
+
+    if not conferir_invalidacao(caminhos[0]):
+        problemas.append("arquivo reescrito não foi relido")
+
+    estatisticas = cache.estatisticas()
+    volume = sum(len(dados) for dados in originais.values())
+    print(f"Arquivos distintos acessados: {len(originais)} ({volume / 2**20:.1f} MB)")
+    print(f"Limite do cache: {args.limite_mb:g} MB, em uso ao final: {estatisticas['bytes'] / 2**20:.1f} MB "
+          f"({estatisticas['entradas']} arquivos)")
+    print(f"Acertos: {estatisticas['acertos']} ({estatisticas['taxa_acertos']:.1%}), "
+          f"falhas: {estatisticas['falhas']}, descartes: {estatisticas['descartes']}")
+    print(f"{'Leitura':<12}{'Total (s)':>12}{'Por acesso (µs)':>18}")
+    for rotulo, total in [("Sem cache", tempo_sem_cache), ("Com cache", tempo_com_cache)]:
+        print(f"{rotulo:<12}{total:>12.3f}{total / len(acessos) * 1e6:>18.1f}")
+    print(f"Mediana com cache: {statistics.median(tempos) * 1e6:.1f} µs")
+
+    if problemas:
+        for problema in problemas[:10]:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ Conteúdo do cache idêntico ao disco, limite respeitado e invalidação conferida")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
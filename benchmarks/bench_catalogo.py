@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: memória do catálogo compacto x lista de dicionários
+Volpe Advogados Associados - Unimed Cuiabá
+
+Gera em memória (sem gravar arquivos) os metadados de um acervo sintético,
+no mesmo formato JSON guardado no índice, e mede com tracemalloc a memória
+ocupada por:
+
+- a lista de dicionários, como retornada por IndicePareceres.listar
+- o catalogo.Catalogo montado a partir dos mesmos dados
+
+Também confere que cada registro do catálogo é igual ao dicionário
+original (sai com código 1 se algum for diferente) e mede o tempo para
+percorrer os dois.
+
+Uso:
+    python -m benchmarks.bench_catalogo [--quantidade 100000]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import carregar_modelos, gerar_documento
+from catalogo import Catalogo
+from extracao import extrair_info_json
+
+
+def gerar_metadados(quantidade, semente=42, pasta="pareceres"):
+    """Gera os metadados (JSON do índice) de `quantidade` pareceres sintéticos"""
+    textos, partes, _ = carregar_modelos("pareceres", "pareceres_html")
+    rng = random.Random(semente)
+    metadados = []
+    for indice in range(quantidade):
+        _, dados = gerar_documento(rng, indice, textos, partes, 0.1)
+        arquivo = Path(pasta) / f"parecer_{dados['hash']}.json"
+        metadados.append(json.dumps(extrair_info_json(arquivo, dados), ensure_ascii=False))
+    return metadados
+
+
+def medir_memoria(montar):
+    """Retorna (objeto montado, bytes alocados que permanecem após a montagem)"""
+    gc.collect()
+    tracemalloc.start()
+    objeto = montar()
+    gc.collect()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objeto, atual
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=100_000, help='Número de pareceres')
+    args = parser.parse_args()
+
+    print(f"Gerando metadados de {args.quantidade} pareceres...", flush=True)
+    metadados = gerar_metadados(args.quantidade)
+
+    dicionarios, memoria_dicionarios = medir_memoria(lambda: [json.loads(m) for m in metadados])
+    catalogo, memoria_catalogo = medir_memoria(lambda: Catalogo(json.loads(m) for m in metadados))
+
+    divergentes = sum(1 for original, registro in zip(dicionarios, catalogo) if original != registro)
+    if len(catalogo) != len(dicionarios):
+        divergentes += 1
+
+    inicio = time.perf_counter()
+    for parecer in dicionarios:
+        parecer['arquivo']
+    tempo_dicionarios = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for parecer in catalogo:
+        parecer['arquivo']
+    tempo_catalogo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    catalogo.contagens('risco')
+    tempo_contagem = time.perf_counter() - inicio
+
+    quantidade = len(dicionarios) or 1
+    print(f"\n{'Representação':<24}{'Total (MB)':>12}{'Por parecer (bytes)':>22}{'Por 100k (MB)':>16}")
+    for nome, memoria in (("Lista de dicionários", memoria_dicionarios), ("Catálogo compacto", memoria_catalogo)):
+        print(
+            f"{nome:<24}{memoria / 2**20:>12.1f}{memoria / quantidade:>22.0f}"
+            f"{memoria / quantidade * 100_000 / 2**20:>16.1f}"
+        )
+    print(f"\nRedução: {memoria_dicionarios / max(memoria_catalogo, 1):.1f}x")
+    print(f"Percorrer dicionários: {tempo_dicionarios * 1000:.1f} ms")
+    print(f"Percorrer catálogo (registros montados sob demanda): {tempo_catalogo * 1000:.1f} ms")
+    print(f"Contagem por risco no catálogo (só códigos): {tempo_contagem * 1000:.1f} ms")
+
+    if divergentes:
+        print(f"❌ {divergentes} registro(s) do catálogo diferentes do original")
+        return 1
+
+    print("✓ Todos os registros do catálogo são iguais aos dicionários originais")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: consultas da página sobre a fotografia x sobre o índice SQLite
+Volpe Advogados Associados - Unimed Cuiabá
+
+Copia um acervo sintético para uma pasta temporária, acrescenta reanálises
+(cópias do mesmo processo com outra data, valor e classificação) e
+pareceres sem data, valor ou número, e compara, para várias combinações de
+filtros e ordenações, as respostas de consulta_pareceres.ConsultaPareceres
+(montada com o catálogo da fotografia do acervo) com as de IndicePareceres:
+
+- contar e a lista completa de consultar (com valor_numerico e
+  quantidade_versoes), página a página
+- consultar restrito a poucos e a muitos arquivos (busca textual, semelhantes)
+- historico de uma amostra de processos
+- as mesmas conferências para ConsultaArquivosHtml (página dos HTMLs,
+  montada com a fotografia) e IndiceArquivosHtml, com HTMLs de mesmo nome
+  em subpastas e de mesmo mtime, para conferir os desempates
+
+Sai com código 1 se alguma resposta for diferente. Mede também o tempo de
+uma execução da página (contagem + uma página) nos dois caminhos.
+
+Uso:
+    python -m benchmarks.bench_consulta [--quantidade 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+from itertools import product
+from pathlib import Path
+
+from acervo import AcervoCompartilhado
+from alteracoes import DetectorAlteracoes
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from consulta_pareceres import ConsultaPareceres
+from indice_pareceres import (
+    ORDENACOES_HTML,
+    ORDENACOES_PARECERES,
+    IndiceArquivosHtml,
+    IndicePareceres,
+    caminho_indice_padrao,
+)
+
+
+def acrescentar_variacoes(pasta_json, semente=7):
+    """Grava reanálises e pareceres incompletos na pasta; retorna a quantidade"""
+    rng = random.Random(semente)
+    arquivos = sorted(Path(pasta_json).glob('*.json'))
+    gravados = 0
+
+    for numero, origem in enumerate(rng.sample(arquivos, len(arquivos) // 5)):
+        dados = json.loads(origem.read_text(encoding='utf-8'))
+        for versao in range(rng.randint(1, 3)):
+            copia = dict(dados)
+            copia['timestamp'] = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T10:00:00"
+            if versao == 0 and numero % 7 == 0:
+                copia['timestamp'] = dados['timestamp']  # mesma data: desempata pelo arquivo
+            copia['hash'] = f"{numero:08d}{versao:024d}"
+            destino = Path(pasta_json) / f"reanalise_{numero}_{versao}.json"
+            destino.write_text(json.dumps(copia, ensure_ascii=False), encoding='utf-8')
+            gravados += 1
+
+    for numero, origem in enumerate(rng.sample(arquivos, 20)):
+        dados = json.loads(origem.read_text(encoding='utf-8'))
+        if numero % 3 == 0:
+            dados.pop('timestamp', None)
+        if numero % 3 == 1:
+            dados['resultado'] = "Parecer sem número, valor ou classificação."
+        if numero % 3 == 2:
+            dados['timestamp'] = None
+        destino = Path(pasta_json) / f"incompleto_{numero}.json"
+        destino.write_text(json.dumps(dados, ensure_ascii=False), encoding='utf-8')
+        gravados += 1
+
+    return gravados
+
+
+def copiar_htmls(origem_html, pasta_html, quantidade):
+    """Copia `quantidade` HTMLs, alguns também numa subpasta e com mtimes repetidos"""
+    pasta_html.mkdir()
+    (pasta_html / "reanalises").mkdir()
+    for numero, origem in enumerate(sorted(Path(origem_html).glob('*.html'))[:quantidade]):
+        shutil.copy2(origem, pasta_html / origem.name)
+        if numero % 10 == 0:
+            shutil.copy2(origem, pasta_html / "reanalises" / origem.name)
+        if numero % 6 == 0:
+            os.utime(pasta_html / origem.name, ns=(1_700_000_000 * 10**9, 1_700_000_000 * 10**9))
+
+
+def combinacoes(classificacoes):
+    """Filtros conferidos: (filtro_processo, classificacao, faixa_valor, periodo, apenas_recentes)"""
+    processos = ["", "-1", "2024", "x"]
+    faixas = [None, (Decimal("10000"), None), (None, Decimal("500000.50")), (Decimal("1000"), Decimal("90000"))]
+    periodos = [None, (date(2024, 6, 1), date(2024, 12, 31)), (date(2025, 3, 1), date(2025, 3, 1))]
+    for processo, classificacao, faixa, periodo, recentes in product(
+        processos, [None, *classificacoes[:2], "inexistente"], faixas, periodos, (False, True)
+    ):
+        yield {
+            'filtro_processo': processo, 'classificacao': classificacao,
+            'faixa_valor': faixa, 'periodo': periodo, 'apenas_recentes': recentes,
+        }
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=2000, help='Número de pareceres do acervo sintético')
+    args = parser.parse_args()
+
+    origem_json, origem_html = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta_json = Path(temporario) / "pareceres"
+        pasta_html = Path(temporario) / "pareceres_html"
+        shutil.copytree(origem_json, pasta_json)
+        copiar_htmls(origem_html, pasta_html, max(50, args.quantidade // 4))
+        variacoes = acrescentar_variacoes(pasta_json)
+
+        acervo = AcervoCompartilhado(
+            DetectorAlteracoes(str(pasta_json), '.json'), DetectorAlteracoes(str(pasta_html), '.html'),
+            indexar_conteudo=False, calcular_semelhanca=False
+        )
+        inicio = time.perf_counter()
+        fotografia = acervo.atualizar()
+        print(f"Pareceres: {len(fotografia.catalogo)} ({variacoes} reanálises e incompletos); "
+              f"fotografia em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        inicio = time.perf_counter()
+        consulta = ConsultaPareceres(fotografia.catalogo)
+        print(f"Consultas montadas em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        indice = IndicePareceres(str(pasta_json))
+        classificacoes = sorted(fotografia.agregados.get('classificacao', {}))
+
+        conferidas = 0
+        for filtros in combinacoes(classificacoes):
+            for ordem in ORDENACOES_PARECERES:
+                esperado = indice.consultar(ordem=ordem, **filtros)
+                obtido = consulta.consultar(ordem=ordem, **filtros)
+                if obtido != esperado:
+                    problemas.append(f"consultar {ordem} {filtros}")
+                pagina = dict(ordem=ordem, limite=25, deslocamento=len(esperado) // 2, **filtros)
+                if consulta.consultar(**pagina) != indice.consultar(**pagina):
+                    problemas.append(f"página {ordem} {filtros}")
+                conferidas += 1
+            if consulta.contar(**filtros) != indice.contar(**filtros):
+                problemas.append(f"contar {filtros}")
+
+        rng = random.Random(3)
+        todos = [parecer['arquivo'] for parecer in fotografia.catalogo]
+        for quantidade in (1, 10, len(todos) // 4, len(todos)):
+            arquivos = set(rng.sample(todos, quantidade)) | {"nao_existe.json"}
+            for ordem in ORDENACOES_PARECERES:
+                if consulta.consultar(arquivos=arquivos, ordem=ordem) != indice.consultar(arquivos=arquivos, ordem=ordem):
+                    problemas.append(f"consultar {quantidade} arquivos {ordem}")
+                conferidas += 1
+
+        numeros = [parecer.get('numero_processo') for parecer in fotografia.catalogo]
+        for numero in rng.sample(numeros, 200) + [None, "", "nenhum", "0000000-00.0000.0.00.0000"]:
+            if consulta.historico(numero) != indice.historico(numero):
+                problemas.append(f"historico {numero}")
+            conferidas += 1
+
+        # Página dos HTMLs: a consulta da fotografia contra o índice
+        consulta_html = fotografia.consulta_html
+        indice_html = IndiceArquivosHtml(str(pasta_html))
+        caminhos = [arquivo['caminho'] for arquivo in indice_html.consultar()]
+        if consulta_html.estatisticas() != indice_html.estatisticas():
+            problemas.append("estatisticas dos HTMLs")
+        for quantidade in (None, 1, 10, len(caminhos) // 4, len(caminhos)):
+            pedidos = None if quantidade is None else set(rng.sample(caminhos, quantidade)) | {"nao_existe.html"}
+            for filtro_busca in ("", "2022", "-1", "parecer", "ção", "x"):
+                for ordem in ORDENACOES_HTML:
+                    esperado = indice_html.consultar(filtro_busca, pedidos, ordem)
+                    if consulta_html.consultar(filtro_busca, pedidos, ordem) != esperado:
+                        problemas.append(f"HTMLs {ordem} {filtro_busca!r} {quantidade}")
+                    pagina = (filtro_busca, pedidos, ordem, 25, len(esperado) // 2)
+                    if consulta_html.consultar(*pagina) != indice_html.consultar(*pagina):
+                        problemas.append(f"página dos HTMLs {ordem} {filtro_busca!r} {quantidade}")
+                    conferidas += 1
+                if consulta_html.contar(filtro_busca, pedidos) != indice_html.contar(filtro_busca, pedidos):
+                    problemas.append(f"contar HTMLs {filtro_busca!r} {quantidade}")
+
+        # Uma execução da página: contagem e a página visível
+        filtros = {'filtro_processo': "-1", 'classificacao': None, 'faixa_valor': (None, None),
+                   'periodo': None, 'apenas_recentes': True}
+        tempos = {}
+        for nome, origem in (("índice SQLite", indice), ("fotografia", consulta)):
+            inicio = time.perf_counter()
+            for pagina in range(20):
+                origem.contar(**filtros)
+                origem.consultar(ordem="Maior valor", limite=50, deslocamento=50 * pagina, **filtros)
+            tempos[nome] = (time.perf_counter() - inicio) / 20
+
+        for caminho_indice in (caminho_indice_padrao(pasta_json), caminho_indice_padrao(pasta_html, "indice_html")):
+            for sufixo in ('', '-wal', '-shm'):
+                Path(f"{caminho_indice}{sufixo}").unlink(missing_ok=True)
+
+    print(f"Consultas conferidas: {conferidas}")
+    for nome, tempo in tempos.items():
+        print(f"Execução da página ({nome}): {tempo * 1000:.2f} ms")
+
+    if problemas:
+        print(f"❌ {len(problemas)} problema(s): {problemas[:5]}")
+        return 1
+
+    print("✓ Contagens, listas, páginas e versões iguais às dos índices")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
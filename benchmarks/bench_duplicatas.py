@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: versões por processo e pareceres quase idênticos
+Volpe Advogados Associados - Unimed Cuiabá
+
+Copia os JSONs de um acervo sintético e acrescenta reanálises (mesmo CNJ,
+timestamp e hash novos, texto levemente alterado). Mede:
+
+- o cálculo das assinaturas MinHash (duplicatas.IndiceDuplicatas) e a
+  atualização incremental, que só recalcula o que mudou
+- o agrupamento dos quase idênticos pelo LSH, comparando o número de pares
+  candidatos com o número de pares de uma comparação de todos com todos
+
+Confere também que:
+
+- o modo "só a versão mais recente" deixa exatamente um parecer por
+  processo, o mais novo, e o histórico traz as versões em ordem
+- toda reanálise é encontrada como quase idêntica ao original
+- numa amostra, os pares com semelhança de Jaccard exata acima do limiar
+  (comparando os conjuntos de shingles) são encontrados pelo LSH, e a
+  semelhança estimada fica próxima da exata
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_duplicatas [--quantidade 1000] [--reanalises 100] [--amostra 300]
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from busca_textual import carregar_campos_json
+from duplicatas import LIMIAR_SEMELHANCA, IndiceDuplicatas, documentos_json, shingles
+from extracao import normalizar_numero_processo
+from indice_pareceres import IndicePareceres
+
+
+def criar_reanalises(pasta, quantidade, semente=7):
+    """Grava reanálises de `quantidade` pareceres; retorna [(original, reanálise)]"""
+    sorteio = random.Random(semente)
+    originais = sorted(Path(pasta).glob("*.json"))
+    pares = []
+
+    for caminho in sorteio.sample(originais, quantidade):
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+        if not isinstance(dados.get('resultado'), str):
+            continue
+
+        momento = datetime.fromisoformat(dados['timestamp']) + timedelta(days=sorteio.randint(1, 90))
+        dados['timestamp'] = momento.isoformat()
+        dados['hash'] = hashlib.md5(f"{caminho.name}:reanalise".encode('utf-8')).hexdigest()
+        dados['resultado'] += "\n\nObservação: parecer revisado após a juntada de novos documentos aos autos."
+
+        novo = Path(pasta) / f"parecer_{dados['hash']}.json"
+        novo.write_text(json.dumps(dados, ensure_ascii=False), encoding='utf-8')
+        pares.append((str(caminho), str(novo)))
+
+    return pares
+
+
+def jaccard(a, b):
+    """Semelhança de Jaccard exata entre dois conjuntos"""
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def conferir_versoes(indice, pares):
+    """Problemas do agrupamento por processo e do modo só a versão mais recente"""
+    problemas = []
+    pareceres = indice.listar()
+    processos = {}
+    for parecer in pareceres:
+        chave = normalizar_numero_processo(parecer.get('numero_processo')) or parecer['arquivo']
+        processos.setdefault(chave, []).append(parecer)
+
+    recentes = indice.consultar(apenas_recentes=True)
+    if len(recentes) != len(processos) or indice.contar(apenas_recentes=True) != len(processos):
+        problemas.append(f"só a mais recente: {len(recentes)} pareceres para {len(processos)} processos")
+
+    esperados = {max(versoes, key=lambda p: (p['timestamp'], p['arquivo']))['arquivo']
+                 for versoes in processos.values()}
+    if {parecer['arquivo'] for parecer in recentes} != esperados:
+        problemas.append("só a mais recente: versão diferente da mais nova")
+
+    for original, reanalise in pares:
+        numero = next(p['numero_processo'] for p in pareceres if p['arquivo'] == original)
+        historico = [parecer['arquivo'] for parecer in indice.historico(numero)]
+        if historico[:1] != [reanalise] or original not in historico:
+            problemas.append(f"histórico fora de ordem: {Path(original).name}")
+            break
+
+    contagens = {p['arquivo']: p['quantidade_versoes'] for p in indice.consultar()}
+    if any(contagens[a] < 2 or contagens[b] < 2 for a, b in pares):
+        problemas.append("quantidade de versões não contou a reanálise")
+
+    return problemas
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=1000, help='Tamanho do acervo sintético')
+    parser.add_argument('--reanalises', type=int, default=100, help='Reanálises acrescentadas')
+    parser.add_argument('--amostra', type=int, default=300, help='Pareceres comparados todos com todos')
+    args = parser.parse_args()
+
+    pasta_origem, _ = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta = Path(temporario) / "pareceres"
+        shutil.copytree(pasta_origem, pasta)
+        pares = criar_reanalises(pasta, args.reanalises)
+
+        indice = IndicePareceres(pasta, caminho_indice=Path(temporario) / "indice.sqlite3")
+        indice.sincronizar()
+        problemas += conferir_versoes(indice, pares)
+
+        duplicatas = IndiceDuplicatas(Path(temporario) / "duplicatas.sqlite3")
+        versoes = indice.versoes()
+
+        inicio = time.perf_counter()
+        resumo = duplicatas.sincronizar(documentos_json(versoes))
+        tempo_assinaturas = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        novo_resumo = duplicatas.sincronizar(documentos_json(versoes))
+        tempo_incremental = time.perf_counter() - inicio
+        if novo_resumo['calculados'] or resumo['erros']:
+            problemas.append("a atualização incremental recalculou assinaturas")
+
+        inicio = time.perf_counter()
+        candidatos = sum(1 for _ in duplicatas.pares_candidatos())
+        grupos = duplicatas.grupos()
+        tempo_grupos = time.perf_counter() - inicio
+
+        # Toda reanálise é quase idêntica ao original
+        nao_encontradas = [
+            reanalise for original, reanalise in pares
+            if reanalise not in dict(duplicatas.semelhantes(original))
+        ]
+        if nao_encontradas:
+            problemas.append(f"{len(nao_encontradas)} reanálise(s) não encontradas como quase idênticas")
+
+        # Todos com todos numa amostra, com os conjuntos exatos
+        sorteio = random.Random(11)
+        amostra = sorteio.sample(sorted(versoes), min(args.amostra, len(versoes)))
+        conjuntos = {a: set(shingles(carregar_campos_json(a)['conteudo']).tolist()) for a in amostra}
+        inicio = time.perf_counter()
+        exatos = {
+            (a, b): jaccard(conjuntos[a], conjuntos[b])
+            for a, b in itertools.combinations(sorted(amostra), 2)
+        }
+        tempo_exato = time.perf_counter() - inicio
+
+        acima = [par for par, valor in exatos.items() if valor >= LIMIAR_SEMELHANCA]
+        encontrados = {
+            (a, b) for a in amostra for b, _ in duplicatas.semelhantes(a, limiar=0.0) if a < b
+        }
+        perdidos = [par for par in acima if par not in encontrados]
+        erros = [
+            abs(dict(duplicatas.semelhantes(a, limiar=0.0))[b] - exatos[(a, b)])
+            for a, b in encontrados if (a, b) in exatos
+        ]
+        if len(perdidos) > 0.01 * max(1, len(acima)):
+            problemas.append(f"{len(perdidos)} de {len(acima)} pares acima do limiar não encontrados pelo LSH")
+
+    total = len(versoes)
+    todos_pares = total * (total - 1) // 2
+    print(f"Pareceres: {total} ({len(pares)} reanálises)")
+    print(f"Assinaturas: {tempo_assinaturas:.2f}s ({tempo_assinaturas / total * 1e3:.1f} ms por parecer); "
+          f"atualização sem mudanças: {tempo_incremental * 1e3:.0f} ms")
+    print(f"Pares candidatos do LSH: {candidatos:,} de {todos_pares:,} ({candidatos / todos_pares:.1%}); "
+          f"grupos: {len(grupos)} (maior: {len(grupos[0]) if grupos else 0}) em {tempo_grupos:.2f}s")
+    print(f"Amostra de {len(amostra)}: todos com todos (exato) em {tempo_exato:.2f}s; "
+          f"{len(acima)} pares acima de {LIMIAR_SEMELHANCA:.0%}, {len(perdidos)} perdidos pelo LSH")
+    if erros:
+        print(f"Erro da semelhança estimada: médio {sum(erros) / len(erros):.3f}, máximo {max(erros):.3f}")
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ Versões agrupadas por processo, reanálises e pares da amostra encontrados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
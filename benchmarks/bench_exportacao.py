@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: exportação da lista de pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Exporta um acervo sintético em CSV, JSONL e XLSX (ver exportacao.py) e mede,
+para cada formato, o tempo, o tamanho do arquivo e o pico de memória
+(tracemalloc) durante a geração, com o acervo inteiro e com um décimo dele:
+como as linhas são gravadas à medida que são lidas, o pico não deve
+crescer com o número de pareceres.
+
+Confere também que cada arquivo, lido de volta (csv, json e o XML da
+planilha do XLSX), tem exatamente as linhas de linhas_exportacao, na mesma
+ordem e com os mesmos valores.
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_exportacao [pasta_json] [--quantidade 5000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from exportacao import COLUNAS, EPOCA_EXCEL, FORMATOS, exportar, linhas_exportacao
+from indice_pareceres import IndicePareceres
+
+
+ESPACO_XLSX = {'s': "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def normalizar(linha):
+    """Linha de linhas_exportacao como texto, para comparar com o que foi lido de volta"""
+    textos = []
+    for campo, _ in COLUNAS:
+        valor = linha[campo]
+        if valor is None:
+            textos.append("")
+        elif isinstance(valor, Decimal):
+            textos.append(f"{valor:.2f}")
+        elif isinstance(valor, datetime):
+            textos.append(valor.isoformat())
+        else:
+            textos.append(str(valor))
+    return textos
+
+
+def ler_csv(dados):
+    """Linhas de dados do CSV exportado"""
+    leitor = csv.reader(io.StringIO(dados.decode('utf-8-sig'), newline=''))
+    next(leitor)
+    return [[f"{Decimal(v):.2f}" if i == 3 and v else v for i, v in enumerate(linha)] for linha in leitor]
+
+
+def ler_jsonl(dados):
+    """Linhas do JSONL exportado"""
+    linhas = []
+    for texto in dados.decode('utf-8').splitlines():
+        registro = json.loads(texto)
+        linha = []
+        for campo, _ in COLUNAS:
+            valor = registro[campo]
+            if valor is None:
+                linha.append("")
+            elif campo == 'valor':
+                linha.append(f"{Decimal(str(valor)):.2f}")
+            elif campo == 'data_analise':
+                linha.append(valor)
+            else:
+                linha.append(str(valor))
+        linhas.append(linha)
+    return linhas
+
+
+def ler_xlsx(dados):
+    """Linhas de dados da primeira planilha do XLSX exportado"""
+    with zipfile.ZipFile(io.BytesIO(dados)) as pacote:
+        planilha = ET.fromstring(pacote.read('xl/worksheets/sheet1.xml'))
+
+    linhas = []
+    for linha_xml in planilha.iterfind('.//s:sheetData/s:row', ESPACO_XLSX):
+        linha = []
+        for celula in linha_xml.iterfind('s:c', ESPACO_XLSX):
+            numero = celula.findtext('s:v', namespaces=ESPACO_XLSX)
+            if celula.get('t') == 'inlineStr':
+                linha.append(celula.findtext('s:is/s:t', default="", namespaces=ESPACO_XLSX))
+            elif numero is None:
+                linha.append("")
+            elif celula.get('s') == '2':
+                # Data do Excel (dias desde EPOCA_EXCEL), arredondada ao segundo
+                momento = EPOCA_EXCEL + timedelta(days=float(numero), microseconds=500_000)
+                linha.append(momento.replace(microsecond=0).isoformat())
+            else:
+                linha.append(f"{Decimal(numero):.2f}")
+        linhas.append(linha)
+    return linhas[1:]
+
+
+LEITORES = {'csv': ler_csv, 'jsonl': ler_jsonl, 'xlsx': ler_xlsx}
+
+
+def medir(indice, formato, limite=None):
+    """Exporta para a memória; retorna (segundos, pico de memória, bytes do arquivo)"""
+    destino = io.BytesIO()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    exportar(indice.percorrer_consulta(limite=limite), formato, destino)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # O próprio BytesIO de destino entra no pico; desconta o tamanho do arquivo
+    return segundos, max(0, pico - destino.tell()), destino.getvalue()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta_json', nargs='?', help='Pasta dos pareceres (padrão: acervo sintético)')
+    parser.add_argument('--quantidade', type=int, default=5000, help='Tamanho do acervo sintético')
+    args = parser.parse_args()
+
+    pasta_json = args.pasta_json or gerar_corpus(DESTINO_PADRAO, args.quantidade)[0]
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        indice = IndicePareceres(pasta_json, caminho_indice=Path(temporario) / "indice.sqlite3")
+        indice.sincronizar()
+        total = indice.contar()
+        esperado = [normalizar(linha) for linha in linhas_exportacao(indice.percorrer_consulta())]
+
+        print(f"Pareceres exportados: {total}")
+        print(f"{'Formato':<9}{'Tempo (s)':>11}{'Tamanho (MB)':>14}"
+              f"{'Pico (KB)':>12}{'Pico 1/10 (KB)':>16}")
+        for formato in FORMATOS:
+            segundos, pico, dados = medir(indice, formato)
+            _, pico_parcial, _ = medir(indice, formato, limite=max(1, total // 10))
+
+            if LEITORES[formato](dados) != esperado:
+                problemas.append(f"{formato}: linhas lidas de volta diferentes das exportadas")
+
+            print(f"{formato.upper():<9}{segundos:>11.2f}{len(dados) / 2**20:>14.2f}"
+                  f"{pico / 1024:>12.0f}{pico_parcial / 1024:>16.0f}")
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ CSV, JSONL e XLSX lidos de volta iguais às linhas exportadas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: extratores individuais x extração em passada única
+Volpe Advogados Associados - Unimed Cuiabá
+
+Compara as cinco funções extrair_* (uma busca por campo, mais as regras
+alternativas) com extrair_metadados_markdown, que percorre o texto uma só
+vez. Antes de medir, confere documento a documento que os dois métodos
+retornam exatamente os mesmos valores no acervo informado (teste "golden"),
+inclusive em cópias de cada documento sem um dos rótulos, para exercitar as
+regras alternativas. Qualquer divergência encerra com código de saída 1.
+
+Uso:
+    python -m benchmarks.bench_extracao [--pasta pareceres] [--repeticoes 20]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from extracao import (
+    ROTULOS_MARKDOWN,
+    extrair_classificacao,
+    extrair_metadados_markdown,
+    extrair_natureza,
+    extrair_numero_processo,
+    extrair_parte_contraria,
+    extrair_valor,
+)
+
+
+def extracao_individual(texto):
+    """Extrai os campos com as funções originais, uma por campo"""
+    return (
+        extrair_numero_processo(texto),
+        extrair_classificacao(texto),
+        extrair_valor(texto),
+        extrair_parte_contraria(texto),
+        extrair_natureza(texto),
+    )
+
+
+def extracao_passada_unica(texto):
+    """Extrai os campos com o extrator de passada única"""
+    return tuple(extrair_metadados_markdown(texto)[:5])
+
+
+def carregar_textos(pasta):
+    """Carrega o markdown `resultado` de todos os pareceres da pasta"""
+    textos = []
+    for arquivo in sorted(Path(pasta).glob('**/*.json')):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            resultado = json.load(f).get('resultado')
+        if isinstance(resultado, str):
+            textos.append((arquivo.name, resultado))
+    return textos
+
+
+def variantes(nome, texto):
+    """Gera o texto original e cópias sem cada um dos rótulos presentes"""
+    yield nome, texto
+    for rotulos in ROTULOS_MARKDOWN.values():
+        for rotulo in rotulos:
+            marcador = f"**{rotulo}:**"
+            if marcador in texto:
+                yield f"{nome} (sem {marcador})", texto.replace(marcador, '')
+
+
+def medir(funcao, textos, repeticoes):
+    """Retorna o melhor tempo (s) para processar todos os textos"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _, texto in textos:
+            funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pasta', default='pareceres', help='Pasta com os pareceres JSON')
+    parser.add_argument('--repeticoes', type=int, default=20, help='Repetições (vale o melhor tempo)')
+    args = parser.parse_args()
+
+    textos = carregar_textos(args.pasta)
+    if not textos:
+        print(f"Nenhum parecer markdown encontrado em '{args.pasta}'")
+        return 1
+
+    # Conferência golden: mesmos valores, documento a documento
+    divergencias = []
+    conferidos = 0
+    for nome, texto in textos:
+        for nome_variante, variante in variantes(nome, texto):
+            conferidos += 1
+            esperado = extracao_individual(variante)
+            obtido = extracao_passada_unica(variante)
+            if esperado != obtido:
+                divergencias.append((nome_variante, esperado, obtido))
+
+    if divergencias:
+        print(f"❌ {len(divergencias)} documento(s) com valores divergentes:")
+        for nome, esperado, obtido in divergencias:
+            print(f"   {nome}\n     esperado: {esperado}\n     obtido:   {obtido}")
+        return 1
+
+    print(f"✓ {len(textos)} documentos ({conferidos} variantes): valores idênticos aos extratores originais")
+
+    regras = {}
+    for _, texto in textos:
+        for campo, regra in extrair_metadados_markdown(texto).regras.items():
+            regras.setdefault(campo, {}).setdefault(regra, 0)
+            regras[campo][regra] += 1
+
+    print("\nRegras aplicadas:")
+    for campo, contagem in regras.items():
+        detalhes = ', '.join(f"{regra} ({quantidade})" for regra, quantidade in sorted(contagem.items()))
+        print(f"   {campo}: {detalhes}")
+
+    tempo_individual = medir(extracao_individual, textos, args.repeticoes)
+    tempo_unico = medir(extracao_passada_unica, textos, args.repeticoes)
+
+    print(f"\n{'Método':<22}{'Tempo total (ms)':>18}{'Por documento (µs)':>22}")
+    print(f"{'Funções individuais':<22}{tempo_individual * 1000:>18.2f}{tempo_individual * 1e6 / len(textos):>22.1f}")
+    print(f"{'Passada única':<22}{tempo_unico * 1000:>18.2f}{tempo_unico * 1e6 / len(textos):>22.1f}")
+    print(f"Ganho: {tempo_individual / tempo_unico:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
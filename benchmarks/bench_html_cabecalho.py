@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: leitura completa x leitura parcial dos HTMLs
+Volpe Advogados Associados - Unimed Cuiabá
+
+Compara a leitura integral de cada HTML (comportamento original de
+buscar_arquivos_html) com a leitura parcial de ler_metadados_html,
+medindo bytes lidos e tempo total. Também confere que os dois métodos
+extraem exatamente os mesmos valores.
+
+Uso:
+    python -m benchmarks.bench_html_cabecalho [--pasta pareceres_html] [--repeticoes 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from extracao import extrair_numero_processo_html, extrair_titulo_html, ler_metadados_html
+
+
+def leitura_completa(caminho):
+    """Lê o arquivo inteiro, como a versão original do aplicativo"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        conteudo = f.read()
+    return extrair_numero_processo_html(conteudo), extrair_titulo_html(conteudo), caminho.stat().st_size
+
+
+def medir(funcao, arquivos, repeticoes):
+    """Executa a função sobre todos os arquivos e retorna (melhor tempo, bytes, resultados)"""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultados = [funcao(arquivo) for arquivo in arquivos]
+        melhor = min(melhor, time.perf_counter() - inicio)
+
+    bytes_lidos = sum(r[2] for r in resultados)
+    return melhor, bytes_lidos, [r[:2] for r in resultados]
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pasta', default='pareceres_html', help='Pasta com os arquivos HTML')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições (vale o melhor tempo)')
+    args = parser.parse_args()
+
+    arquivos = sorted(Path(args.pasta).glob('**/*.html'))
+    if not arquivos:
+        print(f"Nenhum HTML encontrado em '{args.pasta}'")
+        return 1
+
+    tempo_completo, bytes_completo, valores_completo = medir(leitura_completa, arquivos, args.repeticoes)
+    tempo_parcial, bytes_parcial, valores_parcial = medir(ler_metadados_html, arquivos, args.repeticoes)
+
+    divergencias = [a.name for a, x, y in zip(arquivos, valores_completo, valores_parcial) if x != y]
+
+    print(f"Arquivos: {len(arquivos)}")
+    print(f"{'Método':<18}{'Bytes lidos':>16}{'Tempo (ms)':>14}")
+    print(f"{'Leitura completa':<18}{bytes_completo:>16,}{tempo_completo * 1000:>14.2f}")
+    print(f"{'Leitura parcial':<18}{bytes_parcial:>16,}{tempo_parcial * 1000:>14.2f}")
+    print(f"Redução de bytes: {100 * (1 - bytes_parcial / bytes_completo):.1f}%")
+    print(f"Ganho de tempo:   {tempo_completo / tempo_parcial:.1f}x")
+
+    if divergencias:
+        print(f"❌ Valores divergentes em {len(divergencias)} arquivo(s): {', '.join(divergencias)}")
+        return 1
+
+    print("✓ Valores extraídos idênticos nos dois métodos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: download em lote (ZIP) dos pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Monta o ZIP de um acervo sintético (ver lote_zip.py) e compara:
+
+- zipfile: cada HTML lido e comprimido de novo (a forma direta)
+- lote_zip sem variantes: cada HTML comprimido direto no ZIP (o lote
+  não grava variantes)
+- lote_zip com variantes: depois de entrega_arquivos gravar as variantes
+  (como faz o visualizador), o conteúdo comprimido é copiado do gzip
+
+Para cada um mede o tempo e o pico de memória (tracemalloc), com o acervo
+inteiro e com um décimo dele. O pico não acompanha o conteúdo (~107 KB por
+HTML): cresce só com o diretório central do ZIP, centenas de bytes por
+arquivo.
+
+Confere também que cada HTML e JSON do ZIP é idêntico ao original (e que
+o zipfile aceita o arquivo) e que a montagem não cria variantes. Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_lote_zip [--quantidade 5000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from compactacao_html import ler_html
+from correspondencia import MapaCorrespondencia
+from entrega_arquivos import preparar_artefato
+from indice_pareceres import IndiceArquivosHtml, IndicePareceres
+from lote_zip import montar_zip
+from pacote import ler_arquivo
+
+
+def zip_direto(pareceres, mapa, destino):
+    """Referência: zipfile, lendo e comprimindo cada HTML"""
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as saida:
+        for parecer in pareceres:
+            caminho = mapa.buscar(parecer['arquivo'])
+            if caminho is not None and f"html/{Path(caminho).name}" not in saida.NameToInfo:
+                saida.writestr(f"html/{Path(caminho).name}", ler_html(caminho, usar_cache=False))
+
+
+def medir(montar, destino):
+    """Executa a montagem; retorna (segundos, pico de memória)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with open(destino, 'wb') as saida:
+        montar(saida)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return segundos, pico
+
+
+def conferir(caminho_zip, pareceres, mapa):
+    """Problemas encontrados no ZIP (conteúdo diferente, membros faltando)"""
+    esperado = {}
+    for parecer in pareceres:
+        html = mapa.buscar(parecer['arquivo'])
+        if html is not None:
+            esperado[f"html/{Path(html).name}"] = html
+        esperado[f"json/{Path(parecer['arquivo']).name}"] = parecer['arquivo']
+
+    problemas = []
+    with zipfile.ZipFile(caminho_zip) as lote:
+        if lote.testzip() is not None:
+            problemas.append("zipfile encontrou um membro corrompido")
+        if set(lote.namelist()) != set(esperado):
+            problemas.append("membros do ZIP diferentes dos esperados")
+        for nome in lote.namelist():
+            original = esperado.get(nome)
+            if original is None:
+                continue
+            dados = ler_html(original, usar_cache=False) if nome.startswith("html/") else ler_arquivo(original)
+            if lote.read(nome) != dados:
+                problemas.append(f"conteúdo diferente: {nome}")
+                break
+    return problemas
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=5000, help='Tamanho do acervo sintético')
+    args = parser.parse_args()
+
+    pasta_json, pasta_html = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        temporario = Path(temporario)
+        indice = IndicePareceres(pasta_json, caminho_indice=temporario / "indice.sqlite3")
+        indice.sincronizar()
+        pareceres = indice.listar()
+        indice_html = IndiceArquivosHtml(pasta_html, caminho_indice=temporario / "indice_html.sqlite3")
+        indice_html.sincronizar()
+        mapa = MapaCorrespondencia(pareceres, indice_html.numeros_processo())
+        decimo = pareceres[:max(1, len(pareceres) // 10)]
+        variantes = temporario / "downloads"
+
+        def lote(lista, incluir_json=False):
+            return lambda saida: montar_zip(iter(lista), mapa, saida, incluir_json, diretorio=variantes)
+
+        resultados = {}
+        resultados["zipfile"] = (medir(lambda s: zip_direto(pareceres, mapa, s), temporario / "direto.zip"),
+                                 medir(lambda s: zip_direto(decimo, mapa, s), temporario / "direto_10.zip"))
+        resultados["sem variantes"] = (medir(lote(pareceres), temporario / "frio.zip"), None)
+        if variantes.exists() and any(variantes.iterdir()):
+            problemas.append("a montagem sem variantes gravou variantes")
+
+        for html in set(mapa.mapa.values()):
+            preparar_artefato(html, variantes, usar_cache=False)
+        resultados["com variantes"] = (medir(lote(pareceres), temporario / "lote.zip"),
+                                       medir(lote(decimo), temporario / "lote_10.zip"))
+
+        with open(temporario / "conferencia.zip", 'wb') as saida:
+            resumo = montar_zip(iter(decimo), mapa, saida, diretorio=variantes)
+        if resumo['reaproveitados'] != resumo['htmls']:
+            problemas.append(f"variantes gzip reaproveitadas: {resumo['reaproveitados']} de {resumo['htmls']}")
+
+        medir(lote(pareceres, incluir_json=True), temporario / "completo.zip")
+        problemas += conferir(temporario / "completo.zip", pareceres, mapa)
+
+        tamanhos = {rotulo: (temporario / arquivo).stat().st_size
+                    for rotulo, arquivo in [("zipfile", "direto.zip"), ("sem variantes", "frio.zip"),
+                                            ("com variantes", "lote.zip")]}
+
+    print(f"Pareceres: {len(pareceres)}, HTMLs no ZIP: {len(set(mapa.mapa.values()))}")
+    print(f"{'Montagem':<16}{'Tempo (s)':>11}{'ZIP (MB)':>10}{'Pico (KB)':>12}{'Pico 1/10 (KB)':>16}")
+    for rotulo, (total, parcial) in resultados.items():
+        parcial = "-" if parcial is None else f"{parcial[1] / 1024:.0f}"
+        print(f"{rotulo:<16}{total[0]:>11.2f}{tamanhos[rotulo] / 2**20:>10.1f}{total[1] / 1024:>12.0f}{parcial:>16}")
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ HTMLs e JSONs do ZIP idênticos aos originais")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
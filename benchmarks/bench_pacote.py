@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: acervo em pacote (.pacote) x pastas
+Volpe Advogados Associados - Unimed Cuiabá
+
+Importa um acervo sintético para um pacote (ver pacote.py e empacotar.py),
+com e sem compressão, e compara com as pastas de origem:
+
+- a carga completa dos índices (varredura e leitura de todos os arquivos)
+- a leitura de HTMLs em ordem aleatória, como no visualizador
+- o espaço ocupado
+
+Confere também que:
+
+- os índices montados a partir do pacote têm o mesmo conteúdo que os
+  montados a partir das pastas
+- a exportação reproduz os arquivos originais byte a byte
+- um pacote com uma gravação interrompida no fim continua legível
+
+Sai com código 1 se alguma conferência falhar. Com o cache de disco do
+sistema já aquecido, a diferença de tempo mede só o custo das chamadas de
+sistema; em compartilhamentos de rede a diferença é maior.
+
+Uso:
+    python -m benchmarks.bench_pacote [--quantidade 1000] [--leituras 500]
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from compactacao_html import ler_html
+from empacotar import exportar_pacote, importar_pastas
+from indice_pareceres import IndiceArquivosHtml, IndicePareceres, varrer_arquivos
+from pacote import Pacote
+
+
+def carregar_indices(fonte_json, fonte_html, diretorio):
+    """Monta do zero os dois índices de uma fonte; retorna (segundos, pareceres, htmls)"""
+    indice = IndicePareceres(fonte_json, caminho_indice=Path(diretorio) / "indice.sqlite3", trabalhadores=1)
+    indice_html = IndiceArquivosHtml(fonte_html, caminho_indice=Path(diretorio) / "indice_html.sqlite3",
+                                     trabalhadores=1)
+    inicio = time.perf_counter()
+    indice.sincronizar()
+    indice_html.sincronizar()
+    segundos = time.perf_counter() - inicio
+    return segundos, indice.listar(), indice_html.consultar(ordem="Nome (A-Z)")
+
+
+def relativo(caminho, raiz):
+    """Caminho relativo à pasta (ou ao pacote), para comparar as duas fontes"""
+    return Path(caminho).relative_to(raiz).as_posix()
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=1000, help='Número de pareceres')
+    parser.add_argument('--leituras', type=int, default=500, help='Leituras aleatórias de HTML')
+    args = parser.parse_args()
+
+    pasta_json, pasta_html = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        raiz_json, raiz_html = Path(pasta_json).parent, Path(pasta_html).parent
+        htmls = sorted(c for c, _, _ in varrer_arquivos(pasta_html, '.html'))
+        sorteio = random.Random(42)
+        escolhidos = [sorteio.choice(htmls) for _ in range(args.leituras)]
+
+        tempo_pastas, pareceres_pastas, htmls_pastas = carregar_indices(
+            pasta_json, pasta_html, Path(temporario) / "indices_pastas"
+        )
+        for info in pareceres_pastas:
+            info['arquivo'] = relativo(info['arquivo'], raiz_json)
+        for info in htmls_pastas:
+            info['caminho'] = relativo(info['caminho'], raiz_html)
+
+        inicio = time.perf_counter()
+        for c in escolhidos:
+            ler_html(c, usar_cache=False)
+        leitura_pastas = time.perf_counter() - inicio
+
+        tamanho_pastas = sum(t for p in (pasta_json, pasta_html) for ext in ('.json', '.html')
+                             for _, _, t in varrer_arquivos(p, ext))
+        resultados = {"Pastas": (None, tamanho_pastas, tempo_pastas, leitura_pastas)}
+
+        for rotulo, comprimir in [("Pacote zlib", True), ("Pacote puro", False)]:
+            caminho = Path(temporario) / f"acervo_{int(comprimir)}.pacote"
+
+            inicio = time.perf_counter()
+            importar_pastas(caminho, [pasta_json, pasta_html], comprimir)
+            tempo_importacao = time.perf_counter() - inicio
+
+            tempo_indices, pareceres, htmls_pacote = carregar_indices(
+                caminho, caminho, Path(temporario) / f"indices_{int(comprimir)}"
+            )
+
+            # Mesmo conteúdo, a menos do caminho de cada arquivo
+            for info in pareceres:
+                info['arquivo'] = relativo(info['arquivo'], caminho)
+            for info in htmls_pacote:
+                info['caminho'] = relativo(info['caminho'], caminho)
+            if pareceres != pareceres_pastas:
+                problemas.append(f"{rotulo}: índice de pareceres diferente do das pastas")
+            if htmls_pacote != htmls_pastas:
+                problemas.append(f"{rotulo}: índice de HTMLs diferente do das pastas")
+
+            # Leituras aleatórias (sem o cache de conteúdo)
+            no_pacote = [caminho / relativo(c, raiz_html) for c in escolhidos]
+            inicio = time.perf_counter()
+            for c in no_pacote:
+                ler_html(c, usar_cache=False)
+            tempo_leitura = time.perf_counter() - inicio
+
+            if any(ler_html(a, usar_cache=False) != ler_html(b, usar_cache=False)
+                   for a, b in zip(escolhidos, no_pacote)):
+                problemas.append(f"{rotulo}: HTML lido do pacote diferente do original")
+
+            resultados[rotulo] = (tempo_importacao, caminho.stat().st_size, tempo_indices, tempo_leitura)
+
+        # Exportação idêntica às pastas de origem
+        exportados = Path(temporario) / "exportados"
+        exportar_pacote(caminho, exportados)
+        for pasta, extensao in ((pasta_json, '.json'), (pasta_html, '.html')):
+            for origem, _, _ in varrer_arquivos(pasta, extensao):
+                copia = exportados / Path(pasta).name / Path(origem).relative_to(pasta)
+                if not copia.is_file() or copia.read_bytes() != ler_html(origem, usar_cache=False):
+                    problemas.append(f"exportação diferente: {Path(origem).name}")
+                    break
+
+        # Gravação interrompida: bytes soltos depois do último rodapé
+        interrompido = Path(temporario) / "interrompido.pacote"
+        shutil.copyfile(caminho, interrompido)
+        with open(interrompido, 'ab') as f:
+            f.write(b"\x00" * 1000 + b"registro pela metade")
+        with Pacote(caminho) as original, Pacote(interrompido) as recuperado:
+            if original.registros != recuperado.registros:
+                problemas.append("pacote com gravação interrompida não foi recuperado")
+
+    print(f"{'Fonte':<14}{'Importação (s)':>16}{'Espaço (MB)':>13}{'Índices (s)':>13}"
+          f"{f'{args.leituras} HTMLs (s)':>16}")
+    for rotulo, (importacao, tamanho, indices, leitura) in resultados.items():
+        importacao = "-" if importacao is None else f"{importacao:.2f}"
+        print(f"{rotulo:<14}{importacao:>16}{tamanho / 2**20:>13.1f}{indices:>13.2f}{leitura:>16.3f}")
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ Índices iguais, exportação idêntica e recuperação conferida")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
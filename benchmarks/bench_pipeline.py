@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: pipeline de carregamento em acervos sintéticos
+Volpe Advogados Associados - Unimed Cuiabá
+
+Gera (ou reaproveita) acervos sintéticos com benchmarks.corpus_sintetico e
+mede, para cada tamanho, as etapas que o aplicativo executa ao carregar as
+páginas:
+
+- a atualização do AcervoCompartilhado (detectores, índices e primeira
+  fotografia), com índices vazios (frio) e com os índices já sincronizados
+  ao iniciar o processo (quente); a conferência seguinte, que monta os
+  índices da busca no conteúdo e dos quase idênticos (frio); uma
+  conferência sem alterações e a leitura da fotografia publicada (o que
+  cada execução da página faz)
+- extração de metadados: extrair_metadados_markdown, as funções extrair_*
+  individuais e a leitura parcial dos HTMLs (ler_metadados_html)
+- montagem do mapa JSON -> HTML e a busca do HTML de cada JSON
+- resumo do painel (agregados mantidos pelo índice) e maiores exposições,
+  montados com a fotografia
+- filtros (inclusive faixas de valor e de data) e ordenações das duas
+  páginas, paginados como na tela, sobre a fotografia (ConsultaPareceres
+  e ConsultaArquivosHtml, sem o cache de listas)
+
+Os resultados são gravados em JSON (tempos em segundos, melhor e mediana
+das repetições) para acompanhar regressões entre versões; --comparar mostra
+a razão entre os tempos atuais e os de um arquivo anterior.
+
+Uso:
+    python -m benchmarks.bench_pipeline [--tamanhos 1000 10000] [--saida bench_pipeline.json]
+                                        [--comparar anterior.json] [--trabalhadores N]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from acervo import AcervoCompartilhado
+from alteracoes import DetectorAlteracoes
+from benchmarks.bench_extracao import extracao_individual
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from correspondencia import MapaCorrespondencia
+from extracao import extrair_metadados_markdown, ler_metadados_html
+from indice_pareceres import (
+    ORDENACOES_HTML,
+    ORDENACOES_PARECERES,
+    IndicePareceres,
+    caminho_indice_padrao,
+    varrer_arquivos,
+)
+
+
+# Tamanho da página usado nas consultas paginadas (o padrão do aplicativo)
+TAMANHO_PAGINA = 25
+
+
+def medir(funcao, repeticoes, preparar=None):
+    """Executa a função `repeticoes` vezes e retorna o melhor tempo e a mediana"""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'melhor_s': min(tempos), 'mediana_s': statistics.median(tempos), 'repeticoes': repeticoes}
+
+
+def apagar_indices(*caminhos_indice):
+    """Remove os arquivos de índice (e os do WAL)"""
+    for caminho_indice in caminhos_indice:
+        for sufixo in ('', '-wal', '-shm'):
+            Path(f"{caminho_indice}{sufixo}").unlink(missing_ok=True)
+
+
+def novo_acervo(pasta_json, pasta_html):
+    """Acervo com detectores novos, como ao iniciar o processo do aplicativo"""
+    return AcervoCompartilhado(DetectorAlteracoes(pasta_json, '.json'), DetectorAlteracoes(pasta_html, '.html'))
+
+
+def medir_acervo(pasta_json, pasta_html, repeticoes):
+    """Mede todas as etapas do pipeline num acervo e retorna {etapa: medição}"""
+    pasta_json, pasta_html = str(pasta_json), str(pasta_html)
+    medicoes = {}
+
+    indices = (
+        caminho_indice_padrao(pasta_json), caminho_indice_padrao(pasta_html, prefixo="indice_html"),
+        caminho_indice_padrao(pasta_json, prefixo="busca"), caminho_indice_padrao(pasta_json, prefixo="duplicatas"),
+    )
+
+    # Carregamento: a atualização em segundo plano e a leitura de cada execução
+    medicoes['atualização do acervo (frio)'] = medir(
+        lambda: novo_acervo(pasta_json, pasta_html).atualizar(), repeticoes, lambda: apagar_indices(*indices)
+    )
+
+    # A primeira fotografia sai sem os índices do conteúdo: a conferência
+    # seguinte os monta
+    recem_publicado = []
+
+    def publicar_primeira():
+        apagar_indices(*indices)
+        recem_publicado[:] = [novo_acervo(pasta_json, pasta_html)]
+        recem_publicado[0].atualizar()
+
+    medicoes['índices do conteúdo (frio)'] = medir(
+        lambda: recem_publicado[0].atualizar(), repeticoes, publicar_primeira
+    )
+    medicoes['atualização do acervo (quente)'] = medir(
+        lambda: novo_acervo(pasta_json, pasta_html).atualizar(), repeticoes
+    )
+    acervo = novo_acervo(pasta_json, pasta_html)
+    acervo.atualizar()
+    acervo.atualizar()
+    medicoes['conferência sem alterações'] = medir(acervo.atualizar, repeticoes)
+    medicoes['leitura da fotografia'] = medir(acervo.fotografia, repeticoes)
+    fotografia = acervo.fotografia()
+
+    # Extração de metadados
+    textos = []
+    for caminho, _, _ in varrer_arquivos(pasta_json, '.json'):
+        with open(caminho, 'r', encoding='utf-8') as f:
+            resultado = json.load(f)['resultado']
+        if isinstance(resultado, str):
+            textos.append(resultado)
+    arquivos_html = [caminho for caminho, _, _ in varrer_arquivos(pasta_html, '.html')]
+
+    medicoes['extrair_metadados_markdown'] = medir(
+        lambda: [extrair_metadados_markdown(texto) for texto in textos], repeticoes
+    )
+    medicoes['extrair_* individuais'] = medir(lambda: [extracao_individual(texto) for texto in textos], repeticoes)
+    medicoes['ler_metadados_html'] = medir(lambda: [ler_metadados_html(c) for c in arquivos_html], repeticoes)
+
+    # Correspondência JSON -> HTML
+    catalogo = fotografia.catalogo
+    numeros_html = fotografia.consulta_html.numeros_processo()
+    medicoes['montagem do mapa JSON -> HTML'] = medir(
+        lambda: MapaCorrespondencia(catalogo, numeros_html), repeticoes
+    )
+    medicoes['HTML de cada JSON (mapa)'] = medir(
+        lambda: [fotografia.mapa.buscar(catalogo.arquivo(p)) for p in range(len(catalogo))], repeticoes
+    )
+
+    # Painel, montado com a fotografia
+    indice = IndicePareceres(pasta_json)
+    medicoes['resumo do painel (agregados)'] = medir(
+        lambda: (indice.agregados(('risco', 'classificacao')), indice.agregados(('natureza', 'parte_contraria'), 10)),
+        repeticoes
+    )
+    filtros_json = {
+        'sem filtro': {},
+        'processo': {'filtro_processo': '2022'},
+        'classificação': {'classificacao': 'PROVÁVEL'},
+        'faixa de valor': {'faixa_valor': (Decimal('100000'), Decimal('500000'))},
+        'período': {'periodo': (date(2024, 3, 1), date(2024, 3, 31))},
+    }
+    medicoes['maiores exposições (top 10)'] = medir(lambda: indice.maiores_exposicoes(10), repeticoes)
+
+    # Filtros e ordenações, como na tela (contagem + primeira página); o
+    # cache de listas da fotografia é esvaziado antes de cada repetição
+    consulta = fotografia.consulta
+    for nome, filtros in filtros_json.items():
+        medicoes[f'filtro JSON: {nome}'] = medir(
+            lambda: (consulta.contar(**filtros), consulta.consultar(limite=TAMANHO_PAGINA, **filtros)),
+            repeticoes, consulta.filtrar.cache_clear
+        )
+    for ordem in ORDENACOES_PARECERES:
+        medicoes[f'ordenação JSON: {ordem}'] = medir(
+            lambda: consulta.consultar(ordem=ordem, limite=TAMANHO_PAGINA), repeticoes, consulta.filtrar.cache_clear
+        )
+
+    consulta_html = fotografia.consulta_html
+    for ordem in ORDENACOES_HTML:
+        medicoes[f'ordenação HTML: {ordem}'] = medir(
+            lambda: consulta_html.consultar(ordem=ordem, limite=TAMANHO_PAGINA), repeticoes,
+            consulta_html.filtrar.cache_clear
+        )
+    medicoes['filtro HTML: busca'] = medir(
+        lambda: (consulta_html.contar('2022'), consulta_html.consultar('2022', limite=TAMANHO_PAGINA)),
+        repeticoes, consulta_html.filtrar.cache_clear
+    )
+
+    for medicao in medicoes.values():
+        medicao['pareceres'] = len(catalogo)
+        medicao['htmls'] = len(arquivos_html)
+
+    return medicoes
+
+
+def commit_atual():
+    """Retorna o commit atual do repositório, se houver"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        '--tamanhos', type=int, nargs='+', default=[1000], help='Quantidades de pareceres (ex.: 1000 10000 100000)'
+    )
+    parser.add_argument('--destino', default=str(DESTINO_PADRAO), help='Pasta dos acervos sintéticos')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada medição')
+    parser.add_argument('--trabalhadores', type=int, help='Processos na leitura dos arquivos (padrão: CPUs)')
+    parser.add_argument('--saida', default='bench_pipeline.json', help='Arquivo JSON com os resultados')
+    parser.add_argument('--comparar', help='Resultados anteriores para comparação')
+    args = parser.parse_args()
+
+    if args.trabalhadores:
+        os.environ['PARECERES_TRABALHADORES'] = str(args.trabalhadores)
+
+    resultados = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'trabalhadores': args.trabalhadores,
+        'acervos': {},
+    }
+
+    for tamanho in args.tamanhos:
+        print(f"Gerando acervo de {tamanho} pareceres...", flush=True)
+        pasta_json, pasta_html = gerar_corpus(args.destino, tamanho)
+        print("Medindo...", flush=True)
+        resultados['acervos'][str(tamanho)] = medir_acervo(pasta_json, pasta_html, args.repeticoes)
+
+    anteriores = {}
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anteriores = json.load(f).get('acervos', {})
+
+    for tamanho, medicoes in resultados['acervos'].items():
+        print(f"\nAcervo: {tamanho} pareceres")
+        print(f"{'Etapa':<40}{'Melhor (ms)':>14}{'Mediana (ms)':>14}" + (f"{'x anterior':>12}" if anteriores else ''))
+        for etapa, medicao in medicoes.items():
+            linha = f"{etapa:<40}{medicao['melhor_s'] * 1000:>14.2f}{medicao['mediana_s'] * 1000:>14.2f}"
+            anterior = anteriores.get(tamanho, {}).get(etapa)
+            if anterior:
+                linha += f"{medicao['melhor_s'] / anterior['melhor_s']:>12.2f}"
+            print(linha)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: visualização dos pareceres por seções
+Volpe Advogados Associados - Unimed Cuiabá
+
+Divide em seções (secoes_html.dividir_secoes) os HTMLs de uma pasta e mede:
+
+- o tempo da divisão (feita uma vez por conteúdo no aplicativo)
+- os bytes enviados ao navegador para abrir a seção inicial e, em média,
+  uma seção qualquer, comparados com o documento inteiro
+
+Confere também que juntar as partes reproduz cada documento byte a byte
+(sai com código 1 se algum for diferente).
+
+Uso:
+    python -m benchmarks.bench_secoes [pasta_html] [--quantidade 1000]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from compactacao_html import ler_html
+from indice_pareceres import varrer_arquivos
+from secoes_html import dividir_secoes
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta_html', nargs='?', help='Pasta dos HTMLs (padrão: acervo sintético)')
+    parser.add_argument('--quantidade', type=int, default=1000, help='Tamanho do acervo sintético')
+    args = parser.parse_args()
+
+    pasta_html = args.pasta_html or gerar_corpus(DESTINO_PADRAO, args.quantidade)[1]
+
+    tempos, completos, iniciais, medias, quantidades = [], [], [], [], []
+    sem_secoes, divergentes = 0, []
+    for caminho, _, _ in sorted(varrer_arquivos(pasta_html, '.html')):
+        conteudo = ler_html(caminho, usar_cache=False).decode('utf-8')
+
+        inicio = time.perf_counter()
+        documento = dividir_secoes(conteudo)
+        tempos.append(time.perf_counter() - inicio)
+
+        if documento.completo() != conteudo:
+            divergentes.append(caminho)
+
+        if len(documento.secoes) < 2:
+            sem_secoes += 1
+            continue
+
+        paginas = [len(documento.pagina(i).encode('utf-8')) for i in range(len(documento.secoes))]
+        completos.append(len(conteudo.encode('utf-8')))
+        iniciais.append(paginas[documento.inicial])
+        medias.append(statistics.mean(paginas))
+        quantidades.append(len(documento.secoes))
+
+    print(f"Documentos: {len(tempos)} ({sem_secoes} sem seções, exibidos inteiros)")
+    print(f"Divisão: mediana {statistics.median(tempos) * 1000:.2f} ms, máximo {max(tempos) * 1000:.2f} ms")
+    if completos:
+        print(f"Seções por documento: mediana {statistics.median(quantidades):.0f}")
+        print(f"{'Enviado ao abrir':<28}{'Mediana (KB)':>14}")
+        for rotulo, valores in [
+            ("Documento inteiro", completos),
+            ("Seção inicial", iniciais),
+            ("Seção média", medias),
+        ]:
+            print(f"{rotulo:<28}{statistics.median(valores) / 1024:>14.1f}")
+
+    if divergentes:
+        print(f"❌ {len(divergentes)} documento(s) não reconstruídos: {divergentes[:5]}")
+        return 1
+
+    print("✓ Todas as divisões reproduzem o documento original")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
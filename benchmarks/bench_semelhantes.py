@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: pareceres semelhantes (TF-IDF)
+Volpe Advogados Associados - Unimed Cuiabá
+
+Indexa um acervo sintético, conta os termos dos pareceres
+(IndicePareceres.sincronizar_termos) e mede, para a matriz de
+semelhantes.MatrizTfIdf:
+
+- o tempo de montagem e a memória dos arrays, podada e completa
+- a latência de uma consulta (p50/p95/p99) e a de uma página de pareceres
+- a mesma montagem e consulta num acervo ampliado para `--escala`
+  pareceres, com vetores derivados dos reais (cada cópia perde alguns
+  termos e ganha outros, como nomes de partes e números)
+
+Confere também que:
+
+- os vetores gravados no índice são os do texto atual de cada parecer,
+  inclusive depois de alterar parte do acervo, e que a atualização só
+  recalcula os pareceres alterados
+- a matriz completa (sem poda) dá exatamente os mesmos semelhantes de uma
+  comparação com todos os pareceres, feita aqui com outra implementação do
+  TF-IDF
+- a matriz podada encontra ao menos RECALL_MINIMO dos 5 mais semelhantes
+- nenhum semelhante é o próprio parecer ou outra versão do mesmo processo
+
+Sai com código 1 se alguma conferência falhar.
+
+Uso:
+    python -m benchmarks.bench_semelhantes [--quantidade 10000] [--amostra 200] [--escala 100000]
+"""
+
+import argparse
+import json
+import math
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.corpus_sintetico import DESTINO_PADRAO, gerar_corpus
+from indice_pareceres import IndicePareceres
+from semelhantes import MatrizTfIdf, decodificar_vetor, texto_do_resultado, vetor_termos
+
+
+# Fração mínima dos 5 mais semelhantes exatos encontrada pela matriz podada
+RECALL_MINIMO = 0.95
+
+# Pareceres alterados na conferência da atualização incremental
+ALTERADOS = 50
+
+# Pareceres por página do aplicativo
+TAMANHO_PAGINA = 20
+
+
+def percentis(tempos):
+    """Texto com p50/p95/p99 (ms) de uma lista de segundos"""
+    p50, p95, p99 = np.percentile(np.array(tempos) * 1e3, [50, 95, 99])
+    return f"p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms"
+
+
+def alterar_pareceres(pasta, quantidade, semente=5):
+    """Acrescenta um parágrafo ao resultado de `quantidade` pareceres; retorna os caminhos"""
+    sorteio = random.Random(semente)
+    alterados = []
+    for caminho in sorteio.sample(sorted(Path(pasta).glob("*.json")), quantidade):
+        dados = json.loads(caminho.read_text(encoding='utf-8'))
+        if not isinstance(dados.get('resultado'), str):
+            continue
+        dados['hash'] = f"{dados['hash'][:-8]}{sorteio.getrandbits(32):08x}"
+        dados['resultado'] += "\n\nAditamento: cobertura contratual de home care e reembolso de despesas médicas."
+        caminho.write_text(json.dumps(dados, ensure_ascii=False), encoding='utf-8')
+        alterados.append(str(caminho))
+    return alterados
+
+
+def conferir_vetores(indice):
+    """Problemas dos vetores gravados no índice (comparados ao texto atual)"""
+    problemas = []
+    vetores = {arquivo: vetor for arquivo, _, vetor in indice.percorrer_termos()}
+    if len(vetores) != indice.contar():
+        problemas.append(f"{len(vetores)} vetores para {indice.contar()} pareceres")
+
+    for arquivo, vetor in vetores.items():
+        dados = json.loads(Path(arquivo).read_text(encoding='utf-8'))
+        if vetor != vetor_termos(texto_do_resultado(dados.get('resultado'))):
+            problemas.append(f"vetor desatualizado: {Path(arquivo).name}")
+            break
+    return problemas
+
+
+def triplas_referencia(linhas):
+    """TF-IDF de referência, sem a matriz: (linhas, colunas, pesos, vocabulário)
+
+    Conta a frequência dos termos com Counter e calcula os pesos termo a
+    termo, com a mesma fórmula da matriz.
+    """
+    vetores = [dict(zip(*(a.tolist() for a in decodificar_vetor(vetor)))) for _, _, vetor in linhas]
+    documentos = Counter(termo for vetor in vetores for termo in vetor)
+    vocabulario = {termo: coluna for coluna, termo in enumerate(sorted(documentos))}
+    total = len(vetores)
+
+    triplas = []
+    for linha, vetor in enumerate(vetores):
+        pesos = {t: (1 + math.log(f)) * (math.log((1 + total) / (1 + documentos[t])) + 1) for t, f in vetor.items()}
+        norma = math.sqrt(sum(p * p for p in pesos.values()))
+        triplas += [(linha, vocabulario[t], p / norma) for t, p in pesos.items()]
+
+    linhas_t, colunas_t, pesos_t = (np.array(coluna) for coluna in zip(*triplas))
+    return linhas_t, colunas_t, pesos_t, len(vocabulario)
+
+
+def semelhantes_referencia(posicao, referencia, processos, quantidade=5):
+    """Os mais semelhantes a um parecer comparando com todos: [(posição, cosseno)]"""
+    linhas, colunas, pesos, tamanho_vocabulario = referencia
+    consulta = np.zeros(tamanho_vocabulario)
+    do_parecer = linhas == posicao
+    consulta[colunas[do_parecer]] = pesos[do_parecer]
+
+    cossenos = np.bincount(linhas, weights=pesos * consulta[colunas], minlength=len(processos))
+    cossenos[posicao] = 0
+    if processos[posicao] is not None:
+        cossenos[[i for i, p in enumerate(processos) if p == processos[posicao]]] = 0
+
+    ordem = sorted((-c, i) for i, c in enumerate(cossenos.tolist()) if c > 1e-9)
+    return [(i, -c) for c, i in ordem[:quantidade]]
+
+
+def conferir_semelhantes(matriz, completa, referencia, amostra):
+    """Compara as duas matrizes com a referência; retorna (problemas, recall da podada)"""
+    problemas, encontrados = [], []
+    posicoes = {arquivo: i for i, arquivo in enumerate(completa.arquivos)}
+    exatos = completa.semelhantes_de(amostra, candidatos=None, termos_consulta=None)
+    aproximados = matriz.semelhantes_de(amostra)
+
+    for arquivo in amostra:
+        esperado = semelhantes_referencia(posicoes[arquivo], referencia, completa.processos)
+        obtido = [(posicoes[outro], valor) for outro, valor in exatos[arquivo]]
+
+        # Mesmos cossenos; os pareceres podem trocar de lugar só em empates
+        if len(esperado) != len(obtido) or any(abs(a[1] - b[1]) > 1e-5 for a, b in zip(esperado, obtido)):
+            problemas.append(f"matriz completa diferente da referência: {Path(arquivo).name}")
+        elif {i for i, _ in esperado} != {i for i, _ in obtido}:
+            corte = esperado[-1][1]
+            if any(valor > corte + 1e-5 for i, valor in esperado if i not in {j for j, _ in obtido}):
+                problemas.append(f"matriz completa diferente da referência: {Path(arquivo).name}")
+
+        processo = completa.processos[posicoes[arquivo]]
+        for outro, _ in aproximados[arquivo] + exatos[arquivo]:
+            if outro == arquivo or (processo is not None and completa.processos[posicoes[outro]] == processo):
+                problemas.append(f"semelhante do mesmo processo: {Path(arquivo).name}")
+                break
+
+        # Recall: cossenos exatos a partir do menor dos 5 contam como encontrados (empates)
+        if exatos[arquivo]:
+            corte = exatos[arquivo][-1][1] - 1e-6
+            achados = sum(1 for _, valor in aproximados[arquivo] if valor >= corte)
+            encontrados.append(min(1.0, achados / len(exatos[arquivo])))
+
+    return problemas[:5], float(np.mean(encontrados)) if encontrados else 1.0
+
+
+def medir_consultas(matriz, arquivos, sorteio):
+    """Latência de consultas isoladas e de páginas; retorna (tempos, tempos das páginas)"""
+    tempos = []
+    for arquivo in arquivos:
+        inicio = time.perf_counter()
+        matriz.semelhantes(arquivo)
+        tempos.append(time.perf_counter() - inicio)
+
+    paginas = []
+    for _ in range(max(1, len(arquivos) // TAMANHO_PAGINA)):
+        pagina = sorteio.sample(matriz.arquivos, min(TAMANHO_PAGINA, len(matriz)))
+        inicio = time.perf_counter()
+        matriz.semelhantes_de(pagina)
+        paginas.append(time.perf_counter() - inicio)
+    return tempos, paginas
+
+
+def acervo_ampliado(linhas, quantidade, destino, semente=13):
+    """Grava `quantidade` vetores derivados dos reais numa tabela SQLite
+
+    Cada cópia perde ~10% dos termos e ganha 10 termos de um conjunto de
+    500 mil (nomes, números); as cópias de um mesmo original formam um
+    processo a cada 3. Retorna (percorrer, ler_vetores) para MatrizTfIdf.
+    """
+    rng = np.random.default_rng(semente)
+    originais = [decodificar_vetor(vetor) for _, _, vetor in linhas]
+
+    with closing(sqlite3.connect(destino)) as con, con:
+        con.execute("CREATE TABLE termos (arquivo TEXT PRIMARY KEY, processo TEXT, vetor BLOB NOT NULL)")
+        registros = []
+        for numero in range(quantidade):
+            termos, frequencias = originais[numero % len(originais)]
+            manter = rng.random(len(termos)) >= 0.1
+            novos = rng.integers(0, 500_000, 10, dtype=np.uint32) * np.uint32(7919)
+            termos, indices = np.unique(np.concatenate([termos[manter], novos]), return_index=True)
+            frequencias = np.concatenate([frequencias[manter], np.ones(10, np.uint16)])[indices]
+            registros.append((f"copia_{numero:06d}.json", f"processo_{numero // 3}",
+                              termos.tobytes() + frequencias.tobytes()))
+        con.executemany("INSERT INTO termos VALUES (?, ?, ?)", registros)
+
+    def percorrer():
+        with closing(sqlite3.connect(destino)) as con:
+            yield from con.execute("SELECT arquivo, processo, vetor FROM termos ORDER BY arquivo")
+
+    def ler_vetores(arquivos):
+        with closing(sqlite3.connect(destino)) as con:
+            return dict(con.execute(
+                "SELECT arquivo, vetor FROM termos WHERE arquivo IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(arquivos)),)
+            ).fetchall())
+
+    return percorrer, ler_vetores
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, default=10000, help='Tamanho do acervo sintético')
+    parser.add_argument('--amostra', type=int, default=200, help='Pareceres comparados com a referência')
+    parser.add_argument('--escala', type=int, default=100000, help='Tamanho do acervo ampliado (0: não medir)')
+    args = parser.parse_args()
+
+    pasta_origem, _ = gerar_corpus(DESTINO_PADRAO, args.quantidade)
+    sorteio = random.Random(3)
+    problemas = []
+
+    with tempfile.TemporaryDirectory() as temporario:
+        pasta = Path(temporario) / "pareceres"
+        shutil.copytree(pasta_origem, pasta)
+        indice = IndicePareceres(pasta, caminho_indice=Path(temporario) / "indice.sqlite3")
+
+        inicio = time.perf_counter()
+        indice.sincronizar()
+        tempo_indice = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        indice.sincronizar_termos()
+        tempo_termos = time.perf_counter() - inicio
+
+        alterados = alterar_pareceres(pasta, ALTERADOS)
+        inicio = time.perf_counter()
+        resumo = indice.sincronizar()
+        contados = indice.sincronizar_termos()['calculados']
+        tempo_incremental = time.perf_counter() - inicio
+        if resumo['alterados'] != len(alterados) or resumo['novos'] or resumo['removidos']:
+            problemas.append(f"atualização releu {resumo['alterados']} pareceres, {len(alterados)} alterados")
+        if contados != len(alterados):
+            problemas.append(f"atualização contou os termos de {contados} pareceres, {len(alterados)} alterados")
+        problemas += conferir_vetores(indice)
+
+        inicio = time.perf_counter()
+        matriz = MatrizTfIdf.do_indice(indice)
+        tempo_matriz = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        completa = MatrizTfIdf.do_indice(indice, termos_por_parecer=None)
+        tempo_completa = time.perf_counter() - inicio
+
+        amostra = sorteio.sample(matriz.arquivos, min(args.amostra, len(matriz))) + alterados[:10]
+        referencia = triplas_referencia(list(indice.percorrer_termos()))
+        encontrados, recall = conferir_semelhantes(matriz, completa, referencia, amostra)
+        problemas += encontrados
+        if recall < RECALL_MINIMO:
+            problemas.append(f"recall@5 da matriz podada {recall:.3f} < {RECALL_MINIMO}")
+
+        tempos, paginas = medir_consultas(matriz, amostra, sorteio)
+        tempos_completa, _ = medir_consultas(completa, amostra[:50], sorteio)
+
+        print(f"Pareceres: {len(matriz)}; vocabulário: {len(matriz.vocabulario):,} termos")
+        print(f"Índice: {tempo_indice:.1f}s; termos: {tempo_termos:.1f}s; "
+              f"{len(alterados)} alterados (índice e termos): {tempo_incremental:.2f}s")
+        print(f"Matriz podada: {tempo_matriz:.2f}s, {matriz.tamanho_bytes / 2**20:.1f} MB; "
+              f"completa: {tempo_completa:.2f}s, {completa.tamanho_bytes / 2**20:.1f} MB")
+        print(f"Consulta (podada): {percentis(tempos)}; página de {TAMANHO_PAGINA}: {percentis(paginas)}")
+        print(f"Consulta (completa): {percentis(tempos_completa)}")
+        print(f"Recall@5 da podada na amostra de {len(amostra)}: {recall:.3f}")
+
+        if args.escala:
+            percorrer, ler_vetores = acervo_ampliado(
+                list(indice.percorrer_termos()), args.escala, Path(temporario) / "ampliado.sqlite3"
+            )
+            inicio = time.perf_counter()
+            ampliada = MatrizTfIdf(percorrer, ler_vetores)
+            tempo_ampliada = time.perf_counter() - inicio
+
+            tempos, paginas = medir_consultas(ampliada, sorteio.sample(ampliada.arquivos, 200), sorteio)
+            print(f"Acervo ampliado: {len(ampliada):,} pareceres, vocabulário {len(ampliada.vocabulario):,}; "
+                  f"matriz {tempo_ampliada:.1f}s, {ampliada.tamanho_bytes / 2**20:.0f} MB")
+            print(f"Consulta (ampliado): {percentis(tempos)}; página de {TAMANHO_PAGINA}: {percentis(paginas)}")
+
+    if problemas:
+        for problema in problemas:
+            print(f"❌ {problema}")
+        return 1
+
+    print("✓ Vetores atualizados, matriz completa igual à referência e recall da podada acima do mínimo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
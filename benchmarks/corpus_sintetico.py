@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gerador de Acervo Sintético
+Volpe Advogados Associados - Unimed Cuiabá
+
+Gera um acervo de pareceres no formato real, para medir o aplicativo em
+escala de produção (1k, 10k, 100k documentos):
+
+- JSONs parecer_<hash>.json com timestamp, hash e resultado. A maior parte
+  tem resultado em markdown, criado a partir dos pareceres reais trocando o
+  bloco de identificação (CNJ, parte contrária, valor). Os demais são análises
+  estruturadas (resultado em dicionário).
+- HTMLs parecer_<CNJ>.html criados a partir de um HTML real, com o mesmo
+  tamanho (~107 KB), o CNJ no título e o hash no rodapé. Uma pequena parte
+  dos JSONs fica sem HTML, como no acervo real.
+
+A geração é determinística (mesma semente, mesmo acervo). O acervo gerado é
+reaproveitado enquanto os parâmetros não mudarem. Atenção ao espaço em disco:
+cada HTML ocupa o mesmo que o modelo (100k HTMLs ~ 10 GB).
+
+Uso:
+    python -m benchmarks.corpus_sintetico --quantidade 10000 [--destino .cache_pareceres/corpus]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import shutil
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from extracao import PADRAO_CNJ, PADRAO_TITULO
+
+
+# Pasta padrão dos acervos gerados (dentro do cache, ignorado pelo Git)
+DESTINO_PADRAO = Path(".cache_pareceres") / "corpus"
+
+# Incrementar quando o formato gerado mudar (força nova geração)
+VERSAO_GERADOR = 1
+
+PROBABILIDADES = ['PROVÁVEL', 'POSSÍVEL', 'REMOTA']
+NATUREZAS = [
+    'EXECUÇÃO FISCAL', 'AÇÃO DE OBRIGAÇÃO DE FAZER', 'AÇÃO INDENIZATÓRIA',
+    'AÇÃO DECLARATÓRIA', 'MANDADO DE SEGURANÇA', 'AÇÃO DE COBRANÇA',
+]
+FASES = ['Conhecimento', 'Recursal', 'Execução', 'Suspensa', 'Arquivada']
+
+PADRAO_LINHA_CNJ = re.compile(r'(\*\*Número do Processo \(CNJ\):\*\* ).+')
+PADRAO_LINHA_PARTE = re.compile(r'(\*\*Parte Contrária:\*\* ).+')
+PADRAO_LINHA_VALOR = re.compile(r'(\*\*Valor da Causa:\*\* ).+')
+
+
+def carregar_modelos(pasta_modelos, pasta_modelos_html):
+    """Carrega os pareceres markdown, as partes contrárias e um HTML real com CNJ"""
+    textos, partes = [], []
+    for arquivo in sorted(Path(pasta_modelos).glob('*.json')):
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            resultado = json.load(f).get('resultado')
+        if isinstance(resultado, str) and PADRAO_LINHA_CNJ.search(resultado):
+            textos.append(resultado)
+            parte = PADRAO_LINHA_PARTE.search(resultado)
+            if parte:
+                partes.append(parte.group(0).split(':** ', 1)[1].strip())
+
+    modelo_html = None
+    for arquivo in sorted(Path(pasta_modelos_html).glob('*.html')):
+        conteudo = arquivo.read_text(encoding='utf-8')
+        titulo = PADRAO_TITULO.search(conteudo)
+        if titulo and PADRAO_CNJ.search(titulo.group(1)):
+            modelo_html = conteudo
+            break
+
+    if not textos or modelo_html is None:
+        raise ValueError("são necessários pareceres JSON em markdown e um HTML com CNJ no título como modelo")
+
+    return textos, sorted(set(partes)), modelo_html
+
+
+def gerar_cnj(rng):
+    """Gera um número CNJ (NNNNNNN-DD.AAAA.J.TR.OOOO)"""
+    return (
+        f"{rng.randrange(10**7):07d}-{rng.randrange(100):02d}.{rng.randrange(2005, 2026)}."
+        f"{rng.choice('4585')}.{rng.randrange(1, 28):02d}.{rng.randrange(10**4):04d}"
+    )
+
+
+def gerar_valor(rng):
+    """Gera um valor em reais no formato brasileiro"""
+    centavos = rng.randrange(100_000, 500_000_000)
+    inteiro = f"{centavos // 100:,}".replace(',', '.')
+    return f"R$ {inteiro},{centavos % 100:02d}"
+
+
+def gerar_documento(rng, indice, textos, partes, proporcao_estruturada):
+    """Gera (cnj, dados do JSON) de um parecer sintético"""
+    cnj = gerar_cnj(rng)
+    parte = rng.choice(partes) if partes and rng.random() < 0.7 else f"PARTE SINTÉTICA {indice:06d}"
+    valor = gerar_valor(rng)
+    texto = textos[indice % len(textos)]
+
+    if rng.random() < proporcao_estruturada:
+        resultado = {
+            'numero_cnj': cnj,
+            'probabilidade_perda': rng.choice(PROBABILIDADES),
+            'valor_contingencia': valor,
+            'parte_contraria': parte,
+            'natureza': rng.choice(NATUREZAS),
+            'fase': rng.choice(FASES),
+            'fundamentacao': texto[:2000],
+        }
+    else:
+        resultado = PADRAO_LINHA_CNJ.sub(lambda m: m.group(1) + cnj, texto, count=1)
+        resultado = PADRAO_LINHA_PARTE.sub(lambda m: m.group(1) + parte, resultado, count=1)
+        resultado = PADRAO_LINHA_VALOR.sub(lambda m: m.group(1) + valor, resultado, count=1)
+
+    conteudo = json.dumps(resultado, ensure_ascii=False, sort_keys=True)
+    momento = datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(2 * 365 * 86400), microseconds=rng.randrange(10**6))
+
+    return cnj, {
+        'timestamp': momento.isoformat(),
+        'hash': hashlib.md5(f"{indice}\0{conteudo}".encode('utf-8')).hexdigest(),
+        'resultado': resultado,
+    }
+
+
+def gerar_corpus(destino, quantidade, semente=42, proporcao_estruturada=0.1, proporcao_sem_html=0.02,
+                 pasta_modelos="pareceres", pasta_modelos_html="pareceres_html"):
+    """Gera (ou reaproveita) um acervo sintético e retorna (pasta JSON, pasta HTML)
+
+    O acervo fica em `destino`/<quantidade>, com as subpastas pareceres e
+    pareceres_html e um manifesto com os parâmetros da geração.
+    """
+    raiz = Path(destino) / str(quantidade)
+    pasta_json, pasta_html = raiz / "pareceres", raiz / "pareceres_html"
+    manifesto = raiz / "corpus.json"
+
+    parametros = {
+        'versao': VERSAO_GERADOR,
+        'quantidade': quantidade,
+        'semente': semente,
+        'proporcao_estruturada': proporcao_estruturada,
+        'proporcao_sem_html': proporcao_sem_html,
+    }
+
+    if manifesto.exists():
+        with open(manifesto, 'r', encoding='utf-8') as f:
+            if json.load(f) == parametros:
+                return pasta_json, pasta_html
+
+    shutil.rmtree(raiz, ignore_errors=True)
+    pasta_json.mkdir(parents=True)
+    pasta_html.mkdir(parents=True)
+
+    textos, partes, modelo_html = carregar_modelos(pasta_modelos, pasta_modelos_html)
+    cnj_modelo = PADRAO_CNJ.search(PADRAO_TITULO.search(modelo_html).group(1)).group(0)
+    hashes_modelo = set(re.findall(r'\b[0-9a-f]{32}\b', modelo_html))
+
+    rng = random.Random(semente)
+    for indice in range(quantidade):
+        cnj, dados = gerar_documento(rng, indice, textos, partes, proporcao_estruturada)
+
+        with open(pasta_json / f"parecer_{dados['hash']}.json", 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+
+        if rng.random() < proporcao_sem_html:
+            continue
+
+        html = modelo_html.replace(cnj_modelo, cnj)
+        for hash_modelo in hashes_modelo:
+            html = html.replace(hash_modelo, dados['hash'])
+
+        nome_html = f"parecer_{cnj.replace('.', '_')}.html"
+        with open(pasta_html / nome_html, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    # O manifesto por último: acervo incompleto é gerado de novo
+    with open(manifesto, 'w', encoding='utf-8') as f:
+        json.dump(parametros, f, indent=2)
+
+    return pasta_json, pasta_html
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quantidade', type=int, required=True, help='Número de pareceres JSON')
+    parser.add_argument('--destino', default=str(DESTINO_PADRAO), help='Pasta onde o acervo é gerado')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório')
+    parser.add_argument('--estruturadas', type=float, default=0.1, help='Proporção de análises estruturadas')
+    args = parser.parse_args()
+
+    pasta_json, pasta_html = gerar_corpus(args.destino, args.quantidade, args.semente, args.estruturadas)
+    print(f"JSONs: {pasta_json} ({sum(1 for _ in pasta_json.iterdir())})")
+    print(f"HTMLs: {pasta_html} ({sum(1 for _ in pasta_html.iterdir())})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca Textual nos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Índice invertido (SQLite FTS5) sobre o texto dos pareceres, com remoção de
+acentos, radicalização simples do português e ordenação por BM25.
+
+Sintaxe das consultas:
+    negativa cobertura            todas as palavras (em qualquer ordem)
+    "negativa de cobertura"       frase exata
+    parte:ans                     palavra restrita à parte contrária
+    natureza:"execução fiscal"    frase restrita à natureza da ação
+"""
+
+import html
+import json
+import re
+from contextlib import closing
+from pathlib import Path
+
+from compactacao_html import ler_html
+from indice_pareceres import conectar_indice
+from normalizacao import STOPWORDS, dobrar, tokenizar
+from pacote import ler_arquivo
+
+
+# Campos pesquisáveis e pesos no BM25 (conteúdo, parte contrária, natureza)
+CAMPOS = ('conteudo', 'parte_contraria', 'natureza')
+PESOS_BM25 = (1.0, 4.0, 4.0)
+
+# Nomes aceitos para restringir a busca a um campo
+ALIASES_CAMPOS = {
+    'parte': 'parte_contraria',
+    'parte_contraria': 'parte_contraria',
+    'contraria': 'parte_contraria',
+    'natureza': 'natureza',
+    'conteudo': 'conteudo',
+}
+
+# Rótulos usados para extrair os campos do texto do parecer
+ROTULOS_PARTE = ('Parte Contrária', 'Autor')
+ROTULOS_NATUREZA = ('Natureza da Ação', 'Natureza', 'Tipo de Ação')
+
+PADRAO_CONSULTA = re.compile(r'(\w+):"([^"]*)"|(\w+):(\S+)|"([^"]*)"|(\S+)')
+PADRAO_SEM_CORPO = re.compile(r'<(head|style|script)\b.*?</\1>', re.IGNORECASE | re.DOTALL)
+PADRAO_TAG = re.compile(r'<[^>]+>')
+
+VERSAO_ESQUEMA = 1
+
+# Documentos lidos antes de cada gravação (uma transação curta por lote)
+LOTE_GRAVACAO = 200
+
+
+def preparar_texto(texto):
+    """Converte o texto na forma indexada (radicais separados por espaço)"""
+    return ' '.join(tokenizar(texto or ''))
+
+
+def texto_de_html(conteudo_html):
+    """Extrai o texto visível de um HTML de parecer"""
+    texto = PADRAO_SEM_CORPO.sub(' ', conteudo_html)
+    texto = PADRAO_TAG.sub('\n', texto)
+    return html.unescape(texto)
+
+
+def extrair_campo_rotulado(texto, rotulos):
+    """Extrai o valor de uma linha 'Rótulo: valor' (markdown ou texto de HTML)"""
+    for rotulo in rotulos:
+        match = re.search(rf'{re.escape(rotulo)}:(?:\*\*)?[ \t]*\n?[ \t]*(.+)', texto)
+        if match and match.group(1).strip():
+            return match.group(1).strip()
+    return ''
+
+
+def campos_do_texto(texto):
+    """Monta os campos pesquisáveis a partir do texto de um parecer"""
+    return {
+        'conteudo': texto,
+        'parte_contraria': extrair_campo_rotulado(texto, ROTULOS_PARTE),
+        'natureza': extrair_campo_rotulado(texto, ROTULOS_NATUREZA),
+    }
+
+
+def carregar_campos_json(caminho):
+    """Lê um parecer JSON e retorna seus campos pesquisáveis"""
+    resultado = json.loads(ler_arquivo(caminho).decode('utf-8')).get('resultado', '')
+
+    if isinstance(resultado, dict):
+        campos = campos_do_texto(json.dumps(resultado, ensure_ascii=False))
+        campos['parte_contraria'] = str(resultado.get('parte_contraria', '') or campos['parte_contraria'])
+        campos['natureza'] = str(resultado.get('natureza', '') or campos['natureza'])
+        return campos
+
+    return campos_do_texto(str(resultado))
+
+
+def carregar_campos_html(caminho):
+    """Lê um parecer HTML e retorna seus campos pesquisáveis"""
+    return campos_do_texto(texto_de_html(ler_html(caminho, usar_cache=False).decode('utf-8')))
+
+
+def interpretar_consulta(consulta):
+    """Converte a consulta do usuário em uma expressão MATCH do FTS5
+
+    Retorna None se a consulta não tiver nenhum termo pesquisável.
+    """
+    clausulas = []
+
+    for campo_frase, frase_campo, campo_termo, termo_campo, frase, termo in PADRAO_CONSULTA.findall(consulta):
+        campo = ALIASES_CAMPOS.get(dobrar(campo_frase or campo_termo))
+
+        if campo_frase or campo_termo:
+            if campo is None:
+                # Campo desconhecido: trata "x:y" como texto comum
+                termo = f"{campo_frase or campo_termo} {frase_campo or termo_campo}"
+            else:
+                tokens = tokenizar(frase_campo or termo_campo)
+                if tokens:
+                    clausulas.append(f'{campo} : "{" ".join(tokens)}"')
+                continue
+
+        if frase:
+            tokens = tokenizar(frase)
+            if tokens:
+                clausulas.append(f'"{" ".join(tokens)}"')
+            continue
+
+        for token in tokenizar(termo):
+            if token not in STOPWORDS:
+                clausulas.append(f'"{token}"')
+
+    return ' AND '.join(clausulas) if clausulas else None
+
+
+class BuscaTextual:
+    """Índice de busca textual persistido em SQLite (FTS5)"""
+
+    TABELAS = {
+        'documentos': f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS documentos
+            USING fts5({', '.join(CAMPOS)}, tokenize='unicode61')
+        """,
+        'controle': """
+            CREATE TABLE IF NOT EXISTS controle (
+                id INTEGER PRIMARY KEY,
+                doc_id TEXT UNIQUE NOT NULL,
+                versao TEXT NOT NULL
+            )
+        """,
+    }
+
+    def __init__(self, caminho_indice):
+        self.caminho_indice = Path(caminho_indice)
+
+    def _conectar(self):
+        """Abre a conexão com o índice, criando o esquema se necessário"""
+        return conectar_indice(self.caminho_indice, VERSAO_ESQUEMA, self.TABELAS)
+
+    def sincronizar(self, documentos):
+        """Atualiza o índice com os documentos informados
+
+        `documentos` é uma sequência de (doc_id, versao, carregar_campos), onde
+        carregar_campos é chamado apenas para documentos novos ou alterados.
+        Documentos indexados que não estiverem na sequência são removidos.
+        Retorna um resumo com as quantidades indexadas e removidas e a lista
+        de erros de leitura.
+
+        Os arquivos são lidos em lotes fora de qualquer transação; cada lote
+        é gravado numa transação curta (BEGIN IMMEDIATE) que relê o estado do
+        índice, de modo que várias sessões podem sincronizar ao mesmo tempo.
+        """
+        resumo = {'indexados': 0, 'removidos': 0, 'erros': []}
+
+        with closing(self._conectar()) as con:
+            registrados = dict(con.execute("SELECT doc_id, versao FROM controle"))
+
+        pendentes = [
+            (doc_id, versao, carregar_campos)
+            for doc_id, versao, carregar_campos in documentos
+            if registrados.pop(doc_id, None) != versao
+        ]
+
+        with closing(self._conectar()) as con:
+            for inicio in range(0, len(pendentes), LOTE_GRAVACAO):
+                lote = []
+                for doc_id, versao, carregar_campos in pendentes[inicio:inicio + LOTE_GRAVACAO]:
+                    try:
+                        campos = carregar_campos()
+                    except Exception as e:
+                        resumo['erros'].append((Path(doc_id).name, str(e)))
+                        continue
+                    lote.append((doc_id, versao, [preparar_texto(campos.get(c, '')) for c in CAMPOS]))
+
+                resumo['indexados'] += self._gravar(con, lote)
+
+            # O que sobrou não existe mais no acervo
+            self._gravar(con, (), registrados)
+            resumo['removidos'] = len(registrados)
+
+        return resumo
+
+    @staticmethod
+    def _gravar(con, lote, removidos=()):
+        """Grava um lote de (doc_id, versao, textos) e as remoções numa transação
+
+        Documentos que outra sessão já gravou na mesma versão são pulados.
+        Retorna a quantidade de documentos gravados.
+        """
+        if not lote and not removidos:
+            return 0
+
+        con.execute("BEGIN IMMEDIATE")
+        with con:
+            atuais = dict(con.execute(
+                "SELECT doc_id, versao FROM controle WHERE doc_id IN (SELECT value FROM json_each(?))",
+                (json.dumps([doc_id for doc_id, _, _ in lote]),)
+            ))
+            gravados = 0
+            for doc_id, versao, textos in lote:
+                if atuais.get(doc_id) == versao:
+                    continue
+
+                BuscaTextual._remover(con, doc_id)
+                cursor = con.execute("INSERT INTO controle (doc_id, versao) VALUES (?, ?)", (doc_id, versao))
+                con.execute(
+                    f"INSERT INTO documentos (rowid, {', '.join(CAMPOS)}) VALUES (?, ?, ?, ?)",
+                    (cursor.lastrowid, *textos),
+                )
+                gravados += 1
+
+            for doc_id in removidos:
+                BuscaTextual._remover(con, doc_id)
+
+        return gravados
+
+    @staticmethod
+    def _remover(con, doc_id):
+        """Remove um documento (texto e controle) do índice, se estiver nele"""
+        con.execute("DELETE FROM documentos WHERE rowid IN (SELECT id FROM controle WHERE doc_id = ?)", (doc_id,))
+        con.execute("DELETE FROM controle WHERE doc_id = ?", (doc_id,))
+
+    def buscar(self, consulta, limite=None):
+        """Retorna [(doc_id, pontuação)] ordenados pela relevância (BM25)"""
+        expressao = interpretar_consulta(consulta)
+        if expressao is None:
+            return []
+
+        sql = f"""
+            SELECT c.doc_id, -bm25(documentos, {', '.join(map(str, PESOS_BM25))}) AS pontuacao
+            FROM documentos JOIN controle c ON c.id = documentos.rowid
+            WHERE documentos MATCH ?
+            ORDER BY bm25(documentos, {', '.join(map(str, PESOS_BM25))})
+        """
+        parametros = [expressao]
+        if limite:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+
+        with closing(self._conectar()) as con:
+            return con.execute(sql, parametros).fetchall()
+
+
+def documentos_do_acervo(versoes_json, arquivos_html, htmls_com_json):
+    """Enumera os documentos pesquisáveis do acervo para BuscaTextual.sincronizar
+
+    Inclui todos os pareceres JSON (`versoes_json`: arquivo -> (mtime_ns,
+    tamanho)) e os HTMLs de `arquivos_html` (tuplas caminho, mtime_ns,
+    tamanho) que não correspondem a nenhum JSON.
+    """
+    for arquivo, (mtime_ns, tamanho) in versoes_json.items():
+        yield arquivo, f"{mtime_ns}:{tamanho}", lambda a=arquivo: carregar_campos_json(a)
+
+    for caminho, mtime_ns, tamanho in arquivos_html:
+        if caminho not in htmls_com_json:
+            yield caminho, f"{mtime_ns}:{tamanho}", lambda c=caminho: carregar_campos_html(c)
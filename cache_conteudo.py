@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache do Conteúdo dos Arquivos
+Volpe Advogados Associados - Unimed Cuiabá
+
+O mesmo HTML é lido várias vezes: na visualização, no download, no cálculo
+da ETag e na divisão em seções. O CacheConteudo guarda em memória os bytes
+dos arquivos lidos recentemente, com um limite total de memória e descarte
+do menos usado (LRU). Cada entrada é validada pelo mtime_ns e pelo tamanho
+do arquivo (em disco ou num pacote, ver pacote.py) a cada leitura, de modo
+que um arquivo reescrito é lido de novo.
+
+O conteúdo é guardado como bytes, exatamente como devolvido pela função de
+leitura; quem precisa de texto decodifica o que recebe.
+
+O limite (em MB) vem da variável de ambiente PARECERES_CACHE_MB (padrão:
+LIMITE_PADRAO_MB; 0 desliga o cache).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from metricas import contar
+from pacote import estado_arquivo
+
+
+# Variável de ambiente com o limite de memória do cache (MB)
+VARIAVEL_LIMITE = "PARECERES_CACHE_MB"
+LIMITE_PADRAO_MB = 64
+
+
+def limite_configurado():
+    """Limite do cache em bytes: variável de ambiente ou LIMITE_PADRAO_MB"""
+    try:
+        megabytes = float(os.environ.get(VARIAVEL_LIMITE, LIMITE_PADRAO_MB))
+    except ValueError:
+        megabytes = LIMITE_PADRAO_MB
+    return max(0, int(megabytes * 2**20))
+
+
+class CacheConteudo:
+    """Cache LRU, limitado em bytes, do conteúdo de arquivos"""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+        self.invalidacoes = 0
+
+    def ler(self, caminho, carregar):
+        """Retorna o conteúdo do arquivo, do cache ou de carregar(caminho)
+
+        A entrada vale enquanto o arquivo tiver o mesmo mtime_ns e tamanho.
+        Conteúdos maiores que o limite são devolvidos sem entrar no cache.
+        """
+        caminho = str(caminho)
+        versao = estado_arquivo(caminho)
+
+        with self._trava:
+            entrada = self._entradas.get(caminho)
+            if entrada is not None:
+                if entrada[0] == versao:
+                    self._entradas.move_to_end(caminho)
+                    self.acertos += 1
+                    contar('cache_conteudo.acertos')
+                    return entrada[1]
+                self._remover(caminho)
+                self.invalidacoes += 1
+            self.falhas += 1
+        contar('cache_conteudo.falhas')
+
+        # A leitura é feita fora da trava (outras leituras não esperam)
+        dados = carregar(caminho)
+
+        if len(dados) <= self.limite_bytes:
+            with self._trava:
+                if caminho in self._entradas:
+                    self._remover(caminho)
+                self._entradas[caminho] = (versao, dados)
+                self._bytes += len(dados)
+                while self._bytes > self.limite_bytes:
+                    self._remover(next(iter(self._entradas)))
+                    self.descartes += 1
+
+        return dados
+
+    def _remover(self, caminho):
+        """Remove uma entrada (com a trava já adquirida)"""
+        _, dados = self._entradas.pop(caminho)
+        self._bytes -= len(dados)
+
+    def limpar(self):
+        """Descarta todas as entradas (as estatísticas são mantidas)"""
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        """Retorna as estatísticas de uso do cache"""
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acertos': self.acertos / consultas if consultas else 0.0,
+                'descartes': self.descartes,
+                'invalidacoes': self.invalidacoes,
+            }
+
+
+# Cache compartilhado por todo o processo (todas as sessões)
+CACHE_CONTEUDO = CacheConteudo(limite_configurado())
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Catálogo Compacto dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Representação em memória, por colunas, dos metadados de todos os pareceres.
+Uma lista de dicionários guarda, para cada parecer, um dicionário e uma
+cópia de cada texto (classificação, natureza, parte contrária, tipo e o
+caminho completo). No catálogo:
+
+- campos categóricos são codificados por dicionário: cada texto distinto é
+  guardado (internado) uma vez e cada parecer guarda só um código numérico
+- o caminho é dividido em pasta (categórica) e nome do arquivo
+- textos únicos (nome, número do processo, timestamp) ficam concatenados
+  num único str, com os deslocamentos num array
+- o hash MD5 é guardado em 16 bytes e o valor em centavos, num array
+
+O catálogo é imutável depois de montado. Cada parecer é entregue como o
+mesmo dicionário retornado pelo índice, criado apenas quando é acessado.
+"""
+
+import os
+import re
+import sys
+from array import array
+
+from extracao import converter_valor
+
+
+# Campos categóricos (poucos valores distintos, muito repetidos)
+CAMPOS_CATEGORICOS = ('tipo', 'classificacao', 'risco', 'natureza', 'parte_contraria', 'fase')
+
+# Campos de texto praticamente únicos por parecer
+CAMPOS_TEXTO = ('numero_processo', 'timestamp')
+
+# Valor em centavos ausente
+SEM_VALOR = -1
+
+# Campo ausente no dicionário do parecer (diferente de um campo com None)
+AUSENTE = object()
+
+PADRAO_MD5 = re.compile(r'[0-9a-f]{32}')
+
+
+class ColunaCategorica:
+    """Coluna codificada por dicionário: valores distintos e um código por linha"""
+
+    __slots__ = ('valores', 'codigos', '_codigo_de')
+
+    def __init__(self):
+        self.valores = []
+        self.codigos = array('I')
+        self._codigo_de = {}
+
+    def anexar(self, valor):
+        codigo = self._codigo_de.get(valor)
+        if codigo is None:
+            codigo = len(self.valores)
+            self.valores.append(sys.intern(valor) if isinstance(valor, str) else valor)
+            self._codigo_de[valor] = codigo
+        self.codigos.append(codigo)
+
+    def __getitem__(self, posicao):
+        return self.valores[self.codigos[posicao]]
+
+
+class ColunaTexto:
+    """Coluna de textos guardados num único str, com o fim de cada um num array
+
+    Valores que não são texto (None, AUSENTE) são guardados à parte.
+    """
+
+    __slots__ = ('texto', 'fins', 'especiais', '_partes', '_tamanho')
+
+    def __init__(self):
+        self.texto = ''
+        self.fins = array('Q')
+        self.especiais = {}
+        self._partes = []
+        self._tamanho = 0
+
+    def anexar(self, valor):
+        if not isinstance(valor, str):
+            self.especiais[len(self.fins)] = valor
+            valor = ''
+        self._partes.append(valor)
+        self._tamanho += len(valor)
+        self.fins.append(self._tamanho)
+
+    def finalizar(self):
+        """Concatena os textos anexados (chamado uma vez, ao fim da montagem)"""
+        self.texto = ''.join(self._partes)
+        self._partes = None
+
+    def __getitem__(self, posicao):
+        if posicao in self.especiais:
+            return self.especiais[posicao]
+        inicio = self.fins[posicao - 1] if posicao else 0
+        return self.texto[inicio:self.fins[posicao]]
+
+
+class Catalogo:
+    """Metadados de todos os pareceres, por colunas
+
+    Pode ser percorrido (cada item é o dicionário do parecer) e indexado por
+    posição; codigos(), posicoes() e contagens() consultam uma coluna sem
+    montar os dicionários.
+    """
+
+    def __init__(self, pareceres):
+        """Monta o catálogo a partir dos dicionários do índice (IndicePareceres.percorrer)"""
+        self.quantidade = 0
+        self.pastas = ColunaCategorica()
+        self.nomes = ColunaTexto()
+        self.textos = {campo: ColunaTexto() for campo in CAMPOS_TEXTO}
+        self.categoricos = {campo: ColunaCategorica() for campo in CAMPOS_CATEGORICOS}
+        self.hashes = bytearray()
+        self.centavos = array('q')
+
+        # Exceções raras, por posição: hashes fora do padrão MD5, valores
+        # cujo texto não é o valor formatado e campos fora das colunas
+        self.hashes_texto = {}
+        self.valores_texto = {}
+        self.extras = {}
+
+        for parecer in pareceres:
+            self._anexar(parecer)
+
+        self.nomes.finalizar()
+        for coluna in self.textos.values():
+            coluna.finalizar()
+
+    def _anexar(self, parecer):
+        """Acrescenta um parecer às colunas"""
+        posicao = self.quantidade
+        extras = {}
+
+        pasta, _, nome = parecer['arquivo'].rpartition(os.sep)
+        self.pastas.anexar(pasta)
+        self.nomes.anexar(nome)
+        if parecer.get('nome', AUSENTE) != nome:
+            extras['nome'] = parecer.get('nome', AUSENTE)
+
+        for campo, coluna in self.textos.items():
+            coluna.anexar(parecer.get(campo, AUSENTE))
+
+        for campo, coluna in self.categoricos.items():
+            valor = parecer.get(campo, AUSENTE)
+            if valor is AUSENTE or valor is None or isinstance(valor, str):
+                coluna.anexar(valor)
+            else:
+                coluna.anexar(AUSENTE)
+                extras[campo] = valor
+
+        hash_doc = parecer.get('hash', AUSENTE)
+        if isinstance(hash_doc, str) and PADRAO_MD5.fullmatch(hash_doc):
+            self.hashes += bytes.fromhex(hash_doc)
+        else:
+            self.hashes += bytes(16)
+            self.hashes_texto[posicao] = hash_doc
+
+        texto_valor = parecer.get('valor', AUSENTE)
+        valor = converter_valor(texto_valor) if isinstance(texto_valor, str) else None
+        self.centavos.append(int(valor * 100) if valor is not None else SEM_VALOR)
+        if valor is None or texto_valor != formatar_centavos(self.centavos[-1]):
+            self.valores_texto[posicao] = texto_valor
+
+        conhecidos = ('arquivo', 'nome', 'hash', 'valor', *CAMPOS_TEXTO, *CAMPOS_CATEGORICOS)
+        extras.update((campo, valor) for campo, valor in parecer.items() if campo not in conhecidos)
+        if extras:
+            self.extras[posicao] = extras
+
+        self.quantidade += 1
+
+    @classmethod
+    def do_indice(cls, indice):
+        """Monta o catálogo lendo os pareceres do índice um a um"""
+        return cls(indice.percorrer())
+
+    def __len__(self):
+        return self.quantidade
+
+    def __iter__(self):
+        for posicao in range(self.quantidade):
+            yield self.registro(posicao)
+
+    def __getitem__(self, posicao):
+        if posicao < 0:
+            posicao += self.quantidade
+        if not 0 <= posicao < self.quantidade:
+            raise IndexError(posicao)
+        return self.registro(posicao)
+
+    def arquivo(self, posicao):
+        """Caminho completo do JSON de um parecer"""
+        pasta, nome = self.pastas[posicao], self.nomes[posicao]
+        return f"{pasta}{os.sep}{nome}" if pasta else nome
+
+    def hash(self, posicao):
+        """Hash do documento de um parecer"""
+        if posicao in self.hashes_texto:
+            return self.hashes_texto[posicao]
+        return self.hashes[16 * posicao:16 * posicao + 16].hex()
+
+    def valor(self, posicao):
+        """Texto do valor de um parecer, como extraído"""
+        if posicao in self.valores_texto:
+            return self.valores_texto[posicao]
+        return formatar_centavos(self.centavos[posicao])
+
+    def registro(self, posicao):
+        """Dicionário do parecer na posição (igual ao do índice)"""
+        parecer = {
+            'arquivo': self.arquivo(posicao),
+            'nome': self.nomes[posicao],
+            'hash': self.hash(posicao),
+            'valor': self.valor(posicao),
+        }
+        for campo, coluna in self.textos.items():
+            parecer[campo] = coluna[posicao]
+        for campo, coluna in self.categoricos.items():
+            parecer[campo] = coluna[posicao]
+        parecer.update(self.extras.get(posicao, ()))
+        return {campo: valor for campo, valor in parecer.items() if valor is not AUSENTE}
+
+    def codigos(self, campo, aceitar):
+        """Códigos da coluna categórica cujos valores satisfazem aceitar(valor)"""
+        coluna = self.categoricos[campo]
+        return {codigo for codigo, valor in enumerate(coluna.valores) if aceitar(valor)}
+
+    def posicoes(self, campo, aceitar, candidatas=None):
+        """Posições cujo campo categórico satisfaz aceitar(valor)
+
+        Percorre `candidatas` (padrão: todas as posições) e mantém a ordem
+        delas; o teste é feito uma vez por valor distinto, não por parecer.
+        """
+        codigos = self.codigos(campo, aceitar)
+        if not codigos:
+            return []
+        coluna = self.categoricos[campo].codigos
+        if candidatas is None:
+            candidatas = range(self.quantidade)
+        return [posicao for posicao in candidatas if coluna[posicao] in codigos]
+
+    def contagens(self, campo):
+        """Retorna {valor: quantidade} de um campo categórico"""
+        coluna = self.categoricos[campo]
+        quantidades = [0] * len(coluna.valores)
+        for codigo in coluna.codigos:
+            quantidades[codigo] += 1
+        return {valor: q for valor, q in zip(coluna.valores, quantidades) if valor is not AUSENTE}
+
+
+def formatar_centavos(centavos):
+    """Formata centavos inteiros como "R$ 1.234,56\""""
+    inteiro = f"{centavos // 100:,}".replace(',', '.')
+    return f"R$ {inteiro},{centavos % 100:02d}"
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compactação dos HTMLs dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Os HTMLs gerados repetem em todos os arquivos o mesmo bloco <style> e a
+mesma logo embutida em base64 (cerca de 85% de cada arquivo). A compactação
+separa esses trechos grandes (conteúdo de <style> e <script> e URIs data:)
+do corpo de cada documento e os guarda uma única vez, endereçados pelo
+SHA-256, na pasta oculta .recursos do destino. No lugar de cada trecho o
+documento compacto leva um marcador <!--volpe-recurso:<sha256>-->.
+
+A pasta compacta pode ser usada diretamente como pasta dos HTMLs: o título
+e o número do processo continuam no início de cada arquivo, e ler_html
+reconstrói o HTML original, byte a byte, na visualização e no download.
+
+Uso:
+    python -m compactacao_html pareceres_html pareceres_html_compacto
+"""
+
+import hashlib
+import re
+import shutil
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from cache_conteudo import CACHE_CONTEUDO
+from indice_pareceres import gravar_atomico, varrer_arquivos
+from metricas import contar
+from pacote import ler_arquivo
+
+
+# Pasta dos recursos compartilhados, dentro da pasta compacta
+DIRETORIO_RECURSOS = ".recursos"
+
+# Trechos menores que isto ficam no próprio documento
+TAMANHO_MINIMO_RECURSO = 1024
+
+# Trechos candidatos: conteúdo de <style>/<script> e URIs data: em atributos
+PADRAO_SEGMENTOS = re.compile(
+    rb'<(style|script)\b[^>]*>(?P<bloco>.*?)</\1>'
+    rb'|(?P<aspa>["\'])(?P<uri>data:[^"\']+)(?P=aspa)',
+    re.IGNORECASE | re.DOTALL,
+)
+PREFIXO_MARCADOR = b'<!--volpe-recurso:'
+PADRAO_MARCADOR = re.compile(rb'<!--volpe-recurso:([0-9a-f]{64})-->')
+
+
+def compactar_documento(conteudo, tamanho_minimo=TAMANHO_MINIMO_RECURSO):
+    """Separa os trechos grandes de um HTML
+
+    Retorna (documento compacto, {sha256: trecho}). Um documento que já
+    contenha o prefixo do marcador é devolvido sem alteração.
+    """
+    if PREFIXO_MARCADOR in conteudo:
+        return conteudo, {}
+
+    recursos = {}
+
+    def substituir(match):
+        grupo = 'bloco' if match.group('bloco') is not None else 'uri'
+        trecho = match.group(grupo)
+        if len(trecho) < tamanho_minimo:
+            return match.group(0)
+
+        digest = hashlib.sha256(trecho).hexdigest()
+        recursos[digest] = trecho
+        inicio, fim = match.span(grupo)
+        inicio -= match.start()
+        fim -= match.start()
+        return match.group(0)[:inicio] + PREFIXO_MARCADOR + digest.encode('ascii') + b'-->' + match.group(0)[fim:]
+
+    return PADRAO_SEGMENTOS.sub(substituir, conteudo), recursos
+
+
+def reconstruir_documento(compacto, carregar_recurso):
+    """Recoloca os trechos compartilhados num documento compacto"""
+    return PADRAO_MARCADOR.sub(lambda m: carregar_recurso(m.group(1).decode('ascii')), compacto)
+
+
+@lru_cache(maxsize=64)
+def _ler_recurso(diretorio, digest):
+    """Lê um recurso compartilhado (poucos e muito reutilizados)"""
+    with open(Path(diretorio) / digest, 'rb') as f:
+        return f.read()
+
+
+def localizar_recursos(caminho):
+    """Procura a pasta .recursos na pasta do documento ou acima dela"""
+    for pasta in Path(caminho).resolve().parents:
+        candidata = pasta / DIRETORIO_RECURSOS
+        if candidata.is_dir():
+            return candidata
+    return None
+
+
+def ler_html(caminho, usar_cache=True):
+    """Lê um HTML, reconstruindo-o se estiver compactado; retorna bytes
+
+    O resultado passa pelo cache de conteúdo do processo (CACHE_CONTEUDO),
+    validado pelo mtime e pelo tamanho do arquivo. Leituras em massa (que
+    percorrem a pasta inteira) usam usar_cache=False para não expulsar do
+    cache os documentos em uso.
+    """
+    if not usar_cache:
+        return _ler_html_disco(caminho)
+    return CACHE_CONTEUDO.ler(caminho, _ler_html_disco)
+
+
+def _ler_html_disco(caminho):
+    """Lê (e reconstrói, se preciso) um HTML do disco"""
+    conteudo = ler_arquivo(caminho)
+    contar('arquivos_lidos')
+    contar('bytes_lidos', len(conteudo))
+
+    if PREFIXO_MARCADOR not in conteudo:
+        return conteudo
+
+    diretorio = localizar_recursos(caminho)
+    if diretorio is None:
+        raise FileNotFoundError(f"pasta {DIRETORIO_RECURSOS} não encontrada para {Path(caminho).name}")
+
+    return reconstruir_documento(conteudo, lambda digest: _ler_recurso(str(diretorio), digest))
+
+
+def compactar_pasta(origem, destino, tamanho_minimo=TAMANHO_MINIMO_RECURSO):
+    """Compacta todos os HTMLs de `origem` em `destino` (mesma estrutura)
+
+    Cada documento é reconstruído e comparado com o original antes de ser
+    gravado; se não for idêntico, o original é copiado sem compactação.
+    Retorna um relatório com quantidades e bytes antes e depois.
+    """
+    origem, destino = Path(origem), Path(destino)
+    recursos_destino = destino / DIRETORIO_RECURSOS
+
+    relatorio = {
+        'documentos': 0,
+        'nao_compactados': [],
+        'bytes_originais': 0,
+        'bytes_documentos': 0,
+        'bytes_recursos': 0,
+        'referencias': 0,
+        'recursos': 0,
+    }
+    gravados = set()
+
+    for caminho, _, tamanho in sorted(varrer_arquivos(origem, '.html')):
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+
+        compacto, recursos = compactar_documento(conteudo, tamanho_minimo)
+        saida = destino / Path(caminho).relative_to(origem)
+
+        if recursos and reconstruir_documento(compacto, recursos.__getitem__) == conteudo:
+            for digest, trecho in recursos.items():
+                if digest not in gravados:
+                    if not (recursos_destino / digest).exists():
+                        gravar_atomico(recursos_destino / digest, trecho)
+                    gravados.add(digest)
+                    relatorio['bytes_recursos'] += len(trecho)
+            relatorio['referencias'] += len(PADRAO_MARCADOR.findall(compacto))
+            gravar_atomico(saida, compacto)
+        else:
+            if recursos:
+                relatorio['nao_compactados'].append(Path(caminho).name)
+            saida.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(caminho, saida)
+            compacto = conteudo
+
+        relatorio['documentos'] += 1
+        relatorio['bytes_originais'] += tamanho
+        relatorio['bytes_documentos'] += len(compacto)
+
+    relatorio['recursos'] = len(gravados)
+    relatorio['bytes_compactados'] = relatorio['bytes_documentos'] + relatorio['bytes_recursos']
+    relatorio['bytes_economizados'] = relatorio['bytes_originais'] - relatorio['bytes_compactados']
+    return relatorio
+
+
+def main():
+    """Função principal"""
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+
+    origem, destino = sys.argv[1], sys.argv[2]
+    relatorio = compactar_pasta(origem, destino)
+
+    # Confere a reconstrução a partir do que foi gravado em disco
+    divergentes = [
+        caminho for caminho, _, _ in varrer_arquivos(origem, '.html')
+        if ler_html(Path(destino) / Path(caminho).relative_to(origem), usar_cache=False) != Path(caminho).read_bytes()
+    ]
+
+    originais = relatorio['bytes_originais'] or 1
+    print(f"Documentos: {relatorio['documentos']}")
+    print(f"Recursos compartilhados: {relatorio['recursos']} ({relatorio['referencias']} referências)")
+    print(f"Original:   {relatorio['bytes_originais']:>14,} bytes")
+    print(f"Documentos: {relatorio['bytes_documentos']:>14,} bytes")
+    print(f"Recursos:   {relatorio['bytes_recursos']:>14,} bytes")
+    print(f"Compactado: {relatorio['bytes_compactados']:>14,} bytes")
+    print(f"Economia:   {relatorio['bytes_economizados']:>14,} bytes ({100 * relatorio['bytes_economizados'] / originais:.1f}%)")
+
+    if relatorio['nao_compactados']:
+        print(f"Copiados sem compactar: {', '.join(relatorio['nao_compactados'])}")
+
+    if divergentes:
+        print(f"❌ Reconstrução divergente em {len(divergentes)} arquivo(s)")
+        return 1
+
+    print("✓ Todos os HTMLs reconstruídos são idênticos aos originais")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Consultas sobre o Catálogo dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+As mesmas consultas de IndicePareceres (filtros, ordenações, paginação,
+versões de um processo), respondidas em memória a partir do catálogo de uma
+fotografia do acervo. Assim a página lista exatamente os pareceres da
+fotografia cujos agregados exibe, sem abrir o SQLite a cada interação. As
+de IndiceArquivosHtml (página dos HTMLs) são respondidas do mesmo modo, a
+partir das linhas do índice dos HTMLs guardadas na fotografia.
+
+As ordenações e os grupos de versões são montados uma vez, junto com a
+fotografia (em segundo plano), em arrays de posições do catálogo; as listas
+filtradas ficam num cache compartilhado pelas sessões.
+"""
+
+from array import array
+from bisect import bisect_left
+from datetime import timedelta
+from decimal import Decimal
+from functools import lru_cache
+
+from catalogo import AUSENTE, SEM_VALOR
+from extracao import normalizar_numero_processo
+
+
+# Listas filtradas guardadas por fotografia
+CONSULTAS_EM_CACHE = 64
+
+# Ordenação de cada opção de indice_pareceres.ORDENACOES_PARECERES: (coluna, decrescente)
+SENTIDOS = {
+    "Mais recentes": ('timestamp', True),
+    "Mais antigos": ('timestamp', False),
+    "Maior valor": ('valor', True),
+    "Menor valor": ('valor', False),
+}
+
+# Ordenação de cada opção de indice_pareceres.ORDENACOES_HTML: (coluna, decrescente)
+SENTIDOS_HTML = {
+    "Mais recentes": ('mtime_ns', True),
+    "Mais antigos": ('mtime_ns', False),
+    "Nome (A-Z)": ('nome', False),
+    "Nome (Z-A)": ('nome', True),
+    "Maior tamanho": ('tamanho', True),
+    "Menor tamanho": ('tamanho', False),
+}
+
+
+def _como_indice(valor, padrao):
+    """Valor como o índice grava a coluna: str(info.get(campo, padrao))"""
+    return padrao if valor is AUSENTE else str(valor)
+
+
+class ConsultaPareceres:
+    """Consultas paginadas sobre o catálogo de uma fotografia (imutável)
+
+    O catálogo deve estar na ordem de arquivo (Catalogo.do_indice): a
+    posição desempata as ordenações como o arquivo no índice e localiza um
+    arquivo por busca binária, sem guardar os caminhos.
+    """
+
+    def __init__(self, catalogo):
+        self.catalogo = catalogo
+        quantidade = len(catalogo)
+        posicoes = range(quantidade)
+
+        anterior = None
+        for posicao in posicoes:
+            arquivo = catalogo.arquivo(posicao)
+            if anterior is not None and arquivo < anterior:
+                raise ValueError("o catálogo não está na ordem de arquivo")
+            anterior = arquivo
+
+        timestamps = self._timestamps = catalogo.textos['timestamp']
+        datas = [_como_indice(timestamps[p], '') for p in posicoes]
+        centavos = catalogo.centavos
+        self.ordens = {
+            'timestamp': array('I', sorted(posicoes, key=lambda p: (datas[p], p))),
+            'valor': array('I', sorted(posicoes, key=lambda p: (centavos[p] != SEM_VALOR, centavos[p], p))),
+        }
+
+        # Versões: posições agrupadas pelo processo normalizado (grupos na
+        # ordem do processo, versões da mais recente à mais antiga)
+        numeros = catalogo.textos['numero_processo']
+        processos = [
+            normalizar_numero_processo(None if numeros[p] is AUSENTE else numeros[p]) for p in posicoes
+        ]
+        com_processo = sorted(
+            (p for p in posicoes if processos[p] is not None),
+            key=lambda p: (processos[p], datas[p], p)
+        )
+
+        self.grupos = array('I', [0]) * quantidade
+        self.inicios = array('I')
+        self.versoes = array('I')
+        self.recentes = bytearray(b'\x01' * quantidade)
+        atual = None
+        for posicao in com_processo:
+            if processos[posicao] != atual:
+                atual = processos[posicao]
+                self.inicios.append(len(self.versoes))
+            self.grupos[posicao] = len(self.inicios)
+            self.versoes.append(posicao)
+        self.inicios.append(len(self.versoes))
+
+        # Dentro de cada grupo, da mais recente à mais antiga; só a primeira
+        # conta como a versão mais recente do processo
+        for grupo in range(len(self.inicios) - 1):
+            inicio, fim = self.inicios[grupo], self.inicios[grupo + 1]
+            self.versoes[inicio:fim] = self.versoes[inicio:fim][::-1]
+            for posicao in self.versoes[inicio + 1:fim]:
+                self.recentes[posicao] = 0
+
+        self.filtrar = lru_cache(maxsize=CONSULTAS_EM_CACHE)(self._filtrar)
+
+    def posicao(self, arquivo):
+        """Posição de um arquivo no catálogo (None se não estiver)"""
+        catalogo = self.catalogo
+        posicao = bisect_left(range(len(catalogo)), arquivo, key=catalogo.arquivo)
+        if posicao < len(catalogo) and catalogo.arquivo(posicao) == arquivo:
+            return posicao
+        return None
+
+    def quantidade_versoes(self, posicao):
+        """Número de versões do processo do parecer no acervo"""
+        grupo = self.grupos[posicao]
+        return self.inicios[grupo] - self.inicios[grupo - 1] if grupo else 1
+
+    def registro(self, posicao):
+        """Dicionário do parecer, com valor_numerico e quantidade_versoes (como no índice)"""
+        parecer = self.catalogo.registro(posicao)
+        centavos = self.catalogo.centavos[posicao]
+        parecer['valor_numerico'] = Decimal(centavos).scaleb(-2) if centavos != SEM_VALOR else None
+        parecer['quantidade_versoes'] = self.quantidade_versoes(posicao)
+        return parecer
+
+    def _filtrar(self, filtro_processo, classificacao, arquivos, faixa_valor, periodo, apenas_recentes, ordem):
+        """Posições dos pareceres que atendem aos filtros, na ordem pedida
+
+        Mesmos critérios de IndicePareceres._filtros; `arquivos` é um
+        frozenset (ou None).
+        """
+        catalogo = self.catalogo
+        coluna, decrescente = SENTIDOS.get(ordem, SENTIDOS["Mais recentes"])
+        condicoes = []
+
+        minimo, maximo = faixa_valor or (None, None)
+        centavos = catalogo.centavos
+        if minimo is not None:
+            limite_inferior = int(Decimal(minimo) * 100)
+            condicoes.append(lambda p: centavos[p] != SEM_VALOR and centavos[p] >= limite_inferior)
+        if maximo is not None:
+            limite_superior = int(Decimal(maximo) * 100)
+            condicoes.append(lambda p: centavos[p] != SEM_VALOR and centavos[p] <= limite_superior)
+
+        # O timestamp é ISO 8601: a comparação de texto segue a cronológica
+        inicio, fim = periodo or (None, None)
+        timestamps = self._timestamps
+        if inicio is not None:
+            desde = inicio.isoformat()
+            condicoes.append(lambda p: _como_indice(timestamps[p], '') >= desde)
+        if fim is not None:
+            ate = (fim + timedelta(days=1)).isoformat()
+            condicoes.append(lambda p: _como_indice(timestamps[p], '') < ate)
+
+        if filtro_processo:
+            numeros = catalogo.textos['numero_processo']
+            trecho = filtro_processo.upper()
+            condicoes.append(lambda p: trecho in _como_indice(numeros[p], '').upper())
+
+        if classificacao is not None:
+            codigos = catalogo.codigos('classificacao', lambda valor: _como_indice(valor, 'N/A') == classificacao)
+            classificacoes = catalogo.categoricos['classificacao'].codigos
+            condicoes.append(lambda p: classificacoes[p] in codigos)
+
+        if apenas_recentes:
+            recentes = self.recentes
+            condicoes.append(lambda p: recentes[p])
+
+        if arquivos is not None and len(arquivos) * 16 > len(catalogo):
+            # Muitos arquivos: percorre a ordenação inteira
+            pedidos, arquivos = arquivos, None
+            condicoes.insert(0, lambda p: catalogo.arquivo(p) in pedidos)
+
+        if arquivos is not None:
+            # Poucos arquivos: localiza cada um e ordena só esses
+            candidatas = {p for p in map(self.posicao, arquivos) if p is not None}
+            if coluna == 'timestamp':
+                candidatas = sorted(candidatas, key=lambda p: (_como_indice(timestamps[p], ''), p),
+                                    reverse=decrescente)
+            else:
+                candidatas = sorted(candidatas, key=lambda p: (centavos[p] != SEM_VALOR, centavos[p], p),
+                                    reverse=decrescente)
+        else:
+            candidatas = self.ordens[coluna]
+            if decrescente:
+                candidatas = reversed(candidatas)
+
+        return array('I', (p for p in candidatas if all(condicao(p) for condicao in condicoes)))
+
+    def _posicoes(self, filtro_processo, classificacao, arquivos, faixa_valor, periodo, ordem, apenas_recentes):
+        """Posições filtradas, pelo cache de listas da fotografia"""
+        if arquivos is not None:
+            arquivos = frozenset(arquivos)
+        return self.filtrar(filtro_processo or "", classificacao, arquivos,
+                            tuple(faixa_valor) if faixa_valor else None,
+                            tuple(periodo) if periodo else None, bool(apenas_recentes), ordem)
+
+    def contar(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None, periodo=None,
+               apenas_recentes=False):
+        """Conta os pareceres que atendem aos filtros (ver IndicePareceres.contar)"""
+        return len(self._posicoes(filtro_processo, classificacao, arquivos, faixa_valor, periodo,
+                                  "Mais recentes", apenas_recentes))
+
+    def consultar(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None, periodo=None,
+                  ordem="Mais recentes", limite=None, deslocamento=0, apenas_recentes=False):
+        """Retorna os pareceres filtrados na ordem pedida (ver IndicePareceres.consultar)"""
+        return list(self.percorrer_consulta(
+            filtro_processo, classificacao, arquivos, faixa_valor, periodo, ordem, limite, deslocamento,
+            apenas_recentes
+        ))
+
+    def percorrer_consulta(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None,
+                           periodo=None, ordem="Mais recentes", limite=None, deslocamento=0, apenas_recentes=False):
+        """Gera, um de cada vez, os pareceres de consultar"""
+        posicoes = self._posicoes(filtro_processo, classificacao, arquivos, faixa_valor, periodo, ordem,
+                                  apenas_recentes)
+        fim = deslocamento + limite if limite is not None else None
+        for posicao in posicoes[deslocamento:fim]:
+            yield self.registro(posicao)
+
+    def historico(self, numero_processo):
+        """Retorna as versões (reanálises) de um processo, da mais recente à mais antiga"""
+        processo = normalizar_numero_processo(numero_processo)
+        if processo is None:
+            return []
+
+        # Os grupos estão na ordem do processo: busca binária pelo primeiro
+        numeros = self.catalogo.textos['numero_processo']
+        primeiros = self.versoes
+        inicios = self.inicios
+        grupo = bisect_left(
+            range(len(inicios) - 1), processo,
+            key=lambda g: normalizar_numero_processo(numeros[primeiros[inicios[g]]])
+        )
+        if grupo == len(inicios) - 1:
+            return []
+        inicio, fim = inicios[grupo], inicios[grupo + 1]
+        if normalizar_numero_processo(numeros[primeiros[inicio]]) != processo:
+            return []
+
+        versoes = []
+        for posicao in self.versoes[inicio:fim]:
+            parecer = self.catalogo.registro(posicao)
+            centavos = self.catalogo.centavos[posicao]
+            parecer['valor_numerico'] = Decimal(centavos).scaleb(-2) if centavos != SEM_VALOR else None
+            versoes.append(parecer)
+        return versoes
+
+
+class ConsultaArquivosHtml:
+    """Consultas paginadas sobre os HTMLs de uma fotografia (imutável)
+
+    Recebe as linhas de IndiceArquivosHtml.listar e as guarda em colunas, na
+    ordem do caminho: as ordenações (montadas uma vez) desempatam pelo
+    caminho, como as do índice.
+    """
+
+    def __init__(self, linhas):
+        colunas = list(zip(*sorted(linhas))) or [()] * 6
+        self.caminhos, self.nomes, mtimes, tamanhos, self.numeros, self.titulos = colunas
+        self.mtimes = array('q', mtimes)
+        self.tamanhos = array('Q', tamanhos)
+        posicoes = range(len(self.caminhos))
+
+        # O sort é estável: empates ficam na ordem do caminho
+        self.ordens = {
+            'mtime_ns': array('I', sorted(posicoes, key=self.mtimes.__getitem__)),
+            'nome': array('I', sorted(posicoes, key=self.nomes.__getitem__)),
+            'tamanho': array('I', sorted(posicoes, key=self.tamanhos.__getitem__)),
+        }
+
+        # Campos do filtro de busca, já em maiúsculas (como maiusculas() no SQLite)
+        self._pesquisaveis = tuple(
+            tuple((texto or '').upper() for texto in campos)
+            for campos in zip(self.nomes, self.numeros, self.titulos)
+        )
+
+        self.filtrar = lru_cache(maxsize=CONSULTAS_EM_CACHE)(self._filtrar)
+
+    def __len__(self):
+        return len(self.caminhos)
+
+    def estatisticas(self):
+        """Retorna (quantidade, tamanho total, mtime_ns mais recente) dos HTMLs"""
+        return len(self), sum(self.tamanhos), max(self.mtimes, default=None)
+
+    def numeros_processo(self):
+        """Retorna [(caminho, número do processo)] de todos os HTMLs"""
+        return list(zip(self.caminhos, self.numeros))
+
+    def posicao(self, caminho):
+        """Posição de um HTML (None se não estiver)"""
+        posicao = bisect_left(self.caminhos, caminho)
+        if posicao < len(self.caminhos) and self.caminhos[posicao] == caminho:
+            return posicao
+        return None
+
+    def registro(self, posicao):
+        """Dicionário do HTML, como o de IndiceArquivosHtml.consultar"""
+        return {
+            'caminho': self.caminhos[posicao],
+            'nome': self.nomes[posicao],
+            'tamanho': self.tamanhos[posicao],
+            'timestamp_modificacao': self.mtimes[posicao] / 1e9,
+            'numero_processo': self.numeros[posicao],
+            'titulo': self.titulos[posicao],
+        }
+
+    def _filtrar(self, filtro_busca, caminhos, ordem):
+        """Posições dos HTMLs que atendem aos filtros, na ordem pedida
+
+        Mesmos critérios de IndiceArquivosHtml._filtros; `caminhos` é um
+        frozenset (ou None).
+        """
+        coluna, decrescente = SENTIDOS_HTML.get(ordem, SENTIDOS_HTML["Mais recentes"])
+        candidatas = self.ordens[coluna]
+        if decrescente:
+            candidatas = reversed(candidatas)
+
+        if caminhos is not None:
+            pedidas = {p for p in map(self.posicao, caminhos) if p is not None}
+            candidatas = (p for p in candidatas if p in pedidas)
+
+        if filtro_busca:
+            trecho = filtro_busca.upper()
+            pesquisaveis = self._pesquisaveis
+            candidatas = (p for p in candidatas if any(trecho in campo for campo in pesquisaveis[p]))
+
+        return array('I', candidatas)
+
+    def _posicoes(self, filtro_busca, caminhos, ordem):
+        """Posições filtradas, pelo cache de listas da fotografia"""
+        if caminhos is not None:
+            caminhos = frozenset(caminhos)
+        return self.filtrar(filtro_busca or "", caminhos, ordem)
+
+    def contar(self, filtro_busca="", caminhos=None):
+        """Conta os HTMLs que atendem aos filtros (ver IndiceArquivosHtml.contar)"""
+        return len(self._posicoes(filtro_busca, caminhos, "Mais recentes"))
+
+    def consultar(self, filtro_busca="", caminhos=None, ordem="Mais recentes", limite=None, deslocamento=0):
+        """Retorna os HTMLs filtrados na ordem pedida (ver IndiceArquivosHtml.consultar)"""
+        posicoes = self._posicoes(filtro_busca, caminhos, ordem)
+        fim = deslocamento + limite if limite is not None else None
+        return [self.registro(posicao) for posicao in posicoes[deslocamento:fim]]
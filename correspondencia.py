@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Correspondência entre Pareceres JSON e HTML
+Volpe Advogados Associados - Unimed Cuiabá
+
+Os JSONs são nomeados pelo hash (parecer_<md5>.json) e os HTMLs pelo número
+CNJ (parecer_1023444-75_2022_4_01_3600.html). Este módulo monta, uma vez por
+versão do acervo, um mapa JSON -> HTML com busca em tempo constante.
+"""
+
+from pathlib import Path
+
+from extracao import normalizar_numero_processo
+
+
+# Prefixos usados nos nomes dos HTMLs gerados
+PREFIXOS_HTML = ("parecer_", "relatorio_")
+
+
+class MapaCorrespondencia:
+    """Mapa pré-calculado de cada parecer JSON para o seu HTML"""
+
+    def __init__(self, pareceres, arquivos_html):
+        """Monta o mapa a partir dos metadados dos JSONs e dos HTMLs
+
+        `pareceres` são os dicionários retornados pelo índice de pareceres e
+        `arquivos_html` os pares (caminho, número do processo) do índice de
+        HTMLs (IndiceArquivosHtml.numeros_processo), de modo que nenhum
+        arquivo é relido aqui.
+        """
+        self.por_numero = {}
+        self.por_nome = {}
+
+        for caminho, numero_processo in sorted((str(c), n) for c, n in arquivos_html):
+            nome = Path(caminho).name
+            self.por_nome.setdefault(nome, caminho)
+
+            # Número pelo nome do arquivo; se não houver, o lido no conteúdo
+            stem = Path(caminho).stem
+            for prefixo in PREFIXOS_HTML:
+                if stem.startswith(prefixo):
+                    stem = stem[len(prefixo):]
+                    break
+
+            chave = normalizar_numero_processo(stem) or normalizar_numero_processo(numero_processo)
+            if chave:
+                self.por_numero.setdefault(chave, caminho)
+
+        self.mapa = {}
+        for parecer in pareceres:
+            html = self._localizar(parecer)
+            if html:
+                self.mapa[parecer['arquivo']] = html
+
+    def _localizar(self, parecer):
+        """Localiza o HTML de um parecer: primeiro pelo CNJ, depois pelo nome"""
+        chave = normalizar_numero_processo(parecer.get('numero_processo'))
+        if chave and chave in self.por_numero:
+            return self.por_numero[chave]
+
+        nome_base = Path(parecer['arquivo']).stem
+        candidatos = [
+            f"{nome_base}.html",
+            f"parecer_{nome_base}.html",
+            f"relatorio_{nome_base}.html",
+        ]
+        if parecer.get('hash'):
+            candidatos.append(f"parecer_{parecer['hash']}.html")
+
+        for candidato in candidatos:
+            if candidato in self.por_nome:
+                return self.por_nome[candidato]
+
+        return None
+
+    def buscar(self, caminho_json):
+        """Retorna o caminho do HTML correspondente ao JSON, ou None"""
+        return self.mapa.get(str(caminho_json))
+
+    def __len__(self):
+        return len(self.mapa)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pareceres Quase Idênticos
+Volpe Advogados Associados - Unimed Cuiabá
+
+Detecta pareceres com texto (`resultado`) quase igual, sem comparar cada
+par do acervo:
+
+- o texto vira o conjunto das sequências de TAMANHO_SHINGLE palavras
+  (shingles), depois da mesma normalização da busca textual
+- cada conjunto é resumido por uma assinatura MinHash de NUM_PERMUTACOES
+  valores; a fração de valores iguais entre duas assinaturas estima a
+  semelhança de Jaccard entre os conjuntos
+- a assinatura é dividida em BANDAS faixas (LSH); só pareceres que
+  coincidem em alguma faixa inteira são candidatos e têm a semelhança
+  estimada. Com 20 faixas de 6 valores, um par com semelhança 0,8 vira
+  candidato com probabilidade ~99,8%; um par com 0,4, com ~8%.
+
+As assinaturas e as faixas ficam em SQLite e só são recalculadas para
+pareceres novos ou alterados, como na busca textual.
+
+Uso:
+    python -m duplicatas [pareceres] [--limiar 0.8]
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import zlib
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+from busca_textual import carregar_campos_json
+from indice_pareceres import IndicePareceres, caminho_indice_padrao, conectar_indice
+from normalizacao import tokenizar
+
+
+# Palavras por shingle
+TAMANHO_SHINGLE = 5
+
+# Valores da assinatura MinHash e divisão em faixas do LSH
+NUM_PERMUTACOES = 120
+BANDAS = 20
+LINHAS_POR_BANDA = NUM_PERMUTACOES // BANDAS
+
+# Semelhança (Jaccard estimada) a partir da qual dois pareceres são quase idênticos
+LIMIAR_SEMELHANCA = 0.8
+
+# Permutações h(x) = (a·x + b) mod PRIMO, fixas para que as assinaturas
+# gravadas continuem comparáveis; a·x + b cabe em 64 bits (a, b, x < 2³²)
+PRIMO = 4294967291
+_SORTEIO = np.random.default_rng(20240601)
+_COEFICIENTES = _SORTEIO.integers(1, 2**32, size=(NUM_PERMUTACOES, 1), dtype=np.uint64)
+_DESLOCAMENTOS = _SORTEIO.integers(0, 2**32, size=(NUM_PERMUTACOES, 1), dtype=np.uint64)
+
+# Shingles processados por vez no cálculo da assinatura (limita a memória)
+BLOCO_SHINGLES = 4096
+
+VERSAO_ESQUEMA = 1
+
+
+def shingles(texto):
+    """Conjunto (array ordenado de uint32) dos shingles do texto"""
+    palavras = tokenizar(texto or '')
+    if not palavras:
+        return np.empty(0, dtype=np.uint32)
+
+    passos = max(1, len(palavras) - TAMANHO_SHINGLE + 1)
+    valores = (
+        zlib.crc32(' '.join(palavras[i:i + TAMANHO_SHINGLE]).encode('utf-8'))
+        for i in range(passos)
+    )
+    return np.unique(np.fromiter(valores, dtype=np.uint32, count=passos))
+
+
+def assinatura_minhash(conjunto):
+    """Assinatura MinHash (NUM_PERMUTACOES valores uint32) de um conjunto de shingles"""
+    assinatura = np.full(NUM_PERMUTACOES, PRIMO, dtype=np.uint64)
+    for inicio in range(0, len(conjunto), BLOCO_SHINGLES):
+        bloco = conjunto[inicio:inicio + BLOCO_SHINGLES].astype(np.uint64)
+        valores = (_COEFICIENTES * bloco + _DESLOCAMENTOS) % PRIMO
+        np.minimum(assinatura, valores.min(axis=1), out=assinatura)
+    return assinatura.astype(np.uint32)
+
+
+def chaves_faixas(assinatura):
+    """Chave (inteiro de 64 bits com sinal) de cada faixa da assinatura"""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(faixa.tobytes(), digest_size=8).digest(), 'little', signed=True
+        )
+        for faixa in assinatura.reshape(BANDAS, LINHAS_POR_BANDA)
+    ]
+
+
+def semelhanca(assinatura, outra):
+    """Semelhança de Jaccard estimada por duas assinaturas"""
+    return float(np.count_nonzero(assinatura == outra)) / NUM_PERMUTACOES
+
+
+class IndiceDuplicatas:
+    """Assinaturas MinHash e faixas LSH dos pareceres, persistidas em SQLite"""
+
+    TABELAS = {
+        'assinaturas': """
+            CREATE TABLE IF NOT EXISTS assinaturas (
+                arquivo TEXT PRIMARY KEY,
+                versao TEXT NOT NULL,
+                assinatura BLOB
+            )
+        """,
+        'faixas': """
+            CREATE TABLE IF NOT EXISTS faixas (
+                banda INTEGER NOT NULL,
+                chave INTEGER NOT NULL,
+                arquivo TEXT NOT NULL
+            )
+        """,
+    }
+
+    AUXILIARES = (
+        "CREATE INDEX IF NOT EXISTS faixas_chave ON faixas (banda, chave)",
+        "CREATE INDEX IF NOT EXISTS faixas_arquivo ON faixas (arquivo)",
+    )
+
+    def __init__(self, caminho_indice):
+        self.caminho_indice = Path(caminho_indice)
+
+    def _conectar(self):
+        """Abre a conexão com o índice, criando o esquema se necessário"""
+        return conectar_indice(self.caminho_indice, VERSAO_ESQUEMA, self.TABELAS, self.AUXILIARES)
+
+    def sincronizar(self, documentos):
+        """Atualiza as assinaturas com os documentos informados
+
+        `documentos` é uma sequência de (arquivo, versao, carregar_texto),
+        onde carregar_texto é chamado apenas para documentos novos ou
+        alterados (ver documentos_json). Documentos que não estiverem na
+        sequência são removidos. Retorna um resumo com as quantidades
+        calculadas e removidas e a lista de erros de leitura.
+        """
+        resumo = {'calculados': 0, 'removidos': 0, 'erros': []}
+
+        with closing(self._conectar()) as con:
+            registrados = dict(con.execute("SELECT arquivo, versao FROM assinaturas"))
+
+            with con:
+                for arquivo, versao, carregar_texto in documentos:
+                    anterior = registrados.pop(arquivo, None)
+                    if anterior == versao:
+                        continue
+
+                    try:
+                        conjunto = shingles(carregar_texto())
+                    except Exception as e:
+                        resumo['erros'].append((Path(arquivo).name, str(e)))
+                        continue
+
+                    assinatura = assinatura_minhash(conjunto) if len(conjunto) else None
+                    self._remover(con, arquivo)
+                    con.execute(
+                        "INSERT INTO assinaturas VALUES (?, ?, ?)",
+                        (arquivo, versao, assinatura.tobytes() if assinatura is not None else None)
+                    )
+                    if assinatura is not None:
+                        con.executemany(
+                            "INSERT INTO faixas VALUES (?, ?, ?)",
+                            [(banda, chave, arquivo) for banda, chave in enumerate(chaves_faixas(assinatura))]
+                        )
+                    resumo['calculados'] += 1
+
+                # O que sobrou não existe mais no acervo
+                for arquivo in registrados:
+                    self._remover(con, arquivo)
+                resumo['removidos'] = len(registrados)
+
+        return resumo
+
+    @staticmethod
+    def _remover(con, arquivo):
+        """Remove a assinatura e as faixas de um arquivo"""
+        con.execute("DELETE FROM assinaturas WHERE arquivo = ?", (arquivo,))
+        con.execute("DELETE FROM faixas WHERE arquivo = ?", (arquivo,))
+
+    @staticmethod
+    def _assinaturas(con, arquivos):
+        """Retorna {arquivo: assinatura} dos arquivos informados"""
+        return {
+            arquivo: np.frombuffer(dados, dtype=np.uint32)
+            for arquivo, dados in con.execute(
+                "SELECT arquivo, assinatura FROM assinaturas "
+                "WHERE assinatura IS NOT NULL AND arquivo IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(arquivos)),)
+            )
+        }
+
+    def semelhantes(self, arquivo, limiar=LIMIAR_SEMELHANCA):
+        """Retorna [(arquivo, semelhança)] dos pareceres quase idênticos a `arquivo`
+
+        Só os que coincidem em alguma faixa são comparados. Ordenados da
+        maior para a menor semelhança.
+        """
+        arquivo = str(arquivo)
+        with closing(self._conectar()) as con:
+            candidatos = [
+                outro for (outro,) in con.execute(
+                    "SELECT DISTINCT candidato.arquivo FROM faixas AS proprio "
+                    "JOIN faixas AS candidato ON candidato.banda = proprio.banda AND candidato.chave = proprio.chave "
+                    "WHERE proprio.arquivo = ? AND candidato.arquivo <> ?", (arquivo, arquivo)
+                )
+            ]
+            if not candidatos:
+                return []
+            assinaturas = self._assinaturas(con, candidatos + [arquivo])
+
+        propria = assinaturas.get(arquivo)
+        if propria is None:
+            return []
+        resultado = [(outro, semelhanca(propria, assinaturas[outro])) for outro in candidatos if outro in assinaturas]
+        return sorted(
+            ((outro, valor) for outro, valor in resultado if valor >= limiar), key=lambda item: (-item[1], item[0])
+        )
+
+    def pares_candidatos(self):
+        """Gera os pares (arquivo, arquivo) que coincidem em alguma faixa, sem repetição"""
+        with closing(self._conectar()) as con:
+            yield from con.execute(
+                "SELECT DISTINCT a.arquivo, b.arquivo FROM faixas AS a "
+                "JOIN faixas AS b ON b.banda = a.banda AND b.chave = a.chave AND b.arquivo > a.arquivo"
+            )
+
+    def grupos(self, limiar=LIMIAR_SEMELHANCA):
+        """Retorna os grupos (listas de arquivos) de pareceres quase idênticos
+
+        Dois pareceres ficam no mesmo grupo se a semelhança entre eles, ou
+        entre cada um e um terceiro do grupo, atinge o limiar. Grupos maiores
+        primeiro.
+        """
+        pares = list(self.pares_candidatos())
+        with closing(self._conectar()) as con:
+            assinaturas = self._assinaturas(con, {arquivo for par in pares for arquivo in par})
+
+        # União de conjuntos (union-find) sobre os pares confirmados
+        pai = {}
+
+        def raiz(arquivo):
+            pai.setdefault(arquivo, arquivo)
+            while pai[arquivo] != arquivo:
+                pai[arquivo] = pai[pai[arquivo]]
+                arquivo = pai[arquivo]
+            return arquivo
+
+        for a, b in pares:
+            if semelhanca(assinaturas[a], assinaturas[b]) >= limiar:
+                pai[raiz(a)] = raiz(b)
+
+        grupos = {}
+        for arquivo in pai:
+            grupos.setdefault(raiz(arquivo), []).append(arquivo)
+        return sorted((sorted(g) for g in grupos.values() if len(g) > 1), key=lambda g: (-len(g), g[0]))
+
+
+def documentos_json(versoes_json):
+    """Enumera os pareceres para IndiceDuplicatas.sincronizar
+
+    `versoes_json` é {arquivo: (mtime_ns, tamanho)}, como em
+    IndicePareceres.versoes; o texto comparado é o `resultado` do JSON.
+    """
+    for arquivo, (mtime_ns, tamanho) in versoes_json.items():
+        yield arquivo, f"{mtime_ns}:{tamanho}", lambda a=arquivo: carregar_campos_json(a)['conteudo']
+
+
+def main():
+    """Lista os grupos de pareceres quase idênticos de uma pasta"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta', nargs='?', default='pareceres', help='Pasta (ou .pacote) dos pareceres JSON')
+    parser.add_argument('--limiar', type=float, default=LIMIAR_SEMELHANCA, help='Semelhança mínima (0 a 1)')
+    args = parser.parse_args()
+
+    indice = IndicePareceres(args.pasta)
+    indice.sincronizar()
+    duplicatas = IndiceDuplicatas(caminho_indice_padrao(args.pasta, prefixo="duplicatas"))
+    resumo = duplicatas.sincronizar(documentos_json(indice.versoes()))
+
+    processos = {parecer['arquivo']: parecer.get('numero_processo', 'N/A') for parecer in indice.percorrer()}
+    grupos = duplicatas.grupos(args.limiar)
+
+    print(f"Assinaturas calculadas: {resumo['calculados']}, removidas: {resumo['removidos']}")
+    print(f"Grupos de pareceres quase idênticos (semelhança ≥ {args.limiar:.0%}): {len(grupos)}")
+    for numero, grupo in enumerate(grupos, 1):
+        print(f"\n{numero}. {len(grupo)} pareceres")
+        for arquivo in grupo:
+            print(f"   {processos.get(arquivo, 'N/A'):<27} {Path(arquivo).name}")
+
+    for nome, erro in resumo['erros']:
+        print(f"⚠️  {nome}: {erro}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
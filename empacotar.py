@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Empacotamento do Acervo
+Volpe Advogados Associados - Unimed Cuiabá
+
+Importa as pastas de pareceres (JSONs e HTMLs) para um pacote .pacote (ver
+pacote.py) e exporta um pacote de volta para pastas. Cada pasta entra com
+o próprio nome (pareceres/..., pareceres_html/...); uma nova importação só
+grava os arquivos novos ou alterados e tira do pacote os que sumiram das
+pastas. HTMLs compactados (ver compactacao_html) entram reconstruídos.
+Com --sem-compressao os registros novos são gravados puros: o pacote fica
+maior, mas a leitura não gasta CPU descomprimindo.
+
+Para usar o pacote no aplicativo, informe o caminho do .pacote nos dois
+campos de pasta da barra lateral.
+
+Uso:
+    python -m empacotar importar acervo.pacote [pareceres] [pareceres_html] [--sem-compressao]
+    python -m empacotar exportar acervo.pacote destino
+    python -m empacotar listar acervo.pacote
+    python -m empacotar compactar acervo.pacote
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from compactacao_html import ler_html
+from indice_pareceres import varrer_arquivos
+from pacote import Pacote, compactar_pacote, gravar_registros
+
+
+def _arquivos_da_pasta(pasta):
+    """Gera (nome interno, bytes, mtime_ns) dos JSONs e HTMLs de uma pasta"""
+    raiz = Path(pasta)
+    for extensao in ('.json', '.html'):
+        for caminho, mtime_ns, _ in sorted(varrer_arquivos(raiz, extensao)):
+            if extensao == '.html':
+                dados = ler_html(caminho, usar_cache=False)
+            else:
+                with open(caminho, 'rb') as f:
+                    dados = f.read()
+            yield '/'.join((raiz.name,) + Path(caminho).relative_to(raiz).parts), dados, mtime_ns
+
+
+def importar_pastas(caminho, pastas, comprimir=True):
+    """Grava no pacote os arquivos das pastas; remove os que sumiram delas
+
+    Retorna (gravados, removidos).
+    """
+    nomes = set()
+
+    def arquivos():
+        for pasta in pastas:
+            for nome, dados, mtime_ns in _arquivos_da_pasta(pasta):
+                nomes.add(nome)
+                yield nome, dados, mtime_ns
+
+    gravados = gravar_registros(caminho, arquivos(), comprimir=comprimir)
+
+    # Arquivos que não estão mais nas pastas importadas
+    prefixos = tuple(f"{Path(pasta).name}/" for pasta in pastas)
+    with Pacote(caminho) as pacote:
+        sumidos = [nome for nome in pacote.registros if nome.startswith(prefixos) and nome not in nomes]
+    if sumidos:
+        gravar_registros(caminho, (), removidos=sumidos)
+    return gravados, len(sumidos)
+
+
+def exportar_pacote(caminho, destino):
+    """Recria no destino as pastas do pacote (com o mtime original); retorna a quantidade"""
+    with Pacote(caminho) as pacote:
+        for nome, registro in pacote.registros.items():
+            arquivo = Path(destino).joinpath(*nome.split('/'))
+            arquivo.parent.mkdir(parents=True, exist_ok=True)
+            arquivo.write_bytes(pacote.ler(nome))
+            os.utime(arquivo, ns=(registro.mtime_ns, registro.mtime_ns))
+        return len(pacote)
+
+
+def main():
+    """Ferramenta de linha de comando"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('importar', 'exportar', 'listar', 'compactar'):
+        print(__doc__)
+        return 1
+
+    comando, caminho = sys.argv[1], sys.argv[2]
+
+    if comando == 'importar':
+        argumentos = sys.argv[3:]
+        comprimir = '--sem-compressao' not in argumentos
+        pastas = [a for a in argumentos if a != '--sem-compressao'] or ['pareceres', 'pareceres_html']
+        faltando = [pasta for pasta in pastas if not Path(pasta).is_dir()]
+        if faltando:
+            print(f"❌ Pasta(s) não encontrada(s): {', '.join(faltando)}")
+            return 1
+        gravados, removidos = importar_pastas(caminho, pastas, comprimir)
+        with Pacote(caminho) as pacote:
+            total = len(pacote)
+        print(f"✓ {gravados} arquivo(s) gravado(s), {removidos} removido(s); {total} no pacote")
+
+    elif comando == 'exportar':
+        if len(sys.argv) != 4:
+            print(__doc__)
+            return 1
+        print(f"✓ {exportar_pacote(caminho, sys.argv[3])} arquivo(s) exportado(s) para {sys.argv[3]}")
+
+    elif comando == 'listar':
+        with Pacote(caminho) as pacote:
+            original = sum(r.tamanho for r in pacote.registros.values())
+            gravado = sum(r.gravado for r in pacote.registros.values())
+            for nome, registro in sorted(pacote.registros.items()):
+                print(f"{registro.tamanho:>12,} {registro.gravado:>12,}  {nome}")
+            print(f"{len(pacote)} arquivo(s): {original:,} bytes, {gravado:,} gravados; "
+                  f"pacote com {Path(caminho).stat().st_size:,} bytes")
+
+    else:
+        print(f"✓ {compactar_pacote(caminho):,} bytes recuperados")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
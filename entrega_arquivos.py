@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Entrega dos Arquivos dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Prepara os HTMLs dos pareceres para download sob demanda: cada arquivo é
+identificado pelo hash do conteúdo (usado como ETag) e ganha variantes
+pré-comprimidas (gzip e, se o pacote `brotli` estiver instalado, brotli),
+gravadas uma única vez em .cache_pareceres/downloads/<hash>.<codificação>.
+HTMLs compactados (ver compactacao_html) são entregues reconstruídos, lidos
+na hora (o original reconstruído não é gravado de novo na pasta). A pasta
+é podada de tempos em tempos: variantes sem uso há mais de
+IDADE_MAXIMA_DOWNLOADS e, acima de LIMITE_DOWNLOADS, as mais antigas.
+As funções de negociação permitem que um servidor HTTP escolha a variante
+pelo Accept-Encoding e responda 304 quando o If-None-Match confere.
+
+Uso (pré-gera as variantes de uma pasta e apaga as dos demais hashes):
+    python -m entrega_arquivos [pasta_html]
+"""
+
+import gzip
+import hashlib
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from compactacao_html import ler_html
+from indice_pareceres import DIRETORIO_CACHE, gravar_atomico, varrer_arquivos
+from pacote import estado_arquivo
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Pasta das variantes pré-comprimidas
+DIRETORIO_DOWNLOADS = DIRETORIO_CACHE / "downloads"
+
+# Codificações na ordem de preferência do servidor
+CODIFICACOES = ('br', 'gzip', 'identity')
+
+# Espaço máximo (bytes) das variantes; acima dele as mais antigas são apagadas
+LIMITE_DOWNLOADS = 512 * 1024 * 1024
+
+# Variantes sem uso há mais que isso (segundos) são apagadas na poda
+IDADE_MAXIMA_DOWNLOADS = 30 * 24 * 3600
+
+# O uso de uma variante renova o mtime dela no máximo uma vez por intervalo
+INTERVALO_RENOVACAO = 24 * 3600
+
+# Compressores das variantes gravadas (identity é sempre o próprio HTML)
+COMPRESSORES = {'gzip': lambda dados: gzip.compress(dados, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORES['br'] = lambda dados: brotli.compress(dados, quality=11)
+
+# Bytes gravados desde a última poda (None: ainda não podou neste processo)
+_gravados_desde_poda = None
+_trava_poda = threading.Lock()
+
+
+class Artefato(NamedTuple):
+    """Arquivo pronto para entrega: ETag e caminho de cada variante
+
+    variantes['identity'] é o próprio HTML (que pode estar compactado ou num
+    pacote): leia o conteúdo com ler_variante.
+    """
+    nome: str
+    etag: str
+    tamanho: int
+    variantes: dict
+
+
+@lru_cache(maxsize=4096)
+def _identificar(caminho, mtime_ns, tamanho, usar_cache=True):
+    """Retorna (SHA-256, tamanho, compactado) do HTML entregue
+
+    mtime_ns e tamanho (do arquivo em disco ou no pacote) só invalidam o
+    cache.
+    """
+    dados = ler_html(caminho, usar_cache)
+
+    # Um HTML compactado é sempre menor que o original reconstruído
+    return hashlib.sha256(dados).hexdigest(), len(dados), len(dados) != tamanho
+
+
+def hash_conteudo(caminho):
+    """SHA-256 do HTML entregue (reconstruído, se compactado)
+
+    Calculado uma vez por versão do arquivo em disco.
+    """
+    return _identificar(str(caminho), *estado_arquivo(caminho))[0]
+
+
+def caminho_variante(digest, codificacao, diretorio=DIRETORIO_DOWNLOADS):
+    """Caminho da variante pré-comprimida de um conteúdo (pode não existir)"""
+    return Path(diretorio) / f"{digest}.{codificacao}"
+
+
+def preparar_artefato(caminho, diretorio=DIRETORIO_DOWNLOADS, usar_cache=True):
+    """Calcula a ETag do arquivo e garante suas variantes pré-comprimidas
+
+    As variantes são gravadas na primeira vez e reaproveitadas enquanto o
+    conteúdo não mudar; uma variante que não fica menor que o original é
+    descartada.
+    """
+    caminho = Path(caminho)
+    digest, tamanho, _ = _identificar(str(caminho), *estado_arquivo(caminho), usar_cache)
+
+    variantes = {'identity': caminho}
+    dados = None
+    gravados = 0
+    for codificacao, comprimir in COMPRESSORES.items():
+        destino = caminho_variante(digest, codificacao, diretorio)
+        descartado = destino.with_name(f"{destino.name}.descartado")
+
+        if _renovar(destino):
+            variantes[codificacao] = destino
+            continue
+        if _renovar(descartado):
+            continue
+
+        if dados is None:
+            dados = ler_html(caminho, usar_cache)
+        comprimido = comprimir(dados)
+
+        if len(comprimido) < len(dados):
+            gravar_atomico(destino, comprimido)
+            variantes[codificacao] = destino
+            gravados += len(comprimido)
+        else:
+            gravar_atomico(descartado, b'')
+
+    if gravados:
+        _podar_se_preciso(diretorio, gravados)
+    return Artefato(caminho.name, f'"{digest}"', tamanho, variantes)
+
+
+def ler_variante(artefato, codificacao, usar_cache=True):
+    """Conteúdo (bytes) de uma variante do artefato
+
+    identity é o HTML reconstruído; uma variante apagada pela poda entre o
+    preparo e a leitura é comprimida de novo na hora.
+    """
+    if codificacao == 'identity':
+        return ler_html(artefato.variantes['identity'], usar_cache)
+    try:
+        with open(artefato.variantes[codificacao], 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return COMPRESSORES[codificacao](ler_html(artefato.variantes['identity'], usar_cache))
+
+
+def _renovar(arquivo):
+    """Indica se o arquivo existe, renovando o mtime dele se estiver antigo
+
+    O mtime marca o último uso, que a poda respeita.
+    """
+    try:
+        mtime = arquivo.stat().st_mtime
+    except FileNotFoundError:
+        return False
+    if time.time() - mtime > INTERVALO_RENOVACAO:
+        try:
+            os.utime(arquivo)
+        except OSError:
+            pass
+    return True
+
+
+def _podar_se_preciso(diretorio, gravados):
+    """Poda a pasta na primeira gravação do processo e a cada 1/8 do limite gravado"""
+    global _gravados_desde_poda
+    with _trava_poda:
+        if _gravados_desde_poda is not None:
+            _gravados_desde_poda += gravados
+            if _gravados_desde_poda < LIMITE_DOWNLOADS // 8:
+                return
+        _gravados_desde_poda = 0
+    podar_downloads(diretorio)
+
+
+def podar_downloads(diretorio=DIRETORIO_DOWNLOADS, limite=LIMITE_DOWNLOADS,
+                    idade_maxima=IDADE_MAXIMA_DOWNLOADS, manter=None):
+    """Apaga variantes antigas da pasta de downloads; retorna (apagados, bytes)
+
+    Apaga as variantes sem uso há mais de idade_maxima segundos, as cópias
+    identity gravadas por versões anteriores e, enquanto a pasta passar de
+    `limite` bytes, as de uso mais antigo. Se `manter` (conjunto de hashes)
+    for informado, também apaga as variantes de qualquer outro hash.
+    """
+    agora = time.time()
+    arquivos = []
+    for arquivo in Path(diretorio).glob('*.*'):
+        if arquivo.name.startswith('.'):
+            continue  # temporário de uma gravação em andamento
+        try:
+            estado = arquivo.stat()
+        except FileNotFoundError:
+            continue
+        arquivos.append((estado.st_mtime, estado.st_size, arquivo))
+
+    apagados, liberados = 0, 0
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for mtime, tamanho, arquivo in sorted(arquivos, key=lambda item: item[0]):
+        digest, _, codificacao = arquivo.name.partition('.')
+        obsoleto = (
+            agora - mtime > idade_maxima
+            or codificacao == 'identity'
+            or (manter is not None and digest not in manter)
+        )
+        if not obsoleto and total <= limite:
+            continue
+        try:
+            arquivo.unlink()
+        except FileNotFoundError:
+            pass
+        apagados += 1
+        liberados += tamanho
+        total -= tamanho
+
+    return apagados, liberados
+
+
+def escolher_codificacao(accept_encoding, disponiveis):
+    """Escolhe a melhor codificação disponível aceita pelo cliente
+
+    Segue o Accept-Encoding (com pesos q); sem o cabeçalho, só identity.
+    `disponiveis` são as chaves de Artefato.variantes.
+    """
+    pesos = {}
+    for item in (accept_encoding or '').split(','):
+        partes = [p.strip() for p in item.split(';')]
+        if not partes[0]:
+            continue
+        peso = 1.0
+        for parametro in partes[1:]:
+            if parametro.startswith('q='):
+                try:
+                    peso = float(parametro[2:])
+                except ValueError:
+                    peso = 0.0
+        pesos[partes[0].lower()] = peso
+
+    aceitas = []
+    for ordem, codificacao in enumerate(CODIFICACOES):
+        if codificacao not in disponiveis:
+            continue
+        # identity é sempre aceitável se não for excluída, mas é a última opção
+        peso = pesos.get(codificacao, pesos.get('*', 0.001 if codificacao == 'identity' else 0.0))
+        if peso > 0:
+            aceitas.append((-peso, ordem, codificacao))
+
+    # Maior peso do cliente; no empate, a preferência do servidor
+    return min(aceitas)[2] if aceitas else 'identity'
+
+
+def etag_codificacao(etag, codificacao):
+    """ETag de uma codificação do conteúdo
+
+    Uma ETag forte identifica os bytes entregues (RFC 9110): cada
+    codificação leva o nome dela na ETag do conteúdo ("<sha>-gzip").
+    """
+    return etag if codificacao == 'identity' else f'{etag[:-1]}-{codificacao}"'
+
+
+def etag_confere(if_none_match, etag):
+    """Indica se o If-None-Match do cliente corresponde à ETag (resposta 304)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidatos = [c.strip() for c in if_none_match.split(',')]
+    return any(c.removeprefix('W/') == etag for c in candidatos)
+
+
+def main():
+    """Pré-gera as variantes comprimidas de todos os HTMLs de uma pasta"""
+    pasta = sys.argv[1] if len(sys.argv) > 1 else "pareceres_html"
+    totais = {codificacao: 0 for codificacao in CODIFICACOES}
+
+    quantidade = 0
+    atuais = set()
+    for caminho, _, _ in varrer_arquivos(pasta, '.html'):
+        artefato = preparar_artefato(caminho)
+        atuais.add(artefato.etag.strip('"'))
+        quantidade += 1
+        for codificacao in CODIFICACOES:
+            variante = artefato.variantes.get(codificacao)
+            if codificacao == 'identity' or variante is None:
+                totais[codificacao] += artefato.tamanho
+            else:
+                totais[codificacao] += variante.stat().st_size
+
+    # Com a pasta inteira percorrida, as variantes de outros hashes saem
+    apagados, liberados = podar_downloads(manter=atuais)
+
+    print(f"Arquivos: {quantidade}")
+    print(f"Variantes apagadas: {apagados} ({liberados:,} bytes)")
+    for codificacao in CODIFICACOES:
+        if codificacao == 'br' and brotli is None:
+            print("br: pacote brotli não instalado")
+            continue
+        print(f"{codificacao}: {totais[codificacao]:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
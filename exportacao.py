@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportação da Lista de Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Exporta a lista de pareceres (número CNJ, parte contrária, natureza, valor,
+classificação, risco e data da análise) em CSV, JSONL ou XLSX. Os pareceres
+chegam por um gerador (IndicePareceres.percorrer_consulta) e cada linha é
+gravada assim que lida, de modo que a memória usada não depende do tamanho
+do acervo.
+
+O valor sai como número (ponto decimal no CSV e no JSONL, célula numérica
+no XLSX) e a data em ISO 8601 (célula de data no XLSX). O XLSX é montado
+diretamente (zip com as planilhas em XML), sem dependências externas.
+
+Uso (mesmos filtros da página "Pareceres com JSON"):
+    python -m exportacao [pasta] --formato xlsx --saida contingencias.xlsx
+                         [--classificacao "RISCO ALTO"] [--processo 0001234]
+                         [--valor-minimo 1000] [--valor-maximo 50000]
+                         [--de 2025-01-01] [--ate 2025-01-31] [--ordem "Maior valor"]
+                         [--so-recentes]
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+import tempfile
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from extracao import normalizar_risco
+from indice_pareceres import ORDENACOES_PARECERES, IndicePareceres
+
+
+# Colunas exportadas: campo e cabeçalho
+COLUNAS = (
+    ('numero_processo', "Número CNJ"),
+    ('parte_contraria', "Parte Contrária"),
+    ('natureza', "Natureza"),
+    ('valor', "Valor (R$)"),
+    ('classificacao', "Classificação"),
+    ('risco', "Risco"),
+    ('data_analise', "Data da Análise"),
+)
+
+# Formato -> (tipo MIME, extensão)
+FORMATOS = {
+    'csv': ("text/csv", ".csv"),
+    'jsonl': ("application/x-ndjson", ".jsonl"),
+    'xlsx': ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+# Linhas acumuladas antes de cada gravação no XLSX
+LINHAS_POR_BLOCO = 500
+
+# Acima deste tamanho o arquivo temporário da exportação vai para o disco
+LIMITE_MEMORIA_EXPORTACAO = 8 * 2**20
+
+# Caracteres de controle não aceitos em XML
+PADRAO_CONTROLE_XML = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Dia zero das datas do Excel
+EPOCA_EXCEL = datetime(1899, 12, 30)
+
+
+def converter_data(timestamp):
+    """Converte o timestamp do parecer em datetime (None se não for ISO 8601)"""
+    try:
+        return datetime.fromisoformat(str(timestamp)).replace(microsecond=0, tzinfo=None)
+    except ValueError:
+        return None
+
+
+def linhas_exportacao(pareceres):
+    """Gera um dicionário por parecer com os campos de COLUNAS
+
+    `valor` é Decimal (ou None) e `data_analise` é datetime (ou None).
+    """
+    for parecer in pareceres:
+        yield {
+            'numero_processo': str(parecer.get('numero_processo', '')),
+            'parte_contraria': str(parecer.get('parte_contraria', '')),
+            'natureza': str(parecer.get('natureza', '')),
+            'valor': parecer.get('valor_numerico'),
+            'classificacao': str(parecer.get('classificacao', '')),
+            'risco': normalizar_risco(parecer.get('risco')).value,
+            'data_analise': converter_data(parecer.get('timestamp', '')),
+        }
+
+
+def _texto(valor):
+    """Valor de uma célula como texto (CSV)"""
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return str(valor)
+
+
+def escrever_csv(linhas, destino):
+    """Grava as linhas em CSV (UTF-8 com BOM, para o Excel) no arquivo binário `destino`"""
+    texto = io.TextIOWrapper(destino, encoding='utf-8-sig', newline='')
+    try:
+        escritor = csv.writer(texto)
+        escritor.writerow([cabecalho for _, cabecalho in COLUNAS])
+        quantidade = 0
+        for linha in linhas:
+            escritor.writerow([_texto(linha[campo]) for campo, _ in COLUNAS])
+            quantidade += 1
+        texto.flush()
+    finally:
+        # Devolve `destino` aberto a quem chamou
+        texto.detach()
+    return quantidade
+
+
+def _json(valor):
+    """Valor de um campo no JSONL"""
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def escrever_jsonl(linhas, destino):
+    """Grava uma linha JSON por parecer no arquivo binário `destino`"""
+    quantidade = 0
+    for linha in linhas:
+        registro = {campo: _json(linha[campo]) for campo, _ in COLUNAS}
+        destino.write(json.dumps(registro, ensure_ascii=False).encode('utf-8') + b'\n')
+        quantidade += 1
+    return quantidade
+
+
+# Partes fixas do XLSX (estilos: 1 = moeda, 2 = data e hora ISO, 3 = cabeçalho)
+_XLSX_FIXOS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Pareceres" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd\\ hh:mm:ss"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '</cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _celula_xlsx(valor, estilo_texto=''):
+    """XML de uma célula do XLSX"""
+    if valor is None:
+        return '<c/>'
+    if isinstance(valor, Decimal):
+        return f'<c s="1"><v>{valor}</v></c>'
+    if isinstance(valor, datetime):
+        dias = (valor - EPOCA_EXCEL).total_seconds() / 86400
+        return f'<c s="2"><v>{dias:.10f}</v></c>'
+    texto = escape(PADRAO_CONTROLE_XML.sub('', str(valor)))
+    return f'<c t="inlineStr"{estilo_texto}><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def escrever_xlsx(linhas, destino):
+    """Grava as linhas numa planilha XLSX no arquivo binário `destino`
+
+    A planilha é gravada em blocos de LINHAS_POR_BLOCO linhas direto no zip.
+    """
+    quantidade = 0
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) as pacote:
+        for nome, conteudo in _XLSX_FIXOS.items():
+            pacote.writestr(nome, conteudo)
+
+        with pacote.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as planilha:
+            planilha.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+                '</sheetView></sheetViews>'
+                '<cols><col min="1" max="1" width="27" customWidth="1"/><col min="2" max="3" width="45" customWidth="1"/>'
+                '<col min="4" max="4" width="16" customWidth="1"/><col min="5" max="6" width="18" customWidth="1"/>'
+                '<col min="7" max="7" width="20" customWidth="1"/></cols>'
+                '<sheetData><row>'
+                + ''.join(_celula_xlsx(cabecalho, ' s="3"') for _, cabecalho in COLUNAS)
+                + '</row>'
+            ).encode('utf-8'))
+
+            bloco = []
+            for linha in linhas:
+                bloco.append('<row>' + ''.join(_celula_xlsx(linha[campo]) for campo, _ in COLUNAS) + '</row>')
+                quantidade += 1
+                if len(bloco) >= LINHAS_POR_BLOCO:
+                    planilha.write(''.join(bloco).encode('utf-8'))
+                    bloco = []
+            planilha.write((''.join(bloco) + '</sheetData></worksheet>').encode('utf-8'))
+
+    return quantidade
+
+
+ESCRITORES = {'csv': escrever_csv, 'jsonl': escrever_jsonl, 'xlsx': escrever_xlsx}
+
+
+def exportar(pareceres, formato, destino):
+    """Grava os pareceres (iterável de consultar) no formato pedido; retorna a quantidade"""
+    return ESCRITORES[formato](linhas_exportacao(pareceres), destino)
+
+
+def arquivo_exportado(pareceres, formato):
+    """Exporta para um arquivo temporário (em memória até LIMITE_MEMORIA_EXPORTACAO)
+
+    Retorna o arquivo posicionado no início, pronto para ser lido.
+    """
+    temporario = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_EXPORTACAO)
+    exportar(pareceres, formato, temporario)
+    temporario.seek(0)
+    return temporario
+
+
+def nome_exportacao(formato, momento=None):
+    """Nome do arquivo exportado (pareceres_AAAAMMDD_HHMM.<extensão>)"""
+    return f"pareceres_{(momento or datetime.now()):%Y%m%d_%H%M}{FORMATOS[formato][1]}"
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta', nargs='?', default='pareceres', help='Pasta (ou .pacote) dos pareceres JSON')
+    parser.add_argument('--formato', choices=list(FORMATOS), default='csv', help='Formato do arquivo')
+    parser.add_argument('--saida', help='Arquivo de saída (padrão: pareceres_<data>.<formato>; "-": saída padrão)')
+    parser.add_argument('--classificacao', help='Somente esta classificação')
+    parser.add_argument('--processo', default='', help='Trecho do número do processo')
+    parser.add_argument('--valor-minimo', type=Decimal, help='Valor mínimo (R$)')
+    parser.add_argument('--valor-maximo', type=Decimal, help='Valor máximo (R$)')
+    parser.add_argument('--de', type=date.fromisoformat, help='Data inicial da análise (AAAA-MM-DD)')
+    parser.add_argument('--ate', type=date.fromisoformat, help='Data final da análise (AAAA-MM-DD)')
+    parser.add_argument('--ordem', choices=list(ORDENACOES_PARECERES), default="Mais recentes", help='Ordenação')
+    parser.add_argument('--so-recentes', action='store_true', help='Só a versão mais recente de cada processo')
+    args = parser.parse_args()
+
+    indice = IndicePareceres(args.pasta)
+    resumo = indice.sincronizar()
+
+    pareceres = indice.percorrer_consulta(
+        args.processo, args.classificacao,
+        faixa_valor=(args.valor_minimo, args.valor_maximo),
+        periodo=(args.de, args.ate) if args.de or args.ate else None,
+        ordem=args.ordem,
+        apenas_recentes=args.so_recentes,
+    )
+
+    saida = args.saida or nome_exportacao(args.formato)
+    if saida == '-':
+        quantidade = exportar(pareceres, args.formato, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        with open(saida, 'wb') as destino:
+            quantidade = exportar(pareceres, args.formato, destino)
+
+    mensagem = f"✓ {quantidade} parecer(es) exportado(s)" + (f" para {saida}" if saida != '-' else "")
+    print(mensagem, file=sys.stderr)
+    if resumo['erros']:
+        print(f"⚠️  {len(resumo['erros'])} arquivo(s) não puderam ser lidos e ficaram de fora", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
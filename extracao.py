@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extração de Metadados dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Funções de extração independentes do Streamlit, usadas pelo aplicativo
+e pelos índices de pareceres
+"""
+
+import codecs
+import re
+from decimal import Decimal
+from enum import Enum
+from typing import NamedTuple
+
+from pacote import abrir_arquivo
+
+
+# Padrões pré-compilados usados na leitura parcial dos HTMLs
+PADRAO_CNJ = re.compile(r'\d{7}-\d{2}\.\d{4}\.\d{1}\.\d{2}\.\d{4}')
+PADRAO_TITULO = re.compile(r'<title>(.+?)</title>', re.IGNORECASE)
+PADRAO_PROCESSO_ROTULO = re.compile(r'(?:Número do Processo|Processo)[:\s]*([0-9\-\.]+)', re.IGNORECASE)
+
+# Número CNJ com separadores quaisquer (pontos, traços, sublinhados); letras
+# não contam como separador, para que um hash não seja lido como número
+PADRAO_CNJ_FLEXIVEL = re.compile(
+    r'(\d{7})[^0-9A-Za-z]?(\d{2})[^0-9A-Za-z]?(\d{4})[^0-9A-Za-z]?(\d)[^0-9A-Za-z]?'
+    r'(\d{2})[^0-9A-Za-z]?(\d{4})'
+)
+
+# Letra colada a um dígito: sequência hexadecimal (hash), não um número
+PADRAO_ALFANUMERICO_MISTO = re.compile(r'[0-9][A-Za-z]|[A-Za-z][0-9]')
+
+# Rótulos "**Campo:** valor" reconhecidos no parecer markdown, por campo,
+# em ordem de prioridade
+ROTULOS_MARKDOWN = {
+    'numero_processo': ('Número do Processo (CNJ)',),
+    'classificacao': ('Classificação',),
+    'valor': ('Valor da Causa',),
+    'parte_contraria': ('Parte Contrária', 'Autor'),
+    'natureza': ('Natureza', 'Tipo de Ação'),
+}
+
+# Termos procurados no texto quando não há "**Classificação:**", em ordem
+TERMOS_CLASSIFICACAO = (
+    (('RISCO ALTO',), 'RISCO ALTO'),
+    (('RISCO MÉDIO', 'RISCO MÉDIO-BAIXO'), 'RISCO MÉDIO'),
+    (('PROVÁVEL',), 'PROVÁVEL'),
+    (('POSSÍVEL',), 'POSSÍVEL'),
+    (('REMOTA',), 'REMOTA'),
+)
+
+# Uma única expressão para todos os rótulos. O valor fica num lookahead para
+# não consumir o resto da linha, de modo que rótulos na mesma linha continuem
+# sendo encontrados.
+PADRAO_CAMPOS_MARKDOWN = re.compile(
+    r'\*\*(?P<rotulo>'
+    + '|'.join(re.escape(r) for rotulos in ROTULOS_MARKDOWN.values() for r in rotulos)
+    + r'):\*\* (?=(?P<valor>.+))'
+)
+PADRAO_MOEDA = re.compile(r'R\$\s*[\d\.,]+')
+
+# Primeiro valor no formato brasileiro (1.234.567,89) de um texto
+PADRAO_VALOR = re.compile(r'(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{1,2}))?')
+
+# Tamanho do primeiro bloco lido de cada HTML (o título fica no <head>)
+TAMANHO_BLOCO_INICIAL = 4096
+
+
+class Risco(Enum):
+    """Classificação de risco canônica de um parecer"""
+    PROVAVEL = 'PROVÁVEL'
+    POSSIVEL = 'POSSÍVEL'
+    REMOTA = 'REMOTA'
+    NAO_INFORMADO = 'Não informado'
+
+
+# Termos da classificação livre que definem o risco, em ordem de prioridade
+# (RISCO ALTO, MÉDIO e BAIXO equivalem a PROVÁVEL, POSSÍVEL e REMOTA)
+TERMOS_RISCO = (
+    (('PROVÁVEL', 'ALTO'), Risco.PROVAVEL),
+    (('POSSÍVEL', 'MÉDIO'), Risco.POSSIVEL),
+    (('REMOTA', 'BAIXO'), Risco.REMOTA),
+)
+
+
+class MetadadosParecer(NamedTuple):
+    """Campos extraídos de um parecer markdown e a regra que gerou cada um"""
+    numero_processo: str
+    classificacao: str
+    valor: str
+    parte_contraria: str
+    natureza: str
+    regras: dict
+
+
+def extrair_metadados_markdown(texto):
+    """Extrai todos os campos do parecer markdown em uma única passada
+
+    Equivale a chamar extrair_numero_processo, extrair_classificacao,
+    extrair_valor, extrair_parte_contraria e extrair_natureza, com as mesmas
+    regras alternativas, mas buscando todos os rótulos em uma só passada; as
+    regras alternativas só são avaliadas quando o rótulo não existe. O campo
+    `regras` indica, para cada campo, qual regra encontrou o valor.
+    """
+    encontrados = {}
+    for match in PADRAO_CAMPOS_MARKDOWN.finditer(texto):
+        encontrados.setdefault(match.group('rotulo'), match.group('valor').strip())
+
+    valores = {}
+    regras = {}
+
+    for campo, rotulos in ROTULOS_MARKDOWN.items():
+        for rotulo in rotulos:
+            if rotulo in encontrados:
+                valores[campo] = encontrados[rotulo]
+                regras[campo] = f"**{rotulo}:**"
+                break
+
+    if 'classificacao' not in valores:
+        valores['classificacao'], regras['classificacao'] = "Não informado", "não encontrado"
+        for termos, classificacao in TERMOS_CLASSIFICACAO:
+            if any(termo in texto for termo in termos):
+                valores['classificacao'], regras['classificacao'] = classificacao, f"termo '{classificacao}'"
+                break
+
+    # As regras alternativas só percorrem o texto quando o rótulo falta
+    if 'valor' not in valores:
+        match = PADRAO_MOEDA.search(texto)
+        if match:
+            valores['valor'], regras['valor'] = match.group(0), "primeiro valor em R$"
+
+    for campo in ROTULOS_MARKDOWN:
+        if campo not in valores:
+            valores[campo], regras[campo] = "N/A", "não encontrado"
+
+    return MetadadosParecer(regras=regras, **valores)
+
+
+def normalizar_risco(classificacao):
+    """Converte a classificação livre do parecer no Risco canônico"""
+    classificacao = str(classificacao).upper()
+    for termos, risco in TERMOS_RISCO:
+        if any(termo in classificacao for termo in termos):
+            return risco
+    return Risco.NAO_INFORMADO
+
+
+def converter_valor(texto):
+    """Converte um valor em reais ("R$ 128.484,58") em Decimal (None se não houver)"""
+    match = PADRAO_VALOR.search(str(texto))
+    if not match:
+        return None
+    inteiro, centavos = match.groups()
+    return Decimal(f"{inteiro.replace('.', '')}.{(centavos or '0').ljust(2, '0')}")
+
+
+def extrair_info_json(arquivo, dados):
+    """Monta o dicionário de metadados de um parecer JSON já carregado"""
+    info = {
+        'arquivo': str(arquivo),
+        'nome': arquivo.name,
+        'timestamp': dados.get('timestamp', ''),
+        'hash': dados.get('hash', ''),
+    }
+
+    # Verifica se é um parecer completo ou análise estruturada
+    if 'resultado' in dados:
+        resultado = dados['resultado']
+
+        # Se resultado é string (markdown)
+        if isinstance(resultado, str):
+            metadados = extrair_metadados_markdown(resultado)
+            info['tipo'] = 'parecer_markdown'
+            info['numero_processo'] = metadados.numero_processo
+            info['classificacao'] = metadados.classificacao
+            info['valor'] = metadados.valor
+            info['parte_contraria'] = metadados.parte_contraria
+            info['natureza'] = metadados.natureza
+
+        # Se resultado é dict (análise estruturada)
+        elif isinstance(resultado, dict):
+            info['tipo'] = 'analise_estruturada'
+            info['numero_processo'] = resultado.get('numero_cnj', 'N/A')
+            info['classificacao'] = resultado.get('probabilidade_perda', 'Não informado')
+            info['valor'] = resultado.get('valor_contingencia', 'N/A')
+            info['parte_contraria'] = resultado.get('parte_contraria', 'N/A')
+            info['natureza'] = resultado.get('natureza', 'N/A')
+            info['fase'] = resultado.get('fase', 'N/A')
+
+        info['risco'] = normalizar_risco(info.get('classificacao', 'N/A')).value
+
+    return info
+
+
+def normalizar_numero_processo(texto):
+    """Normaliza um número de processo para comparação entre JSON e HTML
+
+    Números CNJ viram seus 20 dígitos, independente dos separadores usados
+    (``1023444-75.2022.4.01.3600`` e ``1023444-75_2022_4_01_3600`` resultam
+    na mesma chave). Outros formatos (ex.: ``000012/2022``) usam todos os
+    dígitos, desde que sejam pelo menos seis e o texto seja só dígitos,
+    separadores e palavras: um nome com hash (``parecer_0516a26e...``) não
+    vira número. Retorna None se não houver número reconhecível.
+    """
+    if not texto:
+        return None
+
+    match = PADRAO_CNJ_FLEXIVEL.search(texto)
+    if match:
+        return ''.join(match.groups())
+
+    if PADRAO_ALFANUMERICO_MISTO.search(texto):
+        return None
+
+    digitos = re.sub(r'\D', '', texto)
+    return digitos if len(digitos) >= 6 else None
+
+
+def ler_metadados_html(caminho, tamanho_bloco=TAMANHO_BLOCO_INICIAL):
+    """Lê o início de um HTML até encontrar o título e o número CNJ
+
+    Retorna a tupla (numero_processo, titulo, bytes_lidos). A leitura é feita
+    em blocos de tamanho crescente e para assim que os dois valores aparecem;
+    se algum deles não estiver no trecho lido, o arquivo é lido até o fim e
+    as regras completas de extração são aplicadas.
+    """
+    decodificador = codecs.getincrementaldecoder('utf-8')()
+    texto = ''
+    bytes_lidos = 0
+    match_titulo = match_cnj = None
+
+    with abrir_arquivo(caminho) as f:
+        while True:
+            bloco = f.read(tamanho_bloco)
+            bytes_lidos += len(bloco)
+            inicio = len(texto)
+            texto += decodificador.decode(bloco, final=not bloco)
+
+            if match_titulo is None:
+                match_titulo = PADRAO_TITULO.search(texto)
+            if match_cnj is None:
+                # Só o trecho novo (com sobreposição do tamanho de um CNJ)
+                match_cnj = PADRAO_CNJ.search(texto, max(0, inicio - 24))
+
+            if match_titulo and match_cnj:
+                return match_cnj.group(0), match_titulo.group(1).strip(), bytes_lidos
+
+            if not bloco:
+                break
+
+            # Dobra o bloco para manter a leitura linear no pior caso
+            tamanho_bloco *= 2
+
+    # Arquivo lido até o fim: aplica as regras alternativas de extração
+    if match_cnj:
+        numero_processo = match_cnj.group(0)
+    else:
+        match = PADRAO_PROCESSO_ROTULO.search(texto)
+        numero_processo = match.group(1).strip() if match else 'N/A'
+
+    titulo = match_titulo.group(1).strip() if match_titulo else extrair_titulo_html(texto)
+    return numero_processo, titulo, bytes_lidos
+
+
+def extrair_numero_processo_html(html_content):
+    """Extrai o número do processo do conteúdo HTML"""
+    # Procura por padrões CNJ
+    match = re.search(r'\d{7}-\d{2}\.\d{4}\.\d{1}\.\d{2}\.\d{4}', html_content)
+    if match:
+        return match.group(0)
+
+    # Procura por "Número do Processo" ou "Processo:"
+    match = re.search(r'(?:Número do Processo|Processo)[:\s]*([0-9\-\.]+)', html_content, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+
+    return 'N/A'
+
+
+def extrair_titulo_html(html_content):
+    """Extrai o título do HTML"""
+    match = re.search(r'<title>(.+?)</title>', html_content, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+
+    match = re.search(r'<h1[^>]*>(.+?)</h1>', html_content, re.IGNORECASE)
+    if match:
+        return re.sub(r'<[^>]+>', '', match.group(1)).strip()
+
+    return 'Documento sem título'
+
+
+def extrair_numero_processo(texto):
+    """Extrai o número do processo do parecer markdown"""
+    match = re.search(r'\*\*Número do Processo \(CNJ\):\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+    return "N/A"
+
+
+def extrair_classificacao(texto):
+    """Extrai a classificação de risco do parecer markdown"""
+    match = re.search(r'\*\*Classificação:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    # Tenta buscar por RISCO ALTO/MÉDIO/BAIXO
+    if 'RISCO ALTO' in texto:
+        return 'RISCO ALTO'
+    elif 'RISCO MÉDIO' in texto or 'RISCO MÉDIO-BAIXO' in texto:
+        return 'RISCO MÉDIO'
+    elif 'PROVÁVEL' in texto:
+        return 'PROVÁVEL'
+    elif 'POSSÍVEL' in texto:
+        return 'POSSÍVEL'
+    elif 'REMOTA' in texto:
+        return 'REMOTA'
+
+    return "Não informado"
+
+
+def extrair_valor(texto):
+    """Extrai o valor da causa do parecer markdown"""
+    match = re.search(r'\*\*Valor da Causa:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    match = re.search(r'R\$\s*[\d\.,]+', texto)
+    if match:
+        return match.group(0)
+
+    return "N/A"
+
+
+def extrair_parte_contraria(texto):
+    """Extrai a parte contrária do parecer markdown"""
+    match = re.search(r'\*\*Parte Contrária:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    match = re.search(r'\*\*Autor:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    return "N/A"
+
+
+def extrair_natureza(texto):
+    """Extrai a natureza da ação do parecer markdown"""
+    match = re.search(r'\*\*Natureza:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    match = re.search(r'\*\*Tipo de Ação:\*\* (.+)', texto)
+    if match:
+        return match.group(1).strip()
+
+    return "N/A"
@@ -0,0 +1,779 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice Persistente de Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Mantém em SQLite os metadados extraídos dos pareceres JSON e dos arquivos
+HTML, de modo que apenas arquivos novos ou alterados precisem ser lidos
+novamente e que as páginas possam contar, filtrar e paginar sem carregar
+o acervo inteiro em memória
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from extracao import normalizar_numero_processo
+from ingestao import colunas_indexadas, ler_arquivo_html, ler_parecer_json, ler_termos_json, processar_em_paralelo
+from pacote import eh_pacote, varrer_pacote
+
+
+# Pasta onde ficam os índices e demais caches locais
+DIRETORIO_CACHE = Path(".cache_pareceres")
+
+# Incrementar sempre que o formato dos metadados mudar (força reconstrução)
+VERSAO_ESQUEMA = 8
+
+# Ordenações aceitas por IndicePareceres.consultar. Cada uma percorre um
+# índice do SQLite (nos dois sentidos), sem ordenar a tabela a cada consulta
+ORDENACOES_PARECERES = {
+    "Mais recentes": "timestamp DESC, arquivo DESC",
+    "Mais antigos": "timestamp, arquivo",
+    "Maior valor": "valor_centavos DESC, arquivo DESC",
+    "Menor valor": "valor_centavos, arquivo",
+}
+
+# Ordenações aceitas por IndiceArquivosHtml.consultar (idem)
+ORDENACOES_HTML = {
+    "Mais recentes": "mtime_ns DESC, caminho DESC",
+    "Mais antigos": "mtime_ns, caminho",
+    "Nome (A-Z)": "nome, caminho",
+    "Nome (Z-A)": "nome DESC, caminho DESC",
+    "Maior tamanho": "tamanho DESC, caminho DESC",
+    "Menor tamanho": "tamanho, caminho",
+}
+
+
+def caminho_indice_padrao(pasta, prefixo="indice"):
+    """Retorna o caminho do arquivo de índice associado a uma pasta"""
+    chave = hashlib.md5(str(Path(pasta).resolve()).encode('utf-8')).hexdigest()[:12]
+    return DIRETORIO_CACHE / f"{prefixo}_{chave}.sqlite3"
+
+
+def conectar_indice(caminho_indice, versao_esquema, tabelas, auxiliares=()):
+    """Abre um índice SQLite, recriando as tabelas se o esquema mudou
+
+    `tabelas` é um dicionário {nome: comando CREATE} com as tabelas do índice
+    e `auxiliares` os comandos CREATE INDEX/TRIGGER sobre elas (removidos
+    junto com as tabelas).
+    """
+    caminho_indice = Path(caminho_indice)
+    caminho_indice.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(str(caminho_indice), timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+
+    # Comparações sem diferenciar maiúsculas (inclusive acentuadas)
+    con.create_function("maiusculas", 1, lambda texto: texto.upper() if texto else texto, deterministic=True)
+
+    versao = con.execute("PRAGMA user_version").fetchone()[0]
+    if versao != versao_esquema:
+        for nome in tabelas:
+            con.execute(f"DROP TABLE IF EXISTS {nome}")
+        con.execute(f"PRAGMA user_version = {versao_esquema}")
+
+    for comando in tabelas.values():
+        con.execute(comando)
+    for comando in auxiliares:
+        con.execute(comando)
+    return con
+
+
+def varrer_arquivos(pasta, extensao, diretorios=None):
+    """Percorre a pasta recursivamente retornando (caminho, mtime_ns, tamanho)
+
+    Se `diretorios` for um dicionário, ele recebe o mtime_ns de cada
+    diretório percorrido (usado na detecção de alterações). A pasta pode
+    ser um arquivo .pacote (ver pacote.py): os arquivos listados são os do
+    pacote e o mtime registrado é o do próprio pacote.
+    """
+    if eh_pacote(pasta):
+        if diretorios is not None:
+            diretorios[str(pasta)] = os.stat(pasta).st_mtime_ns
+        yield from varrer_pacote(pasta, extensao)
+        return
+
+    pendentes = [str(Path(pasta))]
+
+    while pendentes:
+        atual = pendentes.pop()
+        try:
+            if diretorios is not None:
+                diretorios[atual] = os.stat(atual).st_mtime_ns
+            with os.scandir(atual) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if not entrada.name.startswith('.'):
+                            pendentes.append(entrada.path)
+                    elif entrada.name.endswith(extensao):
+                        stat = entrada.stat()
+                        yield entrada.path, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            continue
+
+
+def _mascara_permissoes():
+    """Lê a umask do processo (só é possível trocando-a e restaurando)"""
+    mascara = os.umask(0o022)
+    os.umask(mascara)
+    return mascara
+
+
+# Permissões de um arquivo novo, como as de um open() comum (0666 - umask)
+PERMISSOES_ARQUIVO = 0o666 & ~_mascara_permissoes()
+
+
+def gravar_atomico(destino, dados):
+    """Grava o arquivo por inteiro ou não grava (arquivo temporário + rename)
+
+    O arquivo gravado fica com as permissões do que substitui ou, se for
+    novo, com as de um arquivo criado normalmente (o temporário nasce 0600).
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        permissoes = destino.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        permissoes = PERMISSOES_ARQUIVO
+
+    descritor, temporario = tempfile.mkstemp(dir=destino.parent, prefix=".tmp_")
+    try:
+        with os.fdopen(descritor, 'wb') as f:
+            f.write(dados)
+        os.chmod(temporario, permissoes)
+        os.replace(temporario, destino)
+    except BaseException:
+        Path(temporario).unlink(missing_ok=True)
+        raise
+
+
+def impressao_digital(entradas):
+    """Calcula uma versão curta para uma lista de (caminho, mtime_ns, tamanho)"""
+    digest = hashlib.md5()
+    for caminho, mtime_ns, tamanho in sorted(entradas):
+        digest.update(f"{caminho}\0{mtime_ns}\0{tamanho}\n".encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+class IndicePareceres:
+    """Índice SQLite dos metadados dos pareceres JSON de uma pasta"""
+
+    TABELAS = {
+        'pareceres': """
+            CREATE TABLE IF NOT EXISTS pareceres (
+                arquivo TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                tamanho INTEGER NOT NULL,
+                hash TEXT,
+                info TEXT,
+                erro TEXT,
+                numero_processo TEXT,
+                classificacao TEXT,
+                timestamp TEXT,
+                risco TEXT,
+                natureza TEXT,
+                parte_contraria TEXT,
+                valor_centavos INTEGER,
+                processo_normalizado TEXT
+            )
+        """,
+        'agregados': """
+            CREATE TABLE IF NOT EXISTS agregados (
+                dimensao TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                quantidade INTEGER NOT NULL,
+                valor_centavos INTEGER NOT NULL,
+                PRIMARY KEY (dimensao, chave)
+            )
+        """,
+        'termos': """
+            CREATE TABLE IF NOT EXISTS termos (
+                arquivo TEXT PRIMARY KEY,
+                vetor BLOB NOT NULL
+            )
+        """,
+    }
+
+    # Colunas contadas (e com o valor somado) na tabela agregados
+    DIMENSOES_AGREGADAS = ('risco', 'classificacao', 'natureza', 'parte_contraria')
+
+    # Os agregados acompanham cada inserção e remoção de um parecer válido,
+    # de modo que o painel não precisa percorrer a tabela de pareceres
+    AUXILIARES = (
+        "CREATE INDEX IF NOT EXISTS pareceres_timestamp ON pareceres (timestamp, arquivo) WHERE erro IS NULL",
+        "CREATE INDEX IF NOT EXISTS pareceres_valor ON pareceres (valor_centavos, arquivo) WHERE erro IS NULL",
+        "CREATE INDEX IF NOT EXISTS pareceres_classificacao ON pareceres (classificacao, timestamp, arquivo) "
+        "WHERE erro IS NULL",
+        "CREATE INDEX IF NOT EXISTS pareceres_processo ON pareceres (processo_normalizado, timestamp, arquivo) "
+        "WHERE erro IS NULL",
+        "CREATE INDEX IF NOT EXISTS agregados_quantidade ON agregados (dimensao, quantidade DESC, chave)",
+        "CREATE TRIGGER IF NOT EXISTS agregar_insercao AFTER INSERT ON pareceres WHEN NEW.erro IS NULL BEGIN "
+        + "".join(
+            f"INSERT INTO agregados VALUES ('{dimensao}', NEW.{dimensao}, 1, COALESCE(NEW.valor_centavos, 0)) "
+            "ON CONFLICT (dimensao, chave) DO UPDATE SET quantidade = quantidade + 1, "
+            "valor_centavos = valor_centavos + excluded.valor_centavos; "
+            for dimensao in DIMENSOES_AGREGADAS
+        )
+        + "END",
+        "CREATE TRIGGER IF NOT EXISTS agregar_remocao AFTER DELETE ON pareceres WHEN OLD.erro IS NULL BEGIN "
+        + "".join(
+            "UPDATE agregados SET quantidade = quantidade - 1, "
+            "valor_centavos = valor_centavos - COALESCE(OLD.valor_centavos, 0) "
+            f"WHERE dimensao = '{dimensao}' AND chave = OLD.{dimensao}; "
+            f"DELETE FROM agregados WHERE dimensao = '{dimensao}' AND chave = OLD.{dimensao} AND quantidade = 0; "
+            for dimensao in DIMENSOES_AGREGADAS
+        )
+        + "END",
+    )
+
+    def __init__(self, pasta="pareceres", caminho_indice=None, trabalhadores=None):
+        self.pasta = Path(pasta)
+        self.caminho_indice = Path(caminho_indice) if caminho_indice else caminho_indice_padrao(pasta)
+        self.trabalhadores = trabalhadores
+
+    def _conectar(self):
+        """Abre a conexão com o índice, criando o esquema se necessário"""
+        return conectar_indice(self.caminho_indice, VERSAO_ESQUEMA, self.TABELAS, self.AUXILIARES)
+
+    def sincronizar(self, entradas=None):
+        """Atualiza o índice relendo apenas os arquivos novos ou alterados
+
+        `entradas` é a listagem (caminho, mtime_ns, tamanho) da pasta, se já
+        tiver sido feita; caso contrário a pasta é percorrida. A leitura dos
+        arquivos novos ou alterados é distribuída entre `trabalhadores`
+        processos (ver ingestao.processar_em_paralelo). Retorna um resumo com
+        as quantidades de arquivos novos, alterados, removidos e inalterados,
+        a lista de erros de leitura (na ordem da varredura) e a versão
+        (impressão digital) do conteúdo atual da pasta.
+        """
+        resumo = {'novos': 0, 'alterados': 0, 'removidos': 0, 'inalterados': 0, 'erros': []}
+        if entradas is None:
+            entradas = list(varrer_arquivos(self.pasta, '.json'))
+
+        with closing(self._conectar()) as con:
+            registrados = {
+                arquivo: (mtime_ns, tamanho, hash_doc, info, erro)
+                for arquivo, mtime_ns, tamanho, hash_doc, info, erro
+                in con.execute("SELECT arquivo, mtime_ns, tamanho, hash, info, erro FROM pareceres")
+            }
+
+            pendentes = []
+            for caminho, mtime_ns, tamanho in entradas:
+                anterior = registrados.pop(caminho, None)
+
+                if anterior and anterior[0] == mtime_ns and anterior[1] == tamanho:
+                    resumo['inalterados'] += 1
+                    if anterior[4]:
+                        resumo['erros'].append((Path(caminho).name, anterior[4]))
+                    continue
+
+                resumo['alterados' if anterior else 'novos'] += 1
+                pendentes.append((caminho, mtime_ns, tamanho, anterior))
+
+            # O que sobrou nos registros não existe mais na pasta
+            resumo['removidos'] = len(registrados)
+            self._gravar(con, pendentes, list(registrados), resumo)
+
+        resumo['versao'] = impressao_digital(entradas)
+        return resumo
+
+    def aplicar_delta(self, delta):
+        """Aplica ao índice apenas as alterações já detectadas na pasta
+
+        `delta` tem as listas novos e alterados (caminho, mtime_ns, tamanho)
+        e removidos (caminhos), como em alteracoes.calcular_delta. Retorna o
+        resumo no formato de sincronizar, sem a versão e com todos os erros
+        de leitura registrados no índice.
+        """
+        resumo = {
+            'novos': len(delta.novos), 'alterados': len(delta.alterados),
+            'removidos': len(delta.removidos), 'inalterados': 0, 'erros': [],
+        }
+        modificados = delta.novos + delta.alterados
+
+        with closing(self._conectar()) as con:
+            registrados = {
+                arquivo: (mtime_ns, tamanho, hash_doc, info, erro)
+                for arquivo, mtime_ns, tamanho, hash_doc, info, erro in con.execute(
+                    "SELECT arquivo, mtime_ns, tamanho, hash, info, erro FROM pareceres "
+                    "WHERE arquivo IN (SELECT value FROM json_each(?))",
+                    (json.dumps([caminho for caminho, _, _ in modificados]),)
+                )
+            }
+            pendentes = [
+                (caminho, mtime_ns, tamanho, registrados.get(caminho))
+                for caminho, mtime_ns, tamanho in modificados
+            ]
+            self._gravar(con, pendentes, delta.removidos, resumo)
+            resumo['erros'] = self._erros(con)
+
+        return resumo
+
+    def _gravar(self, con, pendentes, removidos, resumo):
+        """Lê os arquivos pendentes e grava o resultado (e as remoções) no índice"""
+        # Só os metadados já indexados com hash podem ser reaproveitados
+        tarefas = [
+            (caminho, anterior[2] if anterior and anterior[3] else None)
+            for caminho, _, _, anterior in pendentes
+        ]
+        resultados = processar_em_paralelo(ler_parecer_json, tarefas, self.trabalhadores)
+
+        atualizacoes, sem_termos = [], list(removidos)
+        for (caminho, mtime_ns, tamanho, anterior), resultado in zip(pendentes, resultados):
+            hash_doc, info_json, colunas, erro = resultado
+
+            if erro is not None:
+                resumo['erros'].append((Path(caminho).name, erro))
+                atualizacoes.append((caminho, mtime_ns, tamanho, None, None, erro) + (None,) * 8)
+                sem_termos.append(caminho)
+                continue
+
+            # Mesmo hash: reaproveita os metadados (e os termos) já indexados;
+            # os termos de um conteúdo novo são contados em sincronizar_termos
+            if info_json is None:
+                info_json = anterior[3]
+                colunas = colunas_indexadas(json.loads(info_json))
+            else:
+                sem_termos.append(caminho)
+
+            atualizacoes.append((caminho, mtime_ns, tamanho, hash_doc, info_json, None, *colunas))
+
+        # A versão anterior é removida antes (e não substituída) para que os
+        # gatilhos descontem seus agregados
+        with con:
+            con.executemany(
+                "DELETE FROM pareceres WHERE arquivo = ?",
+                [(caminho,) for caminho, _, _, anterior in pendentes if anterior] + [(a,) for a in removidos]
+            )
+            con.executemany("INSERT INTO pareceres VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", atualizacoes)
+            con.executemany("DELETE FROM termos WHERE arquivo = ?", [(caminho,) for caminho in sem_termos])
+
+    def sincronizar_termos(self):
+        """Conta os termos dos pareceres válidos que ainda não têm vetor
+
+        A ingestão (sincronizar, aplicar_delta) só lê os metadados e apaga
+        os vetores dos pareceres novos ou alterados; esta contagem, que
+        percorre o texto inteiro, fica para depois (o acervo a faz em
+        segundo plano, junto com os índices do conteúdo). A leitura é
+        distribuída entre os processos como na ingestão. Retorna um resumo
+        com a quantidade de vetores calculados e a lista de erros de leitura.
+        """
+        resumo = {'calculados': 0, 'erros': []}
+
+        with closing(self._conectar()) as con:
+            pendentes = con.execute(
+                "SELECT arquivo, mtime_ns, tamanho FROM pareceres WHERE erro IS NULL "
+                "AND arquivo NOT IN (SELECT arquivo FROM termos) ORDER BY arquivo"
+            ).fetchall()
+            if not pendentes:
+                return resumo
+
+            arquivos = [arquivo for arquivo, _, _ in pendentes]
+            vetores = []
+            for (arquivo, mtime_ns, tamanho), (termos, erro) in zip(
+                pendentes, processar_em_paralelo(ler_termos_json, arquivos, self.trabalhadores)
+            ):
+                if erro is not None:
+                    resumo['erros'].append((Path(arquivo).name, erro))
+                else:
+                    vetores.append((arquivo, termos, arquivo, mtime_ns, tamanho))
+
+            # Só grava se o parecer não foi reindexado enquanto o texto era
+            # lido (por outro processo): o vetor poderia ser da versão antiga
+            with con:
+                resumo['calculados'] = con.executemany(
+                    "INSERT OR REPLACE INTO termos SELECT ?, ? WHERE EXISTS "
+                    "(SELECT 1 FROM pareceres WHERE arquivo = ? AND mtime_ns = ? AND tamanho = ?)",
+                    vetores
+                ).rowcount
+
+        return resumo
+
+    @staticmethod
+    def _erros(con):
+        """Retorna [(nome, erro)] dos arquivos que não puderam ser lidos"""
+        return [
+            (Path(arquivo).name, erro)
+            for arquivo, erro in con.execute(
+                "SELECT arquivo, erro FROM pareceres WHERE erro IS NOT NULL ORDER BY arquivo"
+            )
+        ]
+
+    def listar(self):
+        """Retorna os metadados de todos os pareceres válidos do índice"""
+        return list(self.percorrer())
+
+    def percorrer(self):
+        """Gera os metadados dos pareceres válidos, um de cada vez (ordem de arquivo)"""
+        with closing(self._conectar()) as con:
+            for (info,) in con.execute("SELECT info FROM pareceres WHERE erro IS NULL ORDER BY arquivo"):
+                yield json.loads(info)
+
+    def versoes(self):
+        """Retorna {arquivo: (mtime_ns, tamanho)} dos pareceres válidos do índice"""
+        with closing(self._conectar()) as con:
+            linhas = con.execute(
+                "SELECT arquivo, mtime_ns, tamanho FROM pareceres WHERE erro IS NULL"
+            ).fetchall()
+
+        return {arquivo: (mtime_ns, tamanho) for arquivo, mtime_ns, tamanho in linhas}
+
+    def percorrer_termos(self):
+        """Gera (arquivo, processo normalizado, vetor de termos) dos pareceres válidos
+
+        Os vetores são os de semelhantes.vetor_termos, gravados por
+        sincronizar_termos; pareceres ainda sem vetor ficam de fora.
+        """
+        with closing(self._conectar()) as con:
+            yield from con.execute(
+                "SELECT termos.arquivo, pareceres.processo_normalizado, termos.vetor "
+                "FROM termos JOIN pareceres USING (arquivo) WHERE pareceres.erro IS NULL ORDER BY termos.arquivo"
+            )
+
+    def vetores_termos(self, arquivos):
+        """Retorna {arquivo: vetor de termos} dos pareceres pedidos que estão no índice"""
+        with closing(self._conectar()) as con:
+            return dict(con.execute(
+                "SELECT arquivo, vetor FROM termos WHERE arquivo IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(arquivos)),)
+            ).fetchall())
+
+    def agregados(self, dimensoes=None, limite=None):
+        """Retorna {dimensão: {chave: (quantidade, valor total)}} dos pareceres válidos
+
+        `dimensoes` (padrão: todas as de DIMENSOES_AGREGADAS) e `limite`
+        restringem a leitura às chaves mais frequentes de cada dimensão, em
+        ordem decrescente de quantidade. O valor total (Decimal) soma os
+        valores que puderam ser convertidos. A leitura não depende do tamanho
+        do acervo, só da quantidade de chaves lidas.
+        """
+        resultado = {}
+        with closing(self._conectar()) as con:
+            for dimensao in dimensoes or self.DIMENSOES_AGREGADAS:
+                resultado[dimensao] = {
+                    chave: (quantidade, Decimal(centavos).scaleb(-2))
+                    for chave, quantidade, centavos in con.execute(
+                        "SELECT chave, quantidade, valor_centavos FROM agregados WHERE dimensao = ? "
+                        "ORDER BY quantidade DESC, chave LIMIT ?",
+                        (dimensao, limite if limite is not None else -1)
+                    )
+                }
+        return resultado
+
+    @staticmethod
+    def _filtros(filtro_processo, classificacao, arquivos, faixa_valor=None, periodo=None, apenas_recentes=False):
+        """Monta a cláusula WHERE e os parâmetros dos filtros da página
+
+        `faixa_valor` é (mínimo, máximo) em Decimal e `periodo` é (data
+        inicial, data final) da análise, ambos inclusivos; qualquer extremo
+        pode ser None. Com `apenas_recentes`, fica só a versão mais recente
+        (pelo timestamp) de cada processo.
+        """
+        condicoes = ["erro IS NULL"]
+        parametros = []
+
+        minimo, maximo = faixa_valor or (None, None)
+        if minimo is not None:
+            condicoes.append("valor_centavos >= ?")
+            parametros.append(int(Decimal(minimo) * 100))
+        if maximo is not None:
+            condicoes.append("valor_centavos <= ?")
+            parametros.append(int(Decimal(maximo) * 100))
+
+        # O timestamp é ISO 8601: a comparação de texto segue a cronológica
+        inicio, fim = periodo or (None, None)
+        if inicio is not None:
+            condicoes.append("timestamp >= ?")
+            parametros.append(inicio.isoformat())
+        if fim is not None:
+            condicoes.append("timestamp < ?")
+            parametros.append((fim + timedelta(days=1)).isoformat())
+
+        if filtro_processo:
+            condicoes.append("instr(maiusculas(numero_processo), ?) > 0")
+            parametros.append(filtro_processo.upper())
+
+        if classificacao is not None:
+            condicoes.append("classificacao = ?")
+            parametros.append(classificacao)
+
+        if arquivos is not None:
+            condicoes.append("arquivo IN (SELECT value FROM json_each(?))")
+            parametros.append(json.dumps(list(arquivos)))
+
+        # Uma versão mais nova do mesmo processo é localizada pelo índice
+        # pareceres_processo; pareceres sem número reconhecível ficam todos
+        if apenas_recentes:
+            condicoes.append(
+                "NOT EXISTS (SELECT 1 FROM pareceres AS nova WHERE nova.erro IS NULL "
+                "AND nova.processo_normalizado = pareceres.processo_normalizado "
+                "AND (nova.timestamp, nova.arquivo) > (pareceres.timestamp, pareceres.arquivo))"
+            )
+
+        return " AND ".join(condicoes), parametros
+
+    def contar(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None, periodo=None,
+               apenas_recentes=False):
+        """Conta os pareceres que atendem aos filtros, sem carregá-los"""
+        where, parametros = self._filtros(
+            filtro_processo, classificacao, arquivos, faixa_valor, periodo, apenas_recentes
+        )
+
+        with closing(self._conectar()) as con:
+            return con.execute(f"SELECT COUNT(*) FROM pareceres WHERE {where}", parametros).fetchone()[0]
+
+    def consultar(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None, periodo=None,
+                  ordem="Mais recentes", limite=None, deslocamento=0, apenas_recentes=False):
+        """Retorna os pareceres filtrados na ordem pedida (ver ORDENACOES_PARECERES)
+
+        `arquivos` restringe o resultado a um conjunto de caminhos (por exemplo,
+        o resultado da busca textual); `faixa_valor`, `periodo` e
+        `apenas_recentes` são os de _filtros; `limite` e `deslocamento`
+        paginam. Cada parecer traz também `valor_numerico`, o valor convertido
+        em Decimal (None se não houver), e `quantidade_versoes`, o número de
+        versões do mesmo processo no acervo.
+        """
+        return list(self.percorrer_consulta(
+            filtro_processo, classificacao, arquivos, faixa_valor, periodo, ordem, limite, deslocamento,
+            apenas_recentes
+        ))
+
+    def percorrer_consulta(self, filtro_processo="", classificacao=None, arquivos=None, faixa_valor=None,
+                           periodo=None, ordem="Mais recentes", limite=None, deslocamento=0, apenas_recentes=False):
+        """Gera, um de cada vez, os pareceres de consultar (memória constante)
+
+        A conexão fica aberta enquanto o gerador é percorrido; no modo WAL
+        isso não bloqueia as gravações do índice.
+        """
+        where, parametros = self._filtros(
+            filtro_processo, classificacao, arquivos, faixa_valor, periodo, apenas_recentes
+        )
+        sql = (
+            "SELECT info, valor_centavos, (SELECT COUNT(*) FROM pareceres AS versao WHERE versao.erro IS NULL "
+            "AND versao.processo_normalizado = pareceres.processo_normalizado) "
+            f"FROM pareceres WHERE {where} "
+            f"ORDER BY {ORDENACOES_PARECERES.get(ordem, ORDENACOES_PARECERES['Mais recentes'])} LIMIT ? OFFSET ?"
+        )
+        parametros += [limite if limite is not None else -1, deslocamento]
+
+        with closing(self._conectar()) as con:
+            for info, centavos, versoes in con.execute(sql, parametros):
+                parecer = json.loads(info)
+                parecer['valor_numerico'] = Decimal(centavos).scaleb(-2) if centavos is not None else None
+                parecer['quantidade_versoes'] = max(1, versoes)
+                yield parecer
+
+    def historico(self, numero_processo):
+        """Retorna as versões (reanálises) de um processo, da mais recente à mais antiga
+
+        As versões são os pareceres com o mesmo número de processo depois de
+        normalizado (ver extracao.normalizar_numero_processo).
+        """
+        processo = normalizar_numero_processo(numero_processo)
+        if processo is None:
+            return []
+
+        with closing(self._conectar()) as con:
+            linhas = con.execute(
+                "SELECT info, valor_centavos FROM pareceres WHERE erro IS NULL AND processo_normalizado = ? "
+                "ORDER BY timestamp DESC, arquivo DESC", (processo,)
+            ).fetchall()
+
+        versoes = []
+        for info, centavos in linhas:
+            parecer = json.loads(info)
+            parecer['valor_numerico'] = Decimal(centavos).scaleb(-2) if centavos is not None else None
+            versoes.append(parecer)
+        return versoes
+
+    def maiores_exposicoes(self, quantidade=10, **filtros):
+        """Retorna os `quantidade` pareceres de maior valor (percorrendo o índice)"""
+        return self.consultar(ordem="Maior valor", limite=quantidade, **filtros)
+
+
+class IndiceArquivosHtml:
+    """Índice SQLite dos metadados dos arquivos HTML de uma pasta"""
+
+    TABELAS = {
+        'arquivos_html': """
+            CREATE TABLE IF NOT EXISTS arquivos_html (
+                caminho TEXT PRIMARY KEY,
+                nome TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                tamanho INTEGER NOT NULL,
+                numero_processo TEXT,
+                titulo TEXT,
+                erro TEXT
+            )
+        """,
+    }
+
+    def __init__(self, pasta_html="pareceres_html", caminho_indice=None, trabalhadores=None):
+        self.pasta = Path(pasta_html)
+        self.caminho_indice = (
+            Path(caminho_indice) if caminho_indice else caminho_indice_padrao(pasta_html, prefixo="indice_html")
+        )
+        self.trabalhadores = trabalhadores
+
+    # Índices das ordenações da página (ver ORDENACOES_HTML)
+    AUXILIARES = (
+        "CREATE INDEX IF NOT EXISTS arquivos_html_mtime ON arquivos_html (mtime_ns, caminho)",
+        "CREATE INDEX IF NOT EXISTS arquivos_html_nome ON arquivos_html (nome, caminho)",
+        "CREATE INDEX IF NOT EXISTS arquivos_html_tamanho ON arquivos_html (tamanho, caminho)",
+    )
+
+    def _conectar(self):
+        """Abre a conexão com o índice, criando o esquema se necessário"""
+        return conectar_indice(self.caminho_indice, VERSAO_ESQUEMA, self.TABELAS, self.AUXILIARES)
+
+    def sincronizar(self, entradas=None):
+        """Atualiza o índice lendo o início apenas dos HTMLs novos ou alterados
+
+        Recebe e retorna o mesmo que IndicePareceres.sincronizar. HTMLs
+        que não puderam ser lidos continuam listados (com número 'N/A' e o
+        nome do arquivo como título) e aparecem nos erros do resumo.
+        """
+        resumo = {'novos': 0, 'alterados': 0, 'removidos': 0, 'inalterados': 0, 'erros': []}
+        if entradas is None:
+            entradas = list(varrer_arquivos(self.pasta, '.html'))
+
+        with closing(self._conectar()) as con:
+            registrados = {
+                caminho: (mtime_ns, tamanho, erro)
+                for caminho, mtime_ns, tamanho, erro
+                in con.execute("SELECT caminho, mtime_ns, tamanho, erro FROM arquivos_html")
+            }
+
+            pendentes = []
+            for caminho, mtime_ns, tamanho in entradas:
+                anterior = registrados.pop(caminho, None)
+
+                if anterior and anterior[:2] == (mtime_ns, tamanho):
+                    resumo['inalterados'] += 1
+                    if anterior[2]:
+                        resumo['erros'].append((Path(caminho).name, anterior[2]))
+                    continue
+
+                resumo['alterados' if anterior else 'novos'] += 1
+                pendentes.append((caminho, mtime_ns, tamanho))
+
+            resumo['removidos'] = len(registrados)
+            self._gravar(con, pendentes, list(registrados), resumo)
+
+        resumo['versao'] = impressao_digital(entradas)
+        return resumo
+
+    def aplicar_delta(self, delta):
+        """Aplica ao índice apenas as alterações já detectadas na pasta
+
+        Recebe e retorna o mesmo que IndicePareceres.aplicar_delta.
+        """
+        resumo = {
+            'novos': len(delta.novos), 'alterados': len(delta.alterados),
+            'removidos': len(delta.removidos), 'inalterados': 0, 'erros': [],
+        }
+
+        with closing(self._conectar()) as con:
+            self._gravar(con, delta.novos + delta.alterados, delta.removidos, resumo)
+            resumo['erros'] = self._erros(con)
+
+        return resumo
+
+    def _gravar(self, con, pendentes, removidos, resumo):
+        """Lê o início dos HTMLs pendentes e grava o resultado (e as remoções) no índice"""
+        resultados = processar_em_paralelo(ler_arquivo_html, [p[0] for p in pendentes], self.trabalhadores)
+
+        atualizacoes = []
+        for (caminho, mtime_ns, tamanho), (numero_processo, titulo, erro) in zip(pendentes, resultados):
+            if erro is not None:
+                resumo['erros'].append((Path(caminho).name, erro))
+            atualizacoes.append((caminho, Path(caminho).name, mtime_ns, tamanho, numero_processo, titulo, erro))
+
+        with con:
+            con.executemany("INSERT OR REPLACE INTO arquivos_html VALUES (?, ?, ?, ?, ?, ?, ?)", atualizacoes)
+            con.executemany("DELETE FROM arquivos_html WHERE caminho = ?", [(c,) for c in removidos])
+
+    @staticmethod
+    def _erros(con):
+        """Retorna [(nome, erro)] dos HTMLs que não puderam ser lidos"""
+        return con.execute(
+            "SELECT nome, erro FROM arquivos_html WHERE erro IS NOT NULL ORDER BY caminho"
+        ).fetchall()
+
+    def listar(self):
+        """Retorna [(caminho, nome, mtime_ns, tamanho, numero_processo, titulo)] de todos os HTMLs"""
+        with closing(self._conectar()) as con:
+            return con.execute(
+                "SELECT caminho, nome, mtime_ns, tamanho, numero_processo, titulo FROM arquivos_html"
+            ).fetchall()
+
+    def numeros_processo(self):
+        """Retorna [(caminho, número do processo)] de todos os HTMLs, lido na indexação"""
+        with closing(self._conectar()) as con:
+            return con.execute("SELECT caminho, numero_processo FROM arquivos_html").fetchall()
+
+    def estatisticas(self):
+        """Retorna (quantidade, tamanho total, mtime_ns mais recente) dos HTMLs"""
+        with closing(self._conectar()) as con:
+            quantidade, tamanho_total, mais_recente = con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0), MAX(mtime_ns) FROM arquivos_html"
+            ).fetchone()
+        return quantidade, tamanho_total, mais_recente
+
+    @staticmethod
+    def _filtros(filtro_busca, caminhos):
+        """Monta a cláusula WHERE e os parâmetros dos filtros da página"""
+        condicoes = ["1"]
+        parametros = []
+
+        if filtro_busca:
+            condicoes.append(
+                "(instr(maiusculas(nome), ?) > 0 OR instr(maiusculas(numero_processo), ?) > 0 "
+                "OR instr(maiusculas(titulo), ?) > 0)"
+            )
+            parametros += [filtro_busca.upper()] * 3
+
+        if caminhos is not None:
+            condicoes.append("caminho IN (SELECT value FROM json_each(?))")
+            parametros.append(json.dumps(list(caminhos)))
+
+        return " AND ".join(condicoes), parametros
+
+    def contar(self, filtro_busca="", caminhos=None):
+        """Conta os HTMLs que atendem aos filtros, sem carregá-los"""
+        where, parametros = self._filtros(filtro_busca, caminhos)
+
+        with closing(self._conectar()) as con:
+            return con.execute(f"SELECT COUNT(*) FROM arquivos_html WHERE {where}", parametros).fetchone()[0]
+
+    def consultar(self, filtro_busca="", caminhos=None, ordem="Mais recentes", limite=None, deslocamento=0):
+        """Retorna os HTMLs filtrados na ordem pedida (ver ORDENACOES_HTML)
+
+        Cada item traz caminho, nome, tamanho, timestamp_modificacao,
+        numero_processo e titulo.
+        """
+        where, parametros = self._filtros(filtro_busca, caminhos)
+        sql = (
+            "SELECT caminho, nome, tamanho, mtime_ns, numero_processo, titulo FROM arquivos_html "
+            f"WHERE {where} ORDER BY {ORDENACOES_HTML.get(ordem, ORDENACOES_HTML['Mais recentes'])} LIMIT ? OFFSET ?"
+        )
+        parametros += [limite if limite is not None else -1, deslocamento]
+
+        with closing(self._conectar()) as con:
+            return [
+                {
+                    'caminho': caminho,
+                    'nome': nome,
+                    'tamanho': tamanho,
+                    'timestamp_modificacao': mtime_ns / 1e9,
+                    'numero_processo': numero_processo,
+                    'titulo': titulo,
+                }
+                for caminho, nome, tamanho, mtime_ns, numero_processo, titulo in con.execute(sql, parametros)
+            ]
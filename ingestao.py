@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingestão Paralela dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+A leitura e a extração de metadados são feitas em Python puro (JSON e
+expressões regulares) e, numa carga completa de uma pasta grande, dominam o
+tempo de sincronização dos índices. Este módulo distribui esse trabalho em
+lotes por um pool de processos, devolvendo os resultados na mesma ordem das
+entradas e com os erros de cada arquivo coletados no próprio resultado.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
+
+from extracao import Risco, converter_valor, extrair_info_json, ler_metadados_html, normalizar_numero_processo
+from metricas import contar, etapa
+from pacote import ler_arquivo
+from semelhantes import texto_do_resultado, vetor_termos
+
+
+# Variável de ambiente com o número de processos (1 desliga o paralelismo)
+VARIAVEL_TRABALHADORES = "PARECERES_TRABALHADORES"
+
+# Abaixo desta quantidade de arquivos o custo de subir o pool não compensa
+MINIMO_PARALELO = 1000
+
+# Arquivos enviados de uma vez para cada processo
+TAMANHO_LOTE = 64
+
+
+def numero_trabalhadores(trabalhadores=None):
+    """Resolve o número de processos: parâmetro, variável de ambiente ou CPUs"""
+    if trabalhadores is None:
+        try:
+            trabalhadores = int(os.environ.get(VARIAVEL_TRABALHADORES, 0))
+        except ValueError:
+            trabalhadores = 0
+
+    if not trabalhadores or trabalhadores < 1:
+        trabalhadores = os.cpu_count() or 1
+
+    return trabalhadores
+
+
+def processar_em_paralelo(funcao, itens, trabalhadores=None, tamanho_lote=None, minimo=MINIMO_PARALELO):
+    """Aplica `funcao` a cada item e retorna a lista de resultados, na ordem
+
+    Com mais de um processo e ao menos `minimo` itens, o trabalho é
+    distribuído em lotes de `tamanho_lote` (padrão TAMANHO_LOTE) por um pool
+    de processos;
+    caso contrário (ou se o pool não puder ser criado) é feito no próprio
+    processo. `funcao` deve ser uma função de módulo e não deve lançar
+    exceções: os erros de cada item fazem parte do resultado. Como o pool
+    usa "spawn", scripts que chamam esta função precisam do guarda
+    `if __name__ == "__main__"`.
+    """
+    itens = list(itens)
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    trabalhadores = min(numero_trabalhadores(trabalhadores), max(1, len(itens) // tamanho_lote))
+
+    if trabalhadores > 1 and len(itens) >= minimo:
+        try:
+            # "spawn" evita herdar threads e conexões abertas (Streamlit, SQLite)
+            with ProcessPoolExecutor(max_workers=trabalhadores, mp_context=get_context("spawn")) as pool:
+                return list(pool.map(funcao, itens, chunksize=tamanho_lote))
+        except (OSError, BrokenProcessPool):
+            pass
+
+    return [funcao(item) for item in itens]
+
+
+def ler_parecer_json(tarefa):
+    """Lê um parecer JSON e extrai seus metadados
+
+    `tarefa` é (caminho, hash já indexado ou None). Retorna (hash, info,
+    colunas, erro): `info` é o JSON dos metadados e `colunas` a tupla de
+    colunas_indexadas, usada nos filtros e agregados do índice; os dois são
+    None quando o hash do documento é igual ao já indexado (o índice
+    reaproveita o que já tem).
+    """
+    caminho, hash_anterior = tarefa
+    arquivo = Path(caminho)
+
+    try:
+        with etapa("leitura JSON"):
+            conteudo = ler_arquivo(arquivo)
+            dados = json.loads(conteudo.decode('utf-8'))
+            contar('arquivos_lidos')
+            contar('bytes_lidos', len(conteudo))
+
+        hash_doc = dados.get('hash', '')
+
+        # Mesmo hash: o conteúdo não mudou, só o arquivo foi tocado
+        if hash_anterior and hash_anterior == hash_doc:
+            return hash_doc, None, None, None
+
+        with etapa("extração"):
+            info = extrair_info_json(arquivo, dados)
+        return hash_doc, json.dumps(info, ensure_ascii=False), colunas_indexadas(info), None
+
+    except Exception as e:
+        return None, None, None, str(e)
+
+
+def ler_termos_json(caminho):
+    """Lê um parecer JSON e conta os termos do texto
+
+    Retorna (termos, erro), com `termos` o vetor de semelhantes.vetor_termos
+    do `resultado`. Fica fora de ler_parecer_json: percorre o texto inteiro
+    e é feita depois, em segundo plano (IndicePareceres.sincronizar_termos).
+    """
+    try:
+        with etapa("termos"):
+            dados = json.loads(ler_arquivo(Path(caminho)).decode('utf-8'))
+            return vetor_termos(texto_do_resultado(dados.get('resultado'))), None
+    except Exception as e:
+        return None, str(e)
+
+
+def colunas_indexadas(info):
+    """Retorna as colunas do índice de um parecer
+
+    (numero_processo, classificacao, timestamp, risco, natureza,
+    parte_contraria, valor_centavos, processo_normalizado); o valor fica em
+    centavos inteiros para que as somas sejam exatas, e o número do processo
+    normalizado agrupa as versões (reanálises) do mesmo processo.
+    """
+    valor = converter_valor(info.get('valor', ''))
+    return (
+        str(info.get('numero_processo', '')),
+        str(info.get('classificacao', 'N/A')),
+        str(info.get('timestamp', '')),
+        str(info.get('risco', Risco.NAO_INFORMADO.value)),
+        str(info.get('natureza', 'N/A')),
+        str(info.get('parte_contraria', 'N/A')),
+        int(valor * 100) if valor is not None else None,
+        normalizar_numero_processo(info.get('numero_processo')),
+    )
+
+
+def ler_arquivo_html(caminho):
+    """Lê o início de um HTML e retorna (número do processo, título, erro)"""
+    arquivo = Path(caminho)
+
+    try:
+        with etapa("cabeçalho HTML"):
+            numero_processo, titulo, _ = ler_metadados_html(arquivo)
+        contar('arquivos_lidos')
+        return numero_processo, titulo, None
+    except Exception as e:
+        return 'N/A', arquivo.stem, str(e)
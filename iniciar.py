@@ -108,8 +108,29 @@ def iniciar_streamlit():
         print("\nTente iniciar manualmente com:")
         print("  streamlit run app_pareceres.py")
 
+def iniciar_api(em_segundo_plano=False):
+    """Inicia a API HTTP somente leitura (api_pareceres.py)"""
+    print("\n🔌 API de consulta: http://127.0.0.1:8502/pareceres")
+    comando = [sys.executable, "api_pareceres.py"]
+    
+    if em_segundo_plano:
+        return subprocess.Popen(comando)
+    
+    try:
+        subprocess.run(comando)
+    except KeyboardInterrupt:
+        print("\n\n✓ API encerrada")
+    except Exception as e:
+        print(f"\n❌ Erro ao iniciar a API: {e}")
+        print("\nTente iniciar manualmente com:")
+        print("  python api_pareceres.py")
+
 def main():
-    """Função principal"""
+    """Função principal
+
+    Opções: --api inicia só a API de consulta; --com-api inicia a API junto
+    com o aplicativo.
+    """
     print_header()
     
     # Verificações
@@ -121,10 +142,20 @@ def main():
     
     criar_pastas()
     
+    if "--api" in sys.argv:
+        iniciar_api()
+        return
+    
     processar_pareceres()
     
+    api = iniciar_api(em_segundo_plano=True) if "--com-api" in sys.argv else None
+    
     # Inicia o aplicativo
-    iniciar_streamlit()
+    try:
+        iniciar_streamlit()
+    finally:
+        if api is not None:
+            api.terminate()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download em Lote (ZIP)
+Volpe Advogados Associados - Unimed Cuiabá
+
+Monta um ZIP com os HTMLs (e, se pedido, os JSONs) dos pareceres filtrados.
+Cada arquivo é lido, gravado no ZIP e descartado antes do próximo, de modo
+que a memória usada não depende do número de pareceres; o ZIP vai para um
+arquivo temporário que só passa para o disco acima de LIMITE_MEMORIA_LOTE.
+O Streamlit não transmite downloads a partir de um arquivo: o botão entrega
+uma cópia inteira na memória do servidor. Por isso o ZIP montado para o
+visualizador (arquivo_zip) é limitado a LIMITE_TAMANHO_LOTE; lotes maiores
+são montados pela linha de comando, que grava direto no arquivo de saída.
+
+O gzip e o ZIP usam o mesmo formato de compressão (deflate). Quando o HTML
+já tem a variante gzip pré-comprimida (ver entrega_arquivos), o conteúdo
+comprimido é copiado direto para o ZIP, com o CRC e o tamanho do trailer do
+gzip, sem descomprimir nem comprimir de novo; sem ela, o HTML é comprimido
+direto no ZIP (o lote não grava variantes). O ZIP é gravado sequencialmente
+(com ZIP64 acima de 4 GB ou 65535 arquivos), por isso o módulo tem o seu
+próprio EscritorZip em vez do zipfile.
+
+Uso (mesmos filtros da página "Pareceres com JSON"):
+    python -m lote_zip [pareceres] [pareceres_html] --saida lote.zip [--com-json]
+                       [--classificacao "PROVÁVEL"] [--processo 0001234]
+"""
+
+import argparse
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+from compactacao_html import ler_html
+from correspondencia import MapaCorrespondencia
+from entrega_arquivos import DIRETORIO_DOWNLOADS, caminho_variante
+from indice_pareceres import IndiceArquivosHtml, IndicePareceres
+from metricas import contar
+from pacote import estado_arquivo, ler_arquivo
+
+
+# Acima deste tamanho o arquivo temporário do lote vai para o disco
+LIMITE_MEMORIA_LOTE = 16 * 2**20
+
+# Tamanho máximo do ZIP montado para o visualizador (o download é copiado na memória)
+LIMITE_TAMANHO_LOTE = 256 * 2**20
+
+# Bloco das cópias de conteúdo já comprimido
+TAMANHO_BLOCO = 2**20
+
+# Registros do formato ZIP
+_LOCAL = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+_FIM = struct.Struct('<IHHHHIIH')
+_FIM_ZIP64 = struct.Struct('<IQHHIIQQQQ')
+_LOCALIZADOR_ZIP64 = struct.Struct('<IIQI')
+
+_ASSINATURA_LOCAL = 0x04034b50
+_ASSINATURA_CENTRAL = 0x02014b50
+_ASSINATURA_FIM = 0x06054b50
+_ASSINATURA_FIM_ZIP64 = 0x06064b50
+_ASSINATURA_LOCALIZADOR_ZIP64 = 0x07064b50
+
+_VERSAO = 20
+_VERSAO_ZIP64 = 45
+_NOME_UTF8 = 0x0800
+_DEFLATE = 8
+_LIMITE_32 = 0xFFFFFFFF
+_LIMITE_16 = 0xFFFF
+
+# Cabeçalho gzip sem campos opcionais (o que gzip.compress grava)
+_TAMANHO_CABECALHO_GZIP = 10
+
+
+class LoteGrandeDemais(ValueError):
+    """O ZIP passou do tamanho máximo permitido"""
+
+
+def _data_dos(mtime_ns):
+    """(hora, data) no formato MS-DOS do ZIP"""
+    momento = datetime.fromtimestamp(mtime_ns / 1e9)
+    if momento.year < 1980:
+        momento = datetime(1980, 1, 1)
+    hora = (momento.hour << 11) | (momento.minute << 5) | (momento.second // 2)
+    data = ((momento.year - 1980) << 9) | (momento.month << 5) | momento.day
+    return hora, data
+
+
+class EscritorZip:
+    """Grava um ZIP sequencialmente (sem seek) num arquivo binário
+
+    Cada membro é gravado por inteiro antes do próximo, com CRC e tamanhos
+    já no cabeçalho local; o diretório central é gravado em fechar().
+    """
+
+    def __init__(self, destino):
+        self.destino = destino
+        self._posicao = 0
+        self._centrais = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        # Com erro, o ZIP incompleto é descartado por quem chamou
+        if tipo is None:
+            self.fechar()
+
+    @property
+    def tamanho(self):
+        """Bytes gravados até agora"""
+        return self._posicao
+
+    def _gravar(self, dados):
+        self.destino.write(dados)
+        self._posicao += len(dados)
+
+    def _cabecalho(self, nome, crc, tamanho_comprimido, tamanho, mtime_ns):
+        """Grava o cabeçalho local e guarda a entrada do diretório central"""
+        nome = nome.encode('utf-8')
+        hora, data = _data_dos(mtime_ns)
+        self._centrais.append((nome, hora, data, crc, tamanho_comprimido, tamanho, self._posicao))
+        self._gravar(_LOCAL.pack(
+            _ASSINATURA_LOCAL, _VERSAO, _NOME_UTF8, _DEFLATE, hora, data,
+            crc, tamanho_comprimido, tamanho, len(nome), 0
+        ) + nome)
+
+    def adicionar(self, nome, dados, mtime_ns):
+        """Comprime (deflate) e grava um membro"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        comprimido = compressor.compress(dados) + compressor.flush()
+        self._cabecalho(nome, zlib.crc32(dados), len(comprimido), len(dados), mtime_ns)
+        self._gravar(comprimido)
+
+    def adicionar_comprimido(self, nome, origem, tamanho_comprimido, crc, tamanho, mtime_ns):
+        """Grava um membro já comprimido em deflate, copiado de `origem` em blocos"""
+        self._cabecalho(nome, crc, tamanho_comprimido, tamanho, mtime_ns)
+        restante = tamanho_comprimido
+        while restante:
+            bloco = origem.read(min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                raise ValueError(f"{nome}: conteúdo comprimido truncado")
+            self._gravar(bloco)
+            restante -= len(bloco)
+
+    def fechar(self):
+        """Grava o diretório central (e os registros ZIP64, se necessários)"""
+        inicio = self._posicao
+        for nome, hora, data, crc, tamanho_comprimido, tamanho, deslocamento in self._centrais:
+            extra = b''
+            versao = _VERSAO
+            if deslocamento >= _LIMITE_32:
+                extra = struct.pack('<HHQ', 0x0001, 8, deslocamento)
+                deslocamento = _LIMITE_32
+                versao = _VERSAO_ZIP64
+            self._gravar(_CENTRAL.pack(
+                _ASSINATURA_CENTRAL, _VERSAO_ZIP64, versao, _NOME_UTF8, _DEFLATE, hora, data,
+                crc, tamanho_comprimido, tamanho, len(nome), len(extra), 0, 0, 0, 0, deslocamento
+            ) + nome + extra)
+        tamanho_central = self._posicao - inicio
+        quantidade = len(self._centrais)
+
+        if quantidade >= _LIMITE_16 or inicio >= _LIMITE_32 or tamanho_central >= _LIMITE_32:
+            fim_zip64 = self._posicao
+            self._gravar(_FIM_ZIP64.pack(
+                _ASSINATURA_FIM_ZIP64, _FIM_ZIP64.size - 12, _VERSAO_ZIP64, _VERSAO_ZIP64, 0, 0,
+                quantidade, quantidade, tamanho_central, inicio
+            ))
+            self._gravar(_LOCALIZADOR_ZIP64.pack(_ASSINATURA_LOCALIZADOR_ZIP64, 0, fim_zip64, 1))
+            quantidade = min(quantidade, _LIMITE_16)
+            inicio = min(inicio, _LIMITE_32)
+            tamanho_central = min(tamanho_central, _LIMITE_32)
+
+        self._gravar(_FIM.pack(_ASSINATURA_FIM, 0, 0, quantidade, quantidade, tamanho_central, inicio, 0))
+        self._centrais = []
+
+
+def adicionar_html(escritor, nome, caminho, diretorio=DIRETORIO_DOWNLOADS):
+    """Grava um HTML no ZIP; retorna True se reaproveitou a variante gzip
+
+    Só usa a variante que o visualizador já tiver gravado: o lote não cria
+    variantes (nem renova as existentes), para não encher a pasta delas e
+    fazer a poda apagar as que estão em uso.
+    """
+    dados = ler_html(caminho, usar_cache=False)
+    mtime_ns, _ = estado_arquivo(caminho)
+    variante = caminho_variante(hashlib.sha256(dados).hexdigest(), 'gzip', diretorio)
+
+    try:
+        gz = open(variante, 'rb')
+    except FileNotFoundError:
+        gz = None
+    if gz is not None:
+        with gz:
+            tamanho_variante = os.fstat(gz.fileno()).st_size
+            cabecalho = gz.read(_TAMANHO_CABECALHO_GZIP)
+            gz.seek(-8, 2)
+            crc, tamanho = struct.unpack('<II', gz.read(8))
+
+            # Só o cabeçalho simples (sem nome ou comentário) tem 10 bytes
+            if cabecalho[:4] == b'\x1f\x8b\x08\x00' and tamanho == len(dados) & _LIMITE_32:
+                gz.seek(_TAMANHO_CABECALHO_GZIP)
+                escritor.adicionar_comprimido(
+                    nome, gz, tamanho_variante - _TAMANHO_CABECALHO_GZIP - 8, crc, len(dados), mtime_ns
+                )
+                contar('lote_zip.reaproveitados')
+                return True
+
+    escritor.adicionar(nome, dados, mtime_ns)
+    contar('lote_zip.comprimidos')
+    return False
+
+
+def _nome_livre(pasta, caminho, usados):
+    """Nome do membro no ZIP (pasta/nome do arquivo), sem repetir nomes"""
+    caminho = Path(caminho)
+    nome = f"{pasta}/{caminho.name}"
+    sufixo = 2
+    while nome in usados:
+        nome = f"{pasta}/{caminho.stem}_{sufixo}{caminho.suffix}"
+        sufixo += 1
+    usados.add(nome)
+    return nome
+
+
+def montar_zip(pareceres, mapa_correspondencia, destino, incluir_json=False, progresso=None,
+               diretorio=DIRETORIO_DOWNLOADS, limite=None):
+    """Grava no arquivo binário `destino` o ZIP dos pareceres (iterável de consultar)
+
+    Os HTMLs ficam em html/ e os JSONs em json/; um HTML compartilhado por
+    várias versões do mesmo processo entra uma vez só. `progresso(feitos)`
+    é chamado depois de cada parecer e `diretorio` é a pasta das variantes
+    pré-comprimidas. Com `limite` (bytes), levanta LoteGrandeDemais assim
+    que o ZIP passa dele. Retorna um resumo da montagem.
+    """
+    resumo = {'pareceres': 0, 'htmls': 0, 'jsons': 0, 'reaproveitados': 0, 'sem_html': 0}
+    usados = set()
+    htmls_gravados = set()
+
+    with EscritorZip(destino) as escritor:
+        for parecer in pareceres:
+            caminho_html = mapa_correspondencia.buscar(parecer['arquivo'])
+            if caminho_html is None:
+                resumo['sem_html'] += 1
+            elif caminho_html not in htmls_gravados:
+                htmls_gravados.add(caminho_html)
+                if adicionar_html(escritor, _nome_livre("html", caminho_html, usados), caminho_html, diretorio):
+                    resumo['reaproveitados'] += 1
+                resumo['htmls'] += 1
+
+            if incluir_json:
+                caminho_json = parecer['arquivo']
+                escritor.adicionar(
+                    _nome_livre("json", caminho_json, usados), ler_arquivo(caminho_json),
+                    estado_arquivo(caminho_json)[0]
+                )
+                resumo['jsons'] += 1
+
+            resumo['pareceres'] += 1
+            if limite is not None and escritor.tamanho > limite:
+                raise LoteGrandeDemais(f"o ZIP passou de {limite // 2**20} MB")
+            if progresso is not None:
+                progresso(resumo['pareceres'])
+
+    return resumo
+
+
+def arquivo_zip(pareceres, mapa_correspondencia, incluir_json=False, progresso=None,
+                limite=LIMITE_TAMANHO_LOTE):
+    """Monta o ZIP num arquivo temporário (em memória até LIMITE_MEMORIA_LOTE)
+
+    Retorna (arquivo posicionado no início, resumo). Acima de `limite`
+    descarta o arquivo e levanta LoteGrandeDemais.
+    """
+    temporario = tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_LOTE)
+    try:
+        resumo = montar_zip(pareceres, mapa_correspondencia, temporario, incluir_json, progresso, limite=limite)
+    except BaseException:
+        temporario.close()
+        raise
+    temporario.seek(0)
+    return temporario, resumo
+
+
+def nome_lote(momento=None):
+    """Nome do arquivo do lote (pareceres_AAAAMMDD_HHMM.zip)"""
+    return f"pareceres_{(momento or datetime.now()):%Y%m%d_%H%M}.zip"
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta', nargs='?', default='pareceres', help='Pasta (ou .pacote) dos pareceres JSON')
+    parser.add_argument('pasta_html', nargs='?', default='pareceres_html', help='Pasta (ou .pacote) dos HTMLs')
+    parser.add_argument('--saida', help='Arquivo ZIP (padrão: pareceres_<data>.zip)')
+    parser.add_argument('--com-json', action='store_true', help='Incluir também os JSONs')
+    parser.add_argument('--classificacao', help='Somente esta classificação')
+    parser.add_argument('--processo', default='', help='Trecho do número do processo')
+    args = parser.parse_args()
+
+    indice = IndicePareceres(args.pasta)
+    indice.sincronizar()
+    indice_html = IndiceArquivosHtml(args.pasta_html)
+    indice_html.sincronizar()
+    mapa = MapaCorrespondencia(indice.listar(), indice_html.numeros_processo())
+
+    saida = args.saida or nome_lote()
+    inicio = time.perf_counter()
+    with open(saida, 'wb') as destino:
+        resumo = montar_zip(
+            indice.percorrer_consulta(args.processo, args.classificacao), mapa, destino, args.com_json
+        )
+
+    print(f"✓ {saida}: {resumo['pareceres']} parecer(es), {resumo['htmls']} HTML(s), "
+          f"{resumo['jsons']} JSON(s) em {time.perf_counter() - inicio:.1f}s")
+    print(f"   {resumo['reaproveitados']} HTML(s) copiados da variante gzip, sem recomprimir")
+    if resumo['sem_html']:
+        print(f"⚠️  {resumo['sem_html']} parecer(es) sem HTML correspondente")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas de Desempenho
+Volpe Advogados Associados - Unimed Cuiabá
+
+Instrumentação leve das execuções do aplicativo. Cada execução (uma
+reexecução do Streamlit numa sessão, ou uma atualização do acervo em
+segundo plano) é uma Medicao, associada à thread que a executa:
+
+- etapa("nome") mede o tempo de um trecho; etapas dentro de etapas ficam
+  com o caminho completo ("página › cards")
+- contar("nome", n) soma um contador (arquivos lidos, bytes lidos, acertos
+  de cache)
+
+Fora de uma execução medida as duas funções não fazem nada, de modo que os
+módulos podem ser instrumentados sem depender do aplicativo. Cada execução
+terminada vai para o histórico em memória e para um log JSONL rotativo em
+.cache_pareceres/metricas/. perfilar() captura um perfil cProfile de um
+trecho e grava o arquivo .pstats.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import logging.handlers
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+
+# Log das execuções (JSONL), rotacionado ao atingir o tamanho máximo. Fica
+# junto dos índices, em .cache_pareceres (este módulo não depende de nenhum
+# outro do aplicativo, pois é importado por todos)
+DIRETORIO_METRICAS = Path(".cache_pareceres") / "metricas"
+ARQUIVO_LOG = DIRETORIO_METRICAS / "metricas.jsonl"
+TAMANHO_MAXIMO_LOG = 5 * 2**20
+COPIAS_LOG = 3
+
+# Perfis cProfile capturados pelo painel
+DIRETORIO_PERFIS = DIRETORIO_METRICAS / "perfis"
+
+# Linhas do resumo de um perfil (funções de maior tempo acumulado)
+LINHAS_PERFIL = 30
+
+# Execuções guardadas em memória para o painel
+TAMANHO_HISTORICO = 200
+
+# Variável de ambiente que exibe o painel de desempenho na barra lateral
+VARIAVEL_ADMIN = "PARECERES_ADMIN"
+
+HISTORICO = deque(maxlen=TAMANHO_HISTORICO)
+
+_atual = threading.local()
+_trava_log = threading.Lock()
+_trava_perfil = threading.Lock()
+_log = None
+
+
+class Medicao:
+    """Tempos por etapa e contadores de uma execução"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.inicio = datetime.now()
+        self.etapas = {}
+        self.contadores = Counter()
+        self.total = None
+        self.registrar = True
+        self._pilha = []
+        self._relogio = time.perf_counter()
+
+    @contextmanager
+    def etapa(self, nome):
+        self._pilha.append(nome)
+        caminho = " › ".join(self._pilha)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[caminho] = self.etapas.get(caminho, 0.0) + time.perf_counter() - inicio
+            self._pilha.pop()
+
+    def contar(self, contador, quantidade=1):
+        self.contadores[contador] += quantidade
+
+    def decorrido(self):
+        """Segundos desde o início (ou a duração total, se já terminou)"""
+        return self.total if self.total is not None else time.perf_counter() - self._relogio
+
+    def registro(self):
+        """Dicionário da execução, como gravado no log (tempos em ms)"""
+        return {
+            'inicio': self.inicio.isoformat(timespec='milliseconds'),
+            'execucao': self.nome,
+            'total_ms': round(self.decorrido() * 1000, 3),
+            'etapas_ms': {nome: round(segundos * 1000, 3) for nome, segundos in self.etapas.items()},
+            'contadores': dict(self.contadores),
+        }
+
+
+def medicao_atual():
+    """Medição em andamento na thread atual (None se não houver)"""
+    return getattr(_atual, 'medicao', None)
+
+
+@contextmanager
+def medir_execucao(nome):
+    """Mede uma execução na thread atual e a registra ao final
+
+    Dentro de outra execução medida, vira apenas uma etapa dela (e o
+    valor do `with` é None).
+    """
+    externa = medicao_atual()
+    if externa is not None:
+        with externa.etapa(nome):
+            yield None
+        return
+
+    medicao = Medicao(nome)
+    _atual.medicao = medicao
+    try:
+        yield medicao
+    finally:
+        # Também registra execuções interrompidas (st.stop, st.rerun)
+        _atual.medicao = None
+        medicao.total = time.perf_counter() - medicao._relogio
+        if medicao.registrar:
+            registro = medicao.registro()
+            HISTORICO.append(registro)
+            gravar_registro(registro)
+
+
+def etapa(nome):
+    """Mede um trecho dentro da execução atual (sem efeito fora de uma)"""
+    medicao = medicao_atual()
+    return medicao.etapa(nome) if medicao is not None else nullcontext()
+
+
+def contar(contador, quantidade=1):
+    """Soma um contador da execução atual (sem efeito fora de uma)"""
+    medicao = medicao_atual()
+    if medicao is not None:
+        medicao.contar(contador, quantidade)
+
+
+def _logger():
+    """Logger do JSONL, criado na primeira gravação"""
+    global _log
+    with _trava_log:
+        if _log is None:
+            DIRETORIO_METRICAS.mkdir(parents=True, exist_ok=True)
+            manipulador = logging.handlers.RotatingFileHandler(
+                ARQUIVO_LOG, maxBytes=TAMANHO_MAXIMO_LOG, backupCount=COPIAS_LOG, encoding='utf-8'
+            )
+            manipulador.setFormatter(logging.Formatter('%(message)s'))
+            log = logging.getLogger("pareceres.metricas")
+            log.setLevel(logging.INFO)
+            log.propagate = False
+            log.addHandler(manipulador)
+            _log = log
+        return _log
+
+
+def gravar_registro(registro):
+    """Acrescenta uma execução ao log JSONL (falhas de gravação são ignoradas)"""
+    try:
+        _logger().info(json.dumps(registro, ensure_ascii=False))
+    except OSError:
+        pass
+
+
+def painel_habilitado():
+    """Indica se o painel de desempenho deve ser exibido"""
+    return os.environ.get(VARIAVEL_ADMIN, '').strip().lower() in ('1', 'true', 'sim')
+
+
+def resumir_historico(execucao, ultimas=TAMANHO_HISTORICO):
+    """Retorna {etapa: (mediana ms, máximo ms)} das últimas execuções com esse nome"""
+    registros = [r for r in HISTORICO if r['execucao'] == execucao][-ultimas:]
+    tempos = {}
+    for registro in registros:
+        tempos.setdefault('total', []).append(registro['total_ms'])
+        for nome, ms in registro['etapas_ms'].items():
+            tempos.setdefault(nome, []).append(ms)
+
+    resumo = {}
+    for nome, valores in tempos.items():
+        valores.sort()
+        resumo[nome] = (valores[len(valores) // 2], valores[-1])
+    return resumo
+
+
+class Perfil:
+    """Resultado de perfilar(): arquivo .pstats e resumo em texto"""
+
+    def __init__(self):
+        self.caminho = None
+        self.resumo = None
+        self.erro = None
+
+
+@contextmanager
+def perfilar(nome="execucao"):
+    """Captura um perfil cProfile do trecho e grava em DIRETORIO_PERFIS
+
+    Apenas um perfil por vez no processo; se já houver outro em andamento,
+    o trecho é executado sem perfil e Perfil.erro explica o motivo.
+    """
+    perfil = Perfil()
+    if not _trava_perfil.acquire(blocking=False):
+        perfil.erro = "outro perfil já está em andamento"
+        yield perfil
+        return
+
+    perfilador = cProfile.Profile()
+    try:
+        perfilador.enable()
+        try:
+            yield perfil
+        finally:
+            perfilador.disable()
+            DIRETORIO_PERFIS.mkdir(parents=True, exist_ok=True)
+            perfil.caminho = DIRETORIO_PERFIS / f"{nome}_{datetime.now():%Y%m%d_%H%M%S_%f}.pstats"
+            perfilador.dump_stats(perfil.caminho)
+
+            saida = io.StringIO()
+            pstats.Stats(perfilador, stream=saida).strip_dirs().sort_stats('cumulative').print_stats(LINHAS_PERFIL)
+            perfil.resumo = saida.getvalue()
+    finally:
+        _trava_perfil.release()
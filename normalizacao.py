@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Normalização do Texto dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Remoção de acentos, radicalização leve do português e divisão em palavras,
+comuns à busca textual, à detecção de pareceres quase idênticos e aos
+pareceres semelhantes. Módulo sem dependências do restante do sistema, para
+poder ser usado também na ingestão.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+
+# Palavras ignoradas fora de frases (já sem acento)
+STOPWORDS = frozenset("""
+    a ao aos as com da das de do dos e em na nas no nos o os ou para pela
+    pelas pelo pelos por que se sem sob sobre um uma umas uns
+""".split())
+
+PADRAO_PALAVRA = re.compile(r'\w+')
+
+# Texto ASCII: tudo o que não é \w vira espaço e as palavras saem do split()
+SEPARADORES_ASCII = {
+    codigo: ' ' for codigo in range(128) if not (chr(codigo).isalnum() or chr(codigo) == '_')
+}
+
+# Palavras com o radical guardado (o vocabulário dos pareceres se repete)
+RADICAIS_EM_CACHE = 2**16
+
+
+class _TabelaSemAcentos(dict):
+    """Tabela de str.translate: caractere -> forma NFKD sem as marcas combinantes
+
+    Preenchida sob demanda, um caractere de cada vez; o texto todo decomposto
+    de uma vez dá o mesmo resultado, pois a decomposição é por caractere e a
+    reordenação só move as marcas combinantes, que são descartadas.
+    """
+
+    def __missing__(self, codigo):
+        decomposto = unicodedata.normalize('NFKD', chr(codigo))
+        forma = ''.join(c for c in decomposto if not unicodedata.combining(c))
+        self[codigo] = forma
+        return forma
+
+
+SEM_ACENTOS = _TabelaSemAcentos()
+
+
+def dobrar(texto):
+    """Remove acentos e converte para minúsculas"""
+    if not texto.isascii():
+        texto = texto.translate(SEM_ACENTOS)
+    return texto.lower()
+
+
+def palavras(texto):
+    """Palavras (PADRAO_PALAVRA) do texto, sem acentos e em minúsculas"""
+    texto = dobrar(texto)
+    if texto.isascii():
+        return texto.translate(SEPARADORES_ASCII).split()
+    return PADRAO_PALAVRA.findall(texto)
+
+
+@lru_cache(maxsize=RADICAIS_EM_CACHE)
+def radical(palavra):
+    """Radicalização leve do português (plurais, advérbios e vogal final)"""
+    if len(palavra) < 4 or not palavra.isalpha():
+        return palavra
+
+    # Plurais
+    if palavra.endswith('s'):
+        if palavra.endswith(('oes', 'aes')):
+            palavra = palavra[:-3] + 'ao'
+        elif palavra.endswith('ais') and len(palavra) > 4:
+            palavra = palavra[:-3] + 'al'
+        elif palavra.endswith('eis'):
+            palavra = palavra[:-3] + 'el'
+        elif palavra.endswith('ois'):
+            palavra = palavra[:-3] + 'ol'
+        elif palavra.endswith('is'):
+            palavra = palavra[:-2] + 'il'
+        elif palavra.endswith(('res', 'zes', 'les')):
+            palavra = palavra[:-2]
+        elif palavra.endswith('ns'):
+            palavra = palavra[:-2] + 'm'
+        elif not palavra.endswith('ss'):
+            palavra = palavra[:-1]
+
+    # Advérbios
+    if palavra.endswith('mente') and len(palavra) > 7:
+        palavra = palavra[:-5]
+
+    # Vogal temática / gênero
+    if palavra.endswith(('a', 'e', 'o')) and len(palavra) > 3:
+        palavra = palavra[:-1]
+
+    return palavra
+
+
+def tokenizar(texto):
+    """Retorna os radicais das palavras do texto, na ordem em que aparecem"""
+    return [radical(p) for p in palavras(texto)]
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pacote de Pareceres (arquivo único)
+Volpe Advogados Associados - Unimed Cuiabá
+
+Em compartilhamentos de rede e discos lentos, cada um dos milhares de JSONs
+e HTMLs custa um open/stat/read. O pacote guarda todos eles num único
+arquivo .pacote:
+
+    [cabeçalho][registro][registro]...[índice][rodapé]
+
+- cada registro é o conteúdo de um arquivo, comprimido com zlib (ou puro,
+  se a compressão não o reduzir ou se o pacote for criado sem compressão)
+- o índice, no final, tem uma entrada de tamanho fixo por arquivo (posição,
+  tamanhos, mtime_ns, CRC-32) seguida dos nomes
+- o rodapé (últimos bytes) aponta para o índice
+
+O arquivo só cresce: acrescentar arquivos grava os novos registros depois
+do índice atual e, em seguida, um novo índice e um novo rodapé (o índice
+anterior vira espaço morto, recuperado com `compactar`). Se uma gravação
+for interrompida, a leitura usa o último rodapé íntegro.
+
+A leitura é feita por mmap: o índice é lido direto da memória mapeada e
+cada registro é descomprimido a partir da sua fatia, sem chamadas de read.
+
+Os arquivos de um pacote são endereçados como se o pacote fosse uma pasta:
+acervo.pacote/pareceres/parecer_x.json. Informar acervo.pacote como pasta
+dos JSONs e dos HTMLs no aplicativo faz com que varrer_arquivos liste os
+arquivos do pacote (pela extensão) e que as leituras (ler_arquivo,
+abrir_arquivo, estado_arquivo) busquem o conteúdo nele.
+
+O pacote tem um único escritor por vez (a ferramenta empacotar.py); o
+aplicativo só lê e percebe as alterações pelo mtime do arquivo.
+"""
+
+import io
+import mmap
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import NamedTuple
+
+
+EXTENSAO_PACOTE = ".pacote"
+
+MAGICA_CABECALHO = b"PPACOTE1"
+MAGICA_INDICE = b"PPINDICE"
+MAGICA_RODAPE = b"PPRODAPE"
+
+# Índice: mágica e quantidade; depois uma ENTRADA por arquivo e os nomes
+CABECALHO_INDICE = struct.Struct('<8sI')
+# posição, tamanho gravado, tamanho original, mtime_ns, CRC-32 do original,
+# método (0: puro, 1: zlib), posição e tamanho do nome nos nomes
+ENTRADA = struct.Struct('<QIIqIBxHI')
+# posição e tamanho do índice, mágica
+RODAPE = struct.Struct('<QQ8s')
+
+METODO_PURO = 0
+METODO_ZLIB = 1
+NIVEL_COMPRESSAO = 6
+
+
+class Registro(NamedTuple):
+    """Entrada do índice de um pacote"""
+    posicao: int
+    gravado: int
+    tamanho: int
+    mtime_ns: int
+    crc: int
+    metodo: int
+
+
+class PacoteInvalido(ValueError):
+    """O arquivo não é um pacote ou não tem nenhum índice íntegro"""
+
+
+class Pacote:
+    """Pacote aberto para leitura (mmap do arquivo inteiro)"""
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        with open(self.caminho, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.versao = (stat.st_mtime_ns, stat.st_size)
+            if stat.st_size < len(MAGICA_CABECALHO) + RODAPE.size:
+                raise PacoteInvalido(f"{self.caminho.name}: arquivo pequeno demais para um pacote")
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mapa[:len(MAGICA_CABECALHO)] != MAGICA_CABECALHO:
+            self._mapa.close()
+            raise PacoteInvalido(f"{self.caminho.name}: não é um pacote de pareceres")
+
+        try:
+            self.registros = self._ler_indice()
+        except PacoteInvalido:
+            self._mapa.close()
+            raise
+
+    def _ler_indice(self):
+        """Lê o índice apontado pelo último rodapé íntegro: {nome: Registro}"""
+        fim = len(self._mapa)
+        while True:
+            posicao_rodape = self._mapa.rfind(MAGICA_RODAPE, 0, fim) - (RODAPE.size - len(MAGICA_RODAPE))
+            if posicao_rodape < len(MAGICA_CABECALHO):
+                raise PacoteInvalido(f"{self.caminho.name}: nenhum índice íntegro encontrado")
+
+            registros = self._indice_do_rodape(posicao_rodape)
+            if registros is not None:
+                return registros
+            fim = posicao_rodape + RODAPE.size - 1
+
+    def _indice_do_rodape(self, posicao_rodape):
+        """Lê o índice de um rodapé; None se o rodapé ou o índice estiverem corrompidos"""
+        posicao, tamanho, _ = RODAPE.unpack_from(self._mapa, posicao_rodape)
+        if posicao < len(MAGICA_CABECALHO) or posicao + tamanho != posicao_rodape or tamanho < CABECALHO_INDICE.size:
+            return None
+
+        magica, quantidade = CABECALHO_INDICE.unpack_from(self._mapa, posicao)
+        inicio_nomes = posicao + CABECALHO_INDICE.size + quantidade * ENTRADA.size
+        if magica != MAGICA_INDICE or inicio_nomes > posicao_rodape:
+            return None
+
+        # Leitura direta da memória mapeada (sem cópia do índice)
+        visao = memoryview(self._mapa)
+        try:
+            entradas = visao[posicao + CABECALHO_INDICE.size:inicio_nomes]
+            nomes = visao[inicio_nomes:posicao_rodape]
+            registros = {}
+            for pos, gravado, tamanho_original, mtime_ns, crc, metodo, tam_nome, pos_nome in ENTRADA.iter_unpack(entradas):
+                if pos + gravado > posicao or pos_nome + tam_nome > len(nomes):
+                    return None
+                nome = str(nomes[pos_nome:pos_nome + tam_nome], 'utf-8')
+                registros[nome] = Registro(pos, gravado, tamanho_original, mtime_ns, crc, metodo)
+        finally:
+            visao.release()
+        return registros
+
+    def __len__(self):
+        return len(self.registros)
+
+    def __contains__(self, nome):
+        return nome in self.registros
+
+    def ler(self, nome):
+        """Conteúdo (bytes) de um arquivo do pacote"""
+        registro = self.registros.get(nome)
+        if registro is None:
+            raise FileNotFoundError(f"{nome} não está em {self.caminho.name}")
+
+        visao = memoryview(self._mapa)
+        try:
+            fatia = visao[registro.posicao:registro.posicao + registro.gravado]
+            dados = zlib.decompress(fatia) if registro.metodo == METODO_ZLIB else bytes(fatia)
+        finally:
+            visao.release()
+
+        if zlib.crc32(dados) != registro.crc:
+            raise PacoteInvalido(f"{nome}: conteúdo corrompido em {self.caminho.name}")
+        return dados
+
+    def abrir(self, nome):
+        """Abre um arquivo do pacote para leitura sequencial (ver LeitorRegistro)"""
+        registro = self.registros.get(nome)
+        if registro is None:
+            raise FileNotFoundError(f"{nome} não está em {self.caminho.name}")
+        return LeitorRegistro(self._mapa, registro)
+
+    def fechar(self):
+        self._mapa.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+
+class LeitorRegistro(io.RawIOBase):
+    """Leitura sequencial de um registro direto da memória mapeada
+
+    Descomprime só o que é lido: quem lê apenas o início do arquivo (como
+    extracao.ler_metadados_html) não paga pela descompressão do resto. O
+    CRC não é conferido nessa leitura parcial.
+    """
+
+    def __init__(self, mapa, registro):
+        super().__init__()
+        self._visao = memoryview(mapa)[registro.posicao:registro.posicao + registro.gravado]
+        self._restante = self._visao
+        self._descompressor = zlib.decompressobj() if registro.metodo == METODO_ZLIB else None
+
+    def readable(self):
+        return True
+
+    def read(self, tamanho=-1):
+        if self._descompressor is None:
+            fim = len(self._restante) if tamanho is None or tamanho < 0 else tamanho
+            dados = bytes(self._restante[:fim])
+            self._restante = self._restante[fim:]
+            return dados
+
+        # max_length 0: sem limite
+        dados = self._descompressor.decompress(self._restante, max(tamanho or 0, 0))
+        self._restante = self._descompressor.unconsumed_tail
+        return dados
+
+    def close(self):
+        if not self.closed:
+            self._restante = None
+            self._visao.release()
+        super().close()
+
+
+# Pacotes abertos no processo: caminho -> Pacote (reaberto quando o arquivo muda)
+_abertos = {}
+_trava_abertos = threading.Lock()
+
+
+def abrir_pacote(caminho):
+    """Pacote aberto (compartilhado no processo) do arquivo atual"""
+    chave = os.path.abspath(caminho)
+    stat = os.stat(chave)
+    with _trava_abertos:
+        pacote = _abertos.get(chave)
+        if pacote is None or pacote.versao != (stat.st_mtime_ns, stat.st_size):
+            # O mmap anterior é fechado pelo coletor quando ninguém mais o usa
+            pacote = Pacote(chave)
+            _abertos[chave] = pacote
+        return pacote
+
+
+def eh_pacote(caminho):
+    """Indica se o caminho é um arquivo de pacote"""
+    return str(caminho).endswith(EXTENSAO_PACOTE) and os.path.isfile(caminho)
+
+
+def separar(caminho):
+    """Divide acervo.pacote/pasta/arquivo em (pacote, nome interno)
+
+    Retorna None se o caminho não estiver dentro de um pacote.
+    """
+    caminho = str(caminho)
+    if EXTENSAO_PACOTE not in caminho:
+        return None
+
+    partes = Path(caminho).parts
+    for i, parte in enumerate(partes[:-1]):
+        if parte.endswith(EXTENSAO_PACOTE):
+            pacote = os.path.join(*partes[:i + 1])
+            if os.path.isfile(pacote):
+                return pacote, '/'.join(partes[i + 1:])
+    return None
+
+
+def varrer_pacote(caminho, extensao):
+    """Lista os arquivos do pacote como varrer_arquivos: (caminho, mtime_ns, tamanho)"""
+    pacote = abrir_pacote(caminho)
+    for nome, registro in sorted(pacote.registros.items()):
+        if nome.endswith(extensao):
+            yield os.path.join(str(caminho), *nome.split('/')), registro.mtime_ns, registro.tamanho
+
+
+def ler_arquivo(caminho):
+    """Conteúdo (bytes) de um arquivo, em disco ou dentro de um pacote"""
+    dentro = separar(caminho)
+    if dentro is None:
+        with open(caminho, 'rb') as f:
+            return f.read()
+    pacote, nome = dentro
+    return abrir_pacote(pacote).ler(nome)
+
+
+def abrir_arquivo(caminho):
+    """Abre um arquivo (em disco ou num pacote) para leitura binária"""
+    dentro = separar(caminho)
+    if dentro is None:
+        return open(caminho, 'rb')
+    pacote, nome = dentro
+    return abrir_pacote(pacote).abrir(nome)
+
+
+def estado_arquivo(caminho):
+    """Retorna (mtime_ns, tamanho) de um arquivo, em disco ou num pacote"""
+    dentro = separar(caminho)
+    if dentro is None:
+        stat = os.stat(caminho)
+        return stat.st_mtime_ns, stat.st_size
+
+    pacote, nome = dentro
+    registro = abrir_pacote(pacote).registros.get(nome)
+    if registro is None:
+        raise FileNotFoundError(f"{nome} não está em {Path(pacote).name}")
+    return registro.mtime_ns, registro.tamanho
+
+
+def arquivo_existe(caminho):
+    """Indica se o arquivo existe (em disco ou num pacote)"""
+    try:
+        estado_arquivo(caminho)
+        return True
+    except (OSError, PacoteInvalido):
+        return False
+
+
+def _comprimir(dados, comprimir=True):
+    """Retorna (método, bytes gravados) de um conteúdo"""
+    if comprimir:
+        comprimido = zlib.compress(dados, NIVEL_COMPRESSAO)
+        if len(comprimido) < len(dados):
+            return METODO_ZLIB, comprimido
+    return METODO_PURO, dados
+
+
+def _gravar_indice(f, registros):
+    """Grava índice e rodapé na posição atual de `f`"""
+    posicao = f.tell()
+    nomes = bytearray()
+    entradas = []
+    for nome, registro in sorted(registros.items()):
+        codificado = nome.encode('utf-8')
+        entradas.append(ENTRADA.pack(*registro[:5], registro.metodo, len(codificado), len(nomes)))
+        nomes += codificado
+
+    indice = CABECALHO_INDICE.pack(MAGICA_INDICE, len(registros)) + b''.join(entradas) + bytes(nomes)
+    f.write(indice)
+    f.write(RODAPE.pack(posicao, len(indice), MAGICA_RODAPE))
+
+
+def gravar_registros(caminho, arquivos, removidos=(), comprimir=True):
+    """Acrescenta arquivos ao pacote (criando-o se não existir)
+
+    `arquivos` são (nome interno, bytes, mtime_ns); um nome já existente é
+    substituído. `removidos` são nomes a tirar do índice. Sem `comprimir`,
+    os registros são gravados puros (leitura mais rápida, pacote maior).
+    Retorna a quantidade de arquivos gravados.
+    """
+    caminho = Path(caminho)
+    if caminho.exists():
+        with Pacote(caminho) as atual:
+            registros = dict(atual.registros)
+        modo = 'r+b'
+    else:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        registros = {}
+        modo = 'w+b'
+
+    gravados = 0
+    with open(caminho, modo) as f:
+        if modo == 'w+b':
+            f.write(MAGICA_CABECALHO)
+
+        # Sempre no fim: restos de uma gravação interrompida viram espaço morto
+        f.seek(0, os.SEEK_END)
+
+        for nome, dados, mtime_ns in arquivos:
+            crc = zlib.crc32(dados)
+            anterior = registros.get(nome)
+            if anterior is not None and anterior.crc == crc and anterior.tamanho == len(dados):
+                continue
+
+            # Conteúdo novo com mtime e tamanho iguais ainda precisa ser percebido
+            if anterior is not None and (anterior.mtime_ns, anterior.tamanho) == (mtime_ns, len(dados)):
+                mtime_ns += 1
+
+            metodo, gravado = _comprimir(dados, comprimir)
+            registros[nome] = Registro(f.tell(), len(gravado), len(dados), mtime_ns, crc, metodo)
+            f.write(gravado)
+            gravados += 1
+
+        removidos = [nome for nome in removidos if registros.pop(nome, None) is not None]
+        if modo == 'r+b' and not gravados and not removidos:
+            return 0
+
+        _gravar_indice(f, registros)
+        f.flush()
+        os.fsync(f.fileno())
+
+    return gravados
+
+
+def compactar_pacote(caminho):
+    """Regrava o pacote só com os registros em uso; retorna os bytes recuperados"""
+    caminho = Path(caminho)
+    temporario = caminho.with_name(f".tmp_{caminho.name}")
+    antes = caminho.stat().st_size
+
+    with Pacote(caminho) as pacote, open(temporario, 'wb') as f:
+        f.write(MAGICA_CABECALHO)
+        registros = {}
+        visao = memoryview(pacote._mapa)
+        try:
+            for nome, registro in sorted(pacote.registros.items()):
+                posicao = f.tell()
+                f.write(visao[registro.posicao:registro.posicao + registro.gravado])
+                registros[nome] = registro._replace(posicao=posicao)
+        finally:
+            visao.release()
+        _gravar_indice(f, registros)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temporario, caminho)
+    return antes - caminho.stat().st_size
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Processamento em Lote dos Pareceres
+Volpe Advogados Associados - Unimed Cuiabá
+
+Gera o HTML de cada parecer JSON a partir do modelo modelo_parecer.html,
+convertendo o markdown do `resultado` (ou os campos da análise estruturada)
+com o pacote `markdown`. O nome do HTML vem do número do processo
+(parecer_<número com _ no lugar de . e />.html); quando há mais de um JSON
+para o mesmo processo, vale o de timestamp mais recente.
+
+Um HTML cujo rodapé já traz o hash do JSON é considerado atualizado e não é
+gerado de novo. Como cada HTML é gravado por inteiro ou não é gravado, um
+lote interrompido pode ser retomado simplesmente executando o script outra
+vez. A renderização é distribuída por um pool de processos (ver
+ingestao.processar_em_paralelo); cada processo compila o modelo e o
+conversor markdown uma única vez.
+
+Uso:
+    python processar_lote.py [pasta_json] [pasta_html] [--trabalhadores N] [--forcar]
+"""
+
+import argparse
+import html
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import markdown
+
+from extracao import Risco, extrair_info_json, normalizar_risco
+from indice_pareceres import IndicePareceres, gravar_atomico
+from ingestao import processar_em_paralelo
+
+
+# Modelo HTML dos pareceres, com os campos marcados como {{campo}}
+MODELO_PADRAO = Path(__file__).with_name("modelo_parecer.html")
+
+# Extensões do markdown usadas na conversão do parecer
+EXTENSOES_MARKDOWN = ('tables', 'nl2br')
+
+# A renderização é mais pesada que a leitura: o pool compensa mais cedo
+MINIMO_PARALELO = 100
+TAMANHO_LOTE = 8
+
+# Tamanho do trecho final lido de um HTML para conferir o hash do rodapé
+TAMANHO_RODAPE = 4096
+
+PADRAO_CAMPO_MODELO = re.compile(r'\{\{(\w+)\}\}')
+PADRAO_HASH_RODAPE = re.compile(rb'Hash do Documento</div>\s*<div class="footer-value">([^<]*)</div>')
+
+# Campos do cabeçalho e do rodapé que não são extraídos pelo aplicativo
+ROTULOS_LOTE = {
+    'posicao': ('Cliente/Posição Processual', 'Posição Processual'),
+    'fase': ('Fase do Processo', 'Fase Atual', 'Fase Processual'),
+}
+PADRAO_ROTULOS_LOTE = re.compile(
+    r'\*\*(?P<rotulo>'
+    + '|'.join(re.escape(r) for rotulos in ROTULOS_LOTE.values() for r in rotulos)
+    + r'):\*\* (?P<valor>.+)'
+)
+
+# Classe do selo de cada risco no modelo
+CLASSES_SELO = {
+    Risco.PROVAVEL: 'badge-provavel',
+    Risco.POSSIVEL: 'badge-possivel',
+    Risco.REMOTA: 'badge-remota',
+    Risco.NAO_INFORMADO: 'badge-default',
+}
+
+# Rótulos dos campos da análise estruturada, na ordem de exibição
+CAMPOS_ESTRUTURADOS = {
+    'numero_cnj': 'Número do Processo (CNJ)',
+    'parte_contraria': 'Parte Contrária',
+    'natureza': 'Natureza da Ação',
+    'valor_contingencia': 'Valor da Contingência',
+    'probabilidade_perda': 'Classificação',
+    'fase': 'Fase do Processo',
+}
+
+
+@lru_cache(maxsize=4)
+def compilar_modelo(caminho_modelo):
+    """Divide o modelo em trechos fixos e nomes de campos, uma vez por processo
+
+    Retorna uma tupla em que as posições pares são texto e as ímpares são
+    nomes de campos.
+    """
+    with open(caminho_modelo, 'r', encoding='utf-8') as f:
+        return tuple(PADRAO_CAMPO_MODELO.split(f.read()))
+
+
+def preencher_modelo(segmentos, campos):
+    """Monta o HTML a partir do modelo compilado e dos valores dos campos"""
+    return ''.join(campos[segmento] if i % 2 else segmento for i, segmento in enumerate(segmentos))
+
+
+@lru_cache(maxsize=1)
+def _conversor_markdown():
+    """Conversor markdown do processo (reaproveitado entre documentos)"""
+    return markdown.Markdown(extensions=list(EXTENSOES_MARKDOWN))
+
+
+def converter_markdown(texto):
+    """Converte o markdown do parecer em HTML"""
+    return _conversor_markdown().reset().convert(texto)
+
+
+def markdown_estruturado(resultado):
+    """Monta o markdown de uma análise estruturada (resultado em dicionário)"""
+    linhas = [
+        f"**{rotulo}:** {resultado[chave]}"
+        for chave, rotulo in CAMPOS_ESTRUTURADOS.items()
+        if resultado.get(chave)
+    ]
+    texto = "# ANÁLISE ESTRUTURADA\n\n" + "\n".join(linhas)
+
+    if resultado.get('fundamentacao'):
+        texto += "\n\n---\n\n" + str(resultado['fundamentacao'])
+
+    return texto
+
+
+def nome_html(info):
+    """Nome do HTML de um parecer: número do processo ou, sem ele, o do JSON"""
+    numero = info.get('numero_processo', 'N/A')
+    if not numero or numero == 'N/A':
+        return Path(info['arquivo']).stem + '.html'
+    return f"parecer_{re.sub(r'[^0-9A-Za-z-]', '_', numero)}.html"
+
+
+def hash_gerado(caminho):
+    """Lê o hash do rodapé de um HTML já gerado (None se não houver)"""
+    try:
+        with open(caminho, 'rb') as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - TAMANHO_RODAPE))
+            match = PADRAO_HASH_RODAPE.search(f.read())
+    except OSError:
+        return None
+
+    return match.group(1).decode('utf-8', 'replace').strip() if match else None
+
+
+def campos_parecer(arquivo, dados):
+    """Monta os valores dos campos do modelo para um parecer JSON"""
+    info = extrair_info_json(arquivo, dados)
+    resultado = dados.get('resultado', '')
+
+    extras = {}
+    if isinstance(resultado, dict):
+        texto = markdown_estruturado(resultado)
+        extras['fase'] = info.get('fase', 'N/A')
+    else:
+        texto = str(resultado)
+        encontrados = {}
+        for match in PADRAO_ROTULOS_LOTE.finditer(texto):
+            encontrados.setdefault(match.group('rotulo'), match.group('valor').strip())
+        for campo, rotulos in ROTULOS_LOTE.items():
+            extras[campo] = next((encontrados[r] for r in rotulos if r in encontrados), 'N/A')
+
+    classificacao = info.get('classificacao', 'N/A')
+    campos = {
+        'numero_processo': info.get('numero_processo', 'N/A'),
+        'posicao': extras.get('posicao', 'N/A'),
+        'classificacao': classificacao,
+        'valor': info.get('valor', 'N/A'),
+        'hash': info.get('hash', ''),
+        'timestamp': info.get('timestamp', ''),
+        'fase': extras.get('fase', 'N/A'),
+        'gerado_em': datetime.now().strftime('%d/%m/%Y às %H:%M'),
+    }
+    campos = {campo: html.escape(str(valor), quote=False) for campo, valor in campos.items()}
+    campos['classe_badge'] = CLASSES_SELO[normalizar_risco(classificacao)]
+    campos['conteudo'] = converter_markdown(texto)
+    return campos
+
+
+def renderizar_parecer(tarefa):
+    """Gera o HTML de um parecer JSON
+
+    `tarefa` é (caminho do JSON, caminho do HTML, caminho do modelo).
+    Retorna (caminho do HTML, erro); não lança exceções.
+    """
+    caminho_json, destino, caminho_modelo = tarefa
+
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+
+        conteudo = preencher_modelo(compilar_modelo(caminho_modelo), campos_parecer(Path(caminho_json), dados))
+        gravar_atomico(destino, conteudo.encode('utf-8'))
+        return destino, None
+
+    except Exception as e:
+        return destino, str(e)
+
+
+def planejar_lote(pasta_json, pasta_html, forcar=False):
+    """Decide quais pareceres precisam ser gerados
+
+    Usa o índice dos pareceres (o mesmo do aplicativo) para os metadados.
+    Retorna (tarefas, relatório): tarefas como (caminho do JSON, caminho do
+    HTML) e o relatório com as quantidades atualizadas, substituídas por uma
+    versão mais recente e os erros de leitura dos JSONs.
+    """
+    indice = IndicePareceres(pasta_json)
+    resumo = indice.sincronizar()
+
+    relatorio = {'atualizados': 0, 'substituidos': 0, 'erros': list(resumo['erros'])}
+
+    # Um HTML por processo: vale o JSON mais recente
+    escolhidos = {}
+    for info in indice.listar():
+        nome = nome_html(info)
+        atual = escolhidos.get(nome)
+        if atual is None or (info.get('timestamp', ''), info['arquivo']) > (atual.get('timestamp', ''), atual['arquivo']):
+            escolhidos[nome] = info
+        if atual is not None:
+            relatorio['substituidos'] += 1
+
+    tarefas = []
+    for nome, info in sorted(escolhidos.items()):
+        destino = Path(pasta_html) / nome
+        if not forcar and info.get('hash') and hash_gerado(destino) == info['hash']:
+            relatorio['atualizados'] += 1
+            continue
+        tarefas.append((info['arquivo'], str(destino)))
+
+    return tarefas, relatorio
+
+
+def processar_lote(pasta_json="pareceres", pasta_html="pareceres_html", caminho_modelo=MODELO_PADRAO,
+                   trabalhadores=None, forcar=False):
+    """Gera os HTMLs que faltam ou estão desatualizados e retorna o relatório"""
+    inicio = time.perf_counter()
+    tarefas, relatorio = planejar_lote(pasta_json, pasta_html, forcar)
+
+    # Confere o modelo antes de distribuir o trabalho
+    compilar_modelo(str(caminho_modelo))
+
+    resultados = processar_em_paralelo(
+        renderizar_parecer,
+        [(caminho_json, destino, str(caminho_modelo)) for caminho_json, destino in tarefas],
+        trabalhadores,
+        tamanho_lote=TAMANHO_LOTE,
+        minimo=MINIMO_PARALELO,
+    )
+
+    relatorio['gerados'] = sum(1 for _, erro in resultados if erro is None)
+    relatorio['erros'] += [(Path(destino).name, erro) for destino, erro in resultados if erro]
+    relatorio['segundos'] = time.perf_counter() - inicio
+    return relatorio
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta_json', nargs='?', default='pareceres', help='Pasta dos pareceres JSON')
+    parser.add_argument('pasta_html', nargs='?', default='pareceres_html', help='Pasta dos HTMLs gerados')
+    parser.add_argument('--modelo', default=str(MODELO_PADRAO), help='Modelo HTML')
+    parser.add_argument('--trabalhadores', type=int, help='Processos na renderização (padrão: CPUs)')
+    parser.add_argument('--forcar', action='store_true', help='Gera de novo mesmo os HTMLs atualizados')
+    args = parser.parse_args()
+
+    relatorio = processar_lote(args.pasta_json, args.pasta_html, args.modelo, args.trabalhadores, args.forcar)
+
+    segundos = relatorio['segundos']
+    print(f"✓ Gerados: {relatorio['gerados']}")
+    print(f"  Já atualizados: {relatorio['atualizados']}")
+    if relatorio['substituidos']:
+        print(f"  Versões antigas ignoradas: {relatorio['substituidos']}")
+    print(f"  Tempo: {segundos:.2f} s ({relatorio['gerados'] / segundos if segundos else 0:.1f} documentos/s)")
+
+    if relatorio['erros']:
+        print(f"⚠️  {len(relatorio['erros'])} arquivo(s) com erro:")
+        for nome, erro in relatorio['erros']:
+            print(f"   - {nome}: {erro}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Divisão dos HTMLs dos Pareceres em Seções
+Volpe Advogados Associados - Unimed Cuiabá
+
+Os pareceres são organizados em seções numeradas (I. IDENTIFICAÇÃO DO
+PROCESSO, II. OBJETO DA DEMANDA, ...). Para exibir uma seção de cada vez,
+o documento é cortado no início de cada título de seção: o cabeçalho (até
+a tag <body>), a capa (tudo antes da primeira seção, com a logo e os
+cartões de informação), uma parte por seção e o rodapé. As partes são
+trechos contíguos do documento, de modo que juntá-las reproduz o original.
+
+Cada parte guarda também as tags que estavam abertas no ponto do corte
+(por exemplo <div class="container"><div class="content">), e a página de
+uma seção é montada com o cabeçalho (estilos), essas tags e a própria
+seção, mantendo a aparência do documento completo.
+"""
+
+import html
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple
+
+
+# Títulos numerados em algarismos romanos ("I.", "IV -", "X)")
+PADRAO_NUMERACAO = re.compile(r'\s*[IVXLCDM]+\s*[.)\-–—]\s', re.IGNORECASE)
+
+PADRAO_TITULO = re.compile(r'<h([1-6])\b[^>]*>(.*?)</h\1\s*>', re.IGNORECASE | re.DOTALL)
+PADRAO_BODY = re.compile(r'<body\b[^>]*>', re.IGNORECASE)
+PADRAO_FIM_BODY = re.compile(r'</body\s*>', re.IGNORECASE)
+PADRAO_RODAPE = re.compile(r'<div\b[^>]*\bclass=["\'](?:[^"\']*\s)?footer[\s"\']', re.IGNORECASE)
+PADRAO_TAGS = re.compile(r'<[^>]+>')
+
+# Elementos sem tag de fechamento
+ELEMENTOS_VAZIOS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr',
+}
+
+TITULO_CAPA = "Capa"
+TITULO_RODAPE = "Rodapé"
+
+
+class Secao(NamedTuple):
+    """Parte do documento: título, tags abertas antes dela e o trecho HTML"""
+    titulo: str
+    contexto: str
+    html: str
+
+
+class DocumentoSecionado(NamedTuple):
+    """Documento dividido: cabeçalho (até <body>) e partes em ordem"""
+    cabecalho: str
+    secoes: tuple
+    inicial: int
+
+    def pagina(self, posicao):
+        """HTML autônomo de uma parte, com os estilos do documento"""
+        secao = self.secoes[posicao]
+        return f"{self.cabecalho}{secao.contexto}{secao.html}</body></html>"
+
+    def completo(self):
+        """Documento completo (idêntico ao original)"""
+        return self.cabecalho + ''.join(secao.html for secao in self.secoes)
+
+
+class _PilhaTags(HTMLParser):
+    """Acompanha as tags abertas (com o texto original da abertura)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.abertas = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ELEMENTOS_VAZIOS:
+            self.abertas.append((tag, self.get_starttag_text()))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        for posicao in range(len(self.abertas) - 1, -1, -1):
+            if self.abertas[posicao][0] == tag:
+                del self.abertas[posicao:]
+                break
+
+
+def texto_titulo(conteudo):
+    """Texto de um título HTML, sem tags e entidades"""
+    return ' '.join(html.unescape(PADRAO_TAGS.sub('', conteudo)).split())
+
+
+def nivel_secoes(titulos):
+    """Escolhe o nível de título (1 a 6) que separa as seções
+
+    Prefere o nível com títulos numerados em romanos; sem eles, o primeiro
+    entre h2, h3 e h1 que aparece mais de uma vez. Retorna None se não houver.
+    """
+    numerados = {}
+    quantidades = {}
+    for nivel, texto in titulos:
+        quantidades[nivel] = quantidades.get(nivel, 0) + 1
+        if PADRAO_NUMERACAO.match(texto):
+            numerados[nivel] = numerados.get(nivel, 0) + 1
+
+    if numerados:
+        return max(numerados, key=lambda nivel: (numerados[nivel], -nivel))
+    for nivel in (2, 3, 1):
+        if quantidades.get(nivel, 0) > 1:
+            return nivel
+    return None
+
+
+def dividir_secoes(conteudo):
+    """Divide um HTML (str) em seções; retorna um DocumentoSecionado
+
+    Sem seções reconhecíveis, o documento tem uma única parte com o corpo
+    inteiro.
+    """
+    corpo = PADRAO_BODY.search(conteudo)
+    inicio_corpo = corpo.end() if corpo else 0
+    cabecalho = conteudo[:inicio_corpo]
+
+    titulos = [
+        (match.start(), int(match.group(1)), texto_titulo(match.group(2)))
+        for match in PADRAO_TITULO.finditer(conteudo, inicio_corpo)
+    ]
+    nivel = nivel_secoes([(n, texto) for _, n, texto in titulos])
+    if nivel is None:
+        return DocumentoSecionado(cabecalho, (Secao(TITULO_CAPA, '', conteudo[inicio_corpo:]),), 0)
+
+    cortes = [(posicao, texto) for posicao, n, texto in titulos if n == nivel]
+
+    # O rodapé (ou o fim do corpo) encerra a última seção
+    fim = len(conteudo)
+    rodape = PADRAO_RODAPE.search(conteudo, cortes[-1][0])
+    fim_corpo = PADRAO_FIM_BODY.search(conteudo, cortes[-1][0])
+    if rodape:
+        fim = rodape.start()
+    elif fim_corpo:
+        fim = fim_corpo.start()
+
+    limites = [(inicio_corpo, TITULO_CAPA)] + cortes + [(fim, TITULO_RODAPE)]
+
+    pilha = _PilhaTags()
+    posicao_anterior = 0
+    secoes = []
+    pendente = None
+    for i, (inicio, titulo) in enumerate(limites):
+        pilha.feed(conteudo[posicao_anterior:inicio])
+        posicao_anterior = inicio
+        contexto = ''.join(abertura for tag, abertura in pilha.abertas if tag not in ('html', 'body'))
+
+        termino = limites[i + 1][0] if i + 1 < len(limites) else len(conteudo)
+        trecho = conteudo[inicio:termino]
+        if pendente is not None:
+            contexto, trecho = pendente.contexto, pendente.html + trecho
+            pendente = None
+
+        # Capa e rodapé sem texto visível são juntados à parte vizinha
+        vazio = not PADRAO_TAGS.sub('', trecho).strip()
+        if i == 0 and vazio:
+            pendente = Secao(titulo, contexto, trecho)
+        elif i == len(limites) - 1 and vazio:
+            secoes[-1] = secoes[-1]._replace(html=secoes[-1].html + trecho)
+        else:
+            secoes.append(Secao(titulo or f"Seção {len(secoes)}", contexto, trecho))
+
+    inicial = next(
+        (i for i, secao in enumerate(secoes) if PADRAO_NUMERACAO.match(secao.titulo)),
+        1 if len(secoes) > 1 and secoes[0].titulo == TITULO_CAPA else 0
+    )
+    return DocumentoSecionado(cabecalho, tuple(secoes), inicial)
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pareceres Semelhantes
+Volpe Advogados Associados - Unimed Cuiabá
+
+Encontra os pareceres de texto (`resultado`) mais parecido com o de um
+parecer, pela semelhança do cosseno entre vetores TF-IDF:
+
+- depois da ingestão, cada parecer vira a contagem dos radicais das suas
+  palavras (vetor_termos), gravada no índice de metadados
+  (IndicePareceres.sincronizar_termos); só os pareceres novos ou alterados
+  são contados de novo
+- a cada nova versão do acervo, MatrizTfIdf junta as contagens numa matriz
+  esparsa (linhas = pareceres, colunas = termos), com peso
+  (1 + log tf) · idf e linhas de norma 1, guardada por coluna (CSC): para
+  cada termo, os pareceres que o têm e o peso
+- a consulta percorre só as colunas dos termos do parecer e soma as
+  contribuições com numpy.bincount, sem comparar o parecer com cada linha
+
+Para limitar a memória e o tempo da consulta num acervo grande, a matriz
+guarda de cada parecer só os TERMOS_POR_PARECER termos de maior peso (com a
+norma do vetor completo) e a consulta usa os TERMOS_CONSULTA termos de
+maior peso do parecer: a pontuação resultante é uma estimativa por baixo do
+cosseno, usada só para escolher os CANDIDATOS; o cosseno exato destes é
+calculado com os vetores completos, lidos do índice pela chave. Com
+termos_por_parecer=None a matriz guarda os vetores inteiros.
+
+Uso:
+    python -m semelhantes [pareceres] arquivo.json [--quantidade 5]
+"""
+
+import argparse
+import json
+import sys
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from normalizacao import RADICAIS_EM_CACHE, STOPWORDS, palavras, radical
+
+
+# Palavras mais curtas que isto (já sem acento) não entram nos vetores
+TAMANHO_MINIMO_TERMO = 3
+
+# Termos de maior peso guardados por parecer (None: todos)
+TERMOS_POR_PARECER = 32
+
+# Termos de maior peso do parecer usados na busca dos candidatos (None: todos)
+TERMOS_CONSULTA = 32
+
+# Candidatos da matriz podada que têm o cosseno exato calculado
+CANDIDATOS = 50
+
+# Pareceres semelhantes devolvidos por consulta
+QUANTIDADE_SEMELHANTES = 5
+
+# Pareceres processados por vez na montagem da matriz (limita a memória)
+BLOCO_PARECERES = 5000
+
+# Contagens gravadas em 16 bits
+MAXIMO_FREQUENCIA = 2**16 - 1
+
+
+def texto_do_resultado(resultado):
+    """Texto do campo `resultado` de um parecer (texto livre ou JSON estruturado)"""
+    if isinstance(resultado, dict):
+        return json.dumps(resultado, ensure_ascii=False)
+    return str(resultado or '')
+
+
+@lru_cache(maxsize=RADICAIS_EM_CACHE)
+def identificador_termo(palavra):
+    """CRC32 do radical de uma palavra já sem acento (None se não for termo)"""
+    if len(palavra) < TAMANHO_MINIMO_TERMO or palavra in STOPWORDS or palavra.isdigit():
+        return None
+    return zlib.crc32(radical(palavra).encode('utf-8'))
+
+
+def vetor_termos(texto):
+    """Contagem dos termos do texto, em bytes para gravar no índice
+
+    Os termos são os radicais das palavras (sem stopwords, números e
+    palavras curtas), identificados pelo CRC32; o vetor é o array ordenado
+    de identificadores (uint32) seguido do array das contagens (uint16).
+    """
+    # Conta as palavras e depois soma as de mesmo termo (o termo de cada
+    # palavra fica guardado: o vocabulário se repete entre os pareceres)
+    contagem = {}
+    for palavra, quantidade in Counter(palavras(texto or '')).items():
+        termo = identificador_termo(palavra)
+        if termo is not None:
+            contagem[termo] = contagem.get(termo, 0) + quantidade
+    termos = np.array(sorted(contagem), dtype=np.uint32)
+    frequencias = np.minimum([contagem[t] for t in termos.tolist()], MAXIMO_FREQUENCIA).astype(np.uint16)
+    return termos.tobytes() + frequencias.tobytes()
+
+
+def decodificar_vetor(vetor):
+    """Retorna (termos, frequências) de um vetor gravado por vetor_termos"""
+    quantidade = len(vetor) // 6
+    termos = np.frombuffer(vetor, dtype=np.uint32, count=quantidade)
+    frequencias = np.frombuffer(vetor, dtype=np.uint16, count=quantidade, offset=4 * quantidade)
+    return termos, frequencias
+
+
+def _blocos(linhas, tamanho=BLOCO_PARECERES):
+    """Agrupa (arquivo, processo, vetor) em blocos de `tamanho` pareceres
+
+    Gera (arquivos, processos, termos, frequências, quantidades), com os
+    termos e as frequências dos pareceres do bloco concatenados e a
+    quantidade de termos de cada um.
+    """
+    arquivos, processos, vetores = [], [], []
+    for arquivo, processo, vetor in linhas:
+        arquivos.append(arquivo)
+        processos.append(processo)
+        vetores.append(decodificar_vetor(vetor))
+        if len(arquivos) == tamanho:
+            yield _juntar(arquivos, processos, vetores)
+            arquivos, processos, vetores = [], [], []
+    if arquivos:
+        yield _juntar(arquivos, processos, vetores)
+
+
+def _juntar(arquivos, processos, vetores):
+    """Concatena os vetores de um bloco (ver _blocos)"""
+    quantidades = np.array([len(termos) for termos, _ in vetores], dtype=np.int64)
+    termos = np.concatenate([termos for termos, _ in vetores]) if vetores else np.empty(0, np.uint32)
+    frequencias = np.concatenate([freq for _, freq in vetores]) if vetores else np.empty(0, np.uint16)
+    return arquivos, processos, termos, frequencias, quantidades
+
+
+def _intervalos(comecos, quantidades):
+    """Concatena os intervalos [começo, começo + quantidade) em um array de posições"""
+    deslocamentos = np.repeat(comecos - np.cumsum(quantidades) + quantidades, quantidades)
+    return deslocamentos + np.arange(quantidades.sum())
+
+
+class MatrizTfIdf:
+    """Matriz TF-IDF esparsa dos pareceres, com consulta dos mais semelhantes
+
+    Imutável depois de montada: uma nova versão do acervo monta outra
+    matriz, e quem usa a anterior continua com ela.
+    """
+
+    def __init__(self, percorrer, ler_vetores, termos_por_parecer=TERMOS_POR_PARECER):
+        """Monta a matriz
+
+        `percorrer` é uma função que gera (arquivo, processo normalizado,
+        vetor de vetor_termos) de cada parecer, como
+        IndicePareceres.percorrer_termos; é chamada duas vezes (frequência
+        dos termos no acervo e pesos), para que os vetores não precisem
+        ficar todos na memória. `ler_vetores` recebe uma lista de arquivos e
+        retorna {arquivo: vetor}, como IndicePareceres.vetores_termos; é
+        usada nas consultas.
+        """
+        self.ler_vetores = ler_vetores
+        self.termos_por_parecer = termos_por_parecer
+
+        # 1ª passagem: em quantos pareceres aparece cada termo
+        vocabulario, documentos = np.empty(0, np.uint32), np.empty(0, np.int64)
+        total = 0
+        for _, _, termos, _, quantidades in _blocos(percorrer()):
+            total += len(quantidades)
+            vocabulario = np.concatenate([vocabulario, termos])
+            documentos = np.concatenate([documentos, np.ones(len(termos), np.int64)])
+            vocabulario, inverso = np.unique(vocabulario, return_inverse=True)
+            documentos = np.bincount(inverso, weights=documentos, minlength=len(vocabulario)).astype(np.int64)
+
+        self.vocabulario = vocabulario
+        self.idf = (np.log((1 + total) / (1 + documentos)) + 1).astype(np.float32)
+
+        # 2ª passagem: pesos normalizados, podados aos termos de maior peso
+        self.arquivos, self.processos = [], []
+        linhas, colunas, pesos, normas = [], [], [], []
+        for arquivos, processos, termos, frequencias, quantidades in _blocos(percorrer()):
+            inicio = len(self.arquivos)
+            self.arquivos += arquivos
+            self.processos += processos
+
+            linha = np.repeat(np.arange(len(arquivos)), quantidades)
+            linha, coluna, peso, norma = self._pesos(termos, frequencias, linha, len(arquivos))
+            normas.append(norma)
+
+            # Cada linha em ordem decrescente de peso; fica com as primeiras
+            if termos_por_parecer is not None:
+                ordem = np.lexsort((-peso, linha))
+                linha, coluna, peso = linha[ordem], coluna[ordem], peso[ordem]
+                comecos = np.concatenate([[0], np.cumsum(quantidades)[:-1]])
+                manter = np.arange(len(linha)) - np.repeat(comecos, quantidades) < termos_por_parecer
+                linha, coluna, peso = linha[manter], coluna[manter], peso[manter]
+
+            linhas.append(linha + inicio)
+            colunas.append(coluna)
+            pesos.append(peso)
+
+        linhas = np.concatenate(linhas) if linhas else np.empty(0, np.int64)
+        colunas = np.concatenate(colunas) if colunas else np.empty(0, np.int64)
+        pesos = np.concatenate(pesos) if pesos else np.empty(0, np.float32)
+
+        # Norma do vetor completo de cada parecer (para o cosseno exato)
+        self.normas = np.concatenate(normas).astype(np.float32) if normas else np.empty(0, np.float32)
+
+        # Por coluna (CSC): os pareceres de cada termo, com o peso
+        ordem = np.argsort(colunas, kind='stable')
+        self.inicio_colunas = np.concatenate([[0], np.cumsum(np.bincount(colunas, minlength=len(vocabulario)))])
+        self.linhas_coluna = linhas[ordem].astype(np.int32)
+        self.pesos_coluna = pesos[ordem].astype(np.float32)
+
+        self.posicoes = {arquivo: posicao for posicao, arquivo in enumerate(self.arquivos)}
+        self.versoes = {}
+        for posicao, processo in enumerate(self.processos):
+            if processo is not None:
+                self.versoes.setdefault(processo, []).append(posicao)
+
+    @classmethod
+    def do_indice(cls, indice, termos_por_parecer=TERMOS_POR_PARECER):
+        """Monta a matriz dos pareceres válidos de um IndicePareceres"""
+        return cls(indice.percorrer_termos, indice.vetores_termos, termos_por_parecer)
+
+    def __len__(self):
+        return len(self.arquivos)
+
+    @property
+    def tamanho_bytes(self):
+        """Memória ocupada pelos arrays da matriz"""
+        return sum(array.nbytes for array in (
+            self.vocabulario, self.idf, self.normas, self.inicio_colunas, self.linhas_coluna, self.pesos_coluna,
+        ))
+
+    def _pesos(self, termos, frequencias, linha, quantidade):
+        """Pesos TF-IDF (linhas de norma 1) de vetores concatenados
+
+        `linha` diz a que vetor (de 0 a `quantidade` - 1) pertence cada termo;
+        termos fora do vocabulário da matriz ficam de fora. Retorna (linhas,
+        colunas, pesos) dos termos e a norma de cada vetor antes da divisão.
+        """
+        coluna = np.minimum(np.searchsorted(self.vocabulario, termos), max(0, len(self.vocabulario) - 1))
+        conhecido = self.vocabulario[coluna] == termos if len(self.vocabulario) else np.zeros(len(termos), bool)
+        coluna, linha = coluna[conhecido], linha[conhecido]
+
+        peso = (1 + np.log(frequencias[conhecido].astype(np.float32))) * self.idf[coluna]
+        normas = np.sqrt(np.bincount(linha, weights=peso.astype(np.float64) ** 2, minlength=quantidade))
+        return linha, coluna, (peso / normas[linha]).astype(np.float32), normas
+
+    def pontuacoes(self, colunas, pesos):
+        """Produto do vetor (colunas, pesos) com cada linha da matriz (array)
+
+        Percorre só as listas por coluna dos termos do vetor e soma as
+        contribuições com bincount. Com a matriz podada, é uma estimativa
+        por baixo do cosseno.
+        """
+        comecos = self.inicio_colunas[colunas]
+        quantidades = self.inicio_colunas[colunas + 1] - comecos
+        posicoes = _intervalos(comecos, quantidades)
+
+        return np.bincount(
+            self.linhas_coluna[posicoes],
+            weights=self.pesos_coluna[posicoes] * np.repeat(pesos, quantidades),
+            minlength=len(self.arquivos),
+        )
+
+    def semelhantes(self, arquivo, quantidade=QUANTIDADE_SEMELHANTES, **opcoes):
+        """Retorna [(arquivo, semelhança)] dos pareceres mais semelhantes a um parecer
+
+        Ver semelhantes_de.
+        """
+        return self.semelhantes_de([arquivo], quantidade, **opcoes).get(arquivo, [])
+
+    def semelhantes_de(self, arquivos, quantidade=QUANTIDADE_SEMELHANTES, outros_processos=True,
+                       candidatos=CANDIDATOS, termos_consulta=TERMOS_CONSULTA):
+        """Retorna {arquivo: [(arquivo, semelhança)]} dos mais semelhantes a cada parecer
+
+        Para cada parecer, os `candidatos` de maior pontuação na matriz (com
+        os `termos_consulta` termos de maior peso do parecer; None: todos)
+        têm o cosseno calculado com os vetores completos, lidos do índice de
+        uma vez para todos os pareceres. Cada lista vem em ordem decrescente
+        de semelhança (de 0 a 1), com até `quantidade` pareceres, sem o
+        próprio e, com `outros_processos`, sem as outras versões do mesmo
+        processo; pareceres fora da matriz ficam de fora do resultado.
+        """
+        vetores = self.ler_vetores([a for a in arquivos if a in self.posicoes])
+
+        escolhidos, consultas = {}, {}
+        for arquivo, vetor in vetores.items():
+            termos, frequencias = decodificar_vetor(vetor)
+            _, colunas, pesos, _ = self._pesos(termos, frequencias, np.zeros(len(termos), np.int64), 1)
+
+            # Termos do parecer (identificadores, em ordem) e o peso de cada um
+            # vezes o idf, para o cosseno com os vetores lidos dos candidatos
+            consultas[arquivo] = (self.vocabulario[colunas], pesos * self.idf[colunas])
+
+            if termos_consulta is not None and len(colunas) > termos_consulta:
+                maiores = np.argpartition(-pesos, termos_consulta - 1)[:termos_consulta]
+                colunas, pesos = colunas[maiores], pesos[maiores]
+            pontuacoes = self.pontuacoes(colunas, pesos)
+
+            posicao = self.posicoes[arquivo]
+            pontuacoes[posicao] = 0
+            if outros_processos and self.processos[posicao] is not None:
+                pontuacoes[self.versoes[self.processos[posicao]]] = 0
+
+            linhas = np.flatnonzero(pontuacoes)
+            if candidatos is not None and len(linhas) > candidatos:
+                linhas = linhas[np.argpartition(-pontuacoes[linhas], candidatos - 1)[:candidatos]]
+            escolhidos[arquivo] = linhas.tolist()
+
+        # Cosseno exato com os vetores completos dos candidatos, lidos de uma
+        # vez; o peso de um termo do candidato é (1 + log tf) · idf / norma
+        todos = sorted({linha for linhas in escolhidos.values() for linha in linhas})
+        lidos = self.ler_vetores([self.arquivos[linha] for linha in todos])
+        nomes, _, termos_lidos, frequencias_lidas, quantidades = _juntar(
+            list(lidos), None, [decodificar_vetor(vetor) for vetor in lidos.values()]
+        )
+        numeros = {arquivo: numero for numero, arquivo in enumerate(nomes)}
+        comecos = np.cumsum(quantidades) - quantidades
+
+        resultado = {}
+        for arquivo, linhas in escolhidos.items():
+            termos_parecer, fatores = consultas[arquivo]
+            linhas = [linha for linha in linhas if self.arquivos[linha] in numeros]
+            lido = np.array([numeros[self.arquivos[linha]] for linha in linhas], dtype=np.int64)
+
+            posicoes = _intervalos(comecos[lido], quantidades[lido])
+            termos = termos_lidos[posicoes]
+            lugar = np.minimum(np.searchsorted(termos_parecer, termos), max(0, len(termos_parecer) - 1))
+            comum = termos_parecer[lugar] == termos if len(termos_parecer) else np.zeros(len(termos), bool)
+
+            produtos = np.bincount(
+                np.repeat(np.arange(len(lido)), quantidades[lido])[comum],
+                weights=(1 + np.log(frequencias_lidas[posicoes][comum].astype(np.float32))) * fatores[lugar[comum]],
+                minlength=len(lido),
+            )
+            semelhancas = produtos / np.maximum(self.normas[linhas], np.finfo(np.float32).tiny)
+
+            ordem = sorted(
+                (-semelhanca, self.arquivos[linha])
+                for linha, semelhanca in zip(linhas, semelhancas.tolist()) if semelhanca > 0
+            )
+            resultado[arquivo] = [(outro, min(1.0, -negativo)) for negativo, outro in ordem[:quantidade]]
+
+        return resultado
+
+
+def main():
+    """Lista os pareceres mais semelhantes a um parecer"""
+    # Importado aqui: o índice importa este módulo (pela ingestão dos termos)
+    from indice_pareceres import IndicePareceres
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pasta', nargs='?', default='pareceres', help='Pasta dos pareceres JSON')
+    parser.add_argument('arquivo', help='Parecer JSON de referência')
+    parser.add_argument('--quantidade', type=int, default=QUANTIDADE_SEMELHANTES, help='Pareceres listados')
+    args = parser.parse_args()
+
+    indice = IndicePareceres(args.pasta)
+    indice.sincronizar()
+    indice.sincronizar_termos()
+    matriz = MatrizTfIdf.do_indice(indice)
+
+    arquivo = next((a for a in matriz.arquivos if Path(a).name == Path(args.arquivo).name), None)
+    if arquivo is None:
+        print(f"Parecer não encontrado no índice: {args.arquivo}", file=sys.stderr)
+        return 1
+
+    semelhantes = matriz.semelhantes(arquivo, args.quantidade)
+    pareceres = {p['arquivo']: p for p in indice.consultar(arquivos=[outro for outro, _ in semelhantes])}
+    for outro, semelhanca in semelhantes:
+        parecer = pareceres.get(outro, {})
+        print(f"{semelhanca:6.1%}  {parecer.get('numero_processo', 'N/A'):<28} "
+              f"{parecer.get('classificacao', 'N/A'):<22} {Path(outro).name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())